@@ -1,15 +1,60 @@
 import json
 import os
+import threading
 import yaml
 from pathlib import Path
 from typing import Dict, Optional, List
 from utils.logger import logger
 class AgentRegistry:
-    def __init__(self, agents_dir: str, config_file: str = "agents_and_baskets.yaml"):
+    def __init__(
+        self,
+        agents_dir: str,
+        config_file: str = "agents_and_baskets.yaml",
+        lazy: bool = False,
+        baskets_file: Optional[str] = None
+    ):
+        """
+        Args:
+            agents_dir: Directory scanned for agent_spec.json files
+            config_file: Agent config file
+            lazy: Defer scanning until first access (or an explicit ensure_loaded())
+            baskets_file: Baskets YAML loaded together with the agent specs
+        """
         self.agents_dir = Path(agents_dir)
-        self.agents: Dict[str, Dict] = {}
-        self.baskets: List[Dict] = []
-        self.load_configs(config_file)
+        self.config_file = config_file
+        self.baskets_file = baskets_file
+        self._agents: Dict[str, Dict] = {}
+        self._baskets: List[Dict] = []
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        if not lazy:
+            self.ensure_loaded()
+
+    @property
+    def agents(self) -> Dict[str, Dict]:
+        self.ensure_loaded()
+        return self._agents
+
+    @property
+    def baskets(self) -> List[Dict]:
+        self.ensure_loaded()
+        return self._baskets
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def ensure_loaded(self) -> bool:
+        """Scan agent specs (and the baskets file) once; safe to call from several threads"""
+        if self._loaded:
+            return True
+        with self._load_lock:
+            if not self._loaded:
+                self.load_configs(self.config_file)
+                if self.baskets_file:
+                    self._load_baskets_file(self.baskets_file)
+                self._loaded = True
+        return True
 
     def load_configs(self, config_file: str):
         if not self.agents_dir.exists():
@@ -24,7 +69,7 @@ class AgentRegistry:
                         spec = json.load(f)
                         agent_name = spec.get("name")
                         if agent_name:
-                            self.agents[agent_name] = spec
+                            self._agents[agent_name] = spec
                             logger.debug(f"Loaded agent: {agent_name} from {spec_file}")
                         else:
                             logger.warning(f"No name in {spec_file}")
@@ -34,16 +79,21 @@ class AgentRegistry:
                 logger.warning(f"No agent_spec.json found in {root}")
 
     def load_baskets(self, config_file: str):
+        # Agent specs first so YAML agent entries keep overriding spec files
+        self.ensure_loaded()
+        self._load_baskets_file(config_file)
+
+    def _load_baskets_file(self, config_file: str):
         config_path = Path(config_file)
         if config_path.exists():
             try:
                 with config_path.open("r", encoding="utf-8") as f:
                     config = yaml.safe_load(f)
-                    self.baskets = config.get("baskets", [])
+                    self._baskets = config.get("baskets", [])
                     for agent_spec in config.get("agents", []):
                         agent_name = agent_spec.get("name")
                         if agent_name:
-                            self.agents[agent_name] = agent_spec
+                            self._agents[agent_name] = agent_spec
                     logger.debug(f"Loaded baskets from {config_file}")
             except Exception as e:
                 logger.error(f"Failed to load {config_file}: {e}")
@@ -1,20 +1,28 @@
 import redis
-import json
 import os
 from typing import Dict, Any, Optional
 from utils.logger import logger
 from database.mongo_db import MongoDBClient
+from utils.serialization import serializer
+from utils.tracing import tracer
+from utils.metrics import AGENT_EXECUTION_SECONDS
 from dotenv import load_dotenv
 
 load_dotenv()
 
 class AgentRunner:
-    def __init__(self, agent_name: str, stateful: bool = False):
+    def __init__(self, agent_name: str, stateful: bool = False, mongo_client: Optional[MongoDBClient] = None,
+                 redis_client: Optional[redis.Redis] = None):
         self.agent_name = agent_name
         self.stateful = stateful
-        self.mongo_client = MongoDBClient()
-        self.redis_client = None
+        # Clients passed in are shared (basket steps, CLI batches) and are not closed in close()
+        self._owns_mongo_client = mongo_client is None
+        self._owns_redis_client = redis_client is None
+        self.mongo_client = mongo_client or MongoDBClient()
+        self.redis_client = redis_client
         self.memory_fallback = {}
+        if redis_client is not None:
+            return
         
         try:
             redis_host = os.getenv("REDIS_HOST", "localhost")
@@ -22,7 +30,7 @@ class AgentRunner:
             self.redis_client = redis.Redis(
                 host=redis_host,
                 port=redis_port,
-                decode_responses=True,
+                decode_responses=False,
                 socket_timeout=5
             )
             self.redis_client.ping()
@@ -33,7 +41,7 @@ class AgentRunner:
 
     def store_state(self, key: str, value: Any) -> bool:
         try:
-            state_data = json.dumps(value)
+            state_data = serializer.dumps(value)
             if self.redis_client:
                 self.redis_client.set(f"{self.agent_name}:{key}", state_data)
                 logger.debug(f"Stored state in Redis for {self.agent_name}: {key}")
@@ -55,7 +63,7 @@ class AgentRunner:
                 state_data = self.memory_fallback.get(f"{self.agent_name}:{key}")
             
             if state_data:
-                result = json.loads(state_data)
+                result = serializer.loads(state_data)
                 logger.debug(f"Retrieved state for {self.agent_name}: {key}")
                 self.mongo_client.store_log(self.agent_name, f"Retrieved state: {key}")
                 return result
@@ -67,29 +75,34 @@ class AgentRunner:
             return None
 
     async def run(self, agent_module, input_data: Dict) -> Dict:
-        try:
-            if self.stateful:
-                prev_state = self.retrieve_state("last_execution")
-                if prev_state:
-                    input_data["previous_state"] = prev_state
-                result = await agent_module.process(input_data)
-                self.store_state("last_execution", result)
-            else:
-                result = await agent_module.process(input_data)
-            
-            self.mongo_client.store_log(self.agent_name, f"Execution result: {result}")
-            return result
-        except Exception as e:
-            logger.error(f"Agent {self.agent_name} execution failed: {e}")
-            self.mongo_client.store_log(self.agent_name, f"Execution error: {str(e)}")
-            return {"error": str(e)}
+        with tracer.span("agent.run", agent=self.agent_name, stateful=self.stateful) as span, \
+                AGENT_EXECUTION_SECONDS.time(agent=self.agent_name) as timer:
+            try:
+                if self.stateful:
+                    prev_state = self.retrieve_state("last_execution")
+                    if prev_state:
+                        input_data["previous_state"] = prev_state
+                    result = await agent_module.process(input_data)
+                    self.store_state("last_execution", result)
+                else:
+                    result = await agent_module.process(input_data)
+                
+                self.mongo_client.store_log(self.agent_name, "Execution result", payload=result)
+                timer.labels["outcome"] = "error" if isinstance(result, dict) and "error" in result else "success"
+                return result
+            except Exception as e:
+                logger.error(f"Agent {self.agent_name} execution failed: {e}")
+                span.set_error(e)
+                timer.labels["outcome"] = "exception"
+                self.mongo_client.store_log(self.agent_name, f"Execution error: {str(e)}")
+                return {"error": str(e)}
 
     def close(self):
-        if self.redis_client:
+        if self.redis_client and self._owns_redis_client:
             try:
                 self.redis_client.close()
                 logger.debug(f"Closed Redis connection for {self.agent_name}")
             except Exception as e:
                 logger.error(f"Error closing Redis for {self.agent_name}: {e}")
-        if self.mongo_client:
+        if self.mongo_client and self._owns_mongo_client:
             self.mongo_client.close()
\ No newline at end of file
@@ -1,3 +1,4 @@
+import copy
 import json
 import importlib
 from typing import Dict, Optional
@@ -6,19 +7,22 @@ from agents.agent_runner import AgentRunner
 from communication.event_bus import EventBus
 from database.mongo_db import MongoDBClient
 from utils.redis_service import RedisService
+from baskets.checkpoint_store import CheckpointStore, step_field
+from baskets.pacing import PacingPolicy
+from utils.tracing import tracer
 import asyncio
-from utils.logger import get_logger, get_execution_logger
+from utils.logger import get_logger, get_execution_logger, get_basket_run_logger
 
 logger = get_logger(__name__)
 execution_logger = get_execution_logger()
 import traceback
 from datetime import datetime, timezone
-import logging
 from pathlib import Path
 
 class AgentBasket:
-    def __init__(self, basket_spec: Dict, registry: AgentRegistry, event_bus: EventBus, redis_service: Optional[RedisService] = None, mongo_client: Optional[MongoDBClient] = None):
-        # Use provided mongo_client or create new one
+    def __init__(self, basket_spec: Dict, registry: AgentRegistry, event_bus: EventBus, redis_service: Optional[RedisService] = None, mongo_client: Optional[MongoDBClient] = None, execution_id: Optional[str] = None, checkpoint_store: Optional[CheckpointStore] = None):
+        # Use provided mongo_client or create new one (only an owned client is closed in close())
+        self._owns_mongo_client = mongo_client is None
         self.mongo_client = mongo_client or MongoDBClient()
         if self.mongo_client and self.mongo_client.db is None:
             logger.warning("MongoDB connection not available - logs will be console/file only")
@@ -32,9 +36,15 @@ class AgentBasket:
         self.description = basket_spec.get("description", "")
         self.registry = registry
         self.event_bus = event_bus
+        self.basket_spec = basket_spec
 
-        # Generate execution ID for this basket run
-        self.execution_id = self.redis_service.generate_execution_id()
+        # Generate execution ID for this basket run (a resumed run keeps its original ID)
+        self.execution_id = execution_id or self.redis_service.generate_execution_id()
+
+        # Step checkpoints so a failed run can resume without redoing finished steps
+        self.checkpoint_store = checkpoint_store or CheckpointStore(self.redis_service)
+        self.restored_steps = []
+        self._current_step = None
 
         if not self.agents:
             logger.error("No agents specified in basket")
@@ -43,6 +53,9 @@ class AgentBasket:
             logger.error(f"Invalid execution strategy: {self.strategy}")
             raise ValueError(f"Invalid execution strategy: {self.strategy}")
 
+        # Optional pacing against a downstream ("pacing" in the basket spec; none by default)
+        self.pacing = PacingPolicy(basket_spec.get("pacing"))
+
         # Setup individual basket log file
         self.basket_logger = self._setup_basket_logger()
 
@@ -61,47 +74,19 @@ class AgentBasket:
         # Log initialization to basket-specific log
         self.basket_logger.info(f"BASKET_INITIALIZED - {self.name} - {self.execution_id} - Agents: {self.agents} - Strategy: {self.strategy}")
 
-    def _setup_basket_logger(self):
-        """Setup individual logger for this basket execution"""
-        try:
-            # Create logs/basket_runs directory if it doesn't exist
-            log_dir = Path("logs/basket_runs")
-            log_dir.mkdir(parents=True, exist_ok=True)
-
-            # Create unique log file for this basket execution
-            log_filename = f"{self.name}_{self.execution_id}.log"
-            log_file_path = log_dir / log_filename
-
-            # Create logger for this specific basket
-            basket_logger = logging.getLogger(f"basket_{self.execution_id}")
-            basket_logger.setLevel(logging.INFO)
-            basket_logger.propagate = False  # Don't propagate to root logger
-
-            # Remove any existing handlers to avoid duplicates
-            for handler in basket_logger.handlers[:]:
-                basket_logger.removeHandler(handler)
-
-            # Create file handler for this basket
-            file_handler = logging.FileHandler(log_file_path, mode='w')
-            file_handler.setLevel(logging.INFO)
-
-            # Create formatter
-            formatter = logging.Formatter(
-                '%(asctime)s - %(levelname)s - %(message)s',
-                datefmt='%Y-%m-%d %H:%M:%S'
-            )
-            file_handler.setFormatter(formatter)
+    def _step_redis_client(self):
+        """RedisService's connection, shared with step runners so each step doesn't open its own"""
+        if getattr(self.redis_service, "connected", False) is True:
+            return getattr(self.redis_service, "client", None)
+        return None
 
-            # Add handler to logger
-            basket_logger.addHandler(file_handler)
-
-            logger.info(f"Created individual log file for basket: {log_file_path}")
-            return basket_logger
+    def _setup_basket_logger(self):
+        """Get the basket run logger for this execution
 
-        except Exception as e:
-            logger.warning(f"Failed to create individual basket log file: {e}")
-            # Return a dummy logger that doesn't write to file
-            return logging.getLogger(f"basket_dummy_{self.execution_id}")
+        All runs share one queue-backed rotating sink (logs/basket_runs/basket_runs.log);
+        execution_id and basket_name are attached to each record as context fields.
+        """
+        return get_basket_run_logger(self.execution_id, self.name)
 
     async def execute(self, input_data: Dict) -> Dict:
         """Execute the basket with comprehensive logging and error handling"""
@@ -132,22 +117,27 @@ class AgentBasket:
             )
 
         try:
+            self.checkpoint_store.save_run(self.execution_id, self.basket_spec, input_data, "running")
+
             # Log detailed execution start
             execution_logger.info(f"BASKET_EXECUTION_START - {self.name} - {self.execution_id} - Input: {json.dumps(input_data)}")
             self.basket_logger.info(f"BASKET_EXECUTION_START - Input: {json.dumps(input_data)}")
 
             # Execute based on strategy
-            if self.strategy == "sequential":
-                result = await self._execute_sequential(input_data)
-            elif self.strategy == "parallel":
-                result = await self._execute_parallel(input_data)
-            else:
-                raise ValueError(f"Unknown execution strategy: {self.strategy}")
+            with tracer.span("basket.execute", basket=self.name, execution_id=self.execution_id, steps=len(self.agents)):
+                if self.strategy == "sequential":
+                    result = await self._execute_sequential(input_data)
+                elif self.strategy == "parallel":
+                    result = await self._execute_parallel(input_data)
+                else:
+                    raise ValueError(f"Unknown execution strategy: {self.strategy}")
 
             # Log successful completion
             end_time = datetime.now(timezone.utc)
             duration = (end_time - start_time).total_seconds()
 
+            self.checkpoint_store.save_run(self.execution_id, self.basket_spec, input_data, "completed")
+
             # Update Redis status
             if self.redis_service and self.redis_service.is_connected():
                 self.redis_service.update_basket_status(self.name, self.execution_id, "completed", result)
@@ -159,7 +149,8 @@ class AgentBasket:
                         "basket_name": self.name,
                         "result": result,
                         "duration_seconds": duration,
-                        "end_time": end_time.isoformat()
+                        "end_time": end_time.isoformat(),
+                        "pacing": self.pacing.get_info()
                     }
                 )
 
@@ -190,6 +181,15 @@ class AgentBasket:
             if self.mongo_client and self.mongo_client.db is not None:
                 self.mongo_client.store_log("basket_manager", error_msg, error_details)
 
+            # Keep checkpoints so POST /resume-basket/{execution_id} restarts at the failed step
+            try:
+                self.checkpoint_store.save_run(
+                    self.execution_id, self.basket_spec, input_data, "failed",
+                    failed_step=self._current_step, error=error_msg
+                )
+            except Exception as checkpoint_error:
+                logger.error(f"Failed to checkpoint failed run {self.execution_id}: {checkpoint_error}")
+
             # Update Redis status
             if self.redis_service and self.redis_service.is_connected():
                 self.redis_service.update_basket_status(self.name, self.execution_id, "failed", error_details)
@@ -201,7 +201,7 @@ class AgentBasket:
                     "error"
                 )
 
-            return {"error": error_msg, "execution_id": self.execution_id}
+            return {"error": error_msg, "execution_id": self.execution_id, "failed_step": self._current_step, "resumable": True}
 
         finally:
             self.close()
@@ -209,137 +209,175 @@ class AgentBasket:
     async def _execute_sequential(self, input_data: Dict) -> Dict:
         """Execute agents sequentially with enhanced logging and Redis integration"""
         result = input_data
+        checkpoints = self.checkpoint_store.load(self.execution_id)
 
         for i, agent_name in enumerate(self.agents):
-            step_start_time = datetime.now(timezone.utc)
-            logger.info(f"Executing agent {i+1}/{len(self.agents)}: {agent_name}")
-            self.basket_logger.info(f"AGENT_START - {agent_name} - Step {i+1}/{len(self.agents)}")
+            self._current_step = i
 
-            # Log agent start
-            self.redis_service.store_execution_log(
-                self.execution_id,
-                agent_name,
-                "agent_start",
-                {"input_data": result, "step": i+1, "total_steps": len(self.agents)}
-            )
+            # Reuse the output of a step that already completed on this exact input
+            restored = self.checkpoint_store.match_step(checkpoints.get(step_field(i)), agent_name, result)
+            if restored is not None:
+                logger.info(f"Restored agent {i+1}/{len(self.agents)} from checkpoint: {agent_name}")
+                self.basket_logger.info(f"AGENT_RESTORED - {agent_name} - Step {i+1}/{len(self.agents)}")
+                self.redis_service.store_execution_log(
+                    self.execution_id,
+                    agent_name,
+                    "agent_restored",
+                    {"step": i+1, "total_steps": len(self.agents)}
+                )
+                self.restored_steps.append(i)
+                result = restored
+                continue
 
-            agent_spec = self.registry.get_agent(agent_name)
-            if not agent_spec:
-                error_msg = f"Agent {agent_name} not found"
-                logger.error(error_msg)
-                execution_logger.error(f"AGENT_NOT_FOUND - {agent_name} - {self.execution_id} - {error_msg}")
-                self.basket_logger.error(f"AGENT_NOT_FOUND - {agent_name} - {error_msg}")
+            with tracer.span("basket.step", agent=agent_name, step=i+1):
+                step_start_time = datetime.now(timezone.utc)
+                logger.info(f"Executing agent {i+1}/{len(self.agents)}: {agent_name}")
+                self.basket_logger.info(f"AGENT_START - {agent_name} - Step {i+1}/{len(self.agents)}")
 
-                if self.mongo_client and self.mongo_client.db is not None:
-                    self.mongo_client.store_log("basket_manager", error_msg, {"agent": agent_name, "execution_id": self.execution_id})
+                # Log agent start
+                self.redis_service.store_execution_log(
+                    self.execution_id,
+                    agent_name,
+                    "agent_start",
+                    {"input_data": result, "step": i+1, "total_steps": len(self.agents)}
+                )
 
-                if self.redis_service and self.redis_service.is_connected():
-                    self.redis_service.store_execution_log(
-                        self.execution_id, agent_name, "agent_error",
-                        {"error": error_msg}, "error"
+                agent_spec = self.registry.get_agent(agent_name)
+                if not agent_spec:
+                    error_msg = f"Agent {agent_name} not found"
+                    logger.error(error_msg)
+                    execution_logger.error(f"AGENT_NOT_FOUND - {agent_name} - {self.execution_id} - {error_msg}")
+                    self.basket_logger.error(f"AGENT_NOT_FOUND - {agent_name} - {error_msg}")
+
+                    if self.mongo_client and self.mongo_client.db is not None:
+                        self.mongo_client.store_log("basket_manager", error_msg, {"agent": agent_name, "execution_id": self.execution_id})
+
+                    if self.redis_service and self.redis_service.is_connected():
+                        self.redis_service.store_execution_log(
+                            self.execution_id, agent_name, "agent_error",
+                            {"error": error_msg}, "error"
+                        )
+
+                    raise ValueError(error_msg)
+
+                try:
+                    # Import and run agent
+                    module_path = agent_spec.get("module_path", f"agents.{agent_name}.{agent_name}")
+                    agent_module = importlib.import_module(module_path)
+                    runner = AgentRunner(
+                        agent_name,
+                        stateful=agent_spec.get("capabilities", {}).get("memory_access", False),
+                        mongo_client=self.mongo_client,
+                        redis_client=self._step_redis_client()
                     )
 
-                raise ValueError(error_msg)
+                    # Debug: Log the actual input data being validated
+                    logger.info(f"Validating {agent_name} with input data: {result}")
 
-            try:
-                # Import and run agent
-                module_path = agent_spec.get("module_path", f"agents.{agent_name}.{agent_name}")
-                agent_module = importlib.import_module(module_path)
-                runner = AgentRunner(agent_name, stateful=agent_spec.get("capabilities", {}).get("memory_access", False))
+                    # Validate input compatibility
+                    if not self.registry.validate_compatibility(agent_name, result):
+                        error_msg = f"Input incompatible for {agent_name}"
+                        logger.error(error_msg)
+                        execution_logger.error(f"AGENT_COMPATIBILITY_ERROR - {agent_name} - {self.execution_id} - {error_msg}")
+                        self.basket_logger.error(f"AGENT_COMPATIBILITY_ERROR - {agent_name} - {error_msg} - Input: {json.dumps(result)}")
 
-                # Debug: Log the actual input data being validated
-                logger.info(f"Validating {agent_name} with input data: {result}")
+                        if self.redis_service and self.redis_service.is_connected():
+                            self.redis_service.store_execution_log(
+                                self.execution_id, agent_name, "compatibility_error",
+                                {"error": error_msg, "input": result}, "error"
+                            )
 
-                # Validate input compatibility
-                if not self.registry.validate_compatibility(agent_name, result):
-                    error_msg = f"Input incompatible for {agent_name}"
-                    logger.error(error_msg)
-                    execution_logger.error(f"AGENT_COMPATIBILITY_ERROR - {agent_name} - {self.execution_id} - {error_msg}")
-                    self.basket_logger.error(f"AGENT_COMPATIBILITY_ERROR - {agent_name} - {error_msg} - Input: {json.dumps(result)}")
+                        runner.close()
+                        raise ValueError(error_msg)
 
+                    # Store agent state before execution
                     if self.redis_service and self.redis_service.is_connected():
+                        self.redis_service.store_agent_state(agent_name, self.execution_id, {"status": "running", "input": result})
+
+                    # Execute agent
+                    execution_logger.info(f"AGENT_START - {agent_name} - {self.execution_id} - Input: {json.dumps(result)}")
+
+                    step_input = result
+                    # Agents may mutate their input; the checkpoint hashes it as it was before the call
+                    checkpoint_input = copy.deepcopy(result)
+                    retries = 0
+                    while True:
+                        await self.pacing.before_step()
+                        result = await runner.run(agent_module, step_input)
+                        backoff = self.pacing.record(result)
+                        if backoff is None or retries >= self.pacing.max_retries:
+                            break
+                        retries += 1
+                        self.pacing.stats["retries"] += 1
+                        self.basket_logger.warning(f"AGENT_RATE_LIMITED - {agent_name} - Retry {retries} in {backoff:.2f}s")
+                        await asyncio.sleep(backoff)
+                    runner.close()
+
+                    # Calculate execution time
+                    step_duration = (datetime.now(timezone.utc) - step_start_time).total_seconds()
+
+                    # Store agent output in Redis for potential use by other agents
+                    if self.redis_service and self.redis_service.is_connected():
+                        self.redis_service.store_agent_output(self.execution_id, agent_name, result)
+
+                        # Log successful agent completion
                         self.redis_service.store_execution_log(
-                            self.execution_id, agent_name, "compatibility_error",
-                            {"error": error_msg, "input": result}, "error"
+                            self.execution_id,
+                            agent_name,
+                            "agent_completed",
+                            {
+                                "output": result,
+                                "duration_seconds": step_duration,
+                                "step": i+1
+                            }
                         )
 
-                    runner.close()
-                    raise ValueError(error_msg)
+                    execution_logger.info(f"AGENT_COMPLETE - {agent_name} - {self.execution_id} - Duration: {step_duration:.2f}s - Output: {json.dumps(result)}")
+                    self.basket_logger.info(f"AGENT_COMPLETE - {agent_name} - Duration: {step_duration:.2f}s - Output: {json.dumps(result)}")
 
-                # Store agent state before execution
-                if self.redis_service and self.redis_service.is_connected():
-                    self.redis_service.store_agent_state(agent_name, self.execution_id, {"status": "running", "input": result})
+                    # Check for errors in result
+                    if "error" in result:
+                        error_msg = f"Agent {agent_name} returned error: {result['error']}"
+                        self.mongo_client.store_log("basket_manager", error_msg)
+                        logger.error(error_msg)
+                        self.basket_logger.error(f"AGENT_RESULT_ERROR - {agent_name} - Error: {result['error']}")
 
-                # Execute agent
-                execution_logger.info(f"AGENT_START - {agent_name} - {self.execution_id} - Input: {json.dumps(result)}")
+                        self.redis_service.store_execution_log(
+                            self.execution_id, agent_name, "agent_result_error",
+                            {"error": result['error']}, "error"
+                        )
+
+                        raise ValueError(error_msg)
 
-                result = await runner.run(agent_module, result)
-                runner.close()
+                    self.checkpoint_store.save_step(self.execution_id, i, agent_name, checkpoint_input, result)
 
-                # Calculate execution time
-                step_duration = (datetime.now(timezone.utc) - step_start_time).total_seconds()
+                    # Publish event for other systems
+                    await self.event_bus.publish(f"{agent_name}_output", result)
 
-                # Store agent output in Redis for potential use by other agents
-                if self.redis_service and self.redis_service.is_connected():
-                    self.redis_service.store_agent_output(self.execution_id, agent_name, result)
+                    logger.info(f"Agent {agent_name} completed successfully in {step_duration:.2f}s")
+
+                except Exception as e:
+                    error_msg = f"Error executing {agent_name}: {str(e)}"
+                    logger.error(error_msg)
+                    self.mongo_client.store_log("basket_manager", error_msg)
+                    self.basket_logger.error(f"AGENT_EXECUTION_ERROR - {agent_name} - Error: {error_msg}")
+                    self.basket_logger.error(f"AGENT_EXECUTION_ERROR - {agent_name} - Traceback: {traceback.format_exc()}")
 
-                    # Log successful agent completion
                     self.redis_service.store_execution_log(
                         self.execution_id,
                         agent_name,
-                        "agent_completed",
+                        "agent_execution_error",
                         {
-                            "output": result,
-                            "duration_seconds": step_duration,
+                            "error": error_msg,
+                            "traceback": traceback.format_exc(),
                             "step": i+1
-                        }
+                        },
+                        "error"
                     )
 
-                execution_logger.info(f"AGENT_COMPLETE - {agent_name} - {self.execution_id} - Duration: {step_duration:.2f}s - Output: {json.dumps(result)}")
-                self.basket_logger.info(f"AGENT_COMPLETE - {agent_name} - Duration: {step_duration:.2f}s - Output: {json.dumps(result)}")
+                    execution_logger.error(f"AGENT_ERROR - {agent_name} - {self.execution_id} - Error: {error_msg} - Traceback: {traceback.format_exc()}")
 
-                # Check for errors in result
-                if "error" in result:
-                    error_msg = f"Agent {agent_name} returned error: {result['error']}"
-                    self.mongo_client.store_log("basket_manager", error_msg)
-                    logger.error(error_msg)
-                    self.basket_logger.error(f"AGENT_RESULT_ERROR - {agent_name} - Error: {result['error']}")
-
-                    self.redis_service.store_execution_log(
-                        self.execution_id, agent_name, "agent_result_error",
-                        {"error": result['error']}, "error"
-                    )
-
-                    raise ValueError(error_msg)
-
-                # Publish event for other systems
-                await self.event_bus.publish(f"{agent_name}_output", result)
-                await asyncio.sleep(0.1)  # Small delay for event processing
-
-                logger.info(f"Agent {agent_name} completed successfully in {step_duration:.2f}s")
-
-            except Exception as e:
-                error_msg = f"Error executing {agent_name}: {str(e)}"
-                logger.error(error_msg)
-                self.mongo_client.store_log("basket_manager", error_msg)
-                self.basket_logger.error(f"AGENT_EXECUTION_ERROR - {agent_name} - Error: {error_msg}")
-                self.basket_logger.error(f"AGENT_EXECUTION_ERROR - {agent_name} - Traceback: {traceback.format_exc()}")
-
-                self.redis_service.store_execution_log(
-                    self.execution_id,
-                    agent_name,
-                    "agent_execution_error",
-                    {
-                        "error": error_msg,
-                        "traceback": traceback.format_exc(),
-                        "step": i+1
-                    },
-                    "error"
-                )
-
-                execution_logger.error(f"AGENT_ERROR - {agent_name} - {self.execution_id} - Error: {error_msg} - Traceback: {traceback.format_exc()}")
-
-                raise e
+                    raise e
 
         return result
 
@@ -351,21 +389,13 @@ class AgentBasket:
 
     def close(self):
         """Clean up resources"""
-        if hasattr(self, 'mongo_client') and self.mongo_client and self.mongo_client.client:
+        if getattr(self, '_owns_mongo_client', False) and self.mongo_client and self.mongo_client.client:
             logger.debug("Closing MongoDB client in AgentBasket")
             self.mongo_client.close()
 
-        # Close basket-specific logger
+        # Basket run logger shares a single sink, so there are no handlers to close here
         if hasattr(self, 'basket_logger'):
-            try:
-                self.basket_logger.info(f"BASKET_LOGGER_CLOSING - {self.name} - {self.execution_id}")
-                # Remove all handlers and close them
-                for handler in self.basket_logger.handlers[:]:
-                    handler.close()
-                    self.basket_logger.removeHandler(handler)
-                logger.debug(f"Closed basket logger for {self.name}")
-            except Exception as e:
-                logger.warning(f"Error closing basket logger: {e}")
+            self.basket_logger.info(f"BASKET_LOGGER_CLOSING - {self.name} - {self.execution_id}")
 
         # Note: Redis service is shared, so we don't close it here
         # It will be closed when the application shuts down
\ No newline at end of file
@@ -0,0 +1,222 @@
+"""
+BHIV Basket Checkpoints
+Persists each completed AgentBasket step so a failed run can resume from the first unfinished step
+- Keyed by execution_id and step index; stored in Redis, or in a local directory when Redis is down
+- A step is reused only if the same agent ran on byte-identical input (input hash), so resumes are idempotent
+- Only failed runs, or running ones whose checkpoints went stale (crashed worker), can be resumed
+"""
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+from utils.logger import get_logger
+from utils.redis_service import RedisService
+
+logger = get_logger(__name__)
+
+CHECKPOINT_CONFIG = {
+    "directory": os.getenv("BASKET_CHECKPOINT_DIR", "logs/checkpoints"),
+    "ttl_seconds": int(os.getenv("BASKET_CHECKPOINT_TTL_SECONDS", str(7 * 86400))),
+    "resume_lock_seconds": int(os.getenv("BASKET_RESUME_LOCK_SECONDS", "3600")),
+    # A "running" run with no checkpoint activity for this long is treated as crashed and may be resumed
+    "stale_run_seconds": int(os.getenv("BASKET_STALE_RUN_SECONDS", "3600"))
+}
+
+META_FIELD = "meta"
+
+
+def step_field(step_index: int) -> str:
+    return f"step:{step_index}"
+
+
+def input_hash(data: Any) -> str:
+    """Stable hash of a step's input (key order independent)"""
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class CheckpointStore:
+    """Run metadata and per-step outputs for basket executions"""
+
+    def __init__(
+        self,
+        redis_service: Optional[RedisService] = None,
+        directory: Optional[str] = None,
+        ttl_seconds: Optional[int] = None
+    ):
+        self.redis_service = redis_service
+        self.directory = Path(directory or CHECKPOINT_CONFIG["directory"])
+        self.ttl_seconds = ttl_seconds or CHECKPOINT_CONFIG["ttl_seconds"]
+        self._file_lock = threading.Lock()
+        self._owner = uuid.uuid4().hex
+
+    @property
+    def backend(self) -> str:
+        if self.redis_service is not None and self.redis_service.is_connected():
+            return "redis"
+        return "local"
+
+    # ------------------------------------------------------------------
+    # Local store: one JSON document per execution, replaced atomically
+    # ------------------------------------------------------------------
+
+    def _path(self, execution_id: str) -> Path:
+        safe_id = "".join(c for c in execution_id if c.isalnum() or c in "-_")
+        return self.directory / f"{safe_id}.json"
+
+    def _read_local(self, execution_id: str) -> Dict[str, Dict]:
+        path = self._path(execution_id)
+        if not path.exists():
+            return {}
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.error(f"Failed to read checkpoint file {path}: {e}")
+            return {}
+
+    def _write_local(self, execution_id: str, field: str, data: Dict):
+        with self._file_lock:
+            document = self._read_local(execution_id)
+            document[field] = data
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self._path(execution_id)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(document, default=str), encoding="utf-8")
+            os.replace(tmp, path)
+
+    # ------------------------------------------------------------------
+    # Fields
+    # ------------------------------------------------------------------
+
+    def _store(self, execution_id: str, field: str, data: Dict):
+        if self.backend == "redis" and self.redis_service.store_checkpoint(execution_id, field, data, self.ttl_seconds):
+            return
+        self._write_local(execution_id, field, data)
+
+    def load(self, execution_id: str) -> Dict[str, Dict]:
+        """All checkpoint fields of an execution (Redis first, then the local store)"""
+        fields = None
+        if self.backend == "redis":
+            fields = self.redis_service.get_checkpoints(execution_id)
+        if not isinstance(fields, dict) or not fields:
+            fields = self._read_local(execution_id)
+        return fields
+
+    def save_run(
+        self,
+        execution_id: str,
+        basket_spec: Dict,
+        input_data: Dict,
+        status: str,
+        failed_step: Optional[int] = None,
+        error: Optional[str] = None
+    ):
+        """Record what is needed to resume the run, plus its latest status"""
+        existing = self.load(execution_id).get(META_FIELD) or {}
+        meta = {
+            "execution_id": execution_id,
+            "basket_spec": basket_spec,
+            "input_data": input_data,
+            "status": status,
+            "failed_step": failed_step,
+            "error": error,
+            "created_at": existing.get("created_at") or datetime.now(timezone.utc).isoformat(),
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+            "attempts": existing.get("attempts", 0) + (1 if status == "running" else 0)
+        }
+        if status == "completed":
+            # Step outputs are only needed to resume; a completed run keeps its metadata
+            self.delete(execution_id)
+        self._store(execution_id, META_FIELD, meta)
+
+    def save_step(self, execution_id: str, step_index: int, agent_name: str, step_input: Dict, output: Dict):
+        """Checkpoint a successfully completed step"""
+        digest = input_hash(step_input)
+        self._store(execution_id, step_field(step_index), {
+            "step": step_index,
+            "agent_name": agent_name,
+            "input_hash": digest,
+            "output": output,
+            "completed_at": datetime.now(timezone.utc).isoformat()
+        })
+
+    @staticmethod
+    def match_step(checkpoint: Any, agent_name: str, step_input: Dict) -> Optional[Dict]:
+        """Checkpointed output if it was produced by this agent from this exact input"""
+        if not isinstance(checkpoint, dict):
+            return None
+        if checkpoint.get("agent_name") != agent_name or checkpoint.get("input_hash") != input_hash(step_input):
+            return None
+        output = checkpoint.get("output")
+        return output if isinstance(output, dict) else None
+
+    def get_run(self, execution_id: str) -> Optional[Dict]:
+        """Run metadata and a step summary, or None if the execution has no checkpoints"""
+        fields = self.load(execution_id)
+        meta = fields.get(META_FIELD)
+        if not meta:
+            return None
+        steps = sorted(
+            (value for field, value in fields.items() if field.startswith("step:")),
+            key=lambda s: s.get("step", 0)
+        )
+        return {
+            **meta,
+            "completed_steps": [
+                {"step": s.get("step"), "agent_name": s.get("agent_name"), "completed_at": s.get("completed_at")}
+                for s in steps
+            ]
+        }
+
+    @staticmethod
+    def resume_conflict(run: Dict, now: Optional[datetime] = None) -> Optional[str]:
+        """Why the run cannot be resumed, or None: only failed runs and stale running ones can"""
+        status = run.get("status")
+        if status == "failed":
+            return None
+        if status != "running":
+            return f"is {status}"
+        activity = [run.get("updated_at")] + [s.get("completed_at") for s in run.get("completed_steps", [])]
+        last_seen = max(datetime.fromisoformat(t) for t in activity if t)
+        idle = ((now or datetime.now(timezone.utc)) - last_seen).total_seconds()
+        if idle < CHECKPOINT_CONFIG["stale_run_seconds"]:
+            return f"is still running (last checkpoint {int(idle)}s ago)"
+        return None
+
+    def delete(self, execution_id: str):
+        if self.redis_service is not None:
+            self.redis_service.delete_checkpoints(execution_id)
+        with self._file_lock:
+            self._path(execution_id).unlink(missing_ok=True)
+
+    # ------------------------------------------------------------------
+    # Resume lock (one resume of an execution at a time)
+    # ------------------------------------------------------------------
+
+    def claim(self, execution_id: str) -> bool:
+        lock_key = f"checkpoint:{execution_id}:resume_lock"
+        if self.backend == "redis":
+            return self.redis_service.acquire_lock(lock_key, self._owner, CHECKPOINT_CONFIG["resume_lock_seconds"])
+        self.directory.mkdir(parents=True, exist_ok=True)
+        try:
+            fd = os.open(self._path(execution_id).with_suffix(".lock"), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, self._owner.encode())
+            os.close(fd)
+            return True
+        except FileExistsError:
+            return False
+
+    def release(self, execution_id: str):
+        if self.backend == "redis":
+            self.redis_service.release_lock(f"checkpoint:{execution_id}:resume_lock", self._owner)
+        lock_path = self._path(execution_id).with_suffix(".lock")
+        try:
+            if lock_path.read_text() == self._owner:
+                lock_path.unlink()
+        except FileNotFoundError:
+            pass
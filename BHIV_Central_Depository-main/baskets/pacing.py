@@ -0,0 +1,184 @@
+"""
+BHIV Basket Pacing
+Optional per-basket pacing of agent steps against a downstream service
+- none (default): steps run back to back
+- fixed: a fixed delay before each step
+- token_bucket: steps take tokens from a bucket shared by all baskets pacing the same downstream
+Adaptive: a 429 from the downstream backs off (halves the rate / doubles the delay) and retries
+the step; successes recover gradually toward the configured pace.
+"""
+
+import asyncio
+import os
+import re
+import time
+from typing import Any, Dict, Optional
+from middleware.rate_limiter import TokenBucket
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PACING_CONFIG = {
+    "mode": os.getenv("BASKET_PACING_MODE", "none"),  # none | fixed | token_bucket
+    "max_retries_on_429": int(os.getenv("BASKET_PACING_MAX_RETRIES", "2")),
+    "max_backoff_seconds": float(os.getenv("BASKET_PACING_MAX_BACKOFF_SECONDS", "30"))
+}
+
+PACING_MODES = ["none", "fixed", "token_bucket"]
+
+# Fraction of the configured rate recovered per successful step after a 429
+RECOVERY_STEP = 0.1
+MIN_RATE_FRACTION = 0.05
+
+# Error text that reports a 429: the reason phrase, or 429 right after a status/HTTP/code word.
+# A bare "429" is not enough; ids and record numbers contain it too
+RATE_LIMITED_TEXT = re.compile(r"too many requests|\b(?:status|http|code|error)\b[^0-9]{0,16}\b429\b", re.IGNORECASE)
+
+
+def is_rate_limited(outcome: Any) -> bool:
+    """Whether an agent result or exception reports a downstream 429"""
+    if isinstance(outcome, BaseException):
+        status = getattr(getattr(outcome, "response", None), "status_code", None) or getattr(outcome, "status_code", None)
+        return status == 429 or bool(RATE_LIMITED_TEXT.search(str(outcome)))
+    if isinstance(outcome, dict):
+        if outcome.get("status_code") == 429 or outcome.get("status") == 429:
+            return True
+        error = outcome.get("error")
+        return isinstance(error, str) and bool(RATE_LIMITED_TEXT.search(error))
+    return False
+
+
+def retry_after(outcome: Any) -> Optional[float]:
+    """Retry-After hint from a result dict or an HTTP error response, if any"""
+    value = None
+    if isinstance(outcome, dict):
+        value = outcome.get("retry_after")
+    elif isinstance(outcome, BaseException):
+        headers = getattr(getattr(outcome, "response", None), "headers", None) or {}
+        value = headers.get("Retry-After") if hasattr(headers, "get") else None
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class DownstreamBucket:
+    """Token bucket plus the adaptive rate for one downstream"""
+
+    def __init__(self, rate_per_sec: float, burst: float, clock=time.monotonic):
+        self.base_rate = rate_per_sec
+        self.rate = rate_per_sec
+        self.burst = burst
+        self.clock = clock
+        self.bucket = TokenBucket(burst, clock())
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Wait for a token; returns seconds waited"""
+        waited = 0.0
+        async with self.lock:
+            while True:
+                allowed, tokens = self.bucket.take(self.rate, self.burst, self.clock())
+                if allowed:
+                    return waited
+                delay = (1.0 - tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+
+# Shared across baskets in this process so concurrent runs respect one downstream budget
+_downstream_buckets: Dict[str, DownstreamBucket] = {}
+
+
+def get_downstream_bucket(name: str, rate_per_sec: float, burst: float) -> DownstreamBucket:
+    bucket = _downstream_buckets.get(name)
+    if bucket is None or bucket.base_rate != rate_per_sec or bucket.burst != burst:
+        bucket = DownstreamBucket(rate_per_sec, burst)
+        _downstream_buckets[name] = bucket
+    return bucket
+
+
+class PacingPolicy:
+    """Paces the steps of one basket run according to its spec"""
+
+    def __init__(self, spec: Optional[Dict[str, Any]] = None):
+        spec = dict(spec or {})
+        self.mode = spec.get("mode", PACING_CONFIG["mode"])
+        if self.mode not in PACING_MODES:
+            raise ValueError(f"Invalid pacing mode: {self.mode}. Valid: {PACING_MODES}")
+
+        self.adaptive = bool(spec.get("adaptive", True))
+        self.max_retries = int(spec.get("max_retries_on_429", PACING_CONFIG["max_retries_on_429"]))
+        self.max_backoff = float(spec.get("max_backoff_seconds", PACING_CONFIG["max_backoff_seconds"]))
+
+        self.base_delay = float(spec.get("delay_seconds", 0.0))
+        self.delay = self.base_delay
+        # Extra delay added by 429s in modes without a rate to cut
+        self.backoff = 0.0
+
+        self.bucket: Optional[DownstreamBucket] = None
+        if self.mode == "token_bucket":
+            rate = float(spec.get("rate_per_sec", 0))
+            if rate <= 0:
+                raise ValueError("token_bucket pacing requires rate_per_sec > 0")
+            burst = float(spec.get("burst", max(1.0, rate)))
+            self.bucket = get_downstream_bucket(spec.get("downstream", "default"), rate, burst)
+
+        self.stats = {"paced_seconds": 0.0, "rate_limited": 0, "retries": 0}
+
+    async def before_step(self):
+        """Wait as the policy requires before calling an agent"""
+        start = time.perf_counter()
+        if self.bucket is not None:
+            await self.bucket.acquire()
+        pause = self.delay + self.backoff
+        if pause > 0:
+            await asyncio.sleep(pause)
+        self.stats["paced_seconds"] += time.perf_counter() - start
+
+    def record(self, outcome: Any) -> Optional[float]:
+        """
+        Adapt to a step outcome
+
+        Returns:
+            Seconds to wait before retrying the step after a 429, or None if it should not be retried
+        """
+        if not is_rate_limited(outcome):
+            self._recover()
+            return None
+
+        self.stats["rate_limited"] += 1
+        if not self.adaptive:
+            return None
+
+        if self.bucket is not None:
+            self.bucket.rate = max(self.bucket.base_rate * MIN_RATE_FRACTION, self.bucket.rate / 2)
+            wait = 1.0 / self.bucket.rate
+        elif self.mode == "fixed":
+            self.delay = min(self.max_backoff, max(self.delay * 2, 0.1))
+            wait = self.delay
+        else:
+            self.backoff = min(self.max_backoff, max(self.backoff * 2, 0.5))
+            wait = self.backoff
+
+        hint = retry_after(outcome)
+        wait = min(self.max_backoff, max(wait, hint or 0.0))
+        logger.warning(f"Downstream rate limited basket step; backing off {wait:.2f}s (mode={self.mode})")
+        return wait
+
+    def _recover(self):
+        if self.bucket is not None and self.bucket.rate < self.bucket.base_rate:
+            self.bucket.rate = min(self.bucket.base_rate, self.bucket.rate + self.bucket.base_rate * RECOVERY_STEP)
+        if self.delay > self.base_delay:
+            self.delay = max(self.base_delay, self.delay / 2)
+        if self.backoff > 0:
+            self.backoff = self.backoff / 2 if self.backoff > 0.05 else 0.0
+
+    def get_info(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "adaptive": self.adaptive,
+            "delay_seconds": self.delay,
+            "rate_per_sec": self.bucket.rate if self.bucket is not None else None,
+            **self.stats
+        }
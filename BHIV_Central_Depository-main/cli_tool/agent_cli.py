@@ -1,18 +1,26 @@
 import argparse
 import json
 import asyncio
+import importlib
 import sys
 import os
+import time
 from pathlib import Path
+from typing import Dict, Iterator, Optional, Set, Tuple
 
 # Add parent directory to sys.path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from agents.agent_registry import AgentRegistry
+from agents.agent_runner import AgentRunner
 from baskets.basket_manager import AgentBasket
 from communication.event_bus import EventBus
+from database.mongo_db import MongoDBClient
+from utils.redis_service import RedisService
 from utils.logger import logger
 
+BUCKET_ROOT = Path(__file__).parent.parent
+
 async def execute_basket(spec_path: str):
     try:
         with open(spec_path, 'r') as f:
@@ -32,6 +40,193 @@ async def execute_basket(spec_path: str):
         logger.error(f"Basket execution failed: {e}")
         return {"error": f"Basket execution failed: {str(e)}"}
 
+def read_jobs(input_path: str) -> Iterator[Tuple[str, Dict]]:
+    """
+    (job_id, job) per non-empty JSONL line; unparseable lines yield a job with "_error"
+
+    Agent job:  {"id": "...", "agent": "cashflow_analyzer", "input": {...}, "stateful": false}
+    Basket job: {"id": "...", "basket": "test_cashflow", "input": {...}} or {"basket_spec": {...}, ...}
+    """
+    with open(input_path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                job = json.loads(line)
+                if not isinstance(job, dict):
+                    raise ValueError("job must be a JSON object")
+            except ValueError as e:
+                yield f"line:{line_number}", {"_error": f"Invalid job: {e}"}
+                continue
+            yield str(job.get("id") or f"line:{line_number}"), job
+
+def completed_job_ids(output_path: str) -> Set[str]:
+    """Ids already recorded as successful in an earlier run's output"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by an interrupted run
+            if record.get("status") == "success":
+                done.add(record.get("id"))
+    return done
+
+class BatchRunner:
+    """Runs JSONL agent/basket jobs in one process, sharing the registry, clients and agent modules"""
+
+    def __init__(
+        self,
+        registry: Optional[AgentRegistry] = None,
+        mongo_client: Optional[MongoDBClient] = None,
+        redis_service: Optional[RedisService] = None,
+        retries: int = 0
+    ):
+        self.registry = registry or AgentRegistry(str(BUCKET_ROOT / "agents"))
+        self.mongo_client = mongo_client or MongoDBClient()
+        self.redis_service = redis_service or RedisService()
+        self.event_bus = EventBus()
+        self.retries = retries
+        self.runners: Dict[Tuple[str, bool], AgentRunner] = {}
+        self.stats = {"success": 0, "error": 0, "skipped": 0}
+
+    def _runner(self, agent_name: str, stateful: bool) -> AgentRunner:
+        # One runner per agent keeps in-memory agent state across jobs when Redis is down
+        key = (agent_name, stateful)
+        if key not in self.runners:
+            redis_client = self.redis_service.client if self.redis_service.connected else None
+            self.runners[key] = AgentRunner(
+                agent_name, stateful=stateful, mongo_client=self.mongo_client, redis_client=redis_client
+            )
+        return self.runners[key]
+
+    async def run_agent(self, job: Dict) -> Dict:
+        agent_name = job["agent"]
+        input_data = job.get("input", {})
+        agent_spec = self.registry.get_agent(agent_name)
+        if not agent_spec:
+            return {"error": f"Agent {agent_name} not found"}
+        if not self.registry.validate_compatibility(agent_name, input_data):
+            return {"error": f"Input data incompatible with agent {agent_name}"}
+        agent_module = importlib.import_module(agent_spec.get("module_path", f"agents.{agent_name}.{agent_name}"))
+        return await self._runner(agent_name, bool(job.get("stateful", False))).run(agent_module, input_data)
+
+    async def run_basket(self, job: Dict) -> Dict:
+        basket_spec = job.get("basket_spec")
+        if basket_spec is None:
+            with open(BUCKET_ROOT / "baskets" / f"{job['basket']}.json", "r") as f:
+                basket_spec = json.load(f)
+        basket = AgentBasket(basket_spec, self.registry, self.event_bus, self.redis_service, self.mongo_client)
+        try:
+            return await basket.execute(job.get("input") or {"input": "start"})
+        finally:
+            basket.close()
+
+    async def run_job(self, job_id: str, job: Dict) -> Dict:
+        """Run one job (with retries) and return its output record"""
+        start = time.perf_counter()
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                if "_error" in job:
+                    result = {"error": job["_error"]}
+                elif "agent" in job:
+                    result = await self.run_agent(job)
+                elif "basket" in job or "basket_spec" in job:
+                    result = await self.run_basket(job)
+                else:
+                    result = {"error": "Job needs an agent, basket or basket_spec"}
+            except Exception as e:
+                result = {"error": str(e)}
+
+            failed = not isinstance(result, dict) or "error" in result
+            if not failed or attempts > self.retries or "_error" in job:
+                break
+            await asyncio.sleep(min(30, 2 ** (attempts - 1)))
+
+        record = {"id": job_id, "status": "error" if failed else "success", "attempts": attempts,
+                  "duration_ms": round((time.perf_counter() - start) * 1000, 2)}
+        if failed:
+            record["error"] = result.get("error") if isinstance(result, dict) else str(result)
+        else:
+            record["result"] = result
+        return record
+
+    async def run(self, input_path: str, output_path: str, concurrency: int = 4, resume: bool = False,
+                  progress_interval: float = 2.0) -> Dict:
+        """
+        Run every job in input_path with at most `concurrency` in flight, appending one record per
+        finished job to output_path. With resume, jobs already successful in output_path are skipped.
+        """
+        done = completed_job_ids(output_path) if resume else set()
+        total = sum(1 for _ in read_jobs(input_path))
+        queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+        started = time.perf_counter()
+
+        with open(output_path, "a" if resume else "w", encoding="utf-8") as out:
+            async def worker():
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        return
+                    record = await self.run_job(*item)
+                    self.stats[record["status"]] += 1
+                    # Stream each record as soon as its job finishes so an interrupted run can resume
+                    out.write(json.dumps(record, default=str) + "\n")
+                    out.flush()
+
+            def report_progress(final: bool = False):
+                finished = sum(self.stats.values())
+                elapsed = time.perf_counter() - started
+                rate = (finished - self.stats["skipped"]) / elapsed if elapsed else 0.0
+                print(
+                    f"[{finished}/{total}] success={self.stats['success']} error={self.stats['error']} "
+                    f"skipped={self.stats['skipped']} {rate:.1f} jobs/s" + (" done" if final else ""),
+                    file=sys.stderr, flush=True
+                )
+
+            async def progress():
+                while True:
+                    await asyncio.sleep(progress_interval)
+                    report_progress()
+
+            workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+            reporter = asyncio.create_task(progress()) if progress_interval > 0 else None
+            try:
+                for job_id, job in read_jobs(input_path):
+                    if job_id in done:
+                        self.stats["skipped"] += 1
+                        continue
+                    await queue.put((job_id, job))
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+            finally:
+                if reporter is not None:
+                    reporter.cancel()
+            report_progress(final=True)
+
+        return {"total": total, **self.stats, "elapsed_seconds": round(time.perf_counter() - started, 2)}
+
+    def close(self):
+        for runner in self.runners.values():
+            runner.close()
+        self.runners = {}
+        self.mongo_client.close()
+        self.redis_service.close()
+
+async def run_batch(args) -> Dict:
+    runner = BatchRunner(retries=args.retries)
+    try:
+        return await runner.run(args.input, args.output, args.concurrency, args.resume, args.progress_interval)
+    finally:
+        runner.close()
+
 def main():
     parser = argparse.ArgumentParser(description="Agent CLI Tool")
     subparsers = parser.add_subparsers(dest="command")
@@ -39,11 +234,23 @@ def main():
     execute_parser = subparsers.add_parser("execute-basket", help="Execute a basket of agents")
     execute_parser.add_argument("--spec", required=True, help="Path to basket specification JSON")
 
+    batch_parser = subparsers.add_parser("batch", help="Run agent/basket jobs from a JSONL file in one process")
+    batch_parser.add_argument("--input", required=True, help="JSONL file, one job per line")
+    batch_parser.add_argument("--output", required=True, help="JSONL file receiving one result per job")
+    batch_parser.add_argument("--concurrency", type=int, default=4, help="Jobs running at once")
+    batch_parser.add_argument("--retries", type=int, default=0, help="Retries per failed job")
+    batch_parser.add_argument("--resume", action="store_true", help="Skip jobs already successful in --output")
+    batch_parser.add_argument("--progress-interval", type=float, default=2.0, help="Seconds between progress lines (0 = off)")
+
     args = parser.parse_args()
 
     if args.command == "execute-basket":
         result = asyncio.run(execute_basket(args.spec))
         print(json.dumps(result, indent=2))
+    elif args.command == "batch":
+        summary = asyncio.run(run_batch(args))
+        print(json.dumps(summary, indent=2))
+        sys.exit(1 if summary["error"] else 0)
     else:
         parser.print_help()
 
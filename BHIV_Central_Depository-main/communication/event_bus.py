@@ -1,23 +1,272 @@
 import asyncio
-from typing import Callable, Dict, List
+import inspect
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
 from utils.logger import logger  # Centralized logger
+from utils.metrics import EVENT_BUS_LAG_SECONDS
+
+DEFAULT_QUEUE_SIZE = 1000
+# Subscribers keep the pre-fan-out delivery contract unless they opt in: no handler
+# timeout, and one message at a time in publish order
+DEFAULT_HANDLER_TIMEOUT: Optional[float] = None
+DEFAULT_CONCURRENCY = 1
+
+
+class Subscription:
+    """A subscriber callback with its own bounded queue, workers and metrics.
+
+    Each subscription is drained by its own worker task(s), so a slow or failing
+    subscriber never delays other subscribers of the same event. By default a
+    subscription has a single worker and sees messages in publish order;
+    concurrency > 1 opts into parallel (unordered) handling and timeout into
+    cancelling slow handlers.
+    """
+
+    def __init__(
+        self,
+        event_type: str,
+        callback: Callable,
+        name: Optional[str] = None,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        timeout: Optional[float] = DEFAULT_HANDLER_TIMEOUT,
+        ordered: bool = False,
+        concurrency: int = DEFAULT_CONCURRENCY
+    ):
+        self.event_type = event_type
+        self.callback = callback
+        self.name = name or getattr(callback, "__qualname__", repr(callback))
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.concurrency = 1 if ordered else max(1, concurrency)
+        self.ordered = self.concurrency == 1
+        self.queue: Optional[asyncio.Queue] = None
+        self.workers: List[asyncio.Task] = []
+        self._loop = None
+        self.stats = {
+            "delivered": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "dropped": 0,
+            "last_lag_ms": 0.0,
+            "max_lag_ms": 0.0,
+            "total_lag_ms": 0.0
+        }
+
+    def _ensure_started(self):
+        """Start workers on the running loop (lazily, and again if the loop changed)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self.workers:
+            return
+        if self.queue is not None:
+            # Messages queued on a previous (closed) loop can no longer be delivered
+            self.stats["dropped"] += self.queue.qsize()
+        self._loop = loop
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.workers = [loop.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    def enqueue(self, message: Dict, future: Optional[asyncio.Future] = None, published_at: Optional[float] = None) -> bool:
+        """Queue a message for delivery; returns False (and counts a drop) when full
+
+        published_at is a time.monotonic() value used for lag; defaults to now.
+        """
+        self._ensure_started()
+        try:
+            self.queue.put_nowait((message, published_at or time.monotonic(), future))
+            return True
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            logger.warning(f"Subscriber {self.name} queue full for event {self.event_type}, message dropped")
+            if future is not None and not future.done():
+                future.set_result("dropped")
+            return False
+
+    async def _worker(self):
+        while True:
+            message, published_at, future = await self.queue.get()
+            try:
+                outcome = await self._invoke(message, published_at)
+                if future is not None and not future.done():
+                    future.set_result(outcome)
+            finally:
+                self.queue.task_done()
+
+    async def _invoke(self, message: Dict, published_at: float) -> str:
+        lag_ms = (time.monotonic() - published_at) * 1000
+        self.stats["last_lag_ms"] = lag_ms
+        self.stats["max_lag_ms"] = max(self.stats["max_lag_ms"], lag_ms)
+        self.stats["total_lag_ms"] += lag_ms
+        EVENT_BUS_LAG_SECONDS.observe(lag_ms / 1000, event_type=self.event_type)
+
+        try:
+            result = self.callback(message)
+            if inspect.isawaitable(result):
+                await asyncio.wait_for(result, self.timeout)
+            self.stats["delivered"] += 1
+            return "delivered"
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            logger.error(f"Subscriber {self.name} timed out after {self.timeout}s for event {self.event_type}")
+            return "timeout"
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Error in callback {self.name} for event {self.event_type}: {e}")
+            return "error"
+
+    async def close(self):
+        for worker in self.workers:
+            worker.cancel()
+        for worker in self.workers:
+            try:
+                await worker
+            except (asyncio.CancelledError, RuntimeError):
+                pass
+        self.workers = []
+        if self.queue is not None:
+            # Release publishers still waiting on undelivered messages
+            while not self.queue.empty():
+                _, _, future = self.queue.get_nowait()
+                if future is not None and not future.done():
+                    future.set_result("dropped")
+                self.stats["dropped"] += 1
+
+    def get_metrics(self) -> Dict[str, Any]:
+        processed = self.stats["delivered"] + self.stats["errors"] + self.stats["timeouts"]
+        return {
+            "subscriber": self.name,
+            "event_type": self.event_type,
+            "mode": "ordered" if self.ordered else "concurrent",
+            "concurrency": self.concurrency,
+            "timeout_seconds": self.timeout,
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "queue_size": self.queue_size,
+            "delivered": self.stats["delivered"],
+            "errors": self.stats["errors"],
+            "timeouts": self.stats["timeouts"],
+            "dropped": self.stats["dropped"],
+            "last_lag_ms": round(self.stats["last_lag_ms"], 3),
+            "max_lag_ms": round(self.stats["max_lag_ms"], 3),
+            "avg_lag_ms": round(self.stats["total_lag_ms"] / processed, 3) if processed else 0.0
+        }
+
 
 class EventBus:
-    def __init__(self):
-        self.subscribers: Dict[str, List[Callable]] = {}
-
-    def subscribe(self, event_type: str, callback: Callable):
-        """Subscribe a callback to an event type."""
-        if event_type not in self.subscribers:
-            self.subscribers[event_type] = []
-        self.subscribers[event_type].append(callback)
-        logger.debug(f"Subscribed callback to event {event_type}")
-
-    async def publish(self, event_type: str, message: Dict):
-        """Publish an event to all subscribers."""
-        if event_type in self.subscribers:
-            for callback in self.subscribers[event_type]:
-                try:
-                    await callback(message)
-                except Exception as e:
-                    logger.error(f"Error in callback for event {event_type}: {e}")
\ No newline at end of file
+    def __init__(self, queue_size: int = DEFAULT_QUEUE_SIZE, timeout: Optional[float] = DEFAULT_HANDLER_TIMEOUT):
+        self.subscribers: Dict[str, List[Subscription]] = {}
+        self.queue_size = queue_size
+        self.timeout = timeout
+
+    def subscribe(
+        self,
+        event_type: str,
+        callback: Callable,
+        name: Optional[str] = None,
+        queue_size: Optional[int] = None,
+        timeout: Optional[float] = None,
+        ordered: bool = False,
+        concurrency: int = DEFAULT_CONCURRENCY
+    ) -> Subscription:
+        """Subscribe a callback (sync, async, or returning an awaitable) to an event type.
+
+        Messages are delivered one at a time in publish order unless concurrency > 1;
+        timeout (seconds) cancels a handler that runs longer; it defaults to the
+        bus-wide timeout, which is none unless the bus was built with one.
+        """
+        subscription = Subscription(
+            event_type,
+            callback,
+            name=name,
+            queue_size=queue_size or self.queue_size,
+            timeout=self.timeout if timeout is None else timeout,
+            ordered=ordered,
+            concurrency=concurrency
+        )
+        self.subscribers.setdefault(event_type, []).append(subscription)
+        logger.debug(f"Subscribed callback {subscription.name} to event {event_type}")
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a subscription; its workers stop on the next close()"""
+        subs = self.subscribers.get(subscription.event_type, [])
+        if subscription in subs:
+            subs.remove(subscription)
+
+    async def publish(self, event_type: str, message: Dict, wait: bool = True) -> Dict[str, int]:
+        """Publish an event to all subscribers concurrently.
+
+        wait=True returns once every subscriber has handled (or timed out on) the
+        message, so latency is the slowest handler rather than the sum of all.
+        wait=False is fire-and-forget. Handlers that publish to their own event
+        type should use wait=False.
+        """
+        if not wait:
+            return self.publish_nowait(event_type, message)
+
+        subs = self.subscribers.get(event_type)
+        if not subs:
+            return {"subscribers": 0}
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        for subscription in list(subs):
+            future = loop.create_future()
+            subscription.enqueue(message, future)
+            futures.append(future)
+
+        outcomes = await asyncio.gather(*futures)
+        summary = {"subscribers": len(futures)}
+        for outcome in outcomes:
+            summary[outcome] = summary.get(outcome, 0) + 1
+        return summary
+
+    def publish_nowait(self, event_type: str, message: Dict) -> Dict[str, int]:
+        """Fire-and-forget publish; must be called with a running event loop"""
+        subs = self.subscribers.get(event_type)
+        if not subs:
+            return {"subscribers": 0}
+
+        queued = sum(1 for subscription in list(subs) if subscription.enqueue(message))
+        return {"subscribers": len(subs), "queued": queued, "dropped": len(subs) - queued}
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Per-subscriber lag, drops, errors and queue depth"""
+        subscribers = [sub.get_metrics() for subs in self.subscribers.values() for sub in subs]
+        return {
+            "backend": "memory",
+            "event_types": len(self.subscribers),
+            "subscriber_count": len(subscribers),
+            "total_dropped": sum(s["dropped"] for s in subscribers),
+            "total_queue_depth": sum(s["queue_depth"] for s in subscribers),
+            "subscribers": subscribers
+        }
+
+    async def close(self):
+        """Stop all subscriber workers"""
+        for subs in self.subscribers.values():
+            for subscription in subs:
+                await subscription.close()
+
+
+def create_event_bus():
+    """Build the event bus selected by EVENT_BUS_CONFIG; falls back to in-process"""
+    from config.event_bus import EVENT_BUS_CONFIG
+
+    if EVENT_BUS_CONFIG["backend"] == "redis_streams":
+        try:
+            import redis.asyncio as aioredis
+            from communication.redis_stream_bus import RedisStreamEventBus
+
+            client = aioredis.Redis(
+                host=os.getenv("REDIS_HOST", "localhost"),
+                port=int(os.getenv("REDIS_PORT", 6379)),
+                password=os.getenv("REDIS_PASSWORD", None),
+                socket_connect_timeout=5,
+                # Blocking XREADGROUP calls must not hit the socket timeout
+                socket_timeout=EVENT_BUS_CONFIG["block_ms"] / 1000 + 5
+            )
+            logger.info("Event bus using Redis Streams transport")
+            return RedisStreamEventBus(client)
+        except Exception as e:
+            logger.warning(f"Redis Streams event bus unavailable, using in-process bus: {e}")
+
+    return EventBus()
@@ -0,0 +1,333 @@
+"""
+BHIV Redis Streams Event Bus
+Distributed event bus transport for multi-worker Bucket deployments
+- One stream per event type, trimmed by MAXLEN
+- One consumer group per subscriber name, so each logical subscriber sees an
+  event once across all workers (at-least-once delivery)
+- Entries are acknowledged after a successful handler run; failed or orphaned
+  entries are reclaimed from the pending list and retried up to max_deliveries
+"""
+
+import asyncio
+import os
+import socket
+import time
+from typing import Any, Callable, Dict, List, Optional
+from communication.event_bus import Subscription, DEFAULT_QUEUE_SIZE, DEFAULT_HANDLER_TIMEOUT, DEFAULT_CONCURRENCY
+from config.event_bus import EVENT_BUS_CONFIG
+from utils.logger import get_logger
+from utils.serialization import serializer
+
+logger = get_logger(__name__)
+
+
+class RedisStreamEventBus:
+    """EventBus-compatible transport backed by Redis Streams consumer groups"""
+
+    def __init__(
+        self,
+        client,
+        stream_prefix: str = None,
+        group_prefix: str = None,
+        maxlen: int = None,
+        approximate_trim: bool = True,
+        read_batch_size: int = None,
+        block_ms: int = None,
+        claim_idle_ms: int = None,
+        claim_interval_seconds: float = None,
+        max_deliveries: int = None,
+        consumer_name: Optional[str] = None,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        timeout: Optional[float] = DEFAULT_HANDLER_TIMEOUT
+    ):
+        self.client = client
+        self.stream_prefix = stream_prefix or EVENT_BUS_CONFIG["stream_prefix"]
+        self.group_prefix = group_prefix or EVENT_BUS_CONFIG["group_prefix"]
+        self.maxlen = maxlen or EVENT_BUS_CONFIG["stream_maxlen"]
+        self.approximate_trim = approximate_trim
+        self.read_batch_size = read_batch_size or EVENT_BUS_CONFIG["read_batch_size"]
+        self.block_ms = EVENT_BUS_CONFIG["block_ms"] if block_ms is None else block_ms
+        self.claim_idle_ms = EVENT_BUS_CONFIG["claim_idle_ms"] if claim_idle_ms is None else claim_idle_ms
+        self.claim_interval_seconds = (
+            EVENT_BUS_CONFIG["claim_interval_seconds"] if claim_interval_seconds is None else claim_interval_seconds
+        )
+        self.max_deliveries = max_deliveries or EVENT_BUS_CONFIG["max_deliveries"]
+        self.consumer_name = consumer_name or f"{socket.gethostname()}-{os.getpid()}"
+        self.queue_size = queue_size
+        self.timeout = timeout
+
+        self.subscribers: Dict[str, List[Subscription]] = {}
+        self._consumers: Dict[Subscription, asyncio.Task] = {}
+        self._groups_ready = set()
+        self._background: set = set()
+        self.stream_stats: Dict[Subscription, Dict[str, int]] = {}
+        self.published = 0
+        self.publish_errors = 0
+        self._closing = False
+
+    # ------------------------------------------------------------------
+    # Naming
+    # ------------------------------------------------------------------
+
+    def stream_key(self, event_type: str) -> str:
+        return f"{self.stream_prefix}:{event_type}"
+
+    def group_name(self, subscription: Subscription) -> str:
+        return f"{self.group_prefix}:{subscription.name}"
+
+    # ------------------------------------------------------------------
+    # Subscriptions
+    # ------------------------------------------------------------------
+
+    def subscribe(
+        self,
+        event_type: str,
+        callback: Callable,
+        name: Optional[str] = None,
+        queue_size: Optional[int] = None,
+        timeout: Optional[float] = None,
+        ordered: bool = False,
+        concurrency: int = DEFAULT_CONCURRENCY
+    ) -> Subscription:
+        """Subscribe a callback; the subscriber name identifies its consumer group.
+
+        Workers subscribing with the same name share the group and split the
+        stream, so use distinct names for subscribers that must each see every event.
+        """
+        subscription = Subscription(
+            event_type,
+            callback,
+            name=name,
+            queue_size=queue_size or self.queue_size,
+            timeout=self.timeout if timeout is None else timeout,
+            ordered=ordered,
+            concurrency=concurrency
+        )
+        self.subscribers.setdefault(event_type, []).append(subscription)
+        self.stream_stats[subscription] = {"acked": 0, "reclaimed": 0, "dead_lettered": 0}
+
+        try:
+            asyncio.get_running_loop()
+            self._consumers[subscription] = asyncio.create_task(self._consume(subscription))
+        except RuntimeError:
+            pass  # No loop yet; started by start() or the first publish
+
+        logger.debug(f"Subscribed {subscription.name} to stream {self.stream_key(event_type)}")
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subs = self.subscribers.get(subscription.event_type, [])
+        if subscription in subs:
+            subs.remove(subscription)
+        task = self._consumers.pop(subscription, None)
+        if task:
+            task.cancel()
+
+    async def start(self):
+        """Create consumer groups and start a consumer task per subscription"""
+        for subs in self.subscribers.values():
+            for subscription in subs:
+                await self._ensure_group(subscription)
+                task = self._consumers.get(subscription)
+                if task is None or task.done():
+                    self._consumers[subscription] = asyncio.create_task(self._consume(subscription))
+
+    async def _ensure_group(self, subscription: Subscription):
+        key = (subscription.event_type, subscription.name)
+        if key in self._groups_ready:
+            return
+        try:
+            # "$": a new subscriber starts with events published from now on
+            await self.client.xgroup_create(
+                self.stream_key(subscription.event_type), self.group_name(subscription), id="$", mkstream=True
+            )
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._groups_ready.add(key)
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+
+    async def publish(self, event_type: str, message: Dict, wait: bool = True) -> Dict[str, Any]:
+        """Append an event to its stream.
+
+        Delivery is asynchronous and at-least-once in every case; `wait` is
+        accepted for EventBus compatibility and only controls whether the
+        XADD itself is awaited.
+        """
+        if not wait:
+            return self.publish_nowait(event_type, message)
+
+        try:
+            # Local subscribers need their groups before the first XADD or they miss it
+            await self.start()
+            entry_id = await self.client.xadd(
+                self.stream_key(event_type),
+                {"data": serializer.dumps(message)},
+                maxlen=self.maxlen,
+                approximate=self.approximate_trim
+            )
+            self.published += 1
+            return {"queued": 1, "stream_id": entry_id.decode() if isinstance(entry_id, bytes) else entry_id}
+        except Exception as e:
+            self.publish_errors += 1
+            logger.error(f"Failed to publish event {event_type} to Redis stream: {e}")
+            return {"queued": 0, "error": str(e)}
+
+    def publish_nowait(self, event_type: str, message: Dict) -> Dict[str, Any]:
+        """Fire-and-forget publish; must be called with a running event loop"""
+        task = asyncio.get_running_loop().create_task(self.publish(event_type, message))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return {"queued": 1}
+
+    # ------------------------------------------------------------------
+    # Consuming
+    # ------------------------------------------------------------------
+
+    async def _consume(self, subscription: Subscription):
+        stream = self.stream_key(subscription.event_type)
+        group = self.group_name(subscription)
+        loop = asyncio.get_running_loop()
+        last_claim = 0.0
+
+        # The client may surface a cancellation as a connection error, so the
+        # loop also checks for close/unsubscribe instead of relying on cancel alone
+        while not self._closing and subscription in self._consumers:
+            try:
+                await self._ensure_group(subscription)
+
+                if loop.time() - last_claim >= self.claim_interval_seconds:
+                    await self._reclaim(subscription, stream, group)
+                    last_claim = loop.time()
+
+                response = await self.client.xreadgroup(
+                    group, self.consumer_name, {stream: ">"}, count=self.read_batch_size, block=self.block_ms
+                )
+                for _, entries in response or []:
+                    await self._dispatch(subscription, stream, group, entries)
+                if not response:
+                    # Yield even if the server returned before block_ms elapsed
+                    await asyncio.sleep(0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self._closing or subscription not in self._consumers:
+                    break
+                logger.error(f"Redis stream consumer {subscription.name} on {stream} failed: {e}")
+                await asyncio.sleep(1)
+
+    async def _dispatch(self, subscription: Subscription, stream: str, group: str, entries: List):
+        """Hand entries to the subscription and acknowledge the delivered ones"""
+        loop = asyncio.get_running_loop()
+        pending = []
+        unreadable = []
+
+        for entry_id, fields in entries:
+            try:
+                message = serializer.loads(fields[b"data"] if b"data" in fields else fields["data"])
+            except Exception as e:
+                # Trimmed or malformed entries can never succeed; acknowledge them
+                logger.error(f"Discarding unreadable stream entry {entry_id} on {stream}: {e}")
+                unreadable.append(entry_id)
+                continue
+
+            future = loop.create_future()
+            subscription.enqueue(message, future, published_at=self._published_at(entry_id))
+            pending.append((entry_id, future))
+
+        outcomes = await asyncio.gather(*(future for _, future in pending))
+        ack_ids = [entry_id for (entry_id, _), outcome in zip(pending, outcomes) if outcome == "delivered"]
+
+        if ack_ids:
+            await self.client.xack(stream, group, *ack_ids)
+            self.stream_stats[subscription]["acked"] += len(ack_ids)
+        if unreadable:
+            await self.client.xack(stream, group, *unreadable)
+            self.stream_stats[subscription]["dead_lettered"] += len(unreadable)
+
+    async def _reclaim(self, subscription: Subscription, stream: str, group: str):
+        """Claim entries left pending by failed handlers or dead workers"""
+        pending = await self.client.xpending_range(
+            stream, group, min="-", max="+", count=self.read_batch_size, idle=self.claim_idle_ms
+        )
+        if not pending:
+            return
+
+        exhausted = [p["message_id"] for p in pending if p["times_delivered"] >= self.max_deliveries]
+        retry = [p["message_id"] for p in pending if p["times_delivered"] < self.max_deliveries]
+
+        if exhausted:
+            await self.client.xack(stream, group, *exhausted)
+            self.stream_stats[subscription]["dead_lettered"] += len(exhausted)
+            logger.error(
+                f"Dropping {len(exhausted)} entries on {stream} for {subscription.name} "
+                f"after {self.max_deliveries} delivery attempts"
+            )
+
+        if retry:
+            claimed = await self.client.xclaim(
+                stream, group, self.consumer_name, min_idle_time=self.claim_idle_ms, message_ids=retry
+            )
+            self.stream_stats[subscription]["reclaimed"] += len(claimed)
+            await self._dispatch(subscription, stream, group, [(i, f or {}) for i, f in claimed])
+
+    @staticmethod
+    def _published_at(entry_id) -> float:
+        """Convert a stream entry id (milliseconds-sequence) into a monotonic timestamp"""
+        if isinstance(entry_id, bytes):
+            entry_id = entry_id.decode()
+        published_ms = int(entry_id.split("-")[0])
+        age = max(0.0, time.time() - published_ms / 1000)
+        return time.monotonic() - age
+
+    # ------------------------------------------------------------------
+    # Metrics and shutdown
+    # ------------------------------------------------------------------
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Per-subscriber lag, acks, reclaims and drops for this worker"""
+        subscribers = []
+        for subs in self.subscribers.values():
+            for subscription in subs:
+                metrics = subscription.get_metrics()
+                metrics.update(self.stream_stats[subscription])
+                metrics["stream"] = self.stream_key(subscription.event_type)
+                metrics["group"] = self.group_name(subscription)
+                subscribers.append(metrics)
+
+        return {
+            "backend": "redis_streams",
+            "consumer": self.consumer_name,
+            "event_types": len(self.subscribers),
+            "subscriber_count": len(subscribers),
+            "published": self.published,
+            "publish_errors": self.publish_errors,
+            "total_dropped": sum(s["dropped"] + s["dead_lettered"] for s in subscribers),
+            "total_queue_depth": sum(s["queue_depth"] for s in subscribers),
+            "subscribers": subscribers
+        }
+
+    async def close(self):
+        """Stop consumers, drain subscriptions and close the Redis client"""
+        self._closing = True
+        tasks = list(self._consumers.values()) + list(self._background)
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._consumers.clear()
+
+        for subs in self.subscribers.values():
+            for subscription in subs:
+                await subscription.close()
+
+        try:
+            await self.client.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing event bus Redis client: {e}")
@@ -0,0 +1,18 @@
+"""
+BHIV Bucket Event Bus Configuration
+Selects the event bus transport: in-process (default) or Redis Streams for multi-worker deployments
+"""
+
+import os
+
+EVENT_BUS_CONFIG = {
+    "backend": os.getenv("EVENT_BUS_BACKEND", "memory"),  # memory | redis_streams
+    "stream_prefix": os.getenv("EVENT_BUS_STREAM_PREFIX", "bhiv:events"),
+    "group_prefix": os.getenv("EVENT_BUS_GROUP_PREFIX", "bucket"),
+    "stream_maxlen": int(os.getenv("EVENT_BUS_STREAM_MAXLEN", "10000")),
+    "read_batch_size": int(os.getenv("EVENT_BUS_READ_BATCH_SIZE", "50")),
+    "block_ms": int(os.getenv("EVENT_BUS_BLOCK_MS", "1000")),
+    "claim_idle_ms": int(os.getenv("EVENT_BUS_CLAIM_IDLE_MS", "30000")),
+    "claim_interval_seconds": float(os.getenv("EVENT_BUS_CLAIM_INTERVAL_SECONDS", "5")),
+    "max_deliveries": int(os.getenv("EVENT_BUS_MAX_DELIVERIES", "5"))
+}
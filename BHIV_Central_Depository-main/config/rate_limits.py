@@ -0,0 +1,105 @@
+"""
+BHIV Bucket Rate Limit Configuration
+Per-client, per-route-class token bucket limits enforced by the rate limit middleware
+Derived from the write/read throughput limits in config/scale_limits.py
+"""
+
+import os
+from typing import Dict, Any, Optional
+from config.scale_limits import ScaleLimits
+
+RATE_LIMIT_CONFIG = {
+    "enabled": os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true",
+    "backend": os.getenv("RATE_LIMIT_BACKEND", "memory"),  # memory | redis
+    "redis_key_prefix": os.getenv("RATE_LIMIT_REDIS_PREFIX", "ratelimit"),
+    # After a Redis error, limit in-process for this long before trying Redis again
+    "redis_cooldown_seconds": float(os.getenv("RATE_LIMIT_REDIS_COOLDOWN_SECONDS", "30")),
+    "client_id_header": os.getenv("RATE_LIMIT_CLIENT_HEADER", "x-client-id"),
+    # Peer IPs allowed to name their client id in client_id_header; everyone else is limited by IP
+    "trusted_client_ips": {
+        ip.strip() for ip in os.getenv("RATE_LIMIT_TRUSTED_CLIENT_IPS", "").split(",") if ip.strip()
+    },
+    # How often each worker re-reads admin limit changes from Redis (redis backend only)
+    "settings_refresh_seconds": float(os.getenv("RATE_LIMIT_SETTINGS_REFRESH_SECONDS", "1")),
+    # /admin/rate-limits* answer 403 unless this is set
+    "admin_token": os.getenv("BUCKET_ADMIN_TOKEN", None),
+    "max_tracked_clients": int(os.getenv("RATE_LIMIT_MAX_TRACKED_CLIENTS", "10000"))
+}
+
+# Route classes: rate is tokens per second per client, burst is bucket capacity
+DEFAULT_ROUTE_LIMITS = {
+    "core_write": {
+        "rate_per_sec": 50.0,
+        "burst": 100,
+        "description": "Core events (/core/write-event; each event of a /core/write-events batch)"
+    },
+    "core_write_batch": {
+        "rate_per_sec": 10.0,
+        "burst": 20,
+        "description": "Core event batch requests (/core/write-events); events are charged to core_write"
+    },
+    "agent_execution": {
+        "rate_per_sec": 5.0,
+        "burst": 10,
+        "description": "Agent and basket execution (/run-agent, /run-basket, law agent queries)"
+    },
+    "write": {
+        "rate_per_sec": float(ScaleLimits.SAFE_WRITE_THROUGHPUT_PER_SEC) / 10,
+        "burst": ScaleLimits.SAFE_CONCURRENT_WRITES,
+        "description": "Other mutating requests (POST/PUT/PATCH/DELETE)"
+    },
+    "read": {
+        "rate_per_sec": float(ScaleLimits.SAFE_READ_THROUGHPUT_PER_SEC),
+        "burst": ScaleLimits.MAX_READ_THROUGHPUT_PER_SEC,
+        "description": "Read-only requests (GET)"
+    }
+}
+
+# Ordered (method, path prefix) -> route class; first match wins, method None matches any
+ROUTE_CLASS_PATTERNS = [
+    (None, "/core/write-events", "core_write_batch"),
+    (None, "/core/write-event", "core_write"),
+    ("POST", "/run-agent", "agent_execution"),
+    ("POST", "/run-basket", "agent_execution"),
+    ("POST", "/basic-query", "agent_execution"),
+    ("POST", "/adaptive-query", "agent_execution"),
+    ("POST", "/enhanced-query", "agent_execution"),
+]
+
+# Never rate limited (health probes, admin tuning, docs)
+EXEMPT_PATHS = ["/health", "/admin/rate-limits", "/docs", "/openapi.json", "/redoc"]
+
+
+def classify_route(method: str, path: str) -> Optional[str]:
+    """Map a request to its route class, or None if the path is exempt"""
+    for exempt in EXEMPT_PATHS:
+        if path == exempt or path.startswith(exempt + "/"):
+            return None
+
+    for pattern_method, prefix, route_class in ROUTE_CLASS_PATTERNS:
+        if (pattern_method is None or pattern_method == method) and path.startswith(prefix):
+            return route_class
+
+    if method in ("GET", "HEAD", "OPTIONS"):
+        return "read"
+    return "write"
+
+
+def validate_route_limit(rate_per_sec: Any, burst: Any) -> Dict[str, Any]:
+    """Validate a rate limit update before it is applied"""
+    errors = []
+    try:
+        rate_per_sec = float(rate_per_sec)
+        if rate_per_sec <= 0:
+            errors.append("rate_per_sec must be greater than 0")
+    except (TypeError, ValueError):
+        errors.append("rate_per_sec must be a number")
+
+    try:
+        burst = int(burst)
+        if burst < 1:
+            errors.append("burst must be at least 1")
+    except (TypeError, ValueError):
+        errors.append("burst must be an integer")
+
+    return {"valid": not errors, "errors": errors}
@@ -1,45 +1,58 @@
 from pymongo import MongoClient
 import os
 from dotenv import load_dotenv
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional
 import datetime
 import time
 from utils.logger import get_logger
+from utils.serialization import serializer
+from utils.tracing import trace_methods
+from utils.metrics import observe_methods, MONGO_CALL_SECONDS
 
 logger = get_logger(__name__)
 
+# Characters of repr kept for a log payload the serializer cannot encode
+PAYLOAD_REPR_LIMIT = 10000
+
 load_dotenv()
 
+@trace_methods("mongo")
+@observe_methods(MONGO_CALL_SECONDS)
 class MongoDBClient:
-    def __init__(self, max_retries: int = 3, retry_delay: int = 2):
+    def __init__(self, max_retries: int = 3, retry_delay: int = 2, connect_on_init: bool = True):
         self.client = None
         self.db = None
         self.max_retries = max_retries
         self.retry_delay = retry_delay
-        self.connect()
+        # main.py connects in the background during startup instead of blocking import
+        if connect_on_init:
+            self.connect()
 
-    def connect(self):
+    def connect(self) -> bool:
         mongo_uri = os.getenv("MONGODB_URI")
         if not mongo_uri:
             logger.error("MONGODB_URI not found in .env file")
-            return
+            return False
         
         for attempt in range(self.max_retries):
             try:
                 logger.debug(f"Attempting MongoDB connection (attempt {attempt + 1})")
-                self.client = MongoClient(mongo_uri)
-                self.db = self.client["workflow_ai"]
-                self.client.admin.command('ping')
+                client = MongoClient(mongo_uri)
+                client.admin.command('ping')
+                # Only publish the handle once the server answered (connect may run in the background)
+                self.client = client
+                self.db = client["workflow_ai"]
                 logger.info("Successfully connected to MongoDB")
-                return
+                return True
             except Exception as e:
                 logger.error(f"MongoDB connection attempt {attempt + 1} failed: {e}")
                 if attempt < self.max_retries - 1:
                     time.sleep(self.retry_delay * (2 ** attempt))
         
         logger.error("Failed to connect to MongoDB after all retries")
+        return False
 
-    def store_log(self, agent_name: str, message: str, details: Optional[Dict] = None):
+    def store_log(self, agent_name: str, message: str, details: Optional[Dict] = None, payload: Any = None):
         if self.db is None:
             logger.error("No database connection")
             return
@@ -56,10 +69,27 @@ class MongoDBClient:
             if details:
                 log_entry.update(details)
 
+            # Large payloads (agent outputs) are stored as compressed envelopes
+            if payload is not None:
+                log_entry["payload"] = self._payload_for_log(agent_name, payload)
+
             self.db.logs.insert_one(log_entry)
         except Exception as e:
             logger.error(f"Failed to store log for {agent_name}: {e}")
 
+    @staticmethod
+    def _payload_for_log(agent_name: str, payload: Any) -> Any:
+        """Encoded payload, or a truncated repr when it cannot be encoded, so the log is still stored"""
+        try:
+            return serializer.to_mongo(payload)
+        except Exception as e:
+            logger.warning(f"Log payload for {agent_name} could not be encoded, storing its repr: {e}")
+            return {
+                "unencodable": type(payload).__name__,
+                "repr": repr(payload)[:PAYLOAD_REPR_LIMIT],
+                "error": str(e)
+            }
+
     def get_logs(self, agent_name: Optional[str] = None) -> List[Dict]:
         if self.db is None:
             logger.error("No database connection")
@@ -67,7 +97,11 @@ class MongoDBClient:
         
         try:
             query = {"agent": agent_name} if agent_name else {}
-            return list(self.db.logs.find(query))
+            logs = list(self.db.logs.find(query))
+            for log in logs:
+                if "payload" in log:
+                    log["payload"] = serializer.from_mongo(log["payload"])
+            return logs
         except Exception as e:
             logger.error(f"Failed to retrieve logs: {e}")
             return []
@@ -47,7 +47,8 @@ from .retention import (
     get_cleanup_procedures,
     get_compliance_checklist,
     calculate_retention_date,
-    get_dsar_process
+    get_dsar_process,
+    get_sweep_policies
 )
 
 from .integration_gate import (
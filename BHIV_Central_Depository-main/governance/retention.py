@@ -16,7 +16,44 @@ RETENTION_CONFIG = {
     "error_log_backup_count": int(os.getenv("ERROR_LOG_BACKUP_COUNT", "3")),
     "tombstone_period_days": int(os.getenv("TOMBSTONE_PERIOD_DAYS", "90")),
     "enable_auto_cleanup": os.getenv("ENABLE_AUTO_CLEANUP", "true").lower() == "true",
-    "gdpr_anonymize": os.getenv("GDPR_ANONYMIZE", "false").lower() == "true"
+    "gdpr_anonymize": os.getenv("GDPR_ANONYMIZE", "false").lower() == "true",
+    "audit_retention_days": int(os.getenv("AUDIT_RETENTION_DAYS", "2555")),  # 7 years
+    "sweep_interval_seconds": int(os.getenv("RETENTION_SWEEP_INTERVAL", "3600")),  # hourly
+    "sweep_batch_size": int(os.getenv("RETENTION_SWEEP_BATCH_SIZE", "500")),
+    "sweep_max_deletes_per_sec": int(os.getenv("RETENTION_SWEEP_MAX_DELETES_PER_SEC", "1000")),
+    "archive_enabled": os.getenv("RETENTION_ARCHIVE_ENABLED", "false").lower() == "true",
+    "archive_dir": os.getenv("RETENTION_ARCHIVE_DIR", "archives")
+}
+
+# Sorted set indexing Redis execution keys by creation time (score = unix seconds)
+# so expiry sweeps never need a keyspace scan
+REDIS_RETENTION_INDEX_KEY = "retention:index:executions"
+
+# Policies applied by the background retention sweeper (utils/retention_sweeper.py)
+SWEEP_POLICIES = {
+    "execution_logs": {
+        "store": "mongodb",
+        "collection": "logs",
+        "timestamp_field": "timestamp",
+        "retention_days": RETENTION_CONFIG["mongodb_log_retention_days"],
+        "archive": True,
+        "artifact_types": ["execution_metadata", "agent_outputs", "logs_success", "logs_error"]
+    },
+    "audit_entries": {
+        "store": "mongodb",
+        "collection": "audit_logs",
+        "timestamp_field": "timestamp",
+        "retention_days": RETENTION_CONFIG["audit_retention_days"],
+        "archive": True,
+        "artifact_types": ["audit_trail"]
+    },
+    "redis_execution_data": {
+        "store": "redis",
+        "index_key": REDIS_RETENTION_INDEX_KEY,
+        "retention_seconds": RETENTION_CONFIG["redis_execution_ttl"],
+        "archive": False,
+        "artifact_types": ["execution_metadata", "agent_outputs", "agent_state"]
+    }
 }
 
 # Per-artifact retention rules
@@ -184,11 +221,27 @@ def get_retention_config() -> Dict[str, Any]:
             "ERROR_LOG_BACKUP_COUNT": "count (default: 3)",
             "TOMBSTONE_PERIOD_DAYS": "days (default: 90)",
             "ENABLE_AUTO_CLEANUP": "boolean (default: true)",
-            "GDPR_ANONYMIZE": "boolean (default: false, Phase 2)"
+            "GDPR_ANONYMIZE": "boolean (default: false, Phase 2)",
+            "AUDIT_RETENTION_DAYS": "days (default: 2555 = 7 years)",
+            "RETENTION_SWEEP_INTERVAL": "seconds between sweeps (default: 3600)",
+            "RETENTION_SWEEP_BATCH_SIZE": "documents/keys per batch (default: 500)",
+            "RETENTION_SWEEP_MAX_DELETES_PER_SEC": "sweeper throttle (default: 1000)",
+            "RETENTION_ARCHIVE_ENABLED": "boolean, gzip JSONL archive before delete (default: false)",
+            "RETENTION_ARCHIVE_DIR": "archive directory (default: archives)"
         }
     }
 
 
+def get_sweep_policies() -> Dict[str, Any]:
+    """Get the policies enforced by the background retention sweeper"""
+    return {
+        "policies": SWEEP_POLICIES,
+        "enabled": RETENTION_CONFIG["enable_auto_cleanup"],
+        "interval_seconds": RETENTION_CONFIG["sweep_interval_seconds"],
+        "legal_hold": "documents with legal_hold: true are never swept"
+    }
+
+
 def get_artifact_retention_rules() -> Dict[str, Any]:
     """Get retention rules for all artifact types"""
     return {
@@ -289,7 +342,8 @@ def get_cleanup_procedures() -> Dict[str, Any]:
         "automated": {
             "redis_ttl": "automatic after 1-24 hours",
             "mongodb_ttl": "automatic after 1 year (configured)",
-            "file_logs": "automatic rotation (daily)"
+            "file_logs": "automatic rotation (daily)",
+            "retention_sweeper": "background sweep every RETENTION_SWEEP_INTERVAL seconds (batched, throttled)"
         },
         "manual": {
             "tombstone_cleanup": {
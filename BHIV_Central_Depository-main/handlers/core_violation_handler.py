@@ -5,9 +5,10 @@ Implements escalation protocols and automated responses
 """
 
 from typing import Dict, List, Optional, Any
-from datetime import datetime, timedelta
+from datetime import datetime
 from enum import Enum
 from utils.logger import get_logger
+from middleware.constitutional.violation_store import ViolationStore
 
 logger = get_logger(__name__)
 
@@ -38,9 +39,20 @@ class AutomatedResponse(Enum):
 class CoreViolationHandler:
     """Handles detection and escalation of Core boundary violations"""
     
-    def __init__(self, audit_middleware=None):
+    def __init__(self, audit_middleware=None, state=None):
         self.audit_middleware = audit_middleware
-        self.violation_history = []
+        # Persists to the audit trail when an audit middleware is attached
+        self.violations = ViolationStore(
+            "core_violations",
+            {
+                "severity": "severity",
+                "type": "violation_type",
+                "requester": "requester_id",
+                "escalation": "escalation.level"
+            },
+            state=state,
+            audit_middleware=audit_middleware
+        )
         self.escalation_contacts = self._define_escalation_contacts()
         self.response_rules = self._define_response_rules()
         logger.info("Core Violation Handler initialized")
@@ -97,12 +109,8 @@ class CoreViolationHandler:
         if escalation["level"] != EscalationLevel.NONE.value:
             self._execute_escalation(escalation, violation)
         
-        # Store in history
-        self.violation_history.append(violation)
-        
-        # Log to audit trail if available
-        if self.audit_middleware:
-            self._log_to_audit(violation)
+        # Store in history (and the audit trail if attached)
+        self.violations.record(violation)
         
         logger.info(f"Violation handled: {violation['violation_id']}")
         
@@ -248,26 +256,6 @@ class CoreViolationHandler:
         
         logger.info(f"Escalation executed: {escalation_log}")
     
-    def _log_to_audit(self, violation: Dict[str, Any]):
-        """Log violation to audit trail"""
-        try:
-            import asyncio
-            
-            # Create audit entry
-            asyncio.create_task(
-                self.audit_middleware.log_operation(
-                    operation_type="BOUNDARY_VIOLATION",
-                    artifact_id="system",
-                    requester_id=violation["requester_id"],
-                    integration_id="core_boundary_enforcer",
-                    data_after=violation,
-                    status="violation_detected",
-                    error_message=f"{violation['violation_type']}: {violation['severity']}"
-                )
-            )
-        except Exception as e:
-            logger.error(f"Failed to log violation to audit: {e}")
-    
     def _define_escalation_contacts(self) -> Dict[str, List[str]]:
         """Define escalation contact lists"""
         return {
@@ -308,57 +296,30 @@ class CoreViolationHandler:
             }
         }
     
+    @property
+    def violation_history(self) -> List[Dict[str, Any]]:
+        """Most recent violations (bounded)"""
+        return self.violations.recent(self.violations.retention_hours)
+    
+    def attach_audit(self, audit_middleware):
+        """Persist handled violations to the audit trail"""
+        self.audit_middleware = audit_middleware
+        self.violations.attach_audit(audit_middleware)
+    
     def get_violation_report(self, hours: int = 24) -> Dict[str, Any]:
         """Generate violation report for last N hours"""
-        cutoff = datetime.utcnow() - timedelta(hours=hours)
-        
-        recent_violations = [
-            v for v in self.violation_history
-            if datetime.fromisoformat(v["timestamp"]) > cutoff
-        ]
+        counts = self.violations.summary(hours)
         
         return {
             "report_generated": datetime.utcnow().isoformat(),
             "period_hours": hours,
-            "total_violations": len(recent_violations),
-            "by_severity": self._group_by_severity(recent_violations),
-            "by_type": self._group_by_type(recent_violations),
-            "by_requester": self._group_by_requester(recent_violations),
-            "escalations": self._count_escalations(recent_violations),
-            "violations": recent_violations
+            "total_violations": counts["total"],
+            "by_severity": counts["severity"],
+            "by_type": counts["type"],
+            "by_requester": counts["requester"],
+            "escalations": counts["escalation"],
+            "violations": self.violations.recent(hours)
         }
-    
-    def _group_by_severity(self, violations: List[Dict]) -> Dict[str, int]:
-        """Group violations by severity"""
-        grouped = {}
-        for v in violations:
-            severity = v.get("severity", "unknown")
-            grouped[severity] = grouped.get(severity, 0) + 1
-        return grouped
-    
-    def _group_by_type(self, violations: List[Dict]) -> Dict[str, int]:
-        """Group violations by type"""
-        grouped = {}
-        for v in violations:
-            vtype = v.get("violation_type", "unknown")
-            grouped[vtype] = grouped.get(vtype, 0) + 1
-        return grouped
-    
-    def _group_by_requester(self, violations: List[Dict]) -> Dict[str, int]:
-        """Group violations by requester"""
-        grouped = {}
-        for v in violations:
-            requester = v.get("requester_id", "unknown")
-            grouped[requester] = grouped.get(requester, 0) + 1
-        return grouped
-    
-    def _count_escalations(self, violations: List[Dict]) -> Dict[str, int]:
-        """Count escalations by level"""
-        escalations = {}
-        for v in violations:
-            level = v.get("escalation", {}).get("level", "none")
-            escalations[level] = escalations.get(level, 0) + 1
-        return escalations
 
 # Global violation handler instance
 core_violation_handler = CoreViolationHandler()
@@ -4,12 +4,33 @@ Forwards behavioral events from Core to Karma Chain for tracking
 """
 import aiohttp
 import asyncio
+import functools
 from datetime import datetime, timezone
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import logging
+from utils.tracing import aiohttp_trace_config
+from utils.metrics import KARMA_FORWARD_TOTAL, KARMA_FORWARD_IN_FLIGHT
 
 logger = logging.getLogger(__name__)
 
+
+def _tracked(fn):
+    """Count forwards in flight (callers fire these as background tasks) and their outcomes"""
+    @functools.wraps(fn)
+    async def wrapper(self, *args, **kwargs):
+        if not self.enabled:
+            KARMA_FORWARD_TOTAL.inc(outcome="disabled")
+            return None
+        KARMA_FORWARD_IN_FLIGHT.inc()
+        try:
+            result = await fn(self, *args, **kwargs)
+            KARMA_FORWARD_TOTAL.inc(outcome="success" if result is not None else "failed")
+            return result
+        finally:
+            KARMA_FORWARD_IN_FLIGHT.dec()
+    return wrapper
+
+
 class KarmaForwarder:
     """Forwards events from Bucket to Karma Chain"""
     
@@ -17,7 +38,48 @@ class KarmaForwarder:
         self.karma_url = karma_url.rstrip('/')
         self.timeout = aiohttp.ClientTimeout(total=timeout)
         self.enabled = True
+        # Cleared when Karma answers 404/405 on /v1/event/batch (older Karma); events are then sent one by one
+        self.batch_supported = True
         
+    def _build_agent_event(self, event_data: Dict[str, Any], user_id: str = "system") -> Dict[str, Any]:
+        """Karma life_event for a Core agent event"""
+        agent_id = event_data.get("agent_id", "unknown")
+        task_id = event_data.get("task_id", "unknown")
+        event_type = event_data.get("event_type", "agent_execution")
+
+        # Determine action based on event type
+        if event_type == "agent_result":
+            result = event_data.get("result", {})
+            success = result.get("status") == 200
+            action = "agent_success" if success else "agent_failure"
+        elif event_type == "rl_outcome":
+            reward = event_data.get("reward", 0)
+            action = "agent_success" if reward > 0 else "agent_failure"
+        else:
+            action = "agent_execution"
+
+        return {
+            "type": "life_event",
+            "data": {
+                "user_id": user_id,
+                "action": action,
+                "role": "user",
+                "note": f"Agent {agent_id} execution",
+                "context": {
+                    "agent_id": agent_id,
+                    "task_id": task_id,
+                    "event_type": event_type,
+                    "source": "bhiv_bucket"
+                },
+                "metadata": event_data.get("metadata", {})
+            },
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "source": "bhiv_bucket",
+            # Stable per Bucket event, so a retried batch is not double counted by Karma
+            "idempotency_key": f"bhiv_bucket:{event_data['event_id']}" if event_data.get("event_id") else None
+        }
+
+    @_tracked
     async def forward_agent_event(
         self,
         event_data: Dict[str, Any],
@@ -28,43 +90,10 @@ class KarmaForwarder:
             return None
             
         try:
-            # Extract relevant data
-            agent_id = event_data.get("agent_id", "unknown")
-            task_id = event_data.get("task_id", "unknown")
-            event_type = event_data.get("event_type", "agent_execution")
-            
-            # Determine action based on event type
-            if event_type == "agent_result":
-                result = event_data.get("result", {})
-                success = result.get("status") == 200
-                action = "agent_success" if success else "agent_failure"
-            elif event_type == "rl_outcome":
-                reward = event_data.get("reward", 0)
-                action = "agent_success" if reward > 0 else "agent_failure"
-            else:
-                action = "agent_execution"
-            
-            # Create life event for Karma
-            karma_event = {
-                "type": "life_event",
-                "data": {
-                    "user_id": user_id,
-                    "action": action,
-                    "role": "user",
-                    "note": f"Agent {agent_id} execution",
-                    "context": {
-                        "agent_id": agent_id,
-                        "task_id": task_id,
-                        "event_type": event_type,
-                        "source": "bhiv_bucket"
-                    },
-                    "metadata": event_data.get("metadata", {})
-                },
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "source": "bhiv_bucket"
-            }
-            
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
+            karma_event = self._build_agent_event(event_data, user_id)
+            agent_id = karma_event["data"]["context"]["agent_id"]
+
+            async with aiohttp.ClientSession(timeout=self.timeout, trace_configs=[aiohttp_trace_config()]) as session:
                 async with session.post(
                     f"{self.karma_url}/v1/event/",
                     json=karma_event
@@ -85,6 +114,47 @@ class KarmaForwarder:
             logger.debug(f"Karma forward error: {e}")
             return None
     
+    @_tracked
+    async def forward_agent_events(
+        self,
+        events: List[Dict[str, Any]],
+        user_id: str = "system"
+    ) -> Optional[Dict[str, Any]]:
+        """Forward several agent events to Karma in one request"""
+        if not events:
+            return None
+        karma_events = [self._build_agent_event(event_data, user_id) for event_data in events]
+
+        try:
+            async with aiohttp.ClientSession(timeout=self.timeout, trace_configs=[aiohttp_trace_config()]) as session:
+                if self.batch_supported:
+                    async with session.post(f"{self.karma_url}/v1/event/batch", json=karma_events) as response:
+                        if response.status == 200:
+                            logger.debug(f"Karma batch forwarded: {len(karma_events)} events")
+                            return await response.json()
+                        if response.status not in (404, 405):
+                            text = await response.text()
+                            logger.warning(f"Karma batch returned {response.status}: {text}")
+                            return None
+                        logger.info("Karma has no batch event endpoint - forwarding events individually")
+                        self.batch_supported = False
+
+                async def post(karma_event):
+                    async with session.post(f"{self.karma_url}/v1/event/", json=karma_event) as response:
+                        return response.status == 200
+
+                sent = await asyncio.gather(*(post(e) for e in karma_events), return_exceptions=True)
+                forwarded = sum(1 for ok in sent if ok is True)
+                return {"forwarded": forwarded, "failed": len(karma_events) - forwarded} if forwarded else None
+
+        except asyncio.TimeoutError:
+            logger.debug("Karma timeout - continuing")
+            return None
+        except Exception as e:
+            logger.debug(f"Karma batch forward error: {e}")
+            return None
+
+    @_tracked
     async def forward_rl_outcome(
         self,
         agent_id: str,
@@ -117,7 +187,7 @@ class KarmaForwarder:
                 "source": "bhiv_bucket"
             }
             
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
+            async with aiohttp.ClientSession(timeout=self.timeout, trace_configs=[aiohttp_trace_config()]) as session:
                 async with session.post(
                     f"{self.karma_url}/v1/event/",
                     json=karma_event
@@ -133,7 +203,7 @@ class KarmaForwarder:
     async def health_check(self) -> bool:
         """Check if Karma service is available"""
         try:
-            async with aiohttp.ClientSession(timeout=self.timeout) as session:
+            async with aiohttp.ClientSession(timeout=self.timeout, trace_configs=[aiohttp_trace_config()]) as session:
                 async with session.get(f"{self.karma_url}/health") as response:
                     return response.status == 200
         except Exception:
@@ -1,13 +1,20 @@
-from fastapi import FastAPI, Query, HTTPException
+from fastapi import FastAPI, Query, HTTPException, Header, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from agents.agent_registry import AgentRegistry
 from agents.agent_runner import AgentRunner
 from baskets.basket_manager import AgentBasket
-from communication.event_bus import EventBus
+from baskets.checkpoint_store import CheckpointStore
+from communication.event_bus import create_event_bus
 from database.mongo_db import MongoDBClient
 from utils.redis_service import RedisService
-from utils.logger import get_logger, get_execution_logger
+from utils.retention_sweeper import RetentionSweeper
+from utils.startup import StartupManager
+from utils.tracing import tracer
+from utils.metrics import metrics, METRICS_CONFIG
+from utils.shared_state import shared_state
+from utils.logger import get_logger, get_execution_logger, shutdown_logging, BASKET_LOG_CONFIG
 from governance.config import get_bucket_info, validate_artifact_class, BUCKET_VERSION
 from governance.snapshot import get_snapshot_info, validate_mongodb_schema, validate_redis_key
 from governance.integration import (
@@ -43,7 +50,9 @@ from governance.retention import (
     get_cleanup_procedures,
     get_compliance_checklist,
     calculate_retention_date,
-    get_dsar_process
+    get_dsar_process,
+    get_sweep_policies,
+    RETENTION_CONFIG
 )
 from governance.integration_gate import (
     get_integration_requirements,
@@ -96,7 +105,11 @@ from governance.owner_principles import (
 )
 from governance.governance_gate import governance_gate, GovernanceDecision
 from middleware.audit_middleware import AuditMiddleware
+from middleware.rate_limiter import RateLimitMiddleware, rate_limiter, rate_limit_headers, client_id_from_scope
+from middleware.tracing import TracingMiddleware
+from middleware.metrics import MetricsMiddleware
 from middleware.constitutional.core_boundary_enforcer import core_boundary_enforcer, CoreCapability, ProhibitedAction
+from middleware.constitutional.violation_store import VIOLATION_STORE_CONFIG
 from validators.core_api_contract import core_api_contract, InputChannel, OutputChannel
 from handlers.core_violation_handler import core_violation_handler, ViolationSeverity
 
@@ -106,7 +119,10 @@ import socketio
 import os
 import asyncio
 import importlib
+import hmac
 import json
+import re
+import uuid
 import redis
 from typing import Dict, Optional, List
 from contextlib import asynccontextmanager
@@ -122,43 +138,58 @@ script_dir = Path(__file__).parent
 agents_dir = script_dir / "agents"
 config_file = script_dir / "agents_and_baskets.yaml"
 
-registry = AgentRegistry(str(agents_dir))
-registry.load_baskets(str(config_file))  # Load baskets from config
-event_bus = EventBus()
-mongo_client = MongoDBClient()
-redis_service = RedisService()
+# Service dependencies are constructed without connecting; the lifespan brings them up
+# in stages (utils/startup.py) so a slow MongoDB no longer holds up a restart.
+# Endpoints still work before startup: the registry loads on first access.
+registry = AgentRegistry(str(agents_dir), lazy=True, baskets_file=str(config_file))
+# In-process by default; EVENT_BUS_BACKEND=redis_streams shares events across workers
+event_bus = create_event_bus()
+mongo_client = MongoDBClient(connect_on_init=False)
+redis_service = RedisService(connect_on_init=False)
 sio = socketio.AsyncClient()
 
-# Initialize audit middleware
-audit_middleware = AuditMiddleware(mongo_client.db if mongo_client is not None and mongo_client.db is not None else None)
+# Initialize audit middleware (in-memory until MongoDB is ready, see attach_db)
+audit_middleware = AuditMiddleware()
 
-# Redis client setup
+# Background enforcement of retention policies (started in lifespan)
+retention_sweeper = RetentionSweeper(mongo_client=mongo_client, redis_service=redis_service)
+
+# Legacy Redis client (connected during startup)
 redis_client = None
-try:
-    redis_host = os.getenv("REDIS_HOST", "localhost")
-    redis_port = int(os.getenv("REDIS_PORT", 6379))
-    redis_password = os.getenv("REDIS_PASSWORD", None)
-    redis_username = os.getenv("REDIS_USERNAME", None)
-    
-    redis_config = {
-        "host": redis_host,
-        "port": redis_port,
-        "decode_responses": True,
-        "socket_timeout": 5,
-        "socket_connect_timeout": 5
-    }
-    
-    if redis_password:
-        redis_config["password"] = redis_password
-    if redis_username:
-        redis_config["username"] = redis_username
-    
-    redis_client = redis.Redis(**redis_config)
-    redis_client.ping()
-    logger.info(f"Connected to Redis at {redis_host}:{redis_port}")
-except (redis.ConnectionError, redis.RedisError) as e:
-    logger.warning(f"Redis connection failed: {e}. Redis features will be disabled")
-    redis_client = None
+
+startup_manager = StartupManager()
+SOCKETIO_ENABLED = os.getenv("SOCKETIO_ENABLED", "false").lower() == "true"
+
+def connect_legacy_redis() -> bool:
+    global redis_client
+    try:
+        redis_host = os.getenv("REDIS_HOST", "localhost")
+        redis_port = int(os.getenv("REDIS_PORT", 6379))
+        redis_password = os.getenv("REDIS_PASSWORD", None)
+        redis_username = os.getenv("REDIS_USERNAME", None)
+        
+        redis_config = {
+            "host": redis_host,
+            "port": redis_port,
+            "decode_responses": True,
+            "socket_timeout": 5,
+            "socket_connect_timeout": 5
+        }
+        
+        if redis_password:
+            redis_config["password"] = redis_password
+        if redis_username:
+            redis_config["username"] = redis_username
+        
+        client = redis.Redis(**redis_config)
+        client.ping()
+        redis_client = client
+        logger.info(f"Connected to Redis at {redis_host}:{redis_port}")
+        return True
+    except (redis.ConnectionError, redis.RedisError) as e:
+        logger.warning(f"Redis connection failed: {e}. Redis features will be disabled")
+        redis_client = None
+        return False
 
 class AgentInput(BaseModel):
     agent_name: str = Field(..., description="Name of the agent to run")
@@ -195,25 +226,107 @@ async def forward_event_to_socketio(event_type: str, message: Dict):
     else:
         logger.warning(f"Socket.IO not connected, could not forward event {event_type}")
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Disable Socket.IO connection for now
-    socketio_connected = False
-    # socketio_connected = await connect_socketio()
-    if not socketio_connected:
+async def attach_audit_db():
+    audit_middleware.attach_db(mongo_client.db)
+    if VIOLATION_STORE_CONFIG["audit_persist"]:
+        core_violation_handler.attach_audit(audit_middleware)
+        core_boundary_enforcer.violations.attach_audit(audit_middleware)
+
+def setup_socketio_forwarding():
+    event_bus.subscribe('agent-recommendation', lambda msg: forward_event_to_socketio('agent-recommendation', msg))
+    event_bus.subscribe('escalation', lambda msg: forward_event_to_socketio('escalation', msg))
+    event_bus.subscribe('dependency-update', lambda msg: forward_event_to_socketio('dependency-update', msg))
+    logger.info("Event forwarding setup complete")
+
+async def start_retention_sweeper() -> bool:
+    retention_sweeper.start()
+    return True
+
+async def start_metrics_snapshots() -> bool:
+    return metrics.start_snapshots()
+
+def register_metric_callbacks():
+    """Gauges read from existing in-process state when /metrics is scraped"""
+    from utils.scale_monitor import scale_monitor
+
+    def dependency_ready():
+        return {
+            (name,): 1.0 if dependency.status == "ready" else 0.0
+            for name, dependency in startup_manager.dependencies.items()
+        }
+
+    def degraded():
+        # Same rule as /health, from startup readiness rather than live pings
+        ready = [name for name in ("mongodb", "redis", "redis_legacy", "socketio") if startup_manager.is_ready(name)]
+        if len(ready) >= 2:
+            state = "healthy"
+        elif "mongodb" in ready:
+            state = "degraded"
+        else:
+            state = "unhealthy"
+        return {(s,): 1.0 if s == state else 0.0 for s in ("healthy", "degraded", "unhealthy")}
+
+    def event_bus_subscribers(field):
+        def collect():
+            return {
+                (s["subscriber"], s["event_type"]): s.get(field, 0)
+                for s in event_bus.get_metrics().get("subscribers", [])
+            }
+        return collect
+
+    metrics.gauge(
+        "dependency_ready", "1 if the startup dependency is ready", ("dependency",), callback=dependency_ready
+    )
+    metrics.gauge("health_state", "Current health state (1 = active)", ("state",), callback=degraded)
+    metrics.gauge(
+        "event_bus_queue_depth", "Events queued per subscriber", ("subscriber", "event_type"),
+        callback=event_bus_subscribers("queue_depth")
+    )
+    metrics.gauge(
+        "event_bus_dropped", "Events dropped per subscriber since start", ("subscriber", "event_type"),
+        callback=event_bus_subscribers("dropped")
+    )
+    metrics.gauge(
+        "scale_active_operations", "In-flight storage operations tracked by ScaleMonitor", ("kind",),
+        callback=lambda: {("write",): scale_monitor.active_writes, ("read",): scale_monitor.active_reads}
+    )
+
+def register_startup_dependencies():
+    """Stage 0 connects clients concurrently (MongoDB and Socket.IO in the background); stage 1 starts workers"""
+    startup_manager.register("agent_registry", registry.ensure_loaded, stage=0)
+    startup_manager.register("redis", redis_service.connect, stage=0, required=False)
+    startup_manager.register("redis_legacy", connect_legacy_redis, stage=0, required=False)
+    startup_manager.register(
+        "mongodb", mongo_client.connect, stage=0, background=True, on_ready=attach_audit_db
+    )
+    if SOCKETIO_ENABLED:
+        startup_manager.register(
+            "socketio", connect_socketio, stage=0, required=False, background=True,
+            on_ready=setup_socketio_forwarding
+        )
+    else:
+        startup_manager.mark_disabled("socketio", "SOCKETIO_ENABLED is not set")
         logger.info("Socket.IO disabled - continuing with core functionality")
-        # We'll continue without Socket.IO instead of raising an error
-    
-    # Set up event forwarding only if Socket.IO is connected
-    if socketio_connected:
-        event_bus.subscribe('agent-recommendation', lambda msg: forward_event_to_socketio('agent-recommendation', msg))
-        event_bus.subscribe('escalation', lambda msg: forward_event_to_socketio('escalation', msg))
-        event_bus.subscribe('dependency-update', lambda msg: forward_event_to_socketio('dependency-update', msg))
-        logger.info("Event forwarding setup complete")
+
+    if RETENTION_CONFIG["enable_auto_cleanup"]:
+        startup_manager.register("retention_sweeper", start_retention_sweeper, stage=1, required=False)
     else:
-        logger.warning("Event forwarding to Socket.IO disabled due to connection failure")
+        startup_manager.mark_disabled("retention_sweeper", "Retention auto-cleanup disabled")
+
+    register_metric_callbacks()
+    if METRICS_CONFIG["multiproc_dir"]:
+        startup_manager.register("metrics_snapshots", start_metrics_snapshots, stage=1, required=False)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    register_startup_dependencies()
+    await startup_manager.start()
     
     yield
+    await startup_manager.stop()
+    await metrics.stop_snapshots()
+    await retention_sweeper.stop()
+    await event_bus.close()
     if mongo_client:
         mongo_client.close()
     if sio.connected:
@@ -225,9 +338,15 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"Error closing Redis connection: {e}")
     logger.info("Disconnected from Socket.IO, MongoDB, and Redis")
+    tracer.shutdown()
+    shutdown_logging()
 
 app = FastAPI(lifespan=lifespan)
 
+# Per-client token bucket rate limiting (limits tunable via /admin/rate-limits)
+# Added before CORS so 429 responses still carry CORS headers
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:8000", "http://localhost:8080", "http://localhost:5000", "http://localhost:3000", "http://localhost:5173", "http://localhost:5174"],
@@ -236,6 +355,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency by route template for GET /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Outermost: root span per request, Server-Timing header, sampled OTLP/JSON export
+app.add_middleware(TracingMiddleware)
+
 @app.get("/health")
 async def health_check():
     health_status = {
@@ -243,8 +368,8 @@ async def health_check():
         "bucket_version": BUCKET_VERSION,
         "core_integration": {
             "status": "active",
-            "events_received": core_stats["events_received"],
-            "agents_tracked": len(core_stats["agents_tracked"])
+            "events_received": await shared_state.run(shared_state.get_counter, CORE_EVENTS_RECEIVED_KEY),
+            "agents_tracked": len(await shared_state.run(shared_state.get_members, CORE_AGENTS_TRACKED_KEY))
         },
         "governance": {
             "gate_active": True,
@@ -255,11 +380,13 @@ async def health_check():
         },
         "services": {
             "mongodb": "connected" if mongo_client and mongo_client.db is not None else "disconnected",
-            "socketio": "disabled",
+            "socketio": "connected" if sio.connected else ("disabled" if not SOCKETIO_ENABLED else "disconnected"),
             "redis": "connected" if redis_service.is_connected() else "disconnected",
             "audit_middleware": "active" if audit_middleware.audit_collection is not None else "inactive",
             "constitutional_enforcement": "active"
-        }
+        },
+        # Per-dependency startup state (pending/starting/ready/unavailable/failed/disabled)
+        "readiness": startup_manager.readiness()
     }
 
     # Check legacy Redis client if it exists
@@ -365,6 +492,7 @@ async def run_agent(agent_input: AgentInput):
 async def execute_basket(basket_input: BasketInput):
     """Execute a basket with enhanced logging and error handling"""
     logger.info(f"Executing basket: {basket_input}")
+    basket = None
 
     try:
         # Load basket configuration
@@ -438,6 +566,75 @@ async def execute_basket(basket_input: BasketInput):
                 logger.warning(f"Failed to store error in Redis: {redis_error}")
 
         raise HTTPException(status_code=500, detail=error_msg)
+    finally:
+        if basket is not None:
+            basket.close()
+
+@app.post("/resume-basket/{execution_id}")
+async def resume_basket(execution_id: str):
+    """Resume a failed basket run from its first failed or unfinished step
+
+    Steps checkpointed on the same input are restored instead of re-run;
+    a run can only be resumed by one caller at a time. Runs still in progress
+    are rejected unless their checkpoints have gone stale.
+    """
+    checkpoint_store = CheckpointStore(redis_service)
+    run = checkpoint_store.get_run(execution_id)
+    if not run:
+        raise HTTPException(status_code=404, detail=f"No checkpoints for execution {execution_id}")
+    conflict = checkpoint_store.resume_conflict(run)
+    if conflict:
+        raise HTTPException(status_code=409, detail=f"Execution {execution_id} {conflict}; only failed runs can be resumed")
+    if not checkpoint_store.claim(execution_id):
+        raise HTTPException(status_code=409, detail=f"Execution {execution_id} is already being resumed")
+
+    basket = None
+    try:
+        # Check again under the claim: a resume that held it until just now may have completed
+        # the run (and dropped its step checkpoints)
+        run = checkpoint_store.get_run(execution_id)
+        if not run:
+            raise HTTPException(status_code=404, detail=f"No checkpoints for execution {execution_id}")
+        conflict = checkpoint_store.resume_conflict(run)
+        if conflict:
+            raise HTTPException(status_code=409, detail=f"Execution {execution_id} {conflict}; only failed runs can be resumed")
+
+        basket = AgentBasket(
+            run["basket_spec"], registry, event_bus, redis_service,
+            execution_id=execution_id, checkpoint_store=checkpoint_store
+        )
+        logger.info(f"Resuming basket execution {execution_id} from step {run.get('failed_step')}")
+        result = await basket.execute(run["input_data"])
+
+        if "error" not in result:
+            result["execution_metadata"] = {
+                "execution_id": execution_id,
+                "basket_name": run["basket_spec"].get("basket_name", "unnamed"),
+                "agents_executed": run["basket_spec"].get("agents", []),
+                "strategy": run["basket_spec"].get("execution_strategy", "sequential"),
+                "resumed": True,
+                "restored_steps": basket.restored_steps
+            }
+        return result
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        error_msg = f"Basket resume failed: {str(e)}"
+        logger.error(error_msg, exc_info=True)
+        raise HTTPException(status_code=500, detail=error_msg)
+    finally:
+        checkpoint_store.release(execution_id)
+        if basket is not None:
+            basket.close()
+
+@app.get("/basket-executions/{execution_id}/checkpoints")
+async def get_basket_checkpoints(execution_id: str):
+    """Run status and completed steps recorded for a basket execution"""
+    run = CheckpointStore(redis_service).get_run(execution_id)
+    if not run:
+        raise HTTPException(status_code=404, detail=f"No checkpoints for execution {execution_id}")
+    return run
 
 @app.post("/create-basket")
 async def create_basket(basket_data: Dict):
@@ -530,15 +727,35 @@ async def get_agent_logs(agent_name: str, limit: int = Query(100, ge=1, le=1000)
 async def cleanup_redis_data(days: int = Query(7, ge=1, le=30)):
     """Clean up old Redis data"""
     try:
-        redis_service.cleanup_old_data(days)
+        deleted = redis_service.cleanup_old_data(days)
         return {
             "success": True,
-            "message": f"Cleaned up Redis data older than {days} days"
+            "message": f"Cleaned up Redis data older than {days} days",
+            "keys_deleted": deleted
         }
     except Exception as e:
         logger.error(f"Redis cleanup failed: {e}")
         raise HTTPException(status_code=500, detail=f"Redis cleanup failed: {str(e)}")
 
+# Per-run log files written before runs shared one sink: <basket>_<execution_id>.log
+GENERATED_EXECUTION_ID = r"\d+_[0-9a-f]{8}"
+
+def basket_run_log_files(logs_dir: Path, basket_name: str, execution_ids: List[str]) -> List[Path]:
+    """Per-run log files of exactly this basket (its known executions, or generated ids)
+
+    A plain glob on "<basket>_*.log" would also match other baskets' files and,
+    for a basket named "basket", the shared basket_runs.log sink.
+    """
+    shared_sink = Path(BASKET_LOG_CONFIG["log_file"]).resolve()
+    run_log = re.compile(rf"{re.escape(basket_name)}_(?:{GENERATED_EXECUTION_ID})\.log")
+    names = {f"{basket_name}_{execution_id}.log" for execution_id in execution_ids}
+    return sorted(
+        path for path in logs_dir.iterdir()
+        if path.is_file()
+        and (path.name in names or run_log.fullmatch(path.name))
+        and path.resolve() != shared_sink
+    )
+
 @app.delete("/baskets/{basket_name}")
 async def delete_basket(basket_name: str):
     """Delete a basket and clean up all related data"""
@@ -563,6 +780,7 @@ async def delete_basket(basket_name: str):
         }
 
         # 1. Clean up Redis data
+        execution_ids = []
         if redis_service.is_connected():
             try:
                 # Get all execution IDs for this basket
@@ -617,10 +835,10 @@ async def delete_basket(basket_name: str):
 
         # 3. Clean up log files
         try:
-            logs_dir = Path("logs/basket_runs")
+            logs_dir = Path(BASKET_LOG_CONFIG["log_file"]).parent
             if logs_dir.exists():
-                # Find and delete log files for this basket
-                log_files = list(logs_dir.glob(f"{basket_name}_*.log"))
+                # Per-run files of this basket only; never the shared sink
+                log_files = basket_run_log_files(logs_dir, basket_name, execution_ids)
                 for log_file in log_files:
                     log_file.unlink()
                     cleanup_summary["files_deleted"].append(str(log_file))
@@ -714,9 +932,39 @@ class EnhancedLegalQueryRequest(BaseModel):
 # CORE INTEGRATION ENDPOINTS (Core-Bucket Communication)
 # ============================================================================
 
-# In-memory storage for Core events
-core_events_store = []
-core_stats = {"events_received": 0, "agents_tracked": set()}
+# Core events live in shared state so every worker serves the same history and stats
+CORE_EVENTS_KEY = "core:events"
+CORE_EVENTS_RECEIVED_KEY = "core:events_received"
+CORE_AGENTS_TRACKED_KEY = "core:agents_tracked"
+# Per agent: the newest CORE_AGENT_EVENTS_MAX events and an all-time count, so /core/read-context
+# reads one short list instead of scanning every Core event
+CORE_AGENT_EVENT_COUNTS_KEY = "core:agent_event_counts"
+CORE_EVENTS_MAX = int(os.getenv("CORE_EVENTS_MAX", "10000"))
+CORE_AGENT_EVENTS_MAX = int(os.getenv("CORE_AGENT_EVENTS_MAX", "100"))
+CORE_EVENTS_BATCH_MAX = int(os.getenv("CORE_EVENTS_BATCH_MAX", "1000"))
+
+def core_agent_events_key(agent_id: str) -> str:
+    return f"{CORE_EVENTS_KEY}:{agent_id}"
+
+def record_core_events(events: List[Dict]):
+    """Store Core events (newest CORE_EVENTS_MAX kept, per agent CORE_AGENT_EVENTS_MAX) and update the shared counters"""
+    shared_state.extend(CORE_EVENTS_KEY, events, maxlen=CORE_EVENTS_MAX)
+    shared_state.incr(CORE_EVENTS_RECEIVED_KEY, len(events))
+    by_agent: Dict[str, List[Dict]] = {}
+    for event in events:
+        if "agent_id" in event:
+            by_agent.setdefault(str(event["agent_id"]), []).append(event)
+    for agent_id, agent_events in by_agent.items():
+        shared_state.extend(core_agent_events_key(agent_id), agent_events, maxlen=CORE_AGENT_EVENTS_MAX)
+        shared_state.hincr(CORE_AGENT_EVENT_COUNTS_KEY, agent_id, len(agent_events))
+    shared_state.add_members(CORE_AGENTS_TRACKED_KEY, list(by_agent))
+
+def read_agent_events(agent_id: str, limit: int):
+    """(newest `limit` events of the agent, all-time event count)"""
+    return (
+        shared_state.get_list(core_agent_events_key(agent_id), limit),
+        shared_state.get_hash_field(CORE_AGENT_EVENT_COUNTS_KEY, agent_id) or 0
+    )
 
 class CoreEventRequest(BaseModel):
     requester_id: str
@@ -735,11 +983,7 @@ async def write_core_event(request: CoreEventRequest):
             **request.event_data
         }
         
-        core_events_store.append(event)
-        core_stats["events_received"] += 1
-        
-        if "agent_id" in request.event_data:
-            core_stats["agents_tracked"].add(request.event_data["agent_id"])
+        await shared_state.run(record_core_events, [event])
         
         # Forward to Karma (fire-and-forget)
         try:
@@ -754,23 +998,113 @@ async def write_core_event(request: CoreEventRequest):
         logger.error(f"Core event write failed: {e}")
         return {"success": False, "message": str(e)}
 
+def parse_core_event_batch(body: bytes, content_type: str) -> List:
+    """Items of a JSON array or NDJSON body; an unparseable NDJSON line becomes an Exception item"""
+    text = body.decode("utf-8").strip()
+    if "ndjson" not in content_type and text.startswith("["):
+        items = json.loads(text)
+        if not isinstance(items, list):
+            raise ValueError("Expected a JSON array of events")
+        return items
+    items = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            items.append(json.loads(line))
+        except ValueError as e:
+            items.append(ValueError(f"Invalid JSON: {e}"))
+    return items
+
+@app.post("/core/write-events")
+async def write_core_events(request: Request):
+    """
+    Receive a batch of Core events (JSON array or NDJSON of {requester_id, event_data})
+
+    Items are validated independently; valid ones are stored together and forwarded to Karma
+    in one request. The response reports the status of every item by index.
+    """
+    try:
+        items = parse_core_event_batch(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch body: {e}")
+    if len(items) > CORE_EVENTS_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {CORE_EVENTS_BATCH_MAX} events")
+
+    # The middleware admits the request under core_write_batch; every event costs a core_write token
+    decision = await rate_limiter.check(client_id_from_scope(request.scope), "core_write", cost=len(items))
+    if not decision["allowed"]:
+        if len(items) > decision["limit"]:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Batch exceeds the core_write burst of {decision['limit']} events; split it"
+            )
+        raise HTTPException(
+            status_code=429,
+            detail="Rate limit exceeded",
+            headers={name.decode(): value.decode() for name, value in rate_limit_headers(decision)}
+        )
+
+    received_at = datetime.now(timezone.utc).isoformat()
+    accepted = []
+    results = []
+    for index, item in enumerate(items):
+        if isinstance(item, Exception):
+            error = str(item)
+        elif not isinstance(item, dict) or not isinstance(item.get("event_data"), dict):
+            error = "Each event needs an event_data object"
+        elif item.get("requester_id") != "bhiv_core":
+            error = "Unauthorized requester"
+        else:
+            event = {
+                "timestamp": received_at,
+                "requester_id": item["requester_id"],
+                **item["event_data"],
+                "event_id": str(uuid.uuid4())
+            }
+            accepted.append(event)
+            results.append({"index": index, "status": "accepted", "event_id": event["event_id"]})
+            continue
+        results.append({"index": index, "status": "rejected", "error": error})
+
+    if accepted:
+        await shared_state.run(record_core_events, accepted)
+
+        # Forward to Karma in one request (fire-and-forget)
+        try:
+            from integration.karma_forwarder import karma_forwarder
+            asyncio.create_task(karma_forwarder.forward_agent_events(accepted))
+        except Exception as karma_error:
+            logger.debug(f"Karma batch forward failed (non-blocking): {karma_error}")
+
+    logger.info(f"Core event batch received: {len(accepted)} accepted, {len(items) - len(accepted)} rejected")
+    return {
+        "success": len(accepted) == len(items),
+        "accepted": len(accepted),
+        "rejected": len(items) - len(accepted),
+        "results": results
+    }
+
 @app.get("/core/events")
 async def get_core_events(limit: int = Query(100, ge=1, le=1000)):
     """Get Core events stored in Bucket"""
+    events = await shared_state.run(shared_state.get_list, CORE_EVENTS_KEY, limit)
     return {
-        "events": core_events_store[-limit:],
-        "count": len(core_events_store),
-        "showing": min(limit, len(core_events_store))
+        "events": events,
+        "count": await shared_state.run(shared_state.list_length, CORE_EVENTS_KEY),
+        "showing": len(events)
     }
 
 @app.get("/core/stats")
 async def get_core_stats():
     """Get Core integration statistics"""
+    tracked_agents = await shared_state.run(shared_state.get_members, CORE_AGENTS_TRACKED_KEY)
     return {
         "stats": {
-            "total_events": core_stats["events_received"],
-            "agents_with_context": len(core_stats["agents_tracked"]),
-            "tracked_agents": list(core_stats["agents_tracked"])
+            "total_events": await shared_state.run(shared_state.get_counter, CORE_EVENTS_RECEIVED_KEY),
+            "agents_with_context": len(tracked_agents),
+            "tracked_agents": sorted(tracked_agents)
         },
         "integration_status": "active"
     }
@@ -784,14 +1118,14 @@ async def read_core_context(
     if requester_id != "bhiv_core":
         raise HTTPException(status_code=403, detail="Unauthorized requester")
     
-    agent_events = [e for e in core_events_store if e.get("agent_id") == agent_id]
+    agent_events, event_count = await shared_state.run(read_agent_events, agent_id, 10)
     
     if agent_events:
         return {
             "success": True,
             "context": {
                 "agent_id": agent_id,
-                "event_count": len(agent_events),
+                "event_count": event_count,
                 "last_updated": agent_events[-1].get("timestamp"),
                 "recent_event_types": list(set(e.get("event_type") for e in agent_events[-10:]))
             }
@@ -953,6 +1287,23 @@ async def get_dsar():
     """Get Data Subject Access Request process"""
     return get_dsar_process()
 
+@app.get("/governance/retention/sweeper")
+async def get_retention_sweeper_status():
+    """Get retention sweeper status, policies and totals"""
+    return {
+        "sweeper": retention_sweeper.get_status(),
+        "sweep_policies": get_sweep_policies()
+    }
+
+@app.post("/governance/retention/sweeper/run")
+async def run_retention_sweep():
+    """Run one retention sweep immediately (batched and throttled)"""
+    try:
+        return await retention_sweeper.sweep_all()
+    except Exception as e:
+        logger.error(f"Retention sweep failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Retention sweep failed: {str(e)}")
+
 @app.post("/governance/retention/calculate")
 async def calculate_retention(
     artifact_type: str = Query(..., description="Artifact type to calculate retention for"),
@@ -1320,6 +1671,7 @@ async def get_all_threats():
     return {
         "threats": BucketThreatModel.get_all_threats(),
         "total_threats": len(BucketThreatModel.THREATS),
+        "detections": BucketThreatModel.get_detection_counts(),
         "reference": "docs/14_bucket_threat_model.md"
     }
 
@@ -1341,6 +1693,7 @@ async def scan_for_threats(data: Dict):
     
     detected_threats = BucketThreatModel.scan_for_threats(data)
     has_critical = BucketThreatModel.has_critical_threats(detected_threats)
+    BucketThreatModel.record_detections(detected_threats)
     
     return {
         "threats_detected": len(detected_threats),
@@ -1498,6 +1851,28 @@ async def get_alert_history(
         "total_in_history": len(scale_monitor.alert_history)
     }
 
+@app.get("/metrics/event-bus")
+async def get_event_bus_metrics():
+    """Get per-subscriber event bus lag, drops, timeouts and queue depth"""
+    return {
+        **event_bus.get_metrics(),
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_prometheus_metrics():
+    """Prometheus text exposition (merged across workers when METRICS_MULTIPROC_DIR is set)"""
+    body = await asyncio.to_thread(metrics.render) if metrics.multiproc_dir else metrics.render()
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/metrics/tracing")
+async def get_tracing_metrics():
+    """Get tracing configuration and trace/export counters"""
+    return {
+        **tracer.get_stats(),
+        "timestamp": datetime.now(timezone.utc).isoformat()
+    }
+
 @app.post("/metrics/record-query-latency")
 async def record_query_latency(
     latency_ms: float = Query(..., description="Query latency in milliseconds")
@@ -1512,6 +1887,54 @@ async def record_query_latency(
         "recorded_at": datetime.now(timezone.utc).isoformat()
     }
 
+# ============================================================================
+# RATE LIMIT ADMIN ENDPOINTS (runtime tuning, no restart required)
+# ============================================================================
+
+class RateLimitUpdate(BaseModel):
+    rate_per_sec: float = Field(..., gt=0, description="Sustained tokens per second per client")
+    burst: int = Field(..., ge=1, description="Bucket capacity (burst allowance)")
+    description: Optional[str] = Field(None, description="Optional description of the route class")
+
+def _require_admin(admin_token: Optional[str]):
+    from config.rate_limits import RATE_LIMIT_CONFIG
+
+    expected = RATE_LIMIT_CONFIG["admin_token"]
+    if not expected:
+        raise HTTPException(status_code=403, detail="Rate limit admin is disabled; set BUCKET_ADMIN_TOKEN")
+    if not admin_token or not hmac.compare_digest(admin_token, expected):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/admin/rate-limits")
+async def get_rate_limits(x_admin_token: Optional[str] = Header(None)):
+    """Get current rate limits per route class and allow/limit counters"""
+    _require_admin(x_admin_token)
+    await rate_limiter.refresh_settings(force=True)
+    return rate_limiter.get_limits()
+
+@app.put("/admin/rate-limits/{route_class}")
+async def update_rate_limit(route_class: str, update: RateLimitUpdate, x_admin_token: Optional[str] = Header(None)):
+    """Update the rate limit for a route class at runtime"""
+    _require_admin(x_admin_token)
+    await rate_limiter.refresh_settings(force=True)
+    result = rate_limiter.update_limit(route_class, update.rate_per_sec, update.burst, update.description)
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail={"message": "Invalid rate limit", "errors": result["errors"]})
+    await rate_limiter.publish_settings()
+    return result
+
+@app.post("/admin/rate-limits/enabled")
+async def set_rate_limiting_enabled(
+    enabled: bool = Query(..., description="Enable or disable rate limiting"),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """Enable or disable rate limiting without a restart"""
+    _require_admin(x_admin_token)
+    await rate_limiter.refresh_settings(force=True)
+    rate_limiter.set_enabled(enabled)
+    await rate_limiter.publish_settings()
+    return {"success": True, "enabled": rate_limiter.enabled}
+
 @app.get("/governance/scale/certification")
 async def get_scale_certification():
     """Get scale readiness certification status"""
@@ -2189,7 +2612,9 @@ async def validate_core_request(
     if not request_data:
         raise HTTPException(status_code=400, detail="request_data required")
     
-    validation_result = core_boundary_enforcer.validate_request(
+    # Violations are recorded in shared state; keep its Redis round trips off the event loop
+    validation_result = await shared_state.run(
+        core_boundary_enforcer.validate_request,
         requester_id=requester_id,
         operation_type=operation_type,
         target_resource=target_resource,
@@ -2198,14 +2623,16 @@ async def validate_core_request(
     )
     
     if not validation_result["allowed"]:
-        for violation in validation_result["violations"]:
-            core_violation_handler.handle_violation(
-                violation_type=violation["type"],
-                severity=violation["severity"],
-                details=violation,
-                requester_id=requester_id,
-                context={"operation": operation_type, "resource": target_resource}
-            )
+        def handle_violations():
+            for violation in validation_result["violations"]:
+                core_violation_handler.handle_violation(
+                    violation_type=violation["type"],
+                    severity=violation["severity"],
+                    details=violation,
+                    requester_id=requester_id,
+                    context={"operation": operation_type, "resource": target_resource}
+                )
+        await shared_state.run(handle_violations)
         
         raise HTTPException(status_code=403, detail={
             "message": "Request violates constitutional boundaries",
@@ -2309,8 +2736,10 @@ async def get_violations_summary(
     Get summary of boundary violations
     Returns violation statistics and trends
     """
-    boundary_summary = core_boundary_enforcer.get_violation_summary(hours)
-    handler_report = core_violation_handler.get_violation_report(hours)
+    boundary_summary, handler_report = await asyncio.gather(
+        shared_state.run(core_boundary_enforcer.get_violation_summary, hours),
+        shared_state.run(core_violation_handler.get_violation_report, hours)
+    )
     
     return {
         "period_hours": hours,
@@ -2327,7 +2756,7 @@ async def get_violations_report(
     Get detailed violation report
     Includes escalations, responses, and trends
     """
-    return core_violation_handler.get_violation_report(hours)
+    return await shared_state.run(core_violation_handler.get_violation_report, hours)
 
 @app.post("/constitutional/violations/handle")
 async def handle_violation_manually(
@@ -2344,7 +2773,8 @@ async def handle_violation_manually(
     if not details:
         raise HTTPException(status_code=400, detail="details required")
     
-    response = core_violation_handler.handle_violation(
+    response = await shared_state.run(
+        core_violation_handler.handle_violation,
         violation_type=violation_type,
         severity=severity,
         details=details,
@@ -2364,7 +2794,7 @@ async def get_constitutional_status():
     Get overall constitutional governance status
     Returns health of boundary enforcement system
     """
-    recent_violations = core_boundary_enforcer.get_violation_summary(24)
+    recent_violations = await shared_state.run(core_boundary_enforcer.get_violation_summary, 24)
     
     return {
         "status": "active",
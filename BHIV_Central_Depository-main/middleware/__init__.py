@@ -1,8 +1,9 @@
 """
 Middleware Package
-Contains audit and monitoring middleware for BHIV Bucket.
+Contains audit, rate limiting and monitoring middleware for BHIV Bucket.
 """
 
 from .audit_middleware import AuditMiddleware
+from .rate_limiter import RateLimitMiddleware, RateLimiter
 
-__all__ = ["AuditMiddleware"]
+__all__ = ["AuditMiddleware", "RateLimitMiddleware", "RateLimiter"]
\ No newline at end of file
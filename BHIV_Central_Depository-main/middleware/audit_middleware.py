@@ -22,7 +22,28 @@ class AuditMiddleware:
             logger.info("Audit middleware initialized with MongoDB")
         else:
             logger.warning("Audit middleware using in-memory fallback (not persistent)")
-    
+
+    def attach_db(self, db) -> int:
+        """
+        Switch to MongoDB once it becomes available (MongoDB connects in the background at startup)
+
+        Entries recorded in memory meanwhile are persisted so the trail has no gap.
+
+        Returns:
+            Number of in-memory entries flushed to MongoDB
+        """
+        if db is None or self.audit_collection is not None:
+            return 0
+
+        collection = db.audit_logs
+        pending = [{k: v for k, v in entry.items() if k != "_id"} for entry in self.in_memory_audit]
+        if pending:
+            collection.insert_many(pending)
+        self.audit_collection = collection
+        self.in_memory_audit = []
+        logger.info(f"Audit middleware attached to MongoDB ({len(pending)} in-memory entries persisted)")
+        return len(pending)
+
     async def log_operation(
         self,
         operation_type: str,
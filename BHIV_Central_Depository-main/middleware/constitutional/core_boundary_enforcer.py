@@ -8,6 +8,7 @@ from typing import Dict, List, Optional, Any
 from datetime import datetime
 from enum import Enum
 from utils.logger import get_logger
+from middleware.constitutional.violation_store import ViolationStore
 
 logger = get_logger(__name__)
 
@@ -43,8 +44,13 @@ class ProhibitedAction(Enum):
 class CoreBoundaryEnforcer:
     """Enforces constitutional boundaries between Core and Bucket"""
     
-    def __init__(self):
-        self.violation_log = []
+    def __init__(self, state=None):
+        self.violations = ViolationStore(
+            "core_boundary",
+            {"type": "type", "severity": "severity", "source": "requester_id"},
+            timestamp_field="logged_at",
+            state=state
+        )
         self.allowed_capabilities = set(cap.value for cap in CoreCapability)
         self.prohibited_actions = set(action.value for action in ProhibitedAction)
         logger.info("Core Boundary Enforcer initialized")
@@ -291,33 +297,25 @@ class CoreBoundaryEnforcer:
     def log_violation(self, violation: Dict[str, Any]):
         """Log boundary violation for audit and escalation"""
         violation["logged_at"] = datetime.utcnow().isoformat()
-        self.violation_log.append(violation)
+        self.violations.record(violation)
         logger.error(f"Boundary violation logged: {violation}")
     
+    @property
+    def violation_log(self) -> List[Dict[str, Any]]:
+        """Most recent violations (bounded)"""
+        return self.violations.recent(self.violations.retention_hours)
+    
     def get_violation_summary(self, hours: int = 24) -> Dict[str, Any]:
         """Get summary of violations in last N hours"""
-        from datetime import timedelta
-        
-        cutoff = datetime.utcnow() - timedelta(hours=hours)
-        recent_violations = [
-            v for v in self.violation_log
-            if datetime.fromisoformat(v["logged_at"]) > cutoff
-        ]
+        counts = self.violations.summary(hours)
         
         return {
-            "total_violations": len(recent_violations),
-            "by_type": self._group_by_type(recent_violations),
-            "critical_count": len([v for v in recent_violations if v.get("severity") == "CRITICAL"]),
-            "violations": recent_violations
+            "total_violations": counts["total"],
+            "by_type": counts["type"],
+            "by_source": counts["source"],
+            "critical_count": counts["severity"].get("CRITICAL", 0),
+            "violations": self.violations.recent(hours)
         }
-    
-    def _group_by_type(self, violations: List[Dict]) -> Dict[str, int]:
-        """Group violations by type"""
-        grouped = {}
-        for v in violations:
-            vtype = v.get("type", "unknown")
-            grouped[vtype] = grouped.get(vtype, 0) + 1
-        return grouped
 
 # Global enforcer instance
 core_boundary_enforcer = CoreBoundaryEnforcer()
@@ -0,0 +1,205 @@
+"""
+BHIV Violation Store
+Bounded, time-bucketed violation history for constitutional enforcement
+- Per-bucket counters (total, plus one hash per dimension: type, severity, source, ...) updated on every record
+- Summaries read every bucket's total and dimension hashes in two batched calls (one round trip each on Redis),
+  so their cost does not grow with the number of violations or distinct values
+- The store calls shared state synchronously; async handlers call it through shared_state.run so Redis round
+  trips stay off the event loop
+- Each bucket keeps at most VIOLATION_MAX_VALUES distinct values per dimension; the rest count as "other",
+  so high-cardinality dimensions (requesters) stay bounded
+- Only the newest VIOLATION_RECENT_LIMIT violations are kept in full; buckets expire after the retention window
+- Optional persistence of each violation to the audit store
+"""
+
+import asyncio
+import math
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from utils.logger import get_logger
+from utils.shared_state import shared_state
+
+logger = get_logger(__name__)
+
+# Bucket of the values past a dimension's max_values
+OTHER = "other"
+
+VIOLATION_STORE_CONFIG = {
+    "bucket_seconds": int(os.getenv("VIOLATION_BUCKET_SECONDS", "3600")),
+    "retention_hours": int(os.getenv("VIOLATION_RETENTION_HOURS", "168")),
+    "recent_limit": int(os.getenv("VIOLATION_RECENT_LIMIT", "500")),
+    "max_values": int(os.getenv("VIOLATION_MAX_VALUES", "100")),
+    "audit_persist": os.getenv("VIOLATION_AUDIT_PERSIST", "false").lower() == "true"
+}
+
+
+def _epoch(timestamp: Any) -> float:
+    if not timestamp:
+        return time.time()
+    parsed = datetime.fromisoformat(str(timestamp))
+    if parsed.tzinfo is None:
+        # Violation timestamps are naive utcnow() values
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _field(record: Dict[str, Any], path: str) -> str:
+    value: Any = record
+    for part in path.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return "unknown" if value is None else str(value)
+
+
+class ViolationStore:
+    """Time-bucketed violation counters plus a bounded list of recent violations"""
+
+    def __init__(
+        self,
+        name: str,
+        dimensions: Dict[str, str],
+        timestamp_field: str = "timestamp",
+        state=None,
+        bucket_seconds: Optional[int] = None,
+        retention_hours: Optional[int] = None,
+        recent_limit: Optional[int] = None,
+        max_values: Optional[int] = None,
+        audit_middleware=None
+    ):
+        """
+        Args:
+            name: Key namespace in shared state
+            dimensions: Counter name -> violation field path (dotted for nested fields)
+            timestamp_field: Field holding the ISO timestamp of the violation
+            max_values: Distinct values counted per bucket and dimension (and reported by summary);
+                further values are counted under OTHER
+        """
+        self.name = name
+        self.dimensions = dimensions
+        self.timestamp_field = timestamp_field
+        self.state = state or shared_state
+        self.bucket_seconds = bucket_seconds or VIOLATION_STORE_CONFIG["bucket_seconds"]
+        self.retention_hours = retention_hours or VIOLATION_STORE_CONFIG["retention_hours"]
+        self.recent_limit = recent_limit or VIOLATION_STORE_CONFIG["recent_limit"]
+        self.max_values = max_values or VIOLATION_STORE_CONFIG["max_values"]
+        self.audit_middleware = audit_middleware
+        self._audit_loop = None
+        self._last_bucket = None
+
+    def _key(self, *parts: Any) -> str:
+        return ":".join([self.name, *map(str, parts)])
+
+    def _bucket(self, epoch: float) -> int:
+        return int(epoch // self.bucket_seconds)
+
+    def attach_audit(self, audit_middleware):
+        """Persist every recorded violation through the audit middleware
+
+        Called from the app's event loop; violations recorded in worker threads are persisted on it.
+        """
+        self.audit_middleware = audit_middleware
+        try:
+            self._audit_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._audit_loop = None
+
+    def record(self, violation: Dict[str, Any]):
+        """Count a violation in its time bucket and keep it among the recent violations"""
+        bucket = self._bucket(_epoch(violation.get(self.timestamp_field)))
+
+        self.state.incr(self._key("recorded_total"))
+        self.state.incr(self._key("bucket", bucket, "total"))
+        # Each bucket keeps max_values values per dimension; later new values count as OTHER
+        self.state.hincr_capped(
+            [(self._key("bucket", bucket, dimension), _field(violation, path)) for dimension, path in self.dimensions.items()],
+            self.max_values,
+            OTHER
+        )
+        self.state.append(self._key("recent"), violation, maxlen=self.recent_limit)
+
+        if bucket != self._last_bucket:
+            self.state.add_members(self._key("buckets"), [bucket])
+            self._prune(bucket)
+            self._last_bucket = bucket
+
+        if self.audit_middleware is not None:
+            self._persist(violation)
+
+    def _prune(self, current_bucket: int):
+        """Drop the counters of buckets that fell out of the retention window"""
+        oldest = current_bucket - math.ceil(self.retention_hours * 3600 / self.bucket_seconds) + 1
+        expired = [b for b in map(int, self.state.get_members(self._key("buckets"))) if b < oldest]
+        if not expired:
+            return
+        keys = []
+        for bucket in expired:
+            keys.append(self._key("bucket", bucket, "total"))
+            keys.extend(self._key("bucket", bucket, dimension) for dimension in self.dimensions)
+        self.state.delete(*keys)
+        self.state.remove_members(self._key("buckets"), expired)
+
+    def _persist(self, violation: Dict[str, Any]):
+        """Write the violation to the audit trail (fire-and-forget)"""
+        try:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+            if loop is None and self._audit_loop is None:
+                raise RuntimeError("no event loop to persist on")
+            operation = self.audit_middleware.log_operation(
+                operation_type="BOUNDARY_VIOLATION",
+                artifact_id="system",
+                requester_id=violation.get("requester_id", "unknown"),
+                integration_id=self.name,
+                data_after=violation,
+                status="violation_detected",
+                error_message=f"{violation.get('violation_type', violation.get('type'))}: {violation.get('severity')}"
+            )
+            if loop is not None:
+                loop.create_task(operation)
+            else:
+                # Recorded in a worker thread (shared_state.run)
+                asyncio.run_coroutine_threadsafe(operation, self._audit_loop)
+        except Exception as e:
+            logger.error(f"Failed to log violation to audit: {e}")
+
+    def _window(self, hours: int) -> List[int]:
+        current = self._bucket(time.time())
+        oldest = current - math.ceil(hours * 3600 / self.bucket_seconds) + 1
+        return sorted(b for b in map(int, self.state.get_members(self._key("buckets"))) if oldest <= b <= current)
+
+    def summary(self, hours: int = 24) -> Dict[str, Any]:
+        """Counts for the last N hours (bucket granularity), per dimension"""
+        buckets = self._window(hours)
+        total = sum(self.state.get_counters(self._key("bucket", bucket, "total") for bucket in buckets))
+        keys = [(dimension, self._key("bucket", bucket, dimension)) for bucket in buckets for dimension in self.dimensions]
+        grouped: Dict[str, Dict[str, int]] = {dimension: {} for dimension in self.dimensions}
+        for (dimension, _), values in zip(keys, self.state.get_hashes(key for _, key in keys)):
+            counts = grouped[dimension]
+            for value, count in values.items():
+                if count:
+                    counts[value] = counts.get(value, 0) + count
+        return {"total": total, **{dimension: self._top(counts) for dimension, counts in grouped.items()}}
+
+    def _top(self, counts: Dict[str, int]) -> Dict[str, int]:
+        """The max_values largest counts; the remainder is folded into OTHER"""
+        named = [item for item in counts.items() if item[0] != OTHER]
+        if len(named) <= self.max_values:
+            return counts
+        top = dict(sorted(named, key=lambda item: item[1], reverse=True)[:self.max_values])
+        top[OTHER] = sum(counts.values()) - sum(top.values())
+        return top
+
+    def recent(self, hours: int = 24, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Recent violations (newest recent_limit kept) within the last N hours, oldest first"""
+        cutoff = time.time() - hours * 3600
+        violations = [
+            v for v in self.state.get_list(self._key("recent"))
+            if _epoch(v.get(self.timestamp_field)) > cutoff
+        ]
+        return violations[-limit:] if limit else violations
+
+    def recorded_total(self) -> int:
+        return self.state.get_counter(self._key("recorded_total"))
@@ -0,0 +1,39 @@
+"""
+BHIV Bucket Metrics Middleware
+Records request latency per route template in bhiv_http_request_duration_seconds
+"""
+
+import time
+from utils.metrics import HTTP_REQUEST_SECONDS, METRICS_CONFIG
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware; unmatched paths are grouped under one route label to bound cardinality"""
+
+    def __init__(self, app, histogram=None):
+        self.app = app
+        self.histogram = histogram or HTTP_REQUEST_SECONDS
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_CONFIG["enabled"]:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            self.histogram.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=getattr(route, "path", None) or "unmatched",
+                status=status[0]
+            )
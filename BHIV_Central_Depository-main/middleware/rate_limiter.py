@@ -0,0 +1,404 @@
+"""
+BHIV Bucket Rate Limit Middleware
+Token bucket rate limiting keyed by peer IP (or a trusted caller's client id) and route class
+Runs in-process by default, or shares buckets and admin limit changes across workers through Redis
+"""
+
+import os
+import time
+import json
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, Optional, Tuple
+from config.rate_limits import (
+    RATE_LIMIT_CONFIG,
+    DEFAULT_ROUTE_LIMITS,
+    classify_route,
+    validate_route_limit
+)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Atomic refill-and-take for one bucket; tokens are returned as a string so
+# Redis does not truncate the fractional part
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1])
+local ts = tonumber(data[2])
+if tokens == nil then
+    tokens = burst
+    ts = now
+end
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class TokenBucket:
+    """Single token bucket; refilled lazily on each take"""
+
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, burst: float, now: float):
+        self.tokens = float(burst)
+        self.updated_at = now
+
+    def take(self, rate: float, burst: float, now: float, cost: float = 1.0) -> Tuple[bool, float]:
+        """Refill for elapsed time and try to take `cost` tokens"""
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(float(burst), self.tokens + elapsed * rate)
+        self.updated_at = now
+
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True, self.tokens
+        return False, self.tokens
+
+
+class InMemoryRateLimitBackend:
+    """Per-process token buckets with LRU eviction of idle clients"""
+
+    name = "memory"
+    shared_settings = False
+
+    def __init__(self, max_buckets: int = 10000, clock=time.monotonic):
+        self.max_buckets = max_buckets
+        self.clock = clock
+        self.buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: int, cost: float = 1.0) -> Tuple[bool, float]:
+        now = self.clock()
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(burst, now)
+            self.buckets[key] = bucket
+            if len(self.buckets) > self.max_buckets:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+        return bucket.take(rate, burst, now, cost)
+
+
+class RedisRateLimitBackend:
+    """Token buckets shared across workers via a Redis Lua script
+
+    Falls back to the in-process backend when Redis is unreachable so a Redis
+    outage degrades to per-worker limiting instead of failing requests. After a
+    failure the backend stays on the fallback for cooldown_seconds (circuit open)
+    instead of waiting out the socket timeout on every request, then tries Redis
+    again with the next request.
+    """
+
+    name = "redis"
+    shared_settings = True
+
+    def __init__(
+        self,
+        client,
+        key_prefix: str = "ratelimit",
+        fallback: Optional[InMemoryRateLimitBackend] = None,
+        cooldown_seconds: Optional[float] = None,
+        clock=time.monotonic
+    ):
+        self.client = client
+        self.key_prefix = key_prefix
+        self.fallback = fallback or InMemoryRateLimitBackend()
+        self.cooldown_seconds = RATE_LIMIT_CONFIG["redis_cooldown_seconds"] if cooldown_seconds is None else cooldown_seconds
+        self.clock = clock
+        self._open_until: Optional[float] = None
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    @property
+    def circuit_open(self) -> bool:
+        return self._open_until is not None and self.clock() < self._open_until
+
+    async def take(self, key: str, rate: float, burst: int, cost: float = 1.0) -> Tuple[bool, float]:
+        if self.circuit_open:
+            return await self.fallback.take(key, rate, burst, cost)
+        try:
+            allowed, tokens = await self._script(
+                keys=[f"{self.key_prefix}:{key}"],
+                args=[rate, burst, time.time(), cost]
+            )
+        except Exception as e:
+            self._open_until = self.clock() + self.cooldown_seconds
+            logger.warning(
+                f"Redis rate limit backend unavailable, using in-process buckets for {self.cooldown_seconds}s: {e}"
+            )
+            return await self.fallback.take(key, rate, burst, cost)
+        if self._open_until is not None:
+            self._open_until = None
+            logger.info("Redis rate limit backend recovered")
+        return bool(int(allowed)), float(tokens)
+
+    async def load_settings(self) -> Optional[Dict[str, Any]]:
+        """Admin overrides saved by any worker, or None if none were saved"""
+        if self.circuit_open:
+            return None
+        raw = await self.client.get(f"{self.key_prefix}:settings")
+        return json.loads(raw) if raw else None
+
+    async def save_settings(self, settings: Dict[str, Any]):
+        await self.client.set(f"{self.key_prefix}:settings", json.dumps(settings))
+
+
+class RateLimiter:
+    """Applies per-route-class limits to client buckets and tracks decisions
+
+    With a backend that shares settings (Redis), admin changes are saved there and
+    every worker picks them up within settings_refresh_seconds. Counters in stats
+    stay per worker.
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        limits: Optional[Dict[str, Dict[str, Any]]] = None,
+        enabled: bool = True,
+        settings_refresh_seconds: Optional[float] = None,
+        clock=time.monotonic
+    ):
+        self.backend = backend or InMemoryRateLimitBackend(RATE_LIMIT_CONFIG["max_tracked_clients"])
+        self.limits = {name: dict(rule) for name, rule in (limits or DEFAULT_ROUTE_LIMITS).items()}
+        self.enabled = enabled
+        self.stats = {name: {"allowed": 0, "limited": 0} for name in self.limits}
+        self.settings_refresh_seconds = (
+            RATE_LIMIT_CONFIG["settings_refresh_seconds"] if settings_refresh_seconds is None else settings_refresh_seconds
+        )
+        self.clock = clock
+        self._settings_checked_at: Optional[float] = None
+
+    def _settings(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "limits": {name: dict(rule) for name, rule in self.limits.items()}}
+
+    async def refresh_settings(self, force: bool = False):
+        """Apply admin changes other workers saved to the shared backend"""
+        if not getattr(self.backend, "shared_settings", False):
+            return
+        now = self.clock()
+        if not force and self._settings_checked_at is not None and now - self._settings_checked_at < self.settings_refresh_seconds:
+            return
+        self._settings_checked_at = now
+        try:
+            settings = await self.backend.load_settings()
+        except Exception as e:
+            logger.warning(f"Could not read shared rate limit settings, keeping local ones: {e}")
+            return
+        if settings:
+            self.enabled = bool(settings.get("enabled", self.enabled))
+            for name, rule in settings.get("limits", {}).items():
+                if name in self.limits:
+                    self.limits[name] = dict(rule)
+
+    async def publish_settings(self):
+        """Save this worker's limits and enabled flag for the other workers"""
+        if getattr(self.backend, "shared_settings", False):
+            await self.backend.save_settings(self._settings())
+
+    async def check(self, client_id: str, route_class: str, cost: float = 1.0) -> Dict[str, Any]:
+        """Take a token for this client/route class and return the decision"""
+        await self.refresh_settings()
+        rule = self.limits.get(route_class)
+        if rule is None or not self.enabled:
+            return {"allowed": True, "route_class": route_class, "limited": False}
+
+        rate = rule["rate_per_sec"]
+        burst = rule["burst"]
+        allowed, tokens = await self.backend.take(f"{route_class}:{client_id}", rate, burst, cost)
+
+        self.stats.setdefault(route_class, {"allowed": 0, "limited": 0})
+        self.stats[route_class]["allowed" if allowed else "limited"] += 1
+
+        # Seconds until the bucket is full again / until one more token exists
+        reset_after = (burst - tokens) / rate
+        retry_after = 0.0 if allowed else (cost - tokens) / rate
+
+        return {
+            "allowed": allowed,
+            "limited": True,
+            "route_class": route_class,
+            "limit": burst,
+            "remaining": max(0, int(tokens)),
+            "reset_after": reset_after,
+            "retry_after": retry_after,
+            "policy": f"{burst};w={max(1, round(burst / rate))}"
+        }
+
+    def get_limits(self) -> Dict[str, Any]:
+        """Current limits, backend and counters (admin view)"""
+        return {
+            "enabled": self.enabled,
+            "backend": self.backend.name,
+            "fallback_active": bool(getattr(self.backend, "circuit_open", False)),
+            "limits": {name: dict(rule) for name, rule in self.limits.items()},
+            "stats": {name: dict(counts) for name, counts in self.stats.items()}
+        }
+
+    def update_limit(self, route_class: str, rate_per_sec: Any, burst: Any, description: Optional[str] = None) -> Dict[str, Any]:
+        """Change a route class limit at runtime; takes effect on the next request
+
+        Applies to this worker; call publish_settings() to share it with the others.
+        """
+        if route_class not in self.limits:
+            return {"success": False, "errors": [f"Unknown route class: {route_class}. Valid: {sorted(self.limits)}"]}
+
+        validation = validate_route_limit(rate_per_sec, burst)
+        if not validation["valid"]:
+            return {"success": False, "errors": validation["errors"]}
+
+        previous = dict(self.limits[route_class])
+        rule = dict(previous)
+        rule["rate_per_sec"] = float(rate_per_sec)
+        rule["burst"] = int(burst)
+        if description is not None:
+            rule["description"] = description
+        # Buckets cap at the new burst on their next refill, so no reset is needed
+        self.limits[route_class] = rule
+
+        logger.info(f"Rate limit updated for {route_class}: {rule['rate_per_sec']}/s burst {rule['burst']}")
+        return {"success": True, "route_class": route_class, "previous": previous, "current": dict(rule)}
+
+    def set_enabled(self, enabled: bool):
+        self.enabled = bool(enabled)
+        logger.info(f"Rate limiting {'enabled' if self.enabled else 'disabled'}")
+
+
+def rate_limit_headers(decision: Dict[str, Any]) -> list:
+    """RateLimit-* (IETF draft) plus legacy X-RateLimit-* headers as ASGI header pairs"""
+    reset = str(max(0, int(decision["reset_after"] + 0.999)))
+    headers = [
+        (b"ratelimit-limit", str(decision["limit"]).encode()),
+        (b"ratelimit-remaining", str(decision["remaining"]).encode()),
+        (b"ratelimit-reset", reset.encode()),
+        (b"ratelimit-policy", decision["policy"].encode()),
+        (b"x-ratelimit-limit", str(decision["limit"]).encode()),
+        (b"x-ratelimit-remaining", str(decision["remaining"]).encode()),
+        (b"x-ratelimit-reset", reset.encode()),
+    ]
+    if not decision["allowed"]:
+        headers.append((b"retry-after", str(max(1, int(decision["retry_after"] + 0.999))).encode()))
+    return headers
+
+
+def client_id_from_scope(
+    scope,
+    client_id_header: Optional[bytes] = None,
+    trusted_client_ips: Optional[Iterable[str]] = None
+) -> str:
+    """The key the middleware limits on: the peer IP, or the client id header of a trusted peer
+
+    Any caller can set the header, so it is only honoured from peers in trusted_client_ips
+    (RATE_LIMIT_TRUSTED_CLIENT_IPS); otherwise a new value per request would get a fresh bucket.
+    """
+    client = scope.get("client")
+    peer = client[0] if client else None
+    trusted = RATE_LIMIT_CONFIG["trusted_client_ips"] if trusted_client_ips is None else trusted_client_ips
+    if peer is not None and peer in trusted:
+        client_id_header = client_id_header or RATE_LIMIT_CONFIG["client_id_header"].lower().encode()
+        for name, value in scope.get("headers", []):
+            if name == client_id_header and value:
+                return value.decode("latin-1")
+    return f"ip:{peer}" if peer is not None else "ip:unknown"
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware so the limiter adds no per-request task or body copy"""
+
+    def __init__(
+        self,
+        app,
+        limiter: RateLimiter,
+        client_id_header: Optional[str] = None,
+        trusted_client_ips: Optional[Iterable[str]] = None
+    ):
+        self.app = app
+        self.limiter = limiter
+        self.client_id_header = (client_id_header or RATE_LIMIT_CONFIG["client_id_header"]).lower().encode()
+        self.trusted_client_ips = trusted_client_ips
+
+    def _client_id(self, scope) -> str:
+        return client_id_from_scope(scope, self.client_id_header, self.trusted_client_ips)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        await self.limiter.refresh_settings()
+        if not self.limiter.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        route_class = classify_route(scope["method"], scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        client_id = self._client_id(scope)
+        decision = await self.limiter.check(client_id, route_class)
+        if not decision.get("limited"):
+            await self.app(scope, receive, send)
+            return
+
+        headers = rate_limit_headers(decision)
+
+        if not decision["allowed"]:
+            logger.warning(f"Rate limit exceeded: client={client_id} route_class={route_class} path={scope['path']}")
+            body = json.dumps({
+                "detail": "Rate limit exceeded",
+                "route_class": route_class,
+                "retry_after_seconds": round(decision["retry_after"], 3)
+            }).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())] + headers
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message = dict(message)
+                message["headers"] = list(message.get("headers", [])) + headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+def create_rate_limiter() -> RateLimiter:
+    """Build the limiter from RATE_LIMIT_CONFIG; Redis mode needs REDIS_HOST reachable"""
+    backend = None
+    if RATE_LIMIT_CONFIG["backend"] == "redis":
+        try:
+            import redis.asyncio as aioredis
+
+            client = aioredis.Redis(
+                host=os.getenv("REDIS_HOST", "localhost"),
+                port=int(os.getenv("REDIS_PORT", 6379)),
+                password=os.getenv("REDIS_PASSWORD", None),
+                decode_responses=True,
+                socket_timeout=1,
+                socket_connect_timeout=1
+            )
+            backend = RedisRateLimitBackend(client, RATE_LIMIT_CONFIG["redis_key_prefix"])
+            logger.info("Rate limiter using shared Redis backend")
+        except Exception as e:
+            logger.warning(f"Redis rate limit backend unavailable, using in-process buckets: {e}")
+
+    return RateLimiter(backend=backend, enabled=RATE_LIMIT_CONFIG["enabled"])
+
+
+# Global limiter instance
+rate_limiter = create_rate_limiter()
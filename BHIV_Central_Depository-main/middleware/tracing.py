@@ -0,0 +1,46 @@
+"""
+BHIV Bucket Tracing Middleware
+Opens the root span for each HTTP request and adds a Server-Timing header
+"""
+
+from typing import Optional
+from utils.tracing import Tracer, TRACING_CONFIG, tracer as default_tracer
+
+
+class TracingMiddleware:
+    """Pure ASGI middleware; spans created while handling the request nest under its root span"""
+
+    def __init__(self, app, tracer: Optional[Tracer] = None, server_timing: Optional[bool] = None):
+        self.app = app
+        self.tracer = tracer or default_tracer
+        self.server_timing = TRACING_CONFIG["server_timing"] if server_timing is None else server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        root = self.tracer.start_trace(
+            f"{scope['method']} {scope['path']}",
+            **{"http.method": scope["method"], "http.target": scope["path"]}
+        )
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+                if self.server_timing:
+                    message = dict(message)
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing", self.tracer.server_timing(root).encode())
+                    ]
+            await send(message)
+
+        try:
+            with root:
+                await self.app(scope, receive, send_with_timing)
+        finally:
+            # Name by route template once routing has run (keeps span names low-cardinality)
+            route = scope.get("route")
+            if route is not None and getattr(route, "path", None):
+                root.name = f"{scope['method']} {route.path}"
+            self.tracer.finish_trace(root)
@@ -0,0 +1,16 @@
+"""
+Shared fixtures: keep files the app writes at runtime out of the source tree
+"""
+
+import pytest
+import utils.tracing as tracing
+from baskets.checkpoint_store import CHECKPOINT_CONFIG
+
+
+@pytest.fixture(autouse=True)
+def runtime_files_in_tmp(tmp_path, monkeypatch):
+    """Exported spans and basket checkpoints go to the test's tmp_path, not logs/"""
+    export_file = str(tmp_path / "traces" / "spans.otlp.jsonl")
+    monkeypatch.setitem(tracing.TRACING_CONFIG, "export_file", export_file)
+    monkeypatch.setattr(tracing.tracer, "export_file", export_file)
+    monkeypatch.setitem(CHECKPOINT_CONFIG, "directory", str(tmp_path / "checkpoints"))
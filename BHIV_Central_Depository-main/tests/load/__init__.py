@@ -0,0 +1,5 @@
+"""
+Bucket load-test harness
+Boots main.app in-process against MongoDB/Redis stand-ins and a stub Karma server
+Run: python -m tests.load.harness --help (from the Bucket root)
+"""
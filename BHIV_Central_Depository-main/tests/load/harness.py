@@ -0,0 +1,401 @@
+"""
+Bucket Load-Test Harness
+Drives a weighted mix of requests at main.app through an in-process ASGI transport and reports
+throughput and latency percentiles, failing when thresholds or a baseline are exceeded
+- Workloads: run_agent, run_basket, write_event, write_events (batch), read_context, governance
+- MongoDB/Redis/Karma are stand-ins (tests/load/stand_ins.py), so numbers measure Bucket itself
+- Thresholds: absolute limits (tests/load/thresholds.json) and/or a previous report as baseline
+
+Usage (from the Bucket root):
+    python -m tests.load.harness --concurrency 16 --requests 2000 --output load_report.json
+    python -m tests.load.harness --baseline load_report.json --tolerance 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BUCKET_ROOT = Path(__file__).resolve().parents[2]
+if str(BUCKET_ROOT) not in sys.path:
+    sys.path.insert(0, str(BUCKET_ROOT))
+
+import httpx
+from tests.load.stand_ins import StandIns, StubKarmaServer
+
+DEFAULT_THRESHOLDS_FILE = Path(__file__).parent / "thresholds.json"
+SAMPLE_INPUTS_DIR = BUCKET_ROOT / "tests" / "sample_inputs"
+
+# Relative weights of each workload in the default mix
+DEFAULT_MIX = {
+    "write_event": 35,
+    "write_events": 5,
+    "read_context": 25,
+    "governance": 20,
+    "run_agent": 10,
+    "run_basket": 5
+}
+
+PERCENTILES = (50, 90, 95, 99)
+
+GOVERNANCE_PATHS = [
+    "/governance/info",
+    "/governance/snapshot",
+    "/governance/boundary",
+    "/governance/artifact-policy",
+    "/governance/retention/config"
+]
+
+AGENT_IDS = [f"load_agent_{i}" for i in range(20)]
+
+Request = Tuple[str, str, Dict[str, Any]]
+
+
+def _cashflow_input() -> Dict[str, Any]:
+    return json.loads((SAMPLE_INPUTS_DIR / "cashflow_analyzer_input.json").read_text())
+
+
+def _core_event(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "requester_id": "bhiv_core",
+        "event_data": {
+            "event_type": rng.choice(["agent_result", "rl_outcome"]),
+            "agent_id": rng.choice(AGENT_IDS),
+            "task_id": f"task_{rng.randrange(1_000_000)}",
+            "reward": rng.random(),
+            "result": {"status": 200}
+        }
+    }
+
+
+def build_workloads() -> Dict[str, Callable[[random.Random], Request]]:
+    """Workload name -> function returning (method, path, httpx request kwargs)"""
+    cashflow_input = _cashflow_input()
+    return {
+        "run_agent": lambda rng: ("POST", "/run-agent", {
+            "json": {"agent_name": "cashflow_analyzer", "input_data": cashflow_input}
+        }),
+        "run_basket": lambda rng: ("POST", "/run-basket", {
+            "json": {
+                "config": {
+                    "basket_name": "load_test_basket",
+                    "agents": ["cashflow_analyzer"],
+                    "execution_strategy": "sequential"
+                },
+                "input_data": cashflow_input
+            }
+        }),
+        "write_event": lambda rng: ("POST", "/core/write-event", {"json": _core_event(rng)}),
+        "write_events": lambda rng: ("POST", "/core/write-events", {
+            "json": [_core_event(rng) for _ in range(10)]
+        }),
+        "read_context": lambda rng: ("GET", "/core/read-context", {
+            "params": {"agent_id": rng.choice(AGENT_IDS), "requester_id": "bhiv_core"}
+        }),
+        "governance": lambda rng: ("GET", rng.choice(GOVERNANCE_PATHS), {})
+    }
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class LoadReport:
+    """Latencies and errors per workload for one run"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.status_codes: Dict[str, Dict[int, int]] = {}
+        self.elapsed_seconds = 0.0
+        self.extra: Dict[str, Any] = {}
+
+    def record(self, workload: str, seconds: float, status: int):
+        self.latencies.setdefault(workload, []).append(seconds)
+        codes = self.status_codes.setdefault(workload, {})
+        codes[status] = codes.get(status, 0) + 1
+        if status >= 400 or status == 0:
+            self.errors[workload] = self.errors.get(workload, 0) + 1
+
+    @staticmethod
+    def _stats(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+        ordered = sorted(latencies)
+        count = len(ordered)
+        return {
+            "requests": count,
+            "errors": errors,
+            "error_rate": round(errors / count, 4) if count else 0.0,
+            "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": {
+                **{f"p{p}": round(percentile(ordered, p) * 1000, 3) for p in PERCENTILES},
+                "mean": round(sum(ordered) / count * 1000, 3) if count else 0.0,
+                "max": round(ordered[-1] * 1000, 3) if count else 0.0
+            }
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        all_latencies = [value for values in self.latencies.values() for value in values]
+        return {
+            **self._stats(all_latencies, sum(self.errors.values()), self.elapsed_seconds),
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "operations": {
+                name: {
+                    **self._stats(values, self.errors.get(name, 0), self.elapsed_seconds),
+                    "status_codes": {str(code): n for code, n in sorted(self.status_codes[name].items())}
+                }
+                for name, values in sorted(self.latencies.items())
+            },
+            **self.extra
+        }
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    mix: Optional[Dict[str, float]] = None,
+    concurrency: int = 16,
+    requests: Optional[int] = 1000,
+    duration: Optional[float] = None,
+    warmup: int = 0,
+    seed: int = 0
+) -> LoadReport:
+    """
+    Run the workload mix with `concurrency` workers until `requests` are done or `duration` passes
+
+    Warmup requests run first (sequentially) and are not recorded.
+    """
+    mix = mix or DEFAULT_MIX
+    workloads = build_workloads()
+    unknown = set(mix) - set(workloads)
+    if unknown:
+        raise ValueError(f"Unknown workloads: {sorted(unknown)}. Valid: {sorted(workloads)}")
+    names = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in names]
+
+    async def send(rng: random.Random, report: Optional[LoadReport]):
+        name = rng.choices(names, weights)[0]
+        method, path, kwargs = workloads[name](rng)
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+            status = response.status_code
+        except Exception:
+            status = 0
+        if report is not None:
+            report.record(name, time.perf_counter() - start, status)
+
+    warmup_rng = random.Random(seed - 1)
+    for _ in range(warmup):
+        await send(warmup_rng, None)
+
+    report = LoadReport()
+    remaining = [requests if requests is not None else math.inf]
+    deadline = time.perf_counter() + duration if duration else None
+
+    async def worker(index: int):
+        rng = random.Random(seed * 1000 + index)
+        while remaining[0] > 0 and (deadline is None or time.perf_counter() < deadline):
+            remaining[0] -= 1
+            await send(rng, report)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    report.elapsed_seconds = time.perf_counter() - start
+    return report
+
+
+@asynccontextmanager
+async def bucket_app(karma_latency_seconds: float = 0.0, rate_limits: bool = False):
+    """main.app wired to stand-ins; module globals touched here are restored on exit"""
+    karma = StubKarmaServer(latency_seconds=karma_latency_seconds)
+    await karma.start()
+    stand_ins = StandIns().start()
+    import main
+    from integration.karma_forwarder import karma_forwarder
+
+    previous_karma_url = karma_forwarder.karma_url
+    previous_rate_limits = main.rate_limiter.enabled
+    try:
+        karma_forwarder.karma_url = karma.url
+        main.rate_limiter.set_enabled(rate_limits)
+        main.registry.ensure_loaded()
+        main.mongo_client.connect()
+        main.redis_service.connect()
+        main.connect_legacy_redis()
+        main.audit_middleware.attach_db(main.mongo_client.db)
+        main.register_metric_callbacks()
+        yield main.app, karma
+    finally:
+        # Let fire-and-forget Karma forwards finish before the stub goes away
+        pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        if pending:
+            await asyncio.wait(pending, timeout=2.0)
+        karma_forwarder.karma_url = previous_karma_url
+        main.rate_limiter.set_enabled(previous_rate_limits)
+        main.mongo_client.client = main.mongo_client.db = None
+        main.redis_service.client, main.redis_service.connected = None, False
+        main.redis_client = None
+        main.audit_middleware.audit_collection = None
+        stand_ins.stop()
+        await karma.stop()
+
+
+async def run_against_stand_ins(
+    mix: Optional[Dict[str, float]] = None,
+    concurrency: int = 16,
+    requests: Optional[int] = 1000,
+    duration: Optional[float] = None,
+    warmup: int = 20,
+    seed: int = 0,
+    karma_latency_seconds: float = 0.0,
+    rate_limits: bool = False
+) -> Dict[str, Any]:
+    """Boot the app on stand-ins, run the load and return the report summary"""
+    async with bucket_app(karma_latency_seconds, rate_limits) as (app, karma):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bucket", timeout=60.0) as client:
+            report = await run_load(client, mix, concurrency, requests, duration, warmup, seed)
+    report.extra = {
+        "concurrency": concurrency,
+        "mix": mix or DEFAULT_MIX,
+        "karma_requests": karma.requests,
+        "karma_events_received": len(karma.received)
+    }
+    return report.summary()
+
+
+# ----------------------------------------------------------------------
+# Regression checks
+# ----------------------------------------------------------------------
+
+def _check_limits(stats: Dict[str, Any], limits: Dict[str, float], scope: str) -> List[str]:
+    violations = []
+    if "min_throughput_rps" in limits and stats["throughput_rps"] < limits["min_throughput_rps"]:
+        violations.append(f"{scope}: throughput {stats['throughput_rps']} rps < {limits['min_throughput_rps']}")
+    if "max_error_rate" in limits and stats["error_rate"] > limits["max_error_rate"]:
+        violations.append(f"{scope}: error rate {stats['error_rate']} > {limits['max_error_rate']}")
+    for key, limit in limits.items():
+        if key.startswith("max_p") and key.endswith("_ms"):
+            name = key[len("max_"):-len("_ms")]
+            value = stats["latency_ms"].get(name)
+            if value is not None and value > limit:
+                violations.append(f"{scope}: {name} {value}ms > {limit}ms")
+    return violations
+
+
+def check_thresholds(summary: Dict[str, Any], thresholds: Dict[str, Any]) -> List[str]:
+    """Absolute limits: {"overall": {...}, "operations": {name: {...}}}"""
+    violations = _check_limits(summary, thresholds.get("overall", {}), "overall")
+    for name, limits in thresholds.get("operations", {}).items():
+        if name in summary["operations"]:
+            violations.extend(_check_limits(summary["operations"][name], limits, name))
+    return violations
+
+
+def compare_baseline(summary: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.2) -> List[str]:
+    """Relative limits: p95 may grow and throughput may drop by at most `tolerance` versus a previous report"""
+    violations = []
+    scopes = [("overall", summary, baseline)] + [
+        (name, stats, baseline.get("operations", {}).get(name))
+        for name, stats in summary["operations"].items()
+    ]
+    for scope, current, previous in scopes:
+        if not previous:
+            continue
+        if previous["latency_ms"]["p95"] and current["latency_ms"]["p95"] > previous["latency_ms"]["p95"] * (1 + tolerance):
+            violations.append(
+                f"{scope}: p95 {current['latency_ms']['p95']}ms vs baseline {previous['latency_ms']['p95']}ms"
+            )
+        if scope == "overall" and current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            violations.append(f"overall: throughput {current['throughput_rps']} rps vs baseline {previous['throughput_rps']} rps")
+    return violations
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """'write_event=40,read_context=20' -> {'write_event': 40.0, 'read_context': 20.0}"""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    lines = [
+        f"{'operation':<14}{'requests':>9}{'errors':>8}{'rps':>10}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)"
+    ]
+    rows = list(summary["operations"].items()) + [("TOTAL", summary)]
+    for name, stats in rows:
+        latency = stats["latency_ms"]
+        lines.append(
+            f"{name:<14}{stats['requests']:>9}{stats['errors']:>8}{stats['throughput_rps']:>10.1f}"
+            f"{latency['p50']:>9.2f}{latency['p95']:>9.2f}{latency['p99']:>9.2f}{latency['max']:>9.2f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Bucket load test against in-process stand-ins")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000, help="Total requests (ignored with --duration)")
+    parser.add_argument("--duration", type=float, help="Run for this many seconds instead of a request count")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--mix", type=parse_mix, help=f"Workload weights, e.g. write_event=40,read_context=20 (valid: {', '.join(DEFAULT_MIX)})")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--karma-latency-ms", type=float, default=0.0, help="Latency added by the stub Karma server")
+    parser.add_argument("--rate-limits", action="store_true", help="Keep Bucket's rate limiter enabled")
+    parser.add_argument("--thresholds", default=str(DEFAULT_THRESHOLDS_FILE), help="Absolute thresholds JSON ('' to skip)")
+    parser.add_argument("--baseline", help="Previous --output report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression versus --baseline")
+    parser.add_argument("--output", help="Write the report JSON here")
+    parser.add_argument("--workdir", help="Directory for logs/checkpoints written during the run (default: temp dir)")
+    args = parser.parse_args(argv)
+
+    # Resolve file arguments before moving to the work directory
+    thresholds = json.loads(Path(args.thresholds).read_text()) if args.thresholds else None
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    output = Path(args.output).resolve() if args.output else None
+    os.chdir(args.workdir or tempfile.mkdtemp(prefix="bucket-load-"))
+    # Per-request INFO logging would dominate the measurement
+    logging.disable(logging.INFO)
+
+    summary = asyncio.run(run_against_stand_ins(
+        mix=args.mix,
+        concurrency=args.concurrency,
+        requests=None if args.duration else args.requests,
+        duration=args.duration,
+        warmup=args.warmup,
+        seed=args.seed,
+        karma_latency_seconds=args.karma_latency_ms / 1000,
+        rate_limits=args.rate_limits
+    ))
+    print(format_summary(summary))
+
+    violations = []
+    if thresholds:
+        violations += check_thresholds(summary, thresholds)
+    if baseline:
+        violations += compare_baseline(summary, baseline, args.tolerance)
+    summary["violations"] = violations
+
+    if output:
+        output.write_text(json.dumps(summary, indent=2))
+    for violation in violations:
+        print(f"REGRESSION {violation}")
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Load-Test Stand-ins
+In-process replacements for Bucket's external services
+- MongoDB: one shared mongomock client behind every MongoDBClient (main.py's and each AgentRunner's)
+- Redis: fakeredis clients sharing one FakeServer behind every redis.Redis(...) call
+- Karma: a stub aiohttp server answering /v1/event/, /v1/event/batch and /health
+"""
+
+import functools
+import os
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+
+class StubKarmaServer:
+    """Accepts Karma events and counts them; optional fixed latency per request"""
+
+    def __init__(self, latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+        self.received: List[Dict[str, Any]] = []
+        self.requests = 0
+        self.url: Optional[str] = None
+        self._runner = None
+
+    async def _event(self, request):
+        import asyncio
+        from aiohttp import web
+
+        self.requests += 1
+        body = await request.json()
+        events = body if isinstance(body, list) else [body]
+        self.received.extend(events)
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        if isinstance(body, list):
+            return web.json_response({"status": "success", "results": [{"status": "success"} for _ in events]})
+        return web.json_response({"status": "success", "event_type": body.get("type"), "data": {}})
+
+    async def _health(self, request):
+        from aiohttp import web
+        return web.json_response({"status": "healthy"})
+
+    async def start(self) -> str:
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_post("/v1/event/", self._event)
+        app.router.add_post("/v1/event/batch", self._event)
+        app.router.add_get("/health", self._health)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+class StandIns:
+    """Patches MongoDB and Redis clients for the duration of a load run"""
+
+    def __init__(self):
+        if mongomock is None or fakeredis is None:
+            raise RuntimeError("Load tests need mongomock and fakeredis (pip install -r tests/requirements.txt)")
+        self.mongo = mongomock.MongoClient()
+        self.redis_server = fakeredis.FakeServer()
+        self._patches = []
+        self._previous_uri = None
+
+    def start(self):
+        self._previous_uri = os.environ.get("MONGODB_URI")
+        os.environ["MONGODB_URI"] = "mongodb://load-test-stand-in"
+        self._patches = [
+            patch("database.mongo_db.MongoClient", lambda *args, **kwargs: self.mongo),
+            patch("redis.Redis", functools.partial(fakeredis.FakeRedis, server=self.redis_server))
+        ]
+        for p in self._patches:
+            p.start()
+        return self
+
+    def stop(self):
+        for p in reversed(self._patches):
+            p.stop()
+        self._patches = []
+        if self._previous_uri is None:
+            os.environ.pop("MONGODB_URI", None)
+        else:
+            os.environ["MONGODB_URI"] = self._previous_uri
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
@@ -0,0 +1,92 @@
+"""
+Unit Tests for the Agent CLI Batch Mode
+Tests JSONL job parsing, streamed results, per-job errors and resume
+"""
+
+import json
+import pytest
+from agents.agent_registry import AgentRegistry
+from cli_tool.agent_cli import BatchRunner, read_jobs, completed_job_ids
+from database.mongo_db import MongoDBClient
+from utils.redis_service import RedisService
+
+CASHFLOW_INPUT = {"transactions": [{"id": 1, "amount": 100}, {"id": 2, "amount": -40}]}
+
+def write_jobs(path, lines):
+    path.write_text("\n".join(line if isinstance(line, str) else json.dumps(line) for line in lines) + "\n")
+
+def make_runner(**kwargs):
+    fakeredis = pytest.importorskip("fakeredis")
+    redis_service = RedisService(connect_on_init=False)
+    redis_service.client = fakeredis.FakeRedis()
+    redis_service.connected = True
+    return BatchRunner(
+        registry=AgentRegistry("agents"),
+        mongo_client=MongoDBClient(connect_on_init=False),
+        redis_service=redis_service,
+        **kwargs
+    )
+
+def read_records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+class TestJobFile:
+    """Test reading jobs and earlier output"""
+
+    def test_read_jobs_assigns_ids_and_flags_bad_lines(self, tmp_path):
+        jobs = tmp_path / "jobs.jsonl"
+        write_jobs(jobs, [{"id": "a", "agent": "x"}, "", "{oops", {"agent": "y"}])
+        parsed = list(read_jobs(str(jobs)))
+        assert [job_id for job_id, _ in parsed] == ["a", "line:3", "line:4"]
+        assert "_error" in parsed[1][1]
+
+    def test_completed_job_ids_ignores_failures_and_torn_lines(self, tmp_path):
+        output = tmp_path / "out.jsonl"
+        output.write_text('{"id": "a", "status": "success"}\n{"id": "b", "status": "error"}\n{"id": "c", "sta')
+        assert completed_job_ids(str(output)) == {"a"}
+
+
+class TestBatchRun:
+    """Test running jobs with bounded concurrency"""
+
+    @pytest.mark.asyncio
+    async def test_runs_agents_and_baskets_and_reports_errors(self, tmp_path):
+        jobs, output = tmp_path / "jobs.jsonl", tmp_path / "out.jsonl"
+        write_jobs(jobs, [
+            {"id": f"agent-{i}", "agent": "cashflow_analyzer", "input": CASHFLOW_INPUT} for i in range(5)
+        ] + [
+            {"id": "basket", "basket_spec": {"basket_name": "cli_batch", "agents": ["cashflow_analyzer"]},
+             "input": CASHFLOW_INPUT},
+            {"id": "missing", "agent": "no_such_agent"},
+            "not json"
+        ])
+
+        runner = make_runner()
+        summary = await runner.run(str(jobs), str(output), concurrency=3, progress_interval=0)
+
+        records = {r["id"]: r for r in read_records(output)}
+        assert summary["total"] == 8
+        assert (summary["success"], summary["error"]) == (6, 2)
+        assert records["agent-0"]["result"]["analysis"]["total"] == 60
+        assert records["basket"]["status"] == "success"
+        assert records["missing"]["error"] == "Agent no_such_agent not found"
+        assert records["line:8"]["status"] == "error"
+        # One warm runner per agent, reused across jobs
+        assert list(runner.runners) == [("cashflow_analyzer", False)]
+
+    @pytest.mark.asyncio
+    async def test_resume_skips_successful_jobs(self, tmp_path):
+        jobs, output = tmp_path / "jobs.jsonl", tmp_path / "out.jsonl"
+        write_jobs(jobs, [
+            {"id": "done", "agent": "cashflow_analyzer", "input": CASHFLOW_INPUT},
+            {"id": "retry", "agent": "cashflow_analyzer", "input": CASHFLOW_INPUT}
+        ])
+        output.write_text(json.dumps({"id": "done", "status": "success", "result": {}}) + "\n"
+                          + json.dumps({"id": "retry", "status": "error", "error": "boom"}) + "\n")
+
+        summary = await make_runner().run(str(jobs), str(output), resume=True, progress_interval=0)
+
+        assert (summary["skipped"], summary["success"]) == (1, 1)
+        records = read_records(output)
+        assert [r["id"] for r in records] == ["done", "retry", "retry"]
+        assert records[-1]["status"] == "success"
@@ -0,0 +1,189 @@
+"""
+Unit Tests for Basket Checkpoints
+Tests step checkpointing, resume from the failed step and input-hash idempotency
+"""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock, patch, AsyncMock
+from baskets.basket_manager import AgentBasket
+from baskets.checkpoint_store import CheckpointStore, input_hash
+from agents.agent_registry import AgentRegistry
+from communication.event_bus import EventBus
+from utils.redis_service import RedisService
+
+AGENTS = ["extract", "enrich", "score"]
+
+@pytest.fixture
+def registry():
+    registry = Mock(spec=AgentRegistry)
+    registry.get_agent.side_effect = lambda name: {"name": name, "module_path": "json"}
+    registry.validate_compatibility.return_value = True
+    return registry
+
+@pytest.fixture
+def redis_service():
+    fakeredis = pytest.importorskip("fakeredis")
+    service = RedisService(connect_on_init=False)
+    service.client = fakeredis.FakeRedis()
+    service.connected = True
+    return service
+
+class FlakyAgents:
+    """Runner stand-in: each agent appends its name; 'score' fails while failing is set"""
+
+    def __init__(self):
+        self.calls = []
+        self.failing = True
+
+    def runner(self, agent_name, stateful=False, **clients):
+        runner = Mock()
+
+        async def run(module, data):
+            self.calls.append(agent_name)
+            if agent_name == "score" and self.failing:
+                return {"error": "timeout"}
+            return {"trail": data.get("trail", []) + [agent_name]}
+
+        runner.run = AsyncMock(side_effect=run)
+        return runner
+
+class MutatingAgents(FlakyAgents):
+    """Agents that append to their input in place and return it"""
+
+    def runner(self, agent_name, stateful=False, **clients):
+        runner = Mock()
+
+        async def run(module, data):
+            self.calls.append(agent_name)
+            if agent_name == "score" and self.failing:
+                return {"error": "timeout"}
+            data.setdefault("trail", []).append(agent_name)
+            return data
+
+        runner.run = AsyncMock(side_effect=run)
+        return runner
+
+async def run_basket(registry, redis_service, store, agents, execution_id=None):
+    spec = {"basket_name": "pipeline", "agents": AGENTS, "execution_strategy": "sequential"}
+    event_bus = Mock(spec=EventBus)
+    event_bus.publish = AsyncMock()
+    with patch('baskets.basket_manager.AgentRunner', side_effect=agents.runner):
+        basket = AgentBasket(spec, registry, event_bus, redis_service, mongo_client=Mock(),
+                             execution_id=execution_id, checkpoint_store=store)
+        return basket, await basket.execute({"trail": []})
+
+class TestCheckpointResume:
+    """Test a failed run resumes at the failed step"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("backend", ["redis", "local"])
+    async def test_resume_skips_completed_steps(self, backend, registry, redis_service, tmp_path):
+        if backend == "local":
+            redis_service.connected = False
+            redis_service.client = None
+        store = CheckpointStore(redis_service, directory=str(tmp_path))
+        agents = FlakyAgents()
+
+        basket, failed = await run_basket(registry, redis_service, store, agents)
+        assert failed["failed_step"] == 2
+        run = store.get_run(basket.execution_id)
+        assert run["status"] == "failed"
+        assert [s["agent_name"] for s in run["completed_steps"]] == ["extract", "enrich"]
+
+        agents.failing = False
+        agents.calls.clear()
+        resumed, result = await run_basket(registry, redis_service, store, agents, execution_id=basket.execution_id)
+
+        assert agents.calls == ["score"]
+        assert resumed.restored_steps == [0, 1]
+        assert result == {"trail": ["extract", "enrich", "score"]}
+        assert store.get_run(basket.execution_id)["status"] == "completed"
+
+    @pytest.mark.asyncio
+    async def test_changed_input_is_not_restored(self, registry, redis_service, tmp_path):
+        """Test a checkpoint is reused only for the exact input it was produced from"""
+        store = CheckpointStore(redis_service, directory=str(tmp_path))
+        agents = FlakyAgents()
+        basket, _ = await run_basket(registry, redis_service, store, agents)
+
+        checkpoint = store.load(basket.execution_id)["step:0"]
+        assert store.match_step(checkpoint, "extract", {"trail": []}) == {"trail": ["extract"]}
+        assert store.match_step(checkpoint, "extract", {"trail": ["other"]}) is None
+        assert store.match_step(checkpoint, "enrich", {"trail": []}) is None
+        assert checkpoint["input_hash"] == input_hash({"trail": []})
+
+    @pytest.mark.asyncio
+    async def test_input_is_hashed_before_the_agent_mutates_it(self, registry, redis_service, tmp_path):
+        store = CheckpointStore(redis_service, directory=str(tmp_path))
+        agents = MutatingAgents()
+        basket, _ = await run_basket(registry, redis_service, store, agents)
+
+        checkpoint = store.load(basket.execution_id)["step:0"]
+        assert checkpoint["input_hash"] == input_hash({"trail": []})
+        assert "idempotency_key" not in checkpoint
+
+        agents.failing = False
+        agents.calls.clear()
+        resumed, result = await run_basket(registry, redis_service, store, agents, execution_id=basket.execution_id)
+        assert agents.calls == ["score"]
+        assert result == {"trail": ["extract", "enrich", "score"]}
+
+class TestResumeEligibility:
+    """Test only failed (or abandoned) runs can be resumed"""
+
+    def run(self, status, minutes_ago=0):
+        updated_at = (datetime.now(timezone.utc) - timedelta(minutes=minutes_ago)).isoformat()
+        return {"status": status, "updated_at": updated_at, "completed_steps": []}
+
+    def test_failed_run_is_resumable(self):
+        assert CheckpointStore.resume_conflict(self.run("failed")) is None
+
+    def test_completed_run_is_rejected(self):
+        assert CheckpointStore.resume_conflict(self.run("completed")) == "is completed"
+
+    def test_running_run_is_rejected_until_stale(self):
+        assert "still running" in CheckpointStore.resume_conflict(self.run("running", minutes_ago=5))
+        assert CheckpointStore.resume_conflict(self.run("running", minutes_ago=120)) is None
+
+    def test_recent_step_keeps_run_alive(self):
+        run = self.run("running", minutes_ago=120)
+        run["completed_steps"] = [{"step": 0, "completed_at": datetime.now(timezone.utc).isoformat()}]
+        assert CheckpointStore.resume_conflict(run) is not None
+
+class TestResumeLock:
+    """Test only one resume of an execution runs at a time"""
+
+    @pytest.mark.parametrize("backend", ["redis", "local"])
+    def test_second_claim_is_rejected(self, backend, redis_service, tmp_path):
+        if backend == "local":
+            redis_service.connected = False
+            redis_service.client = None
+        first = CheckpointStore(redis_service, directory=str(tmp_path))
+        second = CheckpointStore(redis_service, directory=str(tmp_path))
+
+        assert first.claim("exec_1") is True
+        assert second.claim("exec_1") is False
+        second.release("exec_1")
+        assert second.claim("exec_1") is False
+        first.release("exec_1")
+        assert second.claim("exec_1") is True
+
+    def test_run_is_checked_again_after_claiming(self):
+        """Test a resume that wins the claim after another one completed the run does not re-run it"""
+        from fastapi.testclient import TestClient
+        import main
+
+        store = Mock()
+        failed = {"status": "failed", "updated_at": datetime.now(timezone.utc).isoformat(), "completed_steps": []}
+        store.get_run.side_effect = [failed, {**failed, "status": "completed"}]
+        store.resume_conflict.side_effect = CheckpointStore.resume_conflict
+        store.claim.return_value = True
+        with patch.object(main, "CheckpointStore", return_value=store), \
+                patch.object(main, "AgentBasket") as basket:
+            response = TestClient(main.app).post("/resume-basket/exec_1")
+
+        assert response.status_code == 409
+        assert "is completed" in response.json()["detail"]
+        basket.assert_not_called()
+        store.release.assert_called_once_with("exec_1")
@@ -0,0 +1,128 @@
+"""
+Unit Tests for Queue-Based Basket Run Logging
+Tests the shared rotating sink, execution context fields and bounded handler lifetime
+"""
+
+import json
+import logging
+import pytest
+from unittest.mock import Mock, patch, AsyncMock
+from utils.logger import create_queue_logger, DroppingQueueHandler
+from baskets.basket_manager import AgentBasket
+from agents.agent_registry import AgentRegistry
+from communication.event_bus import EventBus
+from utils.redis_service import RedisService
+
+def read_lines(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+class TestQueueLogger:
+    """Test the QueueHandler/QueueListener pipeline"""
+
+    def test_records_carry_execution_context(self, tmp_path):
+        log_file = tmp_path / "runs.log"
+        queue_logger, listener = create_queue_logger("test_runs_context", str(log_file), 1024 * 1024, 2)
+
+        logging.LoggerAdapter(queue_logger, {"execution_id": "exec_1", "basket_name": "b1"}).info("BASKET_START")
+        logging.LoggerAdapter(queue_logger, {"execution_id": "exec_2", "basket_name": "b2"}).error("BASKET_ERROR")
+        listener.stop()
+
+        lines = read_lines(log_file)
+        assert [(l["execution_id"], l["basket_name"], l["message"]) for l in lines] == [
+            ("exec_1", "b1", "BASKET_START"),
+            ("exec_2", "b2", "BASKET_ERROR")
+        ]
+        assert lines[1]["level"] == "ERROR"
+
+    def test_sink_rotates(self, tmp_path):
+        log_file = tmp_path / "runs.log"
+        queue_logger, listener = create_queue_logger("test_runs_rotate", str(log_file), 500, 2)
+
+        for i in range(50):
+            queue_logger.info(f"line {i} " + "x" * 40)
+        listener.stop()
+
+        assert (tmp_path / "runs.log.1").exists()
+        assert (tmp_path / "runs.log.2").exists()
+        assert not (tmp_path / "runs.log.3").exists()
+
+    def test_full_queue_drops_instead_of_blocking(self, tmp_path):
+        queue_logger, listener = create_queue_logger("test_runs_full", str(tmp_path / "runs.log"), 1024, 1, queue_size=1)
+        listener.stop()  # Nothing drains the queue now
+
+        queue_logger.info("first")
+        queue_logger.info("second")
+
+        handler = queue_logger.handlers[0]
+        assert isinstance(handler, DroppingQueueHandler)
+        assert handler.dropped == 1
+
+class TestBasketLoggerLifetime:
+    """Test AgentBasket no longer opens a file handler per execution"""
+
+    @pytest.fixture
+    def make_basket(self):
+        registry = Mock(spec=AgentRegistry)
+        event_bus = Mock(spec=EventBus)
+        event_bus.publish = AsyncMock()
+        counter = iter(range(10000))
+
+        def factory():
+            redis_service = Mock(spec=RedisService)
+            redis_service.generate_execution_id.return_value = f"exec_{next(counter)}"
+            spec = {"basket_name": "leak_check", "agents": ["a"], "execution_strategy": "sequential"}
+            with patch('baskets.basket_manager.MongoDBClient'):
+                return AgentBasket(spec, registry, event_bus, redis_service)
+
+        return factory
+
+    def test_many_runs_share_one_handler(self, make_basket):
+        file_handlers_before = sum(
+            1 for obj in logging.Logger.manager.loggerDict.values()
+            if isinstance(obj, logging.Logger) for h in obj.handlers if isinstance(h, logging.FileHandler)
+        )
+
+        for _ in range(200):
+            basket = make_basket()
+            basket.close()
+
+        file_handlers_after = sum(
+            1 for obj in logging.Logger.manager.loggerDict.values()
+            if isinstance(obj, logging.Logger) for h in obj.handlers if isinstance(h, logging.FileHandler)
+        )
+        assert file_handlers_after == file_handlers_before
+        # Count only our handlers; pytest attaches capture handlers to non-propagating loggers
+        assert sum(isinstance(h, DroppingQueueHandler) for h in logging.getLogger("basket_runs").handlers) == 1
+        assert not any(name.startswith("basket_exec_") for name in logging.Logger.manager.loggerDict)
+
+    def test_basket_logger_tags_execution_id(self, make_basket):
+        basket = make_basket()
+        assert basket.basket_logger.extra == {"execution_id": basket.execution_id, "basket_name": "leak_check"}
+        basket.close()
+
+    def test_shared_mongo_client_not_closed(self):
+        """Test close() only closes a MongoDB client the basket created itself"""
+        shared = Mock()
+        redis_service = Mock(spec=RedisService)
+        redis_service.generate_execution_id.return_value = "exec_shared"
+        spec = {"basket_name": "shared", "agents": ["a"], "execution_strategy": "sequential"}
+        basket = AgentBasket(spec, Mock(spec=AgentRegistry), Mock(spec=EventBus), redis_service, mongo_client=shared)
+
+        basket.close()
+
+        shared.close.assert_not_called()
+
+class TestBasketLogCleanup:
+    """Test basket deletion only removes that basket's per-run log files"""
+
+    def test_shared_sink_and_other_baskets_are_kept(self, tmp_path):
+        from main import basket_run_log_files
+
+        for name in ["basket_runs.log", "basket_1700000000_deadbeef.log", "basket_custom.log",
+                     "basket_extra_1700000000_deadbeef.log", "other_1700000000_deadbeef.log"]:
+            (tmp_path / name).write_text("")
+
+        with patch.dict("utils.logger.BASKET_LOG_CONFIG", {"log_file": str(tmp_path / "basket_runs.log")}):
+            files = basket_run_log_files(tmp_path, "basket", ["custom", "runs"])
+
+        assert [f.name for f in files] == ["basket_1700000000_deadbeef.log", "basket_custom.log"]
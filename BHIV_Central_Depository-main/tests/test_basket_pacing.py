@@ -0,0 +1,108 @@
+"""
+Unit Tests for Basket Pacing
+Tests the default no-delay path, fixed and token bucket pacing, and adaptive 429 backoff
+"""
+
+import time
+import pytest
+from unittest.mock import Mock, patch, AsyncMock
+from baskets.basket_manager import AgentBasket
+from baskets.pacing import PacingPolicy, is_rate_limited
+from agents.agent_registry import AgentRegistry
+from communication.event_bus import EventBus
+from utils.redis_service import RedisService
+
+def make_basket(agent_count, pacing=None):
+    registry = Mock(spec=AgentRegistry)
+    registry.get_agent.side_effect = lambda name: {"name": name, "module_path": "json"}
+    registry.validate_compatibility.return_value = True
+    event_bus = Mock(spec=EventBus)
+    event_bus.publish = AsyncMock()
+    redis_service = Mock(spec=RedisService)
+    redis_service.generate_execution_id.return_value = "exec_pacing"
+    redis_service.is_connected.return_value = False
+    spec = {"basket_name": "paced", "agents": [f"agent_{i}" for i in range(agent_count)], "execution_strategy": "sequential"}
+    if pacing:
+        spec["pacing"] = pacing
+    checkpoint_store = Mock()
+    checkpoint_store.load.return_value = {}
+    checkpoint_store.match_step.return_value = None
+    return AgentBasket(spec, registry, event_bus, redis_service, mongo_client=Mock(), checkpoint_store=checkpoint_store)
+
+def runner_returning(*results):
+    outputs = iter(results)
+    runner = Mock()
+    runner.run = AsyncMock(side_effect=lambda module, data: next(outputs))
+    return runner
+
+class TestBasketLatency:
+    """Test steps are not padded with artificial delays"""
+
+    @pytest.mark.asyncio
+    async def test_default_adds_no_delay(self):
+        basket = make_basket(10)
+        with patch('baskets.basket_manager.AgentRunner', side_effect=lambda *a, **k: runner_returning({"ok": True})):
+            start = time.perf_counter()
+            result = await basket.execute({"input": "x"})
+
+        assert result == {"ok": True}
+        assert time.perf_counter() - start < 0.5
+        assert basket.pacing.mode == "none"
+
+    @pytest.mark.asyncio
+    async def test_fixed_delay_applies_per_step(self):
+        basket = make_basket(3, {"mode": "fixed", "delay_seconds": 0.05})
+        with patch('baskets.basket_manager.AgentRunner', side_effect=lambda *a, **k: runner_returning({"ok": True})):
+            start = time.perf_counter()
+            await basket.execute({"input": "x"})
+
+        assert time.perf_counter() - start >= 0.15
+
+    def test_invalid_mode_rejected(self):
+        with pytest.raises(ValueError, match="pacing mode"):
+            make_basket(1, {"mode": "sometimes"})
+
+class TestAdaptivePacing:
+    """Test 429 detection, backoff and recovery"""
+
+    def test_detects_rate_limited_results(self):
+        assert is_rate_limited({"error": "Client error '429 Too Many Requests'"})
+        assert is_rate_limited({"status_code": 429})
+        assert not is_rate_limited({"error": "timeout"})
+        assert not is_rate_limited({"result": "ok"})
+        assert is_rate_limited({"error": "HTTP status 429"})
+        assert is_rate_limited(RuntimeError("429 Client Error: Too Many Requests for url"))
+        assert not is_rate_limited({"error": "record 4290 not found"})
+        assert not is_rate_limited({"error": "invoice 429 is missing"})
+        assert not is_rate_limited(KeyError("order_429"))
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_step_is_retried(self):
+        basket = make_basket(1, {"mode": "fixed", "delay_seconds": 0.0, "max_backoff_seconds": 0.2})
+        runner = runner_returning({"status_code": 429, "error": "429"}, {"ok": True})
+        with patch('baskets.basket_manager.AgentRunner', return_value=runner):
+            result = await basket.execute({"input": "x"})
+
+        assert result == {"ok": True}
+        assert runner.run.await_count == 2
+        assert basket.pacing.stats["rate_limited"] == 1
+        assert basket.pacing.stats["retries"] == 1
+
+    def test_token_bucket_halves_then_recovers(self):
+        policy = PacingPolicy({"mode": "token_bucket", "rate_per_sec": 10, "downstream": "test-recovery"})
+
+        assert policy.record({"status_code": 429}) == pytest.approx(0.2)
+        assert policy.bucket.rate == 5
+        policy.record({"ok": True})
+        assert policy.bucket.rate == 6
+
+    @pytest.mark.asyncio
+    async def test_token_bucket_is_shared_per_downstream(self):
+        first = PacingPolicy({"mode": "token_bucket", "rate_per_sec": 20, "burst": 1, "downstream": "test-shared"})
+        second = PacingPolicy({"mode": "token_bucket", "rate_per_sec": 20, "burst": 1, "downstream": "test-shared"})
+        assert first.bucket is second.bucket
+
+        start = time.perf_counter()
+        for policy in (first, second, first):
+            await policy.before_step()
+        assert time.perf_counter() - start >= 0.09
@@ -0,0 +1,144 @@
+"""
+Unit Tests for Core Event Batches
+Tests /core/write-events parsing, per-item validation and the single batched Karma forward
+"""
+
+import json
+import pytest
+from aiohttp import web
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+import main
+from main import app, parse_core_event_batch
+from integration.karma_forwarder import KarmaForwarder
+from middleware.rate_limiter import RateLimiter
+
+def core_event(agent_id="agent_a", requester_id="bhiv_core"):
+    return {"requester_id": requester_id, "event_data": {"event_type": "agent_result", "agent_id": agent_id}}
+
+class TestBatchParsing:
+    """Test JSON array and NDJSON bodies"""
+
+    def test_json_array(self):
+        body = json.dumps([core_event(), core_event("agent_b")]).encode()
+        assert len(parse_core_event_batch(body, "application/json")) == 2
+
+    def test_ndjson_with_a_bad_line(self):
+        body = (json.dumps(core_event()) + "\n\n{not json\n" + json.dumps(core_event())).encode()
+        items = parse_core_event_batch(body, "application/x-ndjson")
+        assert len(items) == 3
+        assert isinstance(items[1], ValueError)
+
+    def test_truncated_array_is_rejected(self):
+        with pytest.raises(ValueError):
+            parse_core_event_batch(b'[1, 2', "application/json")
+
+
+class TestWriteEventsEndpoint:
+    """Test batch ingestion"""
+
+    @pytest.fixture
+    def client(self):
+        return TestClient(app)
+
+    def test_mixed_batch_reports_each_item(self, client):
+        forward = AsyncMock(return_value={"forwarded": 2})
+        before = main.shared_state.get_counter(main.CORE_EVENTS_RECEIVED_KEY)
+        body = "\n".join([
+            json.dumps(core_event("agent_a")),
+            json.dumps(core_event("agent_b", requester_id="someone_else")),
+            json.dumps({"requester_id": "bhiv_core"}),
+            json.dumps(core_event("agent_c"))
+        ])
+        with patch("integration.karma_forwarder.karma_forwarder.forward_agent_events", forward):
+            response = client.post(
+                "/core/write-events", content=body, headers={"Content-Type": "application/x-ndjson"}
+            )
+
+        data = response.json()
+        assert response.status_code == 200
+        assert (data["accepted"], data["rejected"], data["success"]) == (2, 2, False)
+        assert [r["status"] for r in data["results"]] == ["accepted", "rejected", "rejected", "accepted"]
+        assert data["results"][1]["error"] == "Unauthorized requester"
+        assert main.shared_state.get_counter(main.CORE_EVENTS_RECEIVED_KEY) == before + 2
+        assert [e["agent_id"] for e in main.shared_state.get_list(main.CORE_EVENTS_KEY, 2)] == ["agent_a", "agent_c"]
+
+        forward.assert_called_once()
+        forwarded = forward.call_args.args[0]
+        assert [e["agent_id"] for e in forwarded] == ["agent_a", "agent_c"]
+        assert all(e["event_id"] for e in forwarded)
+
+    def test_read_context_uses_the_agent_list(self, client):
+        forward = AsyncMock(return_value={"forwarded": 3})
+        with patch("integration.karma_forwarder.karma_forwarder.forward_agent_events", forward), \
+                patch.object(main, "CORE_AGENT_EVENTS_MAX", 2):
+            client.post("/core/write-events", json=[core_event("ctx_agent"), core_event("ctx_other"), core_event("ctx_agent")])
+            client.post("/core/write-events", json=[core_event("ctx_agent")])
+        assert len(main.shared_state.get_list(main.core_agent_events_key("ctx_agent"))) == 2
+
+        with patch.object(main.shared_state, "get_list", wraps=main.shared_state.get_list) as get_list:
+            response = client.get("/core/read-context", params={"agent_id": "ctx_agent", "requester_id": "bhiv_core"})
+        context = response.json()["context"]
+        assert context["event_count"] == 3
+        assert context["recent_event_types"] == ["agent_result"]
+        get_list.assert_called_once_with(main.core_agent_events_key("ctx_agent"), 10)
+
+    def test_invalid_array_is_400(self, client):
+        response = client.post("/core/write-events", content=b"[{", headers={"Content-Type": "application/json"})
+        assert response.status_code == 400
+
+    def test_oversized_batch_is_413(self, client):
+        with patch.object(main, "CORE_EVENTS_BATCH_MAX", 2):
+            response = client.post("/core/write-events", json=[core_event()] * 3)
+        assert response.status_code == 413
+
+    def test_events_are_charged_to_core_write(self, client):
+        """Test a batch costs one core_write token per event, not one per request"""
+        limiter = RateLimiter(limits={"core_write": {"rate_per_sec": 0.001, "burst": 5, "description": "test"}})
+        headers = {"X-Client-ID": "core-batch"}
+        with patch.object(main, "rate_limiter", limiter), \
+                patch("integration.karma_forwarder.karma_forwarder.forward_agent_events", AsyncMock()):
+            assert client.post("/core/write-events", json=[core_event()] * 4, headers=headers).status_code == 200
+            limited = client.post("/core/write-events", json=[core_event()] * 4, headers=headers)
+            oversized = client.post("/core/write-events", json=[core_event()] * 6, headers={"X-Client-ID": "other"})
+
+        assert limited.status_code == 429
+        assert int(limited.headers["Retry-After"]) >= 1
+        assert oversized.status_code == 413
+
+
+class TestKarmaBatchForward:
+    """Test the batched Karma event"""
+
+    def test_events_carry_idempotency_keys(self):
+        forwarder = KarmaForwarder()
+        event = forwarder._build_agent_event({"agent_id": "a", "event_type": "rl_outcome", "reward": 1, "event_id": "e1"})
+        assert event["data"]["action"] == "agent_success"
+        assert event["idempotency_key"] == "bhiv_bucket:e1"
+
+    @pytest.mark.asyncio
+    async def test_empty_batch_is_not_sent(self):
+        assert await KarmaForwarder().forward_agent_events([]) is None
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_single_events_without_batch_endpoint(self, unused_tcp_port):
+        received = []
+
+        async def single(request):
+            received.append(await request.json())
+            return web.json_response({"status": "success"})
+
+        karma = web.Application()
+        karma.router.add_post("/v1/event/", single)
+        runner = web.AppRunner(karma)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", unused_tcp_port).start()
+        try:
+            forwarder = KarmaForwarder(f"http://127.0.0.1:{unused_tcp_port}")
+            result = await forwarder.forward_agent_events([{"agent_id": "a"}, {"agent_id": "b"}])
+        finally:
+            await runner.cleanup()
+
+        assert result == {"forwarded": 2, "failed": 0}
+        assert forwarder.batch_supported is False
+        assert sorted(e["data"]["context"]["agent_id"] for e in received) == ["a", "b"]
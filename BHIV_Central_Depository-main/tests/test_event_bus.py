@@ -0,0 +1,206 @@
+"""
+Unit Tests for the BHIV Event Bus
+Tests concurrent fan-out, timeouts, error isolation, bounded queues and ordering
+"""
+
+import asyncio
+import time
+import pytest
+from communication.event_bus import EventBus
+
+class TestFanOut:
+    """Test concurrent delivery to subscribers"""
+
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_does_not_delay_others(self):
+        """Test publish latency is the slowest handler, not the sum"""
+        bus = EventBus()
+        received = []
+
+        async def slow(msg):
+            await asyncio.sleep(0.2)
+            received.append("slow")
+
+        async def fast(msg):
+            received.append("fast")
+
+        bus.subscribe("evt", slow)
+        bus.subscribe("evt", slow)
+        bus.subscribe("evt", fast)
+
+        started = time.monotonic()
+        summary = await bus.publish("evt", {"n": 1})
+        elapsed = time.monotonic() - started
+
+        assert summary == {"subscribers": 3, "delivered": 3}
+        assert received[0] == "fast"
+        assert elapsed < 0.35
+        await bus.close()
+
+    @pytest.mark.asyncio
+    async def test_sync_and_lambda_callbacks(self):
+        """Test plain functions and lambdas returning coroutines are both supported"""
+        bus = EventBus()
+        received = []
+
+        async def forward(msg):
+            received.append(("async", msg["n"]))
+
+        bus.subscribe("evt", lambda msg: received.append(("sync", msg["n"])))
+        bus.subscribe("evt", lambda msg: forward(msg))
+
+        await bus.publish("evt", {"n": 7})
+
+        assert sorted(received) == [("async", 7), ("sync", 7)]
+        await bus.close()
+
+    @pytest.mark.asyncio
+    async def test_publish_without_subscribers(self):
+        bus = EventBus()
+        assert await bus.publish("nobody", {}) == {"subscribers": 0}
+
+class TestIsolation:
+    """Test timeouts and failures stay with the subscriber that caused them"""
+
+    @pytest.mark.asyncio
+    async def test_timeout_and_error_are_isolated(self):
+        bus = EventBus()
+        received = []
+
+        async def hangs(msg):
+            await asyncio.sleep(10)
+
+        def fails(msg):
+            raise RuntimeError("boom")
+
+        bus.subscribe("evt", hangs, name="hangs", timeout=0.05)
+        bus.subscribe("evt", fails, name="fails")
+        bus.subscribe("evt", lambda msg: received.append(msg), name="ok")
+
+        summary = await bus.publish("evt", {"n": 1})
+
+        assert summary == {"subscribers": 3, "timeout": 1, "error": 1, "delivered": 1}
+        assert received == [{"n": 1}]
+
+        metrics = {m["subscriber"]: m for m in bus.get_metrics()["subscribers"]}
+        assert metrics["hangs"]["timeouts"] == 1
+        assert metrics["fails"]["errors"] == 1
+        assert metrics["ok"]["delivered"] == 1
+        await bus.close()
+
+class TestBackpressure:
+    """Test bounded queues and fire-and-forget publishing"""
+
+    @pytest.mark.asyncio
+    async def test_full_queue_drops_and_counts(self):
+        bus = EventBus()
+        release = asyncio.Event()
+
+        async def blocked(msg):
+            await release.wait()
+
+        bus.subscribe("evt", blocked, name="blocked", queue_size=2, ordered=True)
+
+        bus.publish_nowait("evt", {"n": 0})
+        await asyncio.sleep(0)
+
+        # The first message is held by the worker, two fill the queue, the last is dropped
+        results = [bus.publish_nowait("evt", {"n": i}) for i in range(1, 4)]
+        assert results[-1]["dropped"] == 1
+        metrics = bus.get_metrics()
+        assert metrics["total_dropped"] == 1
+        assert metrics["subscribers"][0]["queue_depth"] == 2
+
+        release.set()
+        await asyncio.sleep(0.01)
+        assert bus.get_metrics()["subscribers"][0]["delivered"] == 3
+        await bus.close()
+
+    @pytest.mark.asyncio
+    async def test_fire_and_forget_returns_immediately(self):
+        bus = EventBus()
+        done = asyncio.Event()
+
+        async def slow(msg):
+            await asyncio.sleep(0.05)
+            done.set()
+
+        bus.subscribe("evt", slow)
+
+        summary = await bus.publish("evt", {}, wait=False)
+        assert summary == {"subscribers": 1, "queued": 1, "dropped": 0}
+        assert not done.is_set()
+
+        await asyncio.wait_for(done.wait(), 1)
+        await bus.close()
+
+    @pytest.mark.asyncio
+    async def test_close_releases_waiting_publishers(self):
+        bus = EventBus()
+
+        async def hangs(msg):
+            await asyncio.sleep(10)
+
+        bus.subscribe("evt", hangs, ordered=True, timeout=None)
+        bus.publish_nowait("evt", {"n": 0})
+        pending = asyncio.create_task(bus.publish("evt", {"n": 1}))
+        await asyncio.sleep(0.01)
+
+        await bus.close()
+
+        assert (await asyncio.wait_for(pending, 1))["dropped"] == 1
+
+class TestOrdering:
+    """Test ordered subscriptions"""
+
+    @pytest.mark.asyncio
+    async def test_ordered_subscriber_sees_publish_order(self):
+        bus = EventBus()
+        received = []
+
+        async def record(msg):
+            # Later messages finish faster, so only a single worker keeps order
+            await asyncio.sleep(0.01 * (5 - msg["n"]))
+            received.append(msg["n"])
+
+        sub = bus.subscribe("evt", record, ordered=True)
+        for i in range(5):
+            bus.publish_nowait("evt", {"n": i})
+        await asyncio.wait_for(sub.queue.join(), 1)
+
+        assert received == [0, 1, 2, 3, 4]
+        assert sub.get_metrics()["mode"] == "ordered"
+        assert sub.get_metrics()["max_lag_ms"] > 0
+        await bus.close()
+
+    @pytest.mark.asyncio
+    async def test_default_subscription_is_ordered_without_timeout(self):
+        """Test existing subscribers keep in-order, unbounded delivery unless they opt in"""
+        bus = EventBus()
+        received = []
+
+        async def record(msg):
+            await asyncio.sleep(0.01 * (3 - msg["n"]))
+            received.append(msg["n"])
+
+        sub = bus.subscribe("evt", record)
+        assert (sub.concurrency, sub.timeout) == (1, None)
+        for i in range(3):
+            bus.publish_nowait("evt", {"n": i})
+        await asyncio.wait_for(sub.queue.join(), 1)
+
+        assert received == [0, 1, 2]
+        assert sub.get_metrics()["mode"] == "ordered"
+        assert bus.subscribe("evt", record, concurrency=4).get_metrics()["mode"] == "concurrent"
+        await bus.close()
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe(self):
+        bus = EventBus()
+        received = []
+        sub = bus.subscribe("evt", lambda msg: received.append(msg))
+        bus.unsubscribe(sub)
+
+        assert await bus.publish("evt", {}) == {"subscribers": 0}
+        assert received == []
+        await sub.close()
@@ -0,0 +1,68 @@
+"""
+Unit Tests for the Load-Test Harness
+Tests percentile/threshold/baseline checks and a short run against the stand-ins
+"""
+
+import pytest
+from tests.load.harness import (
+    percentile, check_thresholds, compare_baseline, parse_mix, run_against_stand_ins, DEFAULT_MIX
+)
+
+def make_summary(p95=10.0, rps=100.0, error_rate=0.0):
+    stats = {
+        "requests": 100, "errors": 0, "error_rate": error_rate, "throughput_rps": rps,
+        "latency_ms": {"p50": 1.0, "p90": 5.0, "p95": p95, "p99": p95 * 2, "mean": 2.0, "max": p95 * 3}
+    }
+    return {**stats, "operations": {"write_event": dict(stats)}}
+
+class TestReportChecks:
+    """Test percentiles and regression checks"""
+
+    def test_nearest_rank_percentile(self):
+        values = [float(v) for v in range(1, 101)]
+        assert percentile(values, 50) == 50.0
+        assert percentile(values, 99) == 99.0
+        assert percentile([], 95) == 0.0
+
+    def test_thresholds(self):
+        thresholds = {
+            "overall": {"min_throughput_rps": 200, "max_error_rate": 0.01},
+            "operations": {"write_event": {"max_p95_ms": 5}}
+        }
+        violations = check_thresholds(make_summary(p95=10.0, rps=100.0), thresholds)
+        assert len(violations) == 2
+        assert any(v.startswith("write_event: p95") for v in violations)
+        assert check_thresholds(make_summary(p95=1.0, rps=500.0), thresholds) == []
+
+    def test_baseline_tolerance(self):
+        baseline = make_summary(p95=10.0, rps=100.0)
+        assert compare_baseline(make_summary(p95=11.0, rps=90.0), baseline, tolerance=0.2) == []
+        violations = compare_baseline(make_summary(p95=13.0, rps=70.0), baseline, tolerance=0.2)
+        assert "overall: throughput 70.0 rps vs baseline 100.0 rps" in violations
+        assert any(v.startswith("write_event: p95") for v in violations)
+
+    def test_parse_mix(self):
+        assert parse_mix("write_event=3, governance") == {"write_event": 3.0, "governance": 1.0}
+
+
+class TestStandInRun:
+    """Test a short run of every workload"""
+
+    @pytest.mark.asyncio
+    async def test_mixed_workload_runs_without_errors(self, tmp_path, monkeypatch):
+        pytest.importorskip("mongomock")
+        pytest.importorskip("fakeredis")
+        monkeypatch.chdir(tmp_path)
+        import main
+
+        summary = await run_against_stand_ins(
+            mix={name: 1 for name in DEFAULT_MIX}, concurrency=4, requests=60, warmup=0, seed=1
+        )
+
+        assert summary["requests"] == 60
+        assert summary["errors"] == 0, summary["operations"]
+        assert set(summary["operations"]) == set(DEFAULT_MIX)
+        assert summary["karma_events_received"] > 0
+        # Module globals are restored for other tests
+        assert main.mongo_client.db is None
+        assert not main.redis_service.connected
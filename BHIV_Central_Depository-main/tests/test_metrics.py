@@ -0,0 +1,143 @@
+"""
+Unit Tests for Prometheus Metrics
+Tests sharded counters/histograms, text exposition, multi-worker snapshot merging and the request middleware
+"""
+
+import json
+import os
+import threading
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from middleware.metrics import MetricsMiddleware
+from utils.metrics import MetricsRegistry, observe_methods, _merge
+
+class TestCountersAndHistograms:
+    """Test value recording across threads"""
+
+    def test_counter_sums_thread_shards(self):
+        registry = MetricsRegistry(namespace="test", multiproc_dir="")
+        counter = registry.counter("events_total", "Events", ("outcome",))
+
+        def work():
+            for _ in range(1000):
+                counter.inc(outcome="success")
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counter.inc(2, outcome="failed")
+
+        assert counter.collect() == {("success",): 4000.0, ("failed",): 2.0}
+
+    def test_histogram_buckets_sum_and_count(self):
+        registry = MetricsRegistry(namespace="test", multiproc_dir="")
+        histogram = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value, route="/x")
+
+        assert histogram.collect()[("/x",)] == [1, 2, 1, 6.05, 4]
+
+    def test_registering_twice_returns_the_same_metric(self):
+        registry = MetricsRegistry(namespace="test", multiproc_dir="")
+        assert registry.counter("a_total", "A") is registry.counter("a_total", "A")
+
+    def test_callback_gauge_is_evaluated_at_scrape(self):
+        registry = MetricsRegistry(namespace="test", multiproc_dir="")
+        depth = {"value": 3}
+        gauge = registry.gauge("queue_depth", "Depth", ("queue",), callback=lambda: {("q",): depth["value"]})
+        depth["value"] = 7
+        assert gauge.collect() == {("q",): 7.0}
+
+    @pytest.mark.asyncio
+    async def test_observe_methods_times_sync_and_async_calls(self):
+        registry = MetricsRegistry(namespace="test", multiproc_dir="")
+        histogram = registry.histogram("call_seconds", "Calls", ("operation",))
+
+        @observe_methods(histogram, exclude=("skipped",))
+        class Client:
+            def get(self):
+                return 1
+
+            async def fetch(self):
+                return 2
+
+            def skipped(self):
+                return 3
+
+        client = Client()
+        assert client.get() == 1
+        assert await client.fetch() == 2
+        assert client.skipped() == 3
+        assert set(histogram.collect()) == {("get",), ("fetch",)}
+
+
+class TestExposition:
+    """Test Prometheus text format"""
+
+    def test_render_text_format(self):
+        registry = MetricsRegistry(namespace="bhiv", multiproc_dir="")
+        registry.counter("forward_total", "Forwards", ("outcome",)).inc(outcome="ok")
+        registry.histogram("lag_seconds", "Lag", ("event_type",), buckets=(0.1,)).observe(0.2, event_type='a"b')
+        registry.gauge("depth", "Depth").set(4)
+
+        text = registry.render()
+        assert "# TYPE bhiv_forward_total counter" in text
+        assert 'bhiv_forward_total{outcome="ok"} 1' in text
+        assert 'bhiv_lag_seconds_bucket{event_type="a\\"b",le="0.1"} 0' in text
+        assert 'bhiv_lag_seconds_bucket{event_type="a\\"b",le="+Inf"} 1' in text
+        assert 'bhiv_lag_seconds_count{event_type="a\\"b"} 1' in text
+        assert "bhiv_depth 4" in text
+        assert text.endswith("\n")
+
+
+class TestMultiWorker:
+    """Test merging per-worker snapshots"""
+
+    def test_render_merges_worker_snapshots(self, tmp_path):
+        registry = MetricsRegistry(namespace="bhiv", multiproc_dir=str(tmp_path))
+        registry.counter("requests_total", "Requests").inc(3)
+        registry.gauge("depth", "Depth").set(2)
+
+        other = registry.snapshot()
+        other["pid"] = os.getpid() + 1_000_000  # a worker that has exited
+        (tmp_path / "other.json").write_text(json.dumps(other))
+
+        text = registry.render()
+        assert "bhiv_requests_total 6" in text
+        assert f'bhiv_depth{{pid="{os.getpid()}"}} 2' in text
+        assert str(os.getpid() + 1_000_000) not in text
+        assert (tmp_path / f"{os.getpid()}.json").exists()
+
+    def test_merge_sums_histograms(self):
+        registry = MetricsRegistry(namespace="bhiv", multiproc_dir="")
+        registry.histogram("lat_seconds", "Latency", buckets=(1.0,)).observe(0.5)
+        snapshot = registry.snapshot()
+
+        merged = _merge([snapshot, snapshot])
+        assert merged["bhiv_lat_seconds"]["values"] == [[[], [2, 0, 1.0, 2]]]
+
+
+class TestMetricsMiddleware:
+    """Test request latency by route template"""
+
+    def test_records_route_template_and_status(self):
+        registry = MetricsRegistry(namespace="test", multiproc_dir="")
+        histogram = registry.histogram("http_seconds", "HTTP", ("method", "route", "status"))
+        app = FastAPI()
+
+        @app.get("/items/{item_id}")
+        async def get_item(item_id: str):
+            return {"item_id": item_id}
+
+        app.add_middleware(MetricsMiddleware, histogram=histogram)
+        client = TestClient(app)
+        client.get("/items/1")
+        client.get("/items/2")
+        client.get("/missing")
+
+        values = histogram.collect()
+        assert values[("GET", "/items/{item_id}", "200")][-1] == 2
+        assert values[("GET", "unmatched", "404")][-1] == 1
@@ -0,0 +1,281 @@
+"""
+Unit Tests for BHIV Bucket Rate Limiting
+Tests token buckets, route classification, runtime tuning and the ASGI middleware
+"""
+
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from config.rate_limits import classify_route, validate_route_limit
+from middleware.rate_limiter import (
+    TokenBucket,
+    InMemoryRateLimitBackend,
+    RedisRateLimitBackend,
+    RateLimiter,
+    RateLimitMiddleware,
+    client_id_from_scope
+)
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestTokenBucket:
+    """Test token bucket refill and consumption"""
+
+    def test_burst_then_empty(self):
+        """Test bucket allows burst requests then rejects"""
+        bucket = TokenBucket(burst=3, now=0.0)
+        results = [bucket.take(rate=1.0, burst=3, now=0.0)[0] for _ in range(4)]
+        assert results == [True, True, True, False]
+
+    def test_refill_over_time(self):
+        """Test tokens refill at the configured rate"""
+        bucket = TokenBucket(burst=2, now=0.0)
+        bucket.take(1.0, 2, 0.0)
+        bucket.take(1.0, 2, 0.0)
+        assert bucket.take(1.0, 2, 0.5)[0] is False
+        assert bucket.take(1.0, 2, 1.5)[0] is True
+
+    def test_refill_capped_at_burst(self):
+        """Test idle time never accumulates more than burst tokens"""
+        bucket = TokenBucket(burst=2, now=0.0)
+        allowed, tokens = bucket.take(1.0, 2, 1000.0)
+        assert allowed is True
+        assert tokens == 1.0
+
+class TestRouteClassification:
+    """Test request to route class mapping"""
+
+    def test_core_write_event(self):
+        assert classify_route("POST", "/core/write-event") == "core_write"
+        assert classify_route("POST", "/core/write-events") == "core_write_batch"
+
+    def test_agent_execution(self):
+        assert classify_route("POST", "/run-basket") == "agent_execution"
+        assert classify_route("POST", "/run-agent") == "agent_execution"
+
+    def test_read_and_write_defaults(self):
+        assert classify_route("GET", "/core/events") == "read"
+        assert classify_route("DELETE", "/baskets/foo") == "write"
+
+    def test_exempt_paths(self):
+        assert classify_route("GET", "/health") is None
+        assert classify_route("PUT", "/admin/rate-limits/read") is None
+
+    def test_validate_route_limit(self):
+        assert validate_route_limit(10, 20)["valid"] is True
+        assert validate_route_limit(0, 20)["valid"] is False
+        assert validate_route_limit(10, "abc")["valid"] is False
+
+class TestRateLimiter:
+    """Test per-client limiting and runtime updates"""
+
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    @pytest.fixture
+    def limiter(self, clock):
+        limits = {"core_write": {"rate_per_sec": 1.0, "burst": 2, "description": "test"}}
+        return RateLimiter(backend=InMemoryRateLimitBackend(clock=clock), limits=limits)
+
+    @pytest.mark.asyncio
+    async def test_clients_are_isolated(self, limiter):
+        """Test one client exhausting its bucket does not affect another"""
+        assert (await limiter.check("core-a", "core_write"))["allowed"]
+        assert (await limiter.check("core-a", "core_write"))["allowed"]
+        assert not (await limiter.check("core-a", "core_write"))["allowed"]
+        assert (await limiter.check("core-b", "core_write"))["allowed"]
+
+    @pytest.mark.asyncio
+    async def test_decision_reports_retry_after(self, limiter):
+        """Test rejected decisions carry a retry hint"""
+        await limiter.check("core-a", "core_write")
+        await limiter.check("core-a", "core_write")
+        decision = await limiter.check("core-a", "core_write")
+        assert decision["remaining"] == 0
+        assert decision["retry_after"] == pytest.approx(1.0)
+        assert limiter.stats["core_write"] == {"allowed": 2, "limited": 1}
+
+    @pytest.mark.asyncio
+    async def test_runtime_update_applies_immediately(self, limiter, clock):
+        """Test raising burst takes effect on the next refill"""
+        for _ in range(3):
+            await limiter.check("core-a", "core_write")
+
+        result = limiter.update_limit("core_write", 100.0, 50)
+        assert result["success"] is True
+        assert result["previous"]["burst"] == 2
+
+        clock.now += 1.0
+        decision = await limiter.check("core-a", "core_write")
+        assert decision["allowed"] is True
+        assert decision["limit"] == 50
+
+    def test_update_rejects_invalid(self, limiter):
+        assert limiter.update_limit("core_write", -1, 5)["success"] is False
+        assert limiter.update_limit("unknown_class", 1, 5)["success"] is False
+
+    @pytest.mark.asyncio
+    async def test_disabled_limiter_allows_all(self, limiter):
+        limiter.set_enabled(False)
+        for _ in range(10):
+            assert (await limiter.check("core-a", "core_write"))["allowed"]
+
+    @pytest.mark.asyncio
+    async def test_memory_backend_evicts_idle_clients(self, clock):
+        backend = InMemoryRateLimitBackend(max_buckets=2, clock=clock)
+        await backend.take("a", 1.0, 1)
+        await backend.take("b", 1.0, 1)
+        await backend.take("c", 1.0, 1)
+        assert list(backend.buckets) == ["b", "c"]
+
+    @pytest.mark.asyncio
+    async def test_redis_backend_falls_back_when_unavailable(self, clock):
+        """Test Redis errors degrade to in-process buckets"""
+        script = Mock(side_effect=ConnectionError("redis down"))
+        client = Mock()
+        client.register_script.return_value = script
+        backend = RedisRateLimitBackend(client, fallback=InMemoryRateLimitBackend(clock=clock))
+
+        allowed, tokens = await backend.take("core_write:a", 1.0, 2)
+        assert allowed is True
+        assert tokens == 1.0
+
+    @pytest.mark.asyncio
+    async def test_redis_backend_skips_redis_during_cooldown(self, clock):
+        """Test an outage opens the circuit instead of timing out every request"""
+        script = AsyncMock(side_effect=ConnectionError("redis down"))
+        client = Mock()
+        client.register_script.return_value = script
+        backend = RedisRateLimitBackend(
+            client, fallback=InMemoryRateLimitBackend(clock=clock), cooldown_seconds=30, clock=clock
+        )
+
+        for _ in range(3):
+            await backend.take("core_write:a", 1.0, 5)
+        assert script.await_count == 1
+        assert backend.circuit_open
+
+        clock.now += 31
+        script.side_effect = None
+        script.return_value = [1, "4"]
+        assert await backend.take("core_write:a", 1.0, 5) == (True, 4.0)
+        assert not backend.circuit_open
+        assert script.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_admin_changes_reach_other_workers(self, clock):
+        """Test limits saved through one worker's Redis backend apply on another's"""
+        store = {}
+        client = Mock()
+        client.get = AsyncMock(side_effect=lambda key: store.get(key))
+        client.set = AsyncMock(side_effect=lambda key, value: store.__setitem__(key, value))
+        limits = {"core_write": {"rate_per_sec": 1.0, "burst": 2, "description": "test"}}
+        workers = [
+            RateLimiter(backend=RedisRateLimitBackend(client), limits=limits, settings_refresh_seconds=5, clock=clock)
+            for _ in range(2)
+        ]
+        await workers[1].refresh_settings()
+
+        workers[0].update_limit("core_write", 10.0, 20)
+        workers[0].set_enabled(False)
+        await workers[0].publish_settings()
+
+        await workers[1].refresh_settings()
+        assert workers[1].limits["core_write"]["burst"] == 2
+        clock.now += 5
+        await workers[1].refresh_settings()
+        assert workers[1].limits["core_write"]["burst"] == 20
+        assert workers[1].enabled is False
+
+class TestAdminEndpoints:
+    """Test the runtime tuning endpoints are closed unless an admin token is configured"""
+
+    @pytest.fixture
+    def client(self):
+        import main
+        return TestClient(main.app)
+
+    def test_disabled_without_token(self, client):
+        with patch.dict("config.rate_limits.RATE_LIMIT_CONFIG", {"admin_token": None}):
+            assert client.get("/admin/rate-limits").status_code == 403
+            response = client.post("/admin/rate-limits/enabled", params={"enabled": "false"})
+            assert response.status_code == 403
+
+    def test_requires_matching_token(self, client):
+        with patch.dict("config.rate_limits.RATE_LIMIT_CONFIG", {"admin_token": "secret"}):
+            assert client.get("/admin/rate-limits").status_code == 403
+            assert client.get("/admin/rate-limits", headers={"x-admin-token": "wrong"}).status_code == 403
+            assert client.get("/admin/rate-limits", headers={"x-admin-token": "secret"}).status_code == 200
+
+class TestRateLimitMiddleware:
+    """Test the ASGI middleware end to end"""
+
+    @pytest.fixture
+    def client(self):
+        limits = {
+            "core_write": {"rate_per_sec": 0.001, "burst": 2, "description": "test"},
+            "read": {"rate_per_sec": 100.0, "burst": 100, "description": "test"}
+        }
+        app = FastAPI()
+        app.add_middleware(RateLimitMiddleware, limiter=RateLimiter(limits=limits), trusted_client_ips={"testclient"})
+
+        @app.post("/core/write-event")
+        async def write_event():
+            return {"success": True}
+
+        @app.get("/health")
+        async def health():
+            return {"status": "healthy"}
+
+        return TestClient(app)
+
+    def test_headers_on_allowed_response(self, client):
+        response = client.post("/core/write-event", headers={"X-Client-ID": "core-1"})
+        assert response.status_code == 200
+        assert response.headers["RateLimit-Limit"] == "2"
+        assert response.headers["RateLimit-Remaining"] == "1"
+        assert "X-RateLimit-Reset" in response.headers
+
+    def test_429_when_exhausted(self, client):
+        for _ in range(2):
+            assert client.post("/core/write-event", headers={"X-Client-ID": "core-1"}).status_code == 200
+
+        response = client.post("/core/write-event", headers={"X-Client-ID": "core-1"})
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert response.json()["route_class"] == "core_write"
+
+        # A different client id has its own bucket
+        assert client.post("/core/write-event", headers={"X-Client-ID": "core-2"}).status_code == 200
+
+    def test_client_id_header_only_from_trusted_peers(self):
+        """Test untrusted callers cannot pick a fresh bucket per request"""
+        scope = {"client": ("203.0.113.7", 5000), "headers": [(b"x-client-id", b"core-1")]}
+        assert client_id_from_scope(scope, trusted_client_ips=set()) == "ip:203.0.113.7"
+        assert client_id_from_scope(scope, trusted_client_ips={"203.0.113.7"}) == "core-1"
+
+        limits = {"core_write": {"rate_per_sec": 0.001, "burst": 1, "description": "test"}}
+        app = FastAPI()
+        app.add_middleware(RateLimitMiddleware, limiter=RateLimiter(limits=limits), trusted_client_ips=set())
+
+        @app.post("/core/write-event")
+        async def write_event():
+            return {"success": True}
+
+        client = TestClient(app)
+        assert client.post("/core/write-event", headers={"X-Client-ID": "a"}).status_code == 200
+        assert client.post("/core/write-event", headers={"X-Client-ID": "b"}).status_code == 429
+
+    def test_exempt_path_has_no_headers(self, client):
+        response = client.get("/health")
+        assert response.status_code == 200
+        assert "RateLimit-Limit" not in response.headers
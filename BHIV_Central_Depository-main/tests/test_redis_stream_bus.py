@@ -0,0 +1,169 @@
+"""
+Unit Tests for the Redis Streams Event Bus
+Tests consumer groups, acknowledgements, pending-entry reclaim and MAXLEN trimming
+Runs against fakeredis; point REDIS_STREAM_TEST_URL at a real Redis to use it instead
+"""
+
+import asyncio
+import os
+import uuid
+import pytest
+from unittest.mock import patch
+from communication.event_bus import EventBus, create_event_bus
+from communication.redis_stream_bus import RedisStreamEventBus
+
+fakeredis = pytest.importorskip("fakeredis")
+
+STATE = {}
+
+@pytest.fixture(autouse=True)
+def isolated_streams():
+    """Fresh fake server and a unique stream prefix per test"""
+    STATE["server"] = fakeredis.FakeServer()
+    STATE["prefix"] = f"test:{uuid.uuid4().hex[:8]}"
+
+def make_client():
+    url = os.getenv("REDIS_STREAM_TEST_URL")
+    if url:
+        import redis.asyncio as aioredis
+        return aioredis.from_url(url)
+    return fakeredis.aioredis.FakeRedis(server=STATE["server"])
+
+def stream(event_type="evt"):
+    return f"{STATE['prefix']}:{event_type}"
+
+def make_bus(consumer, **kwargs):
+    options = {"stream_prefix": STATE["prefix"], "block_ms": 20, "claim_interval_seconds": 0.05}
+    options.update(kwargs)
+    return RedisStreamEventBus(make_client(), consumer_name=consumer, **options)
+
+async def wait_until(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+class TestDelivery:
+    """Test publish, consume and acknowledge"""
+
+    @pytest.mark.asyncio
+    async def test_publish_is_delivered_and_acked(self):
+        bus = make_bus("worker-1")
+        received = []
+        bus.subscribe("evt", lambda msg: received.append(msg), name="recorder")
+
+        result = await bus.publish("evt", {"n": 1})
+        assert result["queued"] == 1
+
+        await wait_until(lambda: received == [{"n": 1}])
+        await wait_until(lambda: bus.get_metrics()["subscribers"][0]["acked"] == 1)
+        pending = await bus.client.xpending(stream(), "bucket:recorder")
+        assert pending["pending"] == 0
+        await bus.close()
+
+    @pytest.mark.asyncio
+    async def test_workers_share_a_subscriber_group(self):
+        """Test the same subscriber in two workers sees each event exactly once overall"""
+        received = []
+        buses = [make_bus(f"worker-{i}") for i in range(2)]
+        for bus in buses:
+            bus.subscribe("evt", lambda msg: received.append(msg["n"]), name="forwarder")
+            await bus.start()
+
+        for i in range(20):
+            await buses[i % 2].publish("evt", {"n": i})
+
+        await wait_until(lambda: len(received) == 20)
+        await asyncio.sleep(0.1)
+        assert sorted(received) == list(range(20))
+        for bus in buses:
+            await bus.close()
+
+    @pytest.mark.asyncio
+    async def test_distinct_subscribers_each_see_every_event(self):
+        bus = make_bus("worker-1")
+        audit, forward = [], []
+        bus.subscribe("evt", lambda msg: audit.append(msg["n"]), name="audit")
+        bus.subscribe("evt", lambda msg: forward.append(msg["n"]), name="forward")
+
+        for i in range(3):
+            await bus.publish("evt", {"n": i})
+
+        await wait_until(lambda: len(audit) == 3 and len(forward) == 3)
+        await bus.close()
+
+class TestReclaim:
+    """Test pending-entry reclaim and retry limits"""
+
+    @pytest.mark.asyncio
+    async def test_failed_entry_is_reclaimed_and_retried(self):
+        bus = make_bus("worker-1", claim_idle_ms=0)
+        attempts = []
+
+        def flaky(msg):
+            attempts.append(msg["n"])
+            if len(attempts) == 1:
+                raise RuntimeError("transient")
+
+        bus.subscribe("evt", flaky, name="flaky")
+        await bus.publish("evt", {"n": 1})
+
+        await wait_until(lambda: len(attempts) == 2)
+        metrics = bus.get_metrics()["subscribers"][0]
+        await wait_until(lambda: bus.get_metrics()["subscribers"][0]["acked"] == 1)
+        assert metrics["errors"] == 1
+        assert metrics["reclaimed"] >= 1
+        await bus.close()
+
+    @pytest.mark.asyncio
+    async def test_dead_worker_entries_are_claimed_by_another(self):
+        """Test entries read but never acked by a crashed worker are taken over"""
+        client = make_client()
+        await client.xgroup_create(stream(), "bucket:forwarder", id="$", mkstream=True)
+        await client.xadd(stream(), {"data": '{"n": 7}'})
+        await client.xreadgroup("bucket:forwarder", "crashed-worker", {stream(): ">"})
+
+        bus = make_bus("worker-2", claim_idle_ms=0)
+        received = []
+        bus.subscribe("evt", lambda msg: received.append(msg), name="forwarder")
+
+        await wait_until(lambda: received == [{"n": 7}])
+        await bus.close()
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_deliveries(self):
+        bus = make_bus("worker-1", claim_idle_ms=0, max_deliveries=2)
+
+        def always_fails(msg):
+            raise RuntimeError("poison")
+
+        bus.subscribe("evt", always_fails, name="poison")
+        await bus.publish("evt", {"n": 1})
+
+        await wait_until(lambda: bus.get_metrics()["subscribers"][0]["dead_lettered"] == 1)
+        assert bus.get_metrics()["subscribers"][0]["errors"] == 2
+        pending = await bus.client.xpending(stream(), "bucket:poison")
+        assert pending["pending"] == 0
+        await bus.close()
+
+class TestTrimmingAndFactory:
+    """Test MAXLEN trimming and transport selection"""
+
+    @pytest.mark.asyncio
+    async def test_stream_trimmed_by_maxlen(self):
+        bus = make_bus("worker-1", maxlen=10, approximate_trim=False)
+        for i in range(25):
+            await bus.publish("evt", {"n": i})
+
+        assert await bus.client.xlen(stream()) == 10
+        assert bus.get_metrics()["published"] == 25
+        await bus.close()
+
+    def test_in_process_bus_is_default(self):
+        assert isinstance(create_event_bus(), EventBus)
+
+    def test_redis_streams_backend_selected(self):
+        with patch.dict("config.event_bus.EVENT_BUS_CONFIG", {"backend": "redis_streams"}):
+            assert isinstance(create_event_bus(), RedisStreamEventBus)
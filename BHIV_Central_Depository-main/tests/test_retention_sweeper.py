@@ -0,0 +1,180 @@
+"""
+Unit Tests for the Retention Sweeper
+Tests batched MongoDB deletes, legal holds, archiving and index-driven Redis expiry
+"""
+
+import gzip
+import json
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock
+from utils.retention_sweeper import RetentionSweeper
+from utils.redis_service import RedisService
+from governance.retention import REDIS_RETENTION_INDEX_KEY
+
+NOW = datetime(2026, 6, 1, tzinfo=timezone.utc)
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction):
+        self.docs = sorted(self.docs, key=lambda d: d[field], reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    def __iter__(self):
+        return iter(self.docs)
+
+class FakeCollection:
+    """Minimal pymongo collection supporting the sweeper's queries"""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.indexes = []
+        self.delete_calls = 0
+
+    def create_index(self, keys):
+        self.indexes.append(keys)
+
+    def find(self, query, projection=None):
+        field, condition = next((k, v) for k, v in query.items() if k != "legal_hold")
+        matched = [
+            d for d in self.docs
+            if d[field] < condition["$lt"] and d.get("legal_hold") is not True
+        ]
+        return FakeCursor(matched)
+
+    def delete_many(self, query):
+        ids = set(query["_id"]["$in"])
+        before = len(self.docs)
+        self.docs = [d for d in self.docs if d["_id"] not in ids]
+        self.delete_calls += 1
+        return Mock(deleted_count=before - len(self.docs))
+
+class FakeMongo:
+    def __init__(self, collections):
+        self.db = collections
+
+def make_logs(count, age_days):
+    return [
+        {"_id": f"log_{age_days}_{i}", "timestamp": NOW - timedelta(days=age_days), "message": "x"}
+        for i in range(count)
+    ]
+
+MONGO_POLICY = {
+    "execution_logs": {
+        "store": "mongodb",
+        "collection": "logs",
+        "timestamp_field": "timestamp",
+        "retention_days": 365,
+        "archive": True
+    }
+}
+
+class TestMongoSweep:
+    """Test MongoDB retention sweeps"""
+
+    @pytest.mark.asyncio
+    async def test_deletes_expired_in_batches(self):
+        logs = FakeCollection(make_logs(7, 400) + make_logs(3, 10))
+        sweeper = RetentionSweeper(
+            mongo_client=FakeMongo({"logs": logs}),
+            policies=MONGO_POLICY,
+            batch_size=3,
+            max_deletes_per_sec=1_000_000,
+            archive_enabled=False
+        )
+
+        result = await sweeper.sweep_all(now=NOW)
+
+        assert result["results"]["execution_logs"]["deleted"] == 7
+        assert logs.delete_calls == 3
+        assert len(logs.docs) == 3
+        assert logs.indexes == [[("timestamp", 1)]]
+
+    @pytest.mark.asyncio
+    async def test_legal_hold_is_never_deleted(self):
+        held = make_logs(1, 900)
+        held[0]["legal_hold"] = True
+        logs = FakeCollection(held + make_logs(2, 901))
+        sweeper = RetentionSweeper(mongo_client=FakeMongo({"logs": logs}), policies=MONGO_POLICY, archive_enabled=False)
+
+        await sweeper.sweep_all(now=NOW)
+
+        assert [d["_id"] for d in logs.docs] == [held[0]["_id"]]
+
+    @pytest.mark.asyncio
+    async def test_archives_before_delete(self, tmp_path):
+        logs = FakeCollection(make_logs(2, 400))
+        sweeper = RetentionSweeper(
+            mongo_client=FakeMongo({"logs": logs}),
+            policies=MONGO_POLICY,
+            archive_enabled=True,
+            archive_dir=str(tmp_path)
+        )
+
+        result = await sweeper.sweep_all(now=NOW)
+
+        assert result["results"]["execution_logs"]["archived"] == 2
+        archive_file = tmp_path / "logs" / "logs_20260601.jsonl.gz"
+        with gzip.open(archive_file, "rt", encoding="utf-8") as f:
+            archived = [json.loads(line) for line in f]
+        assert [d["_id"] for d in archived] == ["log_400_0", "log_400_1"]
+
+    @pytest.mark.asyncio
+    async def test_skips_when_mongo_unavailable(self):
+        sweeper = RetentionSweeper(mongo_client=FakeMongo(None), policies=MONGO_POLICY)
+        result = await sweeper.sweep_all(now=NOW)
+        assert result["results"]["execution_logs"] == {"skipped": "mongodb not connected"}
+
+class TestRedisSweep:
+    """Test index-driven Redis expiry"""
+
+    @pytest.fixture
+    def redis_service(self):
+        service = RedisService.__new__(RedisService)
+        service.client = Mock()
+        service.client.ping.return_value = True
+        service.connected = True
+        return service
+
+    def test_writes_are_indexed(self, redis_service):
+        redis_service.store_agent_output("exec_1", "agent_a", {"ok": True})
+        redis_service.client.zadd.assert_called_once()
+        args, kwargs = redis_service.client.zadd.call_args
+        assert args[0] == REDIS_RETENTION_INDEX_KEY
+        assert "execution:exec_1:outputs:agent_a" in args[1]
+        assert kwargs == {"nx": True}
+
+    def test_sweep_uses_index_not_scan(self, redis_service):
+        redis_service.client.zrangebyscore.return_value = ["execution:old:logs", "agent:a:state:old"]
+        pipe = redis_service.client.pipeline.return_value
+
+        removed = redis_service.sweep_expired_keys(1000.0, batch_size=10)
+
+        assert removed == 2
+        pipe.delete.assert_called_once_with("execution:old:logs", "agent:a:state:old")
+        pipe.zrem.assert_called_once_with(REDIS_RETENTION_INDEX_KEY, "execution:old:logs", "agent:a:state:old")
+        redis_service.client.scan_iter.assert_not_called()
+
+    def test_cleanup_old_data_loops_batches(self, redis_service):
+        redis_service.client.zrangebyscore.side_effect = [["k1", "k2"], ["k3"]]
+        assert redis_service.cleanup_old_data(days=7, batch_size=2) == 3
+
+    @pytest.mark.asyncio
+    async def test_sweeper_redis_policy(self, redis_service):
+        redis_service.client.zrangebyscore.side_effect = [["k1"], []]
+        policies = {
+            "redis_execution_data": {"store": "redis", "index_key": REDIS_RETENTION_INDEX_KEY, "retention_seconds": 86400}
+        }
+        sweeper = RetentionSweeper(redis_service=redis_service, policies=policies, batch_size=1)
+
+        result = await sweeper.sweep_all(now=NOW)
+
+        assert result["results"]["redis_execution_data"]["deleted"] == 1
+        cutoff = redis_service.client.zrangebyscore.call_args_list[0].args[2]
+        assert cutoff == NOW.timestamp() - 86400
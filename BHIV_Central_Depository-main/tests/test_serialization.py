@@ -0,0 +1,153 @@
+"""
+Unit Tests for Payload Serialization
+Tests formats, threshold compression, versioned envelopes and legacy JSON reads
+"""
+
+import json
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import Mock
+from bson import Binary
+from database.mongo_db import MongoDBClient
+from utils.serialization import Serializer, ENVELOPE_MAGIC, MONGO_BINARY_SUBTYPE
+from utils.redis_service import RedisService
+
+DIAGNOSTICS_REPORT = {
+    "agent": "diagnostics",
+    "findings": [{"check": f"check_{i}", "status": "ok", "detail": "all systems nominal " * 5} for i in range(200)]
+}
+
+class TestSerializer:
+    """Test envelope encoding and decoding"""
+
+    @pytest.mark.parametrize("format", ["json", "orjson", "msgpack"])
+    def test_round_trip_each_format(self, format):
+        serializer = Serializer(format=format, compression="none")
+        value = {"a": 1, "nested": {"list": [1, 2.5, "x", None, True]}}
+
+        encoded = serializer.dumps(value)
+
+        assert encoded.startswith(ENVELOPE_MAGIC)
+        assert serializer.loads(encoded) == value
+
+    @pytest.mark.parametrize("compression", ["zstd", "lz4", "zlib"])
+    def test_large_payload_is_compressed(self, compression):
+        serializer = Serializer(format="orjson", compression=compression, compress_threshold=1024)
+
+        encoded = serializer.dumps(DIAGNOSTICS_REPORT)
+
+        assert len(encoded) < len(json.dumps(DIAGNOSTICS_REPORT)) / 5
+        assert serializer.loads(encoded) == DIAGNOSTICS_REPORT
+        assert serializer.stats["compressed"] == 1
+
+    def test_small_payload_not_compressed(self):
+        serializer = Serializer(format="json", compression="zstd", compress_threshold=1024)
+        encoded = serializer.dumps({"status": "ok"})
+        assert encoded[5] == 0
+        assert serializer.stats["compressed"] == 0
+
+    def test_legacy_json_still_readable(self):
+        serializer = Serializer(format="msgpack", compression="zstd")
+        assert serializer.loads('{"result": "success"}') == {"result": "success"}
+        assert serializer.loads(b'[{"step": "start"}]') == [{"step": "start"}]
+
+    def test_reads_envelopes_written_with_other_settings(self):
+        """Test a config change does not strand previously written entries"""
+        written = Serializer(format="msgpack", compression="lz4", compress_threshold=0).dumps(DIAGNOSTICS_REPORT)
+        reader = Serializer(format="json", compression="none")
+        assert reader.loads(written) == DIAGNOSTICS_REPORT
+
+    def test_datetimes_encoded_as_iso_strings(self):
+        stamp = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        for format in ("json", "orjson", "msgpack"):
+            serializer = Serializer(format=format, compression="none")
+            assert serializer.loads(serializer.dumps({"at": stamp}))["at"].startswith("2026-01-01T00:00:00")
+
+    def test_rejects_unknown_envelope_version(self):
+        serializer = Serializer(format="json", compression="none")
+        encoded = bytearray(serializer.dumps({"a": 1}))
+        encoded[3] = 99
+        with pytest.raises(ValueError, match="version"):
+            serializer.loads(bytes(encoded))
+
+    def test_rejects_unknown_settings(self):
+        with pytest.raises(ValueError):
+            Serializer(format="pickle")
+        with pytest.raises(ValueError):
+            Serializer(compression="brotli")
+
+class TestMongoPayloads:
+    """Test BSON Binary storage of large payloads"""
+
+    def test_small_values_stay_native(self):
+        serializer = Serializer(format="orjson", compression="zstd", compress_threshold=1024)
+        assert serializer.to_mongo({"status": "ok"}) == {"status": "ok"}
+
+    def test_large_values_stored_as_binary(self):
+        serializer = Serializer(format="orjson", compression="zstd", compress_threshold=1024)
+
+        stored = serializer.to_mongo(DIAGNOSTICS_REPORT)
+
+        assert isinstance(stored, Binary)
+        assert stored.subtype == MONGO_BINARY_SUBTYPE
+        assert serializer.from_mongo(stored) == DIAGNOSTICS_REPORT
+        assert serializer.from_mongo("plain string") == "plain string"
+
+    def test_small_non_bson_values_are_enveloped(self):
+        serializer = Serializer(format="json", compression="zstd", compress_threshold=1024)
+
+        stored = serializer.to_mongo({"tags": {"a"}, 1: "int key"})
+
+        assert isinstance(stored, Binary)
+        assert serializer.from_mongo(stored) == {"tags": ["a"], "1": "int key"}
+
+class TestMongoLogPayloads:
+    """Test store_log keeps the log when its payload cannot be stored natively"""
+
+    @pytest.fixture
+    def client(self):
+        client = MongoDBClient(connect_on_init=False)
+        client.db = Mock()
+        return client
+
+    def test_non_bson_payload_is_stored(self, client):
+        client.store_log("agent", "done", payload={"ids": {1, 2}})
+
+        entry = client.db.logs.insert_one.call_args[0][0]
+        assert isinstance(entry["payload"], Binary)
+
+    def test_unencodable_payload_falls_back_to_repr(self, client):
+        payload = {}
+        payload["self"] = payload
+
+        client.store_log("agent", "done", payload=payload)
+
+        entry = client.db.logs.insert_one.call_args[0][0]
+        assert entry["message"] == "done"
+        assert entry["payload"]["unencodable"] == "dict"
+        assert entry["payload"]["repr"] == repr(payload)
+
+class TestRedisServicePayloads:
+    """Test RedisService reads and writes through the serializer"""
+
+    @pytest.fixture
+    def redis_service(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        service = RedisService.__new__(RedisService)
+        service.client = fakeredis.FakeRedis()
+        service.connected = True
+        return service
+
+    def test_agent_output_round_trip(self, redis_service):
+        redis_service.store_agent_output("exec_1", "diagnostics", DIAGNOSTICS_REPORT)
+
+        raw = redis_service.client.get("execution:exec_1:outputs:diagnostics")
+        assert raw.startswith(ENVELOPE_MAGIC)
+        assert redis_service.get_agent_output("exec_1", "diagnostics") == DIAGNOSTICS_REPORT
+
+    def test_mixed_legacy_and_enveloped_logs(self, redis_service):
+        redis_service.client.lpush("execution:exec_2:logs", json.dumps({"step": "legacy"}))
+        redis_service.store_execution_log("exec_2", "agent_a", "new", {"k": "v"})
+
+        steps = [log["step"] for log in redis_service.get_execution_logs("exec_2")]
+        assert steps == ["new", "legacy"]
@@ -0,0 +1,192 @@
+"""
+Unit Tests for Shared State
+Tests that the memory, Redis and mmap backends behave identically, and the cross-process mmap segment
+"""
+
+import multiprocessing
+import threading
+import pytest
+from utils.shared_state import (
+    SharedState, InMemorySharedState, RedisSharedState, MmapSharedState, SharedStateFull, create_shared_state
+)
+from utils.scale_monitor import ScaleMonitor
+
+@pytest.fixture(params=["memory", "redis", "mmap"])
+def state(request, tmp_path):
+    if request.param == "memory":
+        yield SharedState(InMemorySharedState())
+    elif request.param == "redis":
+        fakeredis = pytest.importorskip("fakeredis")
+        yield SharedState(RedisSharedState(fakeredis.FakeRedis(), "test:"))
+    else:
+        backend = MmapSharedState(str(tmp_path / "segment"), 1024 * 1024, 1024)
+        yield SharedState(backend)
+        backend.close()
+
+def _increment(path, times):
+    state = SharedState(MmapSharedState(path, 1024 * 1024, 1024))
+    for _ in range(times):
+        state.incr("hits")
+
+class TestBackends:
+    """Test the common API on every backend"""
+
+    def test_counters(self, state):
+        assert state.get_counter("writes") == 0
+        assert state.incr("writes") == 1
+        assert state.incr("writes", 4) == 5
+        assert state.decr("writes") == 4
+        assert state.incr("gb", 1.5) == 1.5
+        assert state.get_counter("writes") == 4
+
+    def test_bounded_lists(self, state):
+        for i in range(5):
+            state.append("log", {"n": i}, maxlen=3)
+        state.extend("log", [{"n": 5}, {"n": 6}], maxlen=3)
+        assert [item["n"] for item in state.get_list("log")] == [4, 5, 6]
+        assert [item["n"] for item in state.get_list("log", 2)] == [5, 6]
+        assert state.list_length("log") == 3
+        assert state.get_list("missing") == []
+
+    def test_flags_values_and_sets(self, state):
+        assert state.get_flag("halt") is False
+        state.set_flag("halt")
+        assert state.get_flag("halt") is True
+        state.set_value("storage", {"gb": 2})
+        assert state.get_value("storage") == {"gb": 2}
+        state.add_members("agents", ["a", "b", "a"])
+        assert state.get_members("agents") == {"a", "b"}
+        state.remove_members("agents", ["a"])
+        assert state.get_members("agents") == {"b"}
+        state.delete("halt", "agents")
+        assert state.get_flag("halt") is False
+        assert state.get_members("agents") == set()
+
+    def test_hashes(self, state):
+        assert state.get_hash("by_type") == {}
+        assert state.hincr("by_type", "delete") == 1
+        assert state.hincr("by_type", "delete", 2) == 3
+        state.hincr("by_type", "mutate")
+        assert state.get_hash("by_type") == {"delete": 3, "mutate": 1}
+        assert state.get_hash_field("by_type", "delete") == 3
+        assert state.get_hash_field("by_type", "missing") is None
+        assert state.hash_length("by_type") == 2
+        state.delete("by_type")
+        assert state.get_hash("by_type") == {}
+        assert state.get_hash_field("by_type", "delete") is None
+
+    def test_batched_reads(self, state):
+        state.incr("a", 2)
+        state.hincr("h1", "x")
+        assert state.get_counters(["a", "missing"]) == [2, 0]
+        assert state.get_hashes(["h1", "missing"]) == [{"x": 1}, {}]
+        assert state.get_counters([]) == [] and state.get_hashes([]) == []
+
+    def test_capped_hash_counts(self, state):
+        state.hincr_capped([("h", "a"), ("h", "b"), ("g", "a")], 2, "other")
+        state.hincr_capped([("h", "c"), ("h", "a"), ("g", "c")], 2, "other")
+        assert state.get_hash("h") == {"a": 2, "b": 1, "other": 1}
+        assert state.get_hash("g") == {"a": 1, "c": 1}
+
+    def test_expiring_flag(self, state, monkeypatch):
+        import utils.shared_state as module
+        state.set_flag("throttle", ttl_seconds=0.05)
+        assert state.get_flag("throttle") is True
+        if state.backend != "redis":
+            now = module.time.time()
+            monkeypatch.setattr(module.time, "time", lambda: now + 1)
+            assert state.get_flag("throttle") is False
+
+
+class TestMmapSegment:
+    """Test that worker processes share one segment"""
+
+    def test_counts_from_several_processes_add_up(self, tmp_path):
+        path = str(tmp_path / "segment")
+        ctx = multiprocessing.get_context("fork")
+        workers = [ctx.Process(target=_increment, args=(path, 200)) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=30)
+
+        assert SharedState(MmapSharedState(path, 1024 * 1024, 1024)).get_counter("hits") == 600
+
+    def test_counters_do_not_rewrite_the_document(self, tmp_path):
+        backend = MmapSharedState(str(tmp_path / "segment"), 64 * 1024, 64)
+        state = SharedState(backend)
+        state.add_members("agents", ["a"])
+        generation = backend._generation
+        for _ in range(100):
+            state.incr("hits")
+        state.incr("hits", 0.5)
+        state.add_members("agents", ["a"])
+        assert backend._generation == generation
+        assert state.get_counter("hits") == 100.5
+        state.delete("hits")
+        assert state.get_counter("hits") == 0
+        backend.close()
+
+    def test_full_segment_raises(self, tmp_path):
+        backend = MmapSharedState(str(tmp_path / "segment"), 4096, 4)
+        state = SharedState(backend)
+        for key in "abcd":
+            state.incr(key)
+        with pytest.raises(SharedStateFull):
+            state.incr("e")
+        with pytest.raises(SharedStateFull):
+            state.set_value("big", "x" * 8192)
+        assert state.get_value("big") is None
+        assert [state.get_counter(key) for key in "abcd"] == [1, 1, 1, 1]
+        backend.close()
+
+    def test_lists_stay_out_of_the_segment(self, tmp_path):
+        path = str(tmp_path / "segment")
+        first = SharedState(MmapSharedState(path, 64 * 1024, 64))
+        first.extend("events", [{"n": 1}])
+        second = SharedState(MmapSharedState(path, 64 * 1024, 64))
+        assert second.get_list("events") == []
+        assert first.get_list("events") == [{"n": 1}]
+
+    def test_unavailable_backend_falls_back_to_memory(self, tmp_path):
+        config = {"backend": "mmap", "mmap_path": str(tmp_path / "missing" / "segment"),
+                  "mmap_size_bytes": 1024, "key_prefix": ""}
+        assert create_shared_state(config).backend == "memory"
+
+
+class TestAsyncAccess:
+    """Test that async callers keep network round trips off the event loop"""
+
+    @pytest.mark.asyncio
+    async def test_redis_calls_run_in_a_worker_thread(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        state = SharedState(RedisSharedState(fakeredis.FakeRedis(), "test:"))
+        loop_thread = threading.get_ident()
+        assert await state.run(threading.get_ident) != loop_thread
+        assert await state.run(state.incr, "hits", 2) == 2
+
+    @pytest.mark.asyncio
+    async def test_local_backends_run_inline(self):
+        state = SharedState(InMemorySharedState())
+        assert await state.run(threading.get_ident) == threading.get_ident()
+
+
+class TestScaleMonitor:
+    """Test that the scale monitor keeps its API on top of shared state"""
+
+    @pytest.mark.asyncio
+    async def test_counters_and_histories(self, state):
+        monitor = ScaleMonitor(state)
+        await monitor.track_write_start()
+        await monitor.track_write_start()
+        await monitor.track_write_end()
+        await monitor.track_read_end()
+        assert (monitor.active_writes, monitor.active_reads) == (1, 0)
+
+        for latency in range(1, 1101):
+            await monitor.record_query_latency(float(latency))
+        assert len(monitor.query_latencies) == 1000
+        assert (await monitor.get_query_performance_status())["sample_count"] == 1000
+
+        await monitor.get_storage_status(used_gb=12.5)
+        assert ScaleMonitor(state).total_storage_gb == 12.5
@@ -0,0 +1,133 @@
+"""
+Unit Tests for Staged Startup
+Tests concurrent stages, background dependencies, readiness reporting and the lazy registry
+"""
+
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import Mock
+from utils.startup import StartupManager
+from agents.agent_registry import AgentRegistry
+from middleware.audit_middleware import AuditMiddleware
+
+class TestStartupManager:
+    """Test stage ordering and readiness"""
+
+    @pytest.mark.asyncio
+    async def test_stage_dependencies_run_concurrently(self):
+        manager = StartupManager()
+        for name in ("a", "b", "c"):
+            manager.register(name, lambda: time.sleep(0.2) or True)
+
+        start = time.perf_counter()
+        readiness = await manager.start()
+
+        assert time.perf_counter() - start < 0.5
+        assert readiness["ready"] is True
+        assert all(d["status"] == "ready" for d in readiness["dependencies"].values())
+
+    @pytest.mark.asyncio
+    async def test_stages_run_in_order(self):
+        manager = StartupManager()
+        order = []
+
+        async def record(name):
+            order.append(name)
+            return True
+
+        manager.register("worker", lambda: record("worker"), stage=1)
+        manager.register("client", lambda: record("client"), stage=0)
+        await manager.start()
+
+        assert order == ["client", "worker"]
+
+    @pytest.mark.asyncio
+    async def test_background_dependency_does_not_block_startup(self):
+        """Test a slow MongoDB leaves startup fast and is reported as starting"""
+        manager = StartupManager()
+        release = threading.Event()
+        manager.register("mongodb", lambda: release.wait(5), background=True)
+        manager.register("redis", lambda: True, required=False)
+
+        start = time.perf_counter()
+        readiness = await manager.start()
+
+        assert time.perf_counter() - start < 0.5
+        assert readiness["ready"] is False
+        assert readiness["dependencies"]["mongodb"]["status"] == "starting"
+
+        release.set()
+        for _ in range(100):
+            if manager.is_ready("mongodb"):
+                break
+            await asyncio.sleep(0.01)
+        assert manager.readiness()["ready"] is True
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_background_dependency_retries_and_runs_on_ready(self):
+        manager = StartupManager()
+        attempts = iter([False, False, True])
+        on_ready = Mock()
+        manager.register("mongodb", lambda: next(attempts), background=True, retry_interval=0.01, on_ready=on_ready)
+
+        await manager.start()
+        for _ in range(100):
+            if manager.is_ready("mongodb"):
+                break
+            await asyncio.sleep(0.01)
+
+        assert manager.dependencies["mongodb"].attempts == 3
+        on_ready.assert_called_once()
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_failures_are_reported_per_dependency(self):
+        manager = StartupManager()
+
+        def broken():
+            raise RuntimeError("connection refused")
+
+        manager.register("redis", broken, required=False)
+        manager.register("agent_registry", lambda: True)
+        manager.mark_disabled("socketio", "off")
+        readiness = await manager.start()
+
+        assert readiness["ready"] is True
+        assert readiness["dependencies"]["redis"]["status"] == "failed"
+        assert readiness["dependencies"]["redis"]["error"] == "connection refused"
+        assert readiness["dependencies"]["socketio"]["status"] == "disabled"
+
+class TestLazyRegistry:
+    """Test the agent registry defers its directory scan"""
+
+    def test_loads_on_first_access(self, tmp_path):
+        (tmp_path / "agents" / "echo").mkdir(parents=True)
+        (tmp_path / "agents" / "echo" / "agent_spec.json").write_text('{"name": "echo"}')
+        baskets = tmp_path / "baskets.yaml"
+        baskets.write_text("baskets:\n  - basket_name: b1\n    agents: [echo]\n")
+
+        registry = AgentRegistry(str(tmp_path / "agents"), lazy=True, baskets_file=str(baskets))
+
+        assert registry.loaded is False
+        assert registry.get_agent("echo") == {"name": "echo"}
+        assert registry.get_basket("b1") is not None
+        assert registry.loaded is True
+
+class TestAuditAttach:
+    """Test the audit trail moves to MongoDB once it is ready"""
+
+    def test_in_memory_entries_are_persisted(self):
+        audit = AuditMiddleware()
+        asyncio.run(audit.log_operation("CREATE", "a1", "user", "core"))
+        db = Mock()
+
+        flushed = audit.attach_db(db)
+
+        assert flushed == 1
+        inserted = db.audit_logs.insert_many.call_args[0][0]
+        assert inserted[0]["artifact_id"] == "a1" and "_id" not in inserted[0]
+        assert audit.audit_collection is db.audit_logs
+        assert audit.in_memory_audit == []
@@ -0,0 +1,120 @@
+"""
+Unit Tests for Request Tracing
+Tests span nesting, no-op spans outside requests, Server-Timing and OTLP/JSON export
+"""
+
+import asyncio
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from middleware.tracing import TracingMiddleware
+from utils.tracing import Tracer, NOOP_SPAN, tracer as global_tracer, traced
+from utils.redis_service import RedisService
+
+class TestSpans:
+    """Test span creation and nesting"""
+
+    def test_spans_outside_a_trace_are_noops(self):
+        assert Tracer().span("redis.get") is NOOP_SPAN
+
+    @pytest.mark.asyncio
+    async def test_nested_spans_record_parents(self):
+        tracer = Tracer(enabled=True, export_sample_rate=0)
+        with tracer.start_trace("POST /run-basket") as root:
+            with tracer.span("basket.step", step=1) as step:
+                with tracer.span("agent.run"):
+                    await asyncio.sleep(0)
+            with tracer.span("redis.store_execution_log"):
+                pass
+
+        spans = {span.name: span for span in root.trace.spans}
+        assert spans["agent.run"].parent_id == step.span_id
+        assert spans["basket.step"].parent_id == root.span_id
+        assert spans["redis.store_execution_log"].parent_id == root.span_id
+        assert tracer.current_span() is None
+
+    def test_exception_marks_span_as_error(self):
+        tracer = Tracer(enabled=True, export_sample_rate=0)
+        with tracer.start_trace("GET /x") as root:
+            with pytest.raises(ValueError):
+                with tracer.span("mongo.store_log"):
+                    raise ValueError("boom")
+        assert root.trace.spans[0].error == "boom"
+
+    def test_redis_service_calls_are_traced(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        service = RedisService(connect_on_init=False)
+        service.client = fakeredis.FakeRedis()
+        service.connected = True
+
+        with global_tracer.start_trace("GET /x") as root:
+            service.store_agent_output("exec_1", "agent", {"a": 1})
+
+        names = [span.name for span in root.trace.spans]
+        assert "redis.store_agent_output" in names
+        assert "redis.is_connected" in names
+
+class TestServerTiming:
+    """Test the per-layer summary"""
+
+    def test_nested_spans_of_one_layer_are_not_double_counted(self):
+        @traced("redis.outer")
+        def outer():
+            inner()
+
+        @traced("redis.inner")
+        def inner():
+            pass
+
+        # traced() records on the global tracer
+        with global_tracer.start_trace("GET /x") as root:
+            outer()
+            with global_tracer.span("agent.run"):
+                pass
+
+        layers = global_tracer.server_timing(root).split(", ")
+        assert [layer.split(";")[0] for layer in layers] == ["agent", "redis", "total"]
+        assert layers[1].endswith('desc="1 calls"')
+
+    def test_middleware_adds_header_and_names_root_by_route(self, tmp_path):
+        tracer = Tracer(enabled=True, export_sample_rate=1.0, export_file=str(tmp_path / "spans.jsonl"))
+        app = FastAPI()
+        app.add_middleware(TracingMiddleware, tracer=tracer)
+
+        @app.get("/items/{item_id}")
+        async def get_item(item_id: str):
+            with tracer.span("mongo.find_item"):
+                await asyncio.sleep(0.01)
+            return {"id": item_id}
+
+        response = TestClient(app).get("/items/42")
+        tracer.shutdown()
+
+        assert response.headers["server-timing"].startswith("mongo;dur=")
+        exported = json.loads((tmp_path / "spans.jsonl").read_text().splitlines()[0])
+        spans = exported["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        root = next(span for span in spans if not span["parentSpanId"])
+        assert root["name"] == "GET /items/{item_id}"
+        assert root["kind"] == 2
+        assert {"key": "http.status_code", "value": {"intValue": "200"}} in root["attributes"]
+        child = next(span for span in spans if span["parentSpanId"])
+        assert child["traceId"] == root["traceId"] and child["kind"] == 3
+        assert int(child["endTimeUnixNano"]) > int(child["startTimeUnixNano"])
+
+class TestExportSampling:
+    """Test only sampled or failed traces are exported"""
+
+    def test_unsampled_success_is_not_exported(self, tmp_path):
+        tracer = Tracer(enabled=True, export_sample_rate=0, export_file=str(tmp_path / "spans.jsonl"))
+        ok = tracer.start_trace("GET /ok")
+        ok.set_attribute("http.status_code", 200)
+        tracer.finish_trace(ok)
+        failed = tracer.start_trace("GET /fail")
+        failed.set_attribute("http.status_code", 500)
+        tracer.finish_trace(failed)
+        tracer.shutdown()
+
+        lines = (tmp_path / "spans.jsonl").read_text().splitlines()
+        assert len(lines) == 1
+        assert tracer.stats == {"traces": 2, "exported": 1, "dropped_spans": 0}
@@ -0,0 +1,143 @@
+"""
+Unit Tests for the Violation Store
+Tests time-bucketed counters, retention, the bounded recent list and audit persistence
+"""
+
+import asyncio
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock
+from utils.shared_state import SharedState, InMemorySharedState
+from middleware.constitutional.violation_store import ViolationStore
+from handlers.core_violation_handler import CoreViolationHandler
+from middleware.constitutional.core_boundary_enforcer import CoreBoundaryEnforcer
+
+def make_store(**kwargs):
+    options = {"bucket_seconds": 3600, "retention_hours": 24, "recent_limit": 5, **kwargs}
+    return ViolationStore(
+        "test", {"type": "violation_type", "source": "requester_id", "level": "escalation.level"},
+        state=SharedState(InMemorySharedState()), **options
+    )
+
+def violation(vtype="deletion_attempt", requester="bhiv_core", hours_ago=0):
+    timestamp = (datetime.utcnow() - timedelta(hours=hours_ago)).isoformat()
+    return {"timestamp": timestamp, "violation_type": vtype, "requester_id": requester,
+            "escalation": {"level": "owner"}}
+
+def store_epoch(hours_ago=0):
+    return (datetime.utcnow() - timedelta(hours=hours_ago)).replace(tzinfo=timezone.utc).timestamp()
+
+class TestViolationStore:
+    """Test counters and bounds"""
+
+    def test_summary_counts_by_dimension(self):
+        store = make_store()
+        store.record(violation())
+        store.record(violation("schema_mutation", requester="rogue"))
+        store.record(violation(hours_ago=3))
+
+        summary = store.summary(24)
+        assert summary["total"] == 3
+        assert summary["type"] == {"deletion_attempt": 2, "schema_mutation": 1}
+        assert summary["source"] == {"bhiv_core": 2, "rogue": 1}
+        assert summary["level"] == {"owner": 3}
+        assert store.summary(1)["total"] == 2
+
+    def test_recent_list_is_bounded(self):
+        store = make_store()
+        for i in range(20):
+            store.record(violation(requester=f"r{i}"))
+        assert store.summary(24)["total"] == 20
+        assert [v["requester_id"] for v in store.recent(24)] == [f"r{i}" for i in range(15, 20)]
+        assert store.recent(24, limit=2)[-1]["requester_id"] == "r19"
+
+    def test_expired_buckets_are_dropped(self):
+        store = make_store()
+        store.record(violation(hours_ago=30))
+        store.record(violation())
+        assert store.recorded_total() == 2
+        assert store.summary(168)["total"] == 1
+        assert len(store.state.get_members("test:buckets")) == 1
+
+    def test_expired_bucket_hashes_are_deleted(self):
+        store = make_store()
+        store.record(violation(hours_ago=30))
+        old_bucket = store._bucket(store_epoch(hours_ago=30))
+        assert store.state.get_hash(f"test:bucket:{old_bucket}:source") == {"bhiv_core": 1}
+        store.record(violation())
+        assert store.state.get_hash(f"test:bucket:{old_bucket}:source") == {}
+        assert store.state.get_counter(f"test:bucket:{old_bucket}:total") == 0
+
+    def test_high_cardinality_dimension_is_capped(self):
+        store = make_store(max_values=3)
+        for i in range(10):
+            store.record(violation(requester=f"r{i}"))
+        store.record(violation(requester="r0"))
+        store.record(violation(hours_ago=2, requester="r9"))
+
+        summary = store.summary(24)
+        assert summary["total"] == 12
+        assert sum(summary["source"].values()) == 12
+        assert summary["source"]["r0"] == 2
+        assert len(summary["source"]) == 4
+        assert summary["type"] == {"deletion_attempt": 12}
+        bucket = store._bucket(store_epoch())
+        assert store.state.hash_length(f"test:bucket:{bucket}:source") == 4
+
+    @pytest.mark.asyncio
+    async def test_audit_persistence(self):
+        audit = AsyncMock()
+        store = make_store(audit_middleware=audit)
+        store.record(violation())
+        await asyncio.sleep(0)
+        audit.log_operation.assert_called_once()
+        assert audit.log_operation.call_args.kwargs["operation_type"] == "BOUNDARY_VIOLATION"
+
+    @pytest.mark.asyncio
+    async def test_audit_persistence_from_worker_thread(self):
+        """Test violations recorded via shared_state.run are persisted on the app loop"""
+        audit = AsyncMock()
+        store = make_store()
+        store.attach_audit(audit)
+        await asyncio.to_thread(store.record, violation())
+        await asyncio.sleep(0.01)
+        audit.log_operation.assert_awaited_once()
+
+    def test_summary_reads_are_batched(self):
+        store = make_store()
+        for hours_ago in range(5):
+            store.record(violation(hours_ago=hours_ago))
+        calls = {"get_counters": 0, "get_hashes": 0, "get_counter": 0, "get_hash": 0}
+        for name in calls:
+            original = getattr(store.state, name)
+            def counted(*args, _name=name, _original=original):
+                calls[_name] += 1
+                return _original(*args)
+            setattr(store.state, name, counted)
+        assert store.summary(24)["total"] == 5
+        assert calls == {"get_counters": 1, "get_hashes": 1, "get_counter": 0, "get_hash": 0}
+
+class TestEnforcementReports:
+    """Test the handler and enforcer reports built on the store"""
+
+    def test_handler_report(self):
+        handler = CoreViolationHandler(state=SharedState(InMemorySharedState()))
+        handler.handle_violation("schema_mutation", "critical", {}, "bhiv_core")
+        handler.handle_violation("deletion_attempt", "low", {}, "bhiv_core")
+
+        report = handler.get_violation_report(24)
+        assert report["total_violations"] == 2
+        assert report["by_type"] == {"schema_mutation": 1, "deletion_attempt": 1}
+        assert report["by_requester"] == {"bhiv_core": 2}
+        assert sum(report["escalations"].values()) == 2
+        assert len(report["violations"]) == len(handler.violation_history) == 2
+
+    def test_enforcer_summary(self):
+        enforcer = CoreBoundaryEnforcer(state=SharedState(InMemorySharedState()))
+        enforcer.log_violation({"type": "audit_hiding", "severity": "CRITICAL"})
+        enforcer.log_violation({"type": "schema_mutation", "severity": "HIGH"})
+
+        summary = enforcer.get_violation_summary(24)
+        assert summary["total_violations"] == 2
+        assert summary["critical_count"] == 1
+        assert summary["by_type"] == {"audit_hiding": 1, "schema_mutation": 1}
@@ -1,6 +1,80 @@
+import atexit
+import json
 import logging
 import logging.handlers
+import os
+import queue
 from pathlib import Path
+from typing import Optional, Tuple
+
+BASKET_LOG_CONFIG = {
+    "log_file": os.getenv("BASKET_RUN_LOG_FILE", "logs/basket_runs/basket_runs.log"),
+    "max_bytes": int(os.getenv("BASKET_RUN_LOG_MAX_BYTES", str(20 * 1024 * 1024))),
+    "backup_count": int(os.getenv("BASKET_RUN_LOG_BACKUP_COUNT", "10")),
+    "queue_size": int(os.getenv("BASKET_RUN_LOG_QUEUE_SIZE", "10000"))
+}
+
+class JsonLineFormatter(logging.Formatter):
+    """One JSON object per line, carrying execution context fields when present"""
+
+    CONTEXT_FIELDS = ("execution_id", "basket_name", "agent_name", "step")
+
+    def format(self, record):
+        entry = {
+            "timestamp": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for field in self.CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def create_queue_logger(name: str, log_file: str, max_bytes: int, backup_count: int,
+                        queue_size: int = 10000,
+                        formatter: Optional[logging.Formatter] = None) -> Tuple[logging.Logger, logging.handlers.QueueListener]:
+    """Logger whose records go through a queue to one rotating file written by a listener thread
+
+    The event loop only pays for an in-memory enqueue; file I/O happens on the
+    listener thread, and there is exactly one file handle regardless of how
+    many executions log through it.
+    """
+    Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+    sink = logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+    )
+    sink.setFormatter(formatter or JsonLineFormatter())
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    listener = logging.handlers.QueueListener(log_queue, sink, respect_handler_level=True)
+
+    queue_logger = logging.getLogger(name)
+    queue_logger.setLevel(logging.INFO)
+    queue_logger.propagate = False
+    for handler in queue_logger.handlers[:]:
+        queue_logger.removeHandler(handler)
+        handler.close()
+    queue_logger.addHandler(DroppingQueueHandler(log_queue))
+
+    listener.start()
+    return queue_logger, listener
 
 class AIIntegrationLogger:
     """Centralized logging configuration for AI Integration Platform"""
@@ -8,7 +82,9 @@ class AIIntegrationLogger:
     def __init__(self):
         self.log_dir = Path('logs')
         self.log_dir.mkdir(exist_ok=True)
+        self.basket_run_listener: Optional[logging.handlers.QueueListener] = None
         self.setup_logging()
+        atexit.register(self.shutdown)
 
     def setup_logging(self):
         """Setup comprehensive logging configuration"""
@@ -75,6 +151,27 @@ class AIIntegrationLogger:
         """Get the execution-specific logger"""
         return logging.getLogger('execution')
 
+    def get_basket_run_logger(self):
+        """Get the shared basket run logger (queue-backed, started on first use)"""
+        if self.basket_run_listener is None:
+            basket_logger, self.basket_run_listener = create_queue_logger(
+                'basket_runs',
+                BASKET_LOG_CONFIG["log_file"],
+                BASKET_LOG_CONFIG["max_bytes"],
+                BASKET_LOG_CONFIG["backup_count"],
+                BASKET_LOG_CONFIG["queue_size"]
+            )
+            return basket_logger
+        return logging.getLogger('basket_runs')
+
+    def shutdown(self):
+        """Flush queued records and close the basket run sink"""
+        if self.basket_run_listener is not None:
+            self.basket_run_listener.stop()
+            for handler in self.basket_run_listener.handlers:
+                handler.close()
+            self.basket_run_listener = None
+
 # Initialize logging system
 _logging_system = AIIntegrationLogger()
 
@@ -87,5 +184,16 @@ def get_execution_logger():
     """Get the execution-specific logger"""
     return _logging_system.get_execution_logger()
 
+def get_basket_run_logger(execution_id: str, basket_name: str) -> logging.LoggerAdapter:
+    """Get a basket run logger that tags every record with its execution context"""
+    return logging.LoggerAdapter(
+        _logging_system.get_basket_run_logger(),
+        {"execution_id": execution_id, "basket_name": basket_name}
+    )
+
+def shutdown_logging():
+    """Flush and stop background log listeners"""
+    _logging_system.shutdown()
+
 # Default logger for backward compatibility
 logger = get_logger(__name__)
\ No newline at end of file
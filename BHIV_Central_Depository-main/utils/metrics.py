@@ -0,0 +1,424 @@
+"""
+BHIV Prometheus Metrics
+Counters, gauges and histograms rendered in the Prometheus text exposition format (GET /metrics)
+- Hot path is lock-free: each thread updates its own shard; shards are summed at scrape time
+- Callback gauges are evaluated only when scraped
+- Multi-worker: with METRICS_MULTIPROC_DIR set, each worker snapshots its values to
+  {dir}/{pid}.json and any worker's /metrics merges all snapshots
+"""
+
+import asyncio
+import bisect
+import functools
+import inspect
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+METRICS_CONFIG = {
+    "enabled": os.getenv("METRICS_ENABLED", "true").lower() == "true",
+    "multiproc_dir": os.getenv("METRICS_MULTIPROC_DIR", ""),
+    "snapshot_interval_seconds": float(os.getenv("METRICS_SNAPSHOT_INTERVAL_SECONDS", "5")),
+    "namespace": os.getenv("METRICS_NAMESPACE", "bhiv")
+}
+
+# Seconds; covers sub-millisecond cache hits up to long agent runs
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra.items())
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Sharded:
+    """Per-thread value dicts; a thread only ever writes its own shard"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[Dict] = []
+        self._shards_lock = threading.Lock()  # taken once per thread, on its first update
+
+    def _shard(self) -> Dict:
+        shard = getattr(self._local, "values", None)
+        if shard is None:
+            shard = {}
+            self._local.values = shard
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def _snapshots(self) -> List[Dict]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        return [dict(shard) for shard in shards]
+
+
+class Counter(_Sharded):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__()
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        shard = self._shard()
+        shard[key] = shard.get(key, 0.0) + amount
+
+    def collect(self) -> Dict[LabelKey, float]:
+        totals: Dict[LabelKey, float] = {}
+        for shard in self._snapshots():
+            for key, value in shard.items():
+                totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+
+class Histogram(_Sharded):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__()
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        shard = self._shard()
+        # [per-bucket counts (non-cumulative, last is +Inf), sum, count]
+        state = shard.get(key)
+        if state is None:
+            state = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            shard[key] = state
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    def time(self, **labels):
+        """Context manager observing the elapsed seconds"""
+        return _Timer(self, labels)
+
+    def collect(self) -> Dict[LabelKey, List[float]]:
+        totals: Dict[LabelKey, List[float]] = {}
+        for shard in self._snapshots():
+            for key, state in shard.items():
+                state = list(state)
+                if key in totals:
+                    totals[key] = [a + b for a, b in zip(totals[key], state)]
+                else:
+                    totals[key] = state
+        return totals
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Gauge:
+    """Last-value gauge, or a callback evaluated at scrape time"""
+
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                 callback: Optional[Callable[[], Dict[LabelKey, float]]] = None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self._values: Dict[LabelKey, float] = {}
+
+    def set(self, value: float, **labels):
+        self._values[tuple(str(labels.get(name, "")) for name in self.labelnames)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, callback: Callable[[], Dict[LabelKey, float]]):
+        self.callback = callback
+
+    def collect(self) -> Dict[LabelKey, float]:
+        if self.callback is None:
+            return dict(self._values)
+        try:
+            return {tuple(str(v) for v in key): float(value) for key, value in self.callback().items()}
+        except Exception as e:
+            logger.error(f"Metrics callback for {self.name} failed: {e}")
+            return {}
+
+
+class MetricsRegistry:
+    """Holds the metrics of this process and renders/merges them"""
+
+    def __init__(self, namespace: Optional[str] = None, multiproc_dir: Optional[str] = None):
+        self.namespace = namespace if namespace is not None else METRICS_CONFIG["namespace"]
+        self.multiproc_dir = multiproc_dir if multiproc_dir is not None else METRICS_CONFIG["multiproc_dir"]
+        self.metrics: Dict[str, Any] = {}
+        self._snapshot_task: Optional[asyncio.Task] = None
+
+    def _name(self, name: str) -> str:
+        return f"{self.namespace}_{name}" if self.namespace else name
+
+    def _register(self, metric):
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(self._name(name), help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Tuple[str, ...] = (), callback=None) -> Gauge:
+        gauge = self._register(Gauge(self._name(name), help, labelnames))
+        if callback is not None:
+            gauge.set_function(callback)
+        return gauge
+
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(self._name(name), help, labelnames, buckets))
+
+    # ------------------------------------------------------------------
+    # Snapshots (multi-worker)
+    # ------------------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        """This process' values in a JSON-serializable form"""
+        return {
+            "pid": os.getpid(),
+            "timestamp": time.time(),
+            "metrics": {
+                name: {
+                    "type": metric.type,
+                    "help": metric.help,
+                    "labelnames": list(metric.labelnames),
+                    "buckets": list(getattr(metric, "buckets", ())),
+                    "values": [[list(key), value] for key, value in metric.collect().items()]
+                }
+                for name, metric in self.metrics.items()
+            }
+        }
+
+    def write_snapshot(self):
+        if not self.multiproc_dir:
+            return
+        directory = Path(self.multiproc_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{os.getpid()}.json"
+        tmp = directory / f".{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(self.snapshot()), encoding="utf-8")
+        os.replace(tmp, path)
+
+    async def _snapshot_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.write_snapshot)
+            except Exception as e:
+                logger.error(f"Failed to write metrics snapshot: {e}")
+
+    def start_snapshots(self, interval: Optional[float] = None) -> bool:
+        """Periodically publish this worker's values so other workers' scrapes include them"""
+        if not self.multiproc_dir or self._snapshot_task is not None:
+            return bool(self.multiproc_dir)
+        self._snapshot_task = asyncio.create_task(
+            self._snapshot_loop(interval or METRICS_CONFIG["snapshot_interval_seconds"])
+        )
+        return True
+
+    async def stop_snapshots(self):
+        if self._snapshot_task is not None:
+            self._snapshot_task.cancel()
+            try:
+                await self._snapshot_task
+            except asyncio.CancelledError:
+                pass
+            self._snapshot_task = None
+        if self.multiproc_dir:
+            # Final values; counters of exited workers stay in the merged totals
+            self.write_snapshot()
+
+    def _read_snapshots(self) -> List[Dict[str, Any]]:
+        snapshots = []
+        for path in Path(self.multiproc_dir).glob("*.json"):
+            try:
+                snapshots.append(json.loads(path.read_text(encoding="utf-8")))
+            except Exception as e:
+                logger.warning(f"Skipping unreadable metrics snapshot {path}: {e}")
+        return snapshots
+
+    # ------------------------------------------------------------------
+    # Exposition
+    # ------------------------------------------------------------------
+
+    def render(self) -> str:
+        """Prometheus text format (version 0.0.4)"""
+        if self.multiproc_dir:
+            self.write_snapshot()
+            families = _merge(self._read_snapshots())
+        else:
+            families = self.snapshot()["metrics"]
+
+        lines: List[str] = []
+        for name, family in sorted(families.items()):
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['type']}")
+            labelnames = family["labelnames"]
+            for key, value in sorted(family["values"], key=lambda kv: kv[0]):
+                if family["type"] == "histogram":
+                    cumulative = 0
+                    for bound, count in zip(list(family["buckets"]) + [math.inf], value[:-2]):
+                        cumulative += count
+                        labels = _format_labels(labelnames, key, {"le": _format_value(bound)})
+                        lines.append(f"{name}_bucket{labels} {_format_value(cumulative)}")
+                    labels = _format_labels(labelnames, key)
+                    lines.append(f"{name}_sum{labels} {_format_value(value[-2])}")
+                    lines.append(f"{name}_count{labels} {_format_value(value[-1])}")
+                else:
+                    lines.append(f"{name}{_format_labels(labelnames, key)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+def _merge(snapshots: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Sum counters/histograms across workers; gauges keep a per-worker pid label (live workers only)"""
+    families: Dict[str, Any] = {}
+    for snapshot in snapshots:
+        pid = snapshot.get("pid")
+        alive = _pid_alive(pid) if isinstance(pid, int) else False
+        for name, metric in snapshot.get("metrics", {}).items():
+            family = families.setdefault(name, {
+                "type": metric["type"],
+                "help": metric["help"],
+                "labelnames": list(metric["labelnames"]) + (["pid"] if metric["type"] == "gauge" else []),
+                "buckets": metric.get("buckets", []),
+                "merged": {}
+            })
+            if metric["type"] == "gauge":
+                if not alive:
+                    continue
+                for key, value in metric["values"]:
+                    family["merged"][tuple(key) + (str(pid),)] = value
+                continue
+            for key, value in metric["values"]:
+                key = tuple(key)
+                current = family["merged"].get(key)
+                if current is None:
+                    family["merged"][key] = value
+                elif metric["type"] == "histogram":
+                    family["merged"][key] = [a + b for a, b in zip(current, value)]
+                else:
+                    family["merged"][key] = current + value
+    for family in families.values():
+        family["values"] = [[list(key), value] for key, value in family.pop("merged").items()]
+    return families
+
+
+def observe_methods(histogram: Histogram, label: str = "operation", exclude: tuple = ()):
+    """Class decorator: record the latency of every public method in `histogram`"""
+    def wrap(fn, operation):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start, **{label: operation})
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, **{label: operation})
+        return wrapper
+
+    def decorate(cls):
+        for attr, value in list(vars(cls).items()):
+            if attr.startswith("_") or attr in exclude or not inspect.isfunction(value):
+                continue
+            setattr(cls, attr, wrap(value, attr))
+        return cls
+    return decorate
+
+
+# Global registry and the metrics shared across modules
+metrics = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status")
+)
+AGENT_EXECUTION_SECONDS = metrics.histogram(
+    "agent_execution_seconds", "Agent execution time by agent", ("agent", "outcome")
+)
+REDIS_CALL_SECONDS = metrics.histogram(
+    "redis_call_duration_seconds", "RedisService call latency by operation", ("operation",)
+)
+MONGO_CALL_SECONDS = metrics.histogram(
+    "mongo_call_duration_seconds", "MongoDBClient call latency by operation", ("operation",)
+)
+EVENT_BUS_LAG_SECONDS = metrics.histogram(
+    "event_bus_lag_seconds", "Time from publish to subscriber invocation", ("event_type",)
+)
+KARMA_FORWARD_TOTAL = metrics.counter(
+    "karma_forward_total", "Events forwarded to Karma by outcome", ("outcome",)
+)
+KARMA_FORWARD_IN_FLIGHT = metrics.gauge(
+    "karma_forward_in_flight", "Karma forwards started but not yet finished (forwarder queue depth)"
+)
@@ -1,19 +1,30 @@
 import redis
-import json
 import time
 import uuid
 from typing import Dict, List, Optional, Any
 from utils.logger import logger
+from utils.serialization import serializer
+from utils.tracing import trace_methods
+from utils.metrics import observe_methods, REDIS_CALL_SECONDS
+from governance.retention import REDIS_RETENTION_INDEX_KEY
 import os
 from datetime import datetime, timedelta, timezone
 
+@trace_methods("redis", exclude=("generate_execution_id",))
+@observe_methods(REDIS_CALL_SECONDS, exclude=("generate_execution_id",))
 class RedisService:
     """Enhanced Redis service for agent and basket execution management"""
     
-    def __init__(self):
+    def __init__(self, connect_on_init: bool = True):
         self.client = None
         self.connected = False
+        if connect_on_init:
+            self._connect()
+
+    def connect(self) -> bool:
+        """Connect (or reconnect) and report whether Redis is reachable"""
         self._connect()
+        return self.connected
     
     def _connect(self):
         """Initialize Redis connection with retry logic"""
@@ -26,7 +37,8 @@ class RedisService:
                 host=redis_host,
                 port=redis_port,
                 password=redis_password,
-                decode_responses=True,
+                # Payloads are binary envelopes (utils/serialization.py), so responses stay bytes
+                decode_responses=False,
                 socket_timeout=5,
                 socket_connect_timeout=5,
                 retry_on_timeout=True,
@@ -72,12 +84,13 @@ class RedisService:
             
             # Store in execution-specific list
             key = f"execution:{execution_id}:logs"
-            self.client.lpush(key, json.dumps(log_entry))
+            self.client.lpush(key, serializer.dumps(log_entry))
             self.client.expire(key, 86400)  # Expire after 24 hours
+            self._index_for_retention(key)
             
             # Store in agent-specific list
             agent_key = f"agent:{agent_name}:logs"
-            self.client.lpush(agent_key, json.dumps(log_entry))
+            self.client.lpush(agent_key, serializer.dumps(log_entry))
             self.client.ltrim(agent_key, 0, 999)  # Keep last 1000 logs
             
             logger.debug(f"Stored execution log: {execution_id} - {agent_name} - {step}")
@@ -93,11 +106,12 @@ class RedisService:
         try:
             key = f"agent:{agent_name}:state:{execution_id}"
             self.client.hset(key, mapping={
-                "state": json.dumps(state),
+                "state": serializer.dumps(state),
                 "timestamp": datetime.now(timezone.utc).isoformat(),
                 "execution_id": execution_id
             })
             self.client.expire(key, 3600)  # Expire after 1 hour
+            self._index_for_retention(key)
             
         except Exception as e:
             logger.error(f"Failed to store agent state: {e}")
@@ -111,7 +125,7 @@ class RedisService:
             key = f"agent:{agent_name}:state:{execution_id}"
             state_data = self.client.hget(key, "state")
             if state_data:
-                return json.loads(state_data)
+                return serializer.loads(state_data)
             return None
             
         except Exception as e:
@@ -128,15 +142,16 @@ class RedisService:
             execution_data = {
                 "basket_name": basket_name,
                 "execution_id": execution_id,
-                "config": json.dumps(config),
+                "config": serializer.dumps(config),
                 "status": status,
                 "started_at": datetime.now(timezone.utc).isoformat(),
-                "agents": json.dumps(config.get("agents", [])),
+                "agents": serializer.dumps(config.get("agents", [])),
                 "strategy": config.get("execution_strategy", "sequential")
             }
             
             self.client.hset(key, mapping=execution_data)
             self.client.expire(key, 86400)  # Expire after 24 hours
+            self._index_for_retention(key)
             
             # Add to basket execution list
             list_key = f"basket:{basket_name}:executions"
@@ -159,7 +174,7 @@ class RedisService:
             }
             
             if result:
-                update_data["result"] = json.dumps(result)
+                update_data["result"] = serializer.dumps(result)
             
             if status in ["completed", "failed"]:
                 update_data["completed_at"] = datetime.now(timezone.utc).isoformat()
@@ -177,7 +192,7 @@ class RedisService:
         try:
             key = f"execution:{execution_id}:logs"
             logs = self.client.lrange(key, 0, limit - 1)
-            return [json.loads(log) for log in logs]
+            return [serializer.loads(log) for log in logs]
             
         except Exception as e:
             logger.error(f"Failed to get execution logs: {e}")
@@ -191,7 +206,7 @@ class RedisService:
         try:
             key = f"agent:{agent_name}:logs"
             logs = self.client.lrange(key, 0, limit - 1)
-            return [json.loads(log) for log in logs]
+            return [serializer.loads(log) for log in logs]
             
         except Exception as e:
             logger.error(f"Failed to get agent logs: {e}")
@@ -204,7 +219,8 @@ class RedisService:
         
         try:
             key = f"execution:{execution_id}:outputs:{agent_name}"
-            self.client.set(key, json.dumps(output), ex=3600)  # Expire after 1 hour
+            self.client.set(key, serializer.dumps(output), ex=3600)  # Expire after 1 hour
+            self._index_for_retention(key)
             
         except Exception as e:
             logger.error(f"Failed to store agent output: {e}")
@@ -218,13 +234,78 @@ class RedisService:
             key = f"execution:{execution_id}:outputs:{agent_name}"
             output_data = self.client.get(key)
             if output_data:
-                return json.loads(output_data)
+                return serializer.loads(output_data)
             return None
             
         except Exception as e:
             logger.error(f"Failed to get agent output: {e}")
             return None
     
+    def store_checkpoint(self, execution_id: str, field: str, data: Dict, ttl_seconds: int) -> bool:
+        """Store one checkpoint field (run metadata or a step output) for a basket execution"""
+        if not self.is_connected():
+            return False
+        
+        try:
+            key = f"checkpoint:{execution_id}"
+            self.client.hset(key, field, serializer.dumps(data))
+            self.client.expire(key, ttl_seconds)
+            self._index_for_retention(key)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to store checkpoint {field} for {execution_id}: {e}")
+            return False
+    
+    def get_checkpoints(self, execution_id: str) -> Optional[Dict[str, Dict]]:
+        """Get all checkpoint fields for a basket execution (None when Redis is unavailable)"""
+        if not self.is_connected():
+            return None
+        
+        try:
+            raw = self.client.hgetall(f"checkpoint:{execution_id}")
+            return {
+                (field.decode() if isinstance(field, bytes) else field): serializer.loads(value)
+                for field, value in raw.items()
+            }
+            
+        except Exception as e:
+            logger.error(f"Failed to get checkpoints for {execution_id}: {e}")
+            return None
+    
+    def delete_checkpoints(self, execution_id: str):
+        """Drop all checkpoints of a basket execution"""
+        if not self.is_connected():
+            return
+        
+        try:
+            self.client.delete(f"checkpoint:{execution_id}")
+        except Exception as e:
+            logger.error(f"Failed to delete checkpoints for {execution_id}: {e}")
+    
+    def acquire_lock(self, key: str, owner: str, ttl_seconds: int) -> bool:
+        """Take a simple SET NX lock; False when another owner holds it"""
+        if not self.is_connected():
+            return False
+        
+        try:
+            return bool(self.client.set(key, owner, nx=True, ex=ttl_seconds))
+        except Exception as e:
+            logger.error(f"Failed to acquire lock {key}: {e}")
+            return False
+    
+    def release_lock(self, key: str, owner: str):
+        """Release a lock if it is still held by owner"""
+        if not self.is_connected():
+            return
+        
+        try:
+            current = self.client.get(key)
+            if current is not None and (current.decode() if isinstance(current, bytes) else current) == owner:
+                self.client.delete(key)
+        except Exception as e:
+            logger.error(f"Failed to release lock {key}: {e}")
+    
     def generate_execution_id(self) -> str:
         """Generate unique execution ID"""
         return f"{int(time.time())}_{uuid.uuid4().hex[:8]}"
@@ -242,32 +323,46 @@ class RedisService:
             logger.error(f"Error getting basket executions: {e}")
             return []
 
-    def cleanup_old_data(self, days: int = 7):
-        """Clean up old execution data"""
+    def _index_for_retention(self, key: str):
+        """Record key creation time in the retention index (first write wins)"""
+        self.client.zadd(REDIS_RETENTION_INDEX_KEY, {key: time.time()}, nx=True)
+
+    def sweep_expired_keys(self, cutoff_timestamp: float, batch_size: int = 500, index_key: str = REDIS_RETENTION_INDEX_KEY) -> int:
+        """Delete one batch of indexed keys created before cutoff; returns keys removed"""
         if not self.is_connected():
-            return
+            return 0
+
+        keys = self.client.zrangebyscore(index_key, "-inf", cutoff_timestamp, start=0, num=batch_size)
+        if not keys:
+            return 0
+
+        pipe = self.client.pipeline(transaction=False)
+        pipe.delete(*keys)
+        pipe.zrem(index_key, *keys)
+        pipe.execute()
+        return len(keys)
+
+    def cleanup_old_data(self, days: int = 7, batch_size: int = 500) -> int:
+        """Clean up old execution data using the retention index (no keyspace scan)"""
+        if not self.is_connected():
+            return 0
         
         try:
-            cutoff_time = datetime.now(timezone.utc) - timedelta(days=days)
-            cutoff_timestamp = cutoff_time.timestamp()
+            cutoff_timestamp = (datetime.now(timezone.utc) - timedelta(days=days)).timestamp()
             
-            # This is a basic cleanup - in production, you'd want more sophisticated cleanup
-            pattern = "execution:*"
-            for key in self.client.scan_iter(match=pattern):
-                try:
-                    # Check if key is old enough to delete
-                    key_parts = key.split(":")
-                    if len(key_parts) >= 2:
-                        timestamp_part = key_parts[1].split("_")[0]
-                        if timestamp_part.isdigit() and int(timestamp_part) < cutoff_timestamp:
-                            self.client.delete(key)
-                except:
-                    continue
+            deleted = 0
+            while True:
+                removed = self.sweep_expired_keys(cutoff_timestamp, batch_size)
+                deleted += removed
+                if removed < batch_size:
+                    break
                     
-            logger.info(f"Cleaned up Redis data older than {days} days")
+            logger.info(f"Cleaned up {deleted} Redis keys older than {days} days")
+            return deleted
             
         except Exception as e:
             logger.error(f"Failed to cleanup old data: {e}")
+            return 0
     
     def get_stats(self) -> Dict:
         """Get Redis usage statistics"""
@@ -281,7 +376,8 @@ class RedisService:
                 "used_memory": info.get("used_memory_human", "N/A"),
                 "connected_clients": info.get("connected_clients", 0),
                 "total_commands_processed": info.get("total_commands_processed", 0),
-                "keyspace": info.get("db0", {})
+                "keyspace": info.get("db0", {}),
+                "serializer": serializer.get_info()
             }
         except Exception as e:
             logger.error(f"Failed to get Redis stats: {e}")
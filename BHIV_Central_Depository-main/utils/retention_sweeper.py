@@ -0,0 +1,212 @@
+"""
+Retention Sweeper
+Background enforcement of the Document 06 retention policies (governance/retention.py)
+Deletes expired data incrementally in small, throttled batches:
+- MongoDB: batched deletes driven by the indexed timestamp field
+- Redis: expiry driven by the retention sorted-set index (no keyspace scans)
+- Optional gzip JSONL archive of MongoDB documents before deletion
+"""
+
+import asyncio
+import gzip
+import json
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from datetime import datetime, timedelta, timezone
+from governance.retention import RETENTION_CONFIG, SWEEP_POLICIES
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class RetentionSweeper:
+    """Applies retention policies incrementally without competing with foreground traffic"""
+
+    def __init__(
+        self,
+        mongo_client=None,
+        redis_service=None,
+        policies: Optional[Dict[str, Dict[str, Any]]] = None,
+        batch_size: int = None,
+        max_deletes_per_sec: int = None,
+        archive_enabled: bool = None,
+        archive_dir: str = None
+    ):
+        self.mongo_client = mongo_client
+        self.redis_service = redis_service
+        self.policies = policies if policies is not None else SWEEP_POLICIES
+        self.batch_size = batch_size or RETENTION_CONFIG["sweep_batch_size"]
+        self.max_deletes_per_sec = max_deletes_per_sec or RETENTION_CONFIG["sweep_max_deletes_per_sec"]
+        self.archive_enabled = RETENTION_CONFIG["archive_enabled"] if archive_enabled is None else archive_enabled
+        self.archive_dir = Path(archive_dir or RETENTION_CONFIG["archive_dir"])
+        self.interval_seconds = RETENTION_CONFIG["sweep_interval_seconds"]
+
+        self._task: Optional[asyncio.Task] = None
+        self._running_sweep = asyncio.Lock()
+        self._indexed_collections = set()
+        self.last_run: Optional[Dict[str, Any]] = None
+        self.totals = {name: {"deleted": 0, "archived": 0} for name in self.policies}
+
+    # ------------------------------------------------------------------
+    # Scheduling
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start the periodic sweep loop on the running event loop"""
+        if self._task and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._run_forever())
+        logger.info(f"Retention sweeper started (interval {self.interval_seconds}s)")
+
+    async def stop(self):
+        """Cancel the sweep loop; an in-flight batch finishes first"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Retention sweeper stopped")
+
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def _run_forever(self):
+        while True:
+            try:
+                await self.sweep_all()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Retention sweep failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    # ------------------------------------------------------------------
+    # Sweeping
+    # ------------------------------------------------------------------
+
+    async def sweep_all(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Run every policy once; concurrent calls wait for the running sweep"""
+        async with self._running_sweep:
+            now = now or datetime.now(timezone.utc)
+            started = time.monotonic()
+            results = {}
+
+            for name, policy in self.policies.items():
+                try:
+                    if policy["store"] == "mongodb":
+                        results[name] = await self._sweep_mongo(name, policy, now)
+                    elif policy["store"] == "redis":
+                        results[name] = await self._sweep_redis(name, policy, now)
+                    else:
+                        results[name] = {"skipped": f"unknown store {policy['store']}"}
+                except Exception as e:
+                    logger.error(f"Retention policy {name} failed: {e}")
+                    results[name] = {"error": str(e)}
+
+            self.last_run = {
+                "started_at": now.isoformat(),
+                "duration_seconds": round(time.monotonic() - started, 3),
+                "results": results
+            }
+            return self.last_run
+
+    async def _throttle(self, deleted: int):
+        """Sleep long enough to keep the delete rate under max_deletes_per_sec"""
+        if deleted and self.max_deletes_per_sec > 0:
+            await asyncio.sleep(deleted / self.max_deletes_per_sec)
+        else:
+            await asyncio.sleep(0)
+
+    async def _sweep_mongo(self, name: str, policy: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+        db = self.mongo_client.db if self.mongo_client is not None else None
+        if db is None:
+            return {"skipped": "mongodb not connected"}
+
+        collection = db[policy["collection"]]
+        field = policy["timestamp_field"]
+        cutoff = now - timedelta(days=policy["retention_days"])
+        archive = self.archive_enabled and policy.get("archive", False)
+
+        if policy["collection"] not in self._indexed_collections:
+            await asyncio.to_thread(collection.create_index, [(field, 1)])
+            self._indexed_collections.add(policy["collection"])
+
+        # Legal holds are never swept (Document 06 legal hold process)
+        query = {field: {"$lt": cutoff}, "legal_hold": {"$ne": True}}
+        projection = None if archive else {"_id": 1}
+
+        deleted = archived = 0
+        while True:
+            batch = await asyncio.to_thread(
+                lambda: list(collection.find(query, projection).sort(field, 1).limit(self.batch_size))
+            )
+            if not batch:
+                break
+
+            if archive:
+                archived += await asyncio.to_thread(self._archive_documents, policy["collection"], batch, now)
+
+            ids = [doc["_id"] for doc in batch]
+            result = await asyncio.to_thread(collection.delete_many, {"_id": {"$in": ids}})
+            deleted += result.deleted_count
+
+            await self._throttle(len(ids))
+            if len(batch) < self.batch_size:
+                break
+
+        self.totals[name]["deleted"] += deleted
+        self.totals[name]["archived"] += archived
+        if deleted:
+            logger.info(f"Retention sweep {name}: deleted {deleted} documents older than {cutoff.isoformat()}")
+        return {"deleted": deleted, "archived": archived, "cutoff": cutoff.isoformat()}
+
+    async def _sweep_redis(self, name: str, policy: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+        if self.redis_service is None or not self.redis_service.is_connected():
+            return {"skipped": "redis not connected"}
+
+        cutoff = now.timestamp() - policy["retention_seconds"]
+
+        deleted = 0
+        while True:
+            removed = await asyncio.to_thread(
+                self.redis_service.sweep_expired_keys, cutoff, self.batch_size, policy["index_key"]
+            )
+            deleted += removed
+            await self._throttle(removed)
+            if removed < self.batch_size:
+                break
+
+        self.totals[name]["deleted"] += deleted
+        if deleted:
+            logger.info(f"Retention sweep {name}: removed {deleted} indexed Redis keys")
+        return {"deleted": deleted, "cutoff": datetime.fromtimestamp(cutoff, timezone.utc).isoformat()}
+
+    def _archive_documents(self, collection_name: str, documents: List[Dict[str, Any]], now: datetime) -> int:
+        """Append documents to a gzip JSONL file per collection per sweep day"""
+        target_dir = self.archive_dir / collection_name
+        target_dir.mkdir(parents=True, exist_ok=True)
+        archive_file = target_dir / f"{collection_name}_{now.strftime('%Y%m%d')}.jsonl.gz"
+
+        # Appending gzip members keeps each batch independently readable
+        with gzip.open(archive_file, "at", encoding="utf-8") as f:
+            for doc in documents:
+                f.write(json.dumps(doc, default=str) + "\n")
+        return len(documents)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Sweeper state for the retention status endpoint"""
+        return {
+            "running": self.is_running(),
+            "enabled": RETENTION_CONFIG["enable_auto_cleanup"],
+            "interval_seconds": self.interval_seconds,
+            "batch_size": self.batch_size,
+            "max_deletes_per_sec": self.max_deletes_per_sec,
+            "archive_enabled": self.archive_enabled,
+            "archive_dir": str(self.archive_dir),
+            "policies": list(self.policies.keys()),
+            "totals": self.totals,
+            "last_run": self.last_run
+        }
@@ -6,47 +6,81 @@ Real-time monitoring of scale limits with automated alerts and graceful degradat
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta, timezone
 from utils.logger import get_logger
+from utils.shared_state import shared_state
 import asyncio
 
 logger = get_logger(__name__)
 
+QUERY_LATENCY_SAMPLES = 1000
+ALERT_HISTORY_SIZE = 100
+
 class ScaleMonitor:
     """Real-time scale monitoring with automated alerts"""
     
-    def __init__(self):
+    def __init__(self, state=None, key_prefix: str = "scale:"):
+        # Counters and histories live in shared state so every worker reports the same numbers
+        self.state = state or shared_state
+        self.key_prefix = key_prefix
         self.metrics_cache = {}
-        self.alert_history = []
-        self.active_writes = 0
-        self.active_reads = 0
-        self.total_storage_gb = 0
-        self.write_rate_per_sec = 0
-        self.query_latencies = []
+
+    def _key(self, name: str) -> str:
+        return f"{self.key_prefix}{name}"
+
+    @property
+    def active_writes(self) -> int:
+        return max(0, self.state.get_counter(self._key("active_writes")))
+
+    @property
+    def active_reads(self) -> int:
+        return max(0, self.state.get_counter(self._key("active_reads")))
+
+    @property
+    def total_storage_gb(self) -> float:
+        return self.state.get_value(self._key("total_storage_gb"), 0)
+
+    @total_storage_gb.setter
+    def total_storage_gb(self, value: float):
+        self.state.set_value(self._key("total_storage_gb"), value)
+
+    @property
+    def write_rate_per_sec(self) -> float:
+        return self.state.get_value(self._key("write_rate_per_sec"), 0)
+
+    @write_rate_per_sec.setter
+    def write_rate_per_sec(self, value: float):
+        self.state.set_value(self._key("write_rate_per_sec"), value)
+
+    @property
+    def query_latencies(self) -> List[Dict[str, Any]]:
+        return self.state.get_list(self._key("query_latencies"))
+
+    @property
+    def alert_history(self) -> List[Dict[str, Any]]:
+        return self.state.get_list(self._key("alert_history"))
         
     async def track_write_start(self):
         """Track start of write operation"""
-        self.active_writes += 1
+        await self.state.run(self.state.incr, self._key("active_writes"))
         
     async def track_write_end(self):
         """Track end of write operation"""
-        self.active_writes = max(0, self.active_writes - 1)
+        await self.state.run(self.state.decr, self._key("active_writes"))
         
     async def track_read_start(self):
         """Track start of read operation"""
-        self.active_reads += 1
+        await self.state.run(self.state.incr, self._key("active_reads"))
         
     async def track_read_end(self):
         """Track end of read operation"""
-        self.active_reads = max(0, self.active_reads - 1)
+        await self.state.run(self.state.decr, self._key("active_reads"))
         
     async def record_query_latency(self, latency_ms: float):
         """Record query latency"""
-        self.query_latencies.append({
+        # Keep only last 1000 measurements
+        await self.state.run(self.state.append, self._key("query_latencies"), {
             "latency_ms": latency_ms,
             "timestamp": datetime.now(timezone.utc).isoformat()
-        })
-        # Keep only last 1000 measurements
-        if len(self.query_latencies) > 1000:
-            self.query_latencies = self.query_latencies[-1000:]
+        }, maxlen=QUERY_LATENCY_SAMPLES)
     
     async def get_concurrent_writes_status(self) -> Dict[str, Any]:
         """Get concurrent writes status with thresholds"""
@@ -113,7 +147,8 @@ class ScaleMonitor:
         """Get query performance metrics"""
         from config.scale_limits import ScaleLimits
         
-        if not self.query_latencies:
+        query_latencies = self.query_latencies
+        if not query_latencies:
             return {
                 "p50_ms": 0,
                 "p99_ms": 0,
@@ -121,7 +156,7 @@ class ScaleMonitor:
                 "sla_status": "NO_DATA"
             }
         
-        latencies = sorted([q["latency_ms"] for q in self.query_latencies])
+        latencies = sorted([q["latency_ms"] for q in query_latencies])
         count = len(latencies)
         
         p50 = latencies[int(count * 0.5)] if count > 0 else 0
@@ -185,9 +220,7 @@ class ScaleMonitor:
             })
         
         # Store alerts
-        self.alert_history.extend(alerts)
-        if len(self.alert_history) > 100:
-            self.alert_history = self.alert_history[-100:]
+        self.state.extend(self._key("alert_history"), alerts, maxlen=ALERT_HISTORY_SIZE)
         
         return alerts
 
@@ -0,0 +1,247 @@
+"""
+BHIV Payload Serialization
+Pluggable encoding for Redis and MongoDB payloads (agent outputs, execution logs, state)
+- Formats: json (stdlib), orjson, msgpack
+- Optional zstd / lz4 / zlib compression above a size threshold
+- Versioned binary envelope; legacy plain-JSON entries remain readable
+"""
+
+import json
+import os
+import zlib
+from datetime import datetime, date
+from typing import Any, Dict, Optional, Union
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+SERIALIZATION_CONFIG = {
+    "format": os.getenv("PAYLOAD_FORMAT", "orjson"),  # json | orjson | msgpack
+    "compression": os.getenv("PAYLOAD_COMPRESSION", "zstd"),  # none | zstd | lz4 | zlib
+    "compress_threshold_bytes": int(os.getenv("PAYLOAD_COMPRESS_THRESHOLD_BYTES", "4096")),
+    "compression_level": int(os.getenv("PAYLOAD_COMPRESSION_LEVEL", "3"))
+}
+
+# Envelope: MAGIC + version + format code + compression code + body.
+# 0xB7 can never start a JSON document, so legacy entries are told apart by the first bytes.
+ENVELOPE_MAGIC = b"\xb7BV"
+ENVELOPE_VERSION = 1
+HEADER_SIZE = len(ENVELOPE_MAGIC) + 3
+
+FORMAT_CODES = {"json": 1, "orjson": 2, "msgpack": 3}
+COMPRESSION_CODES = {"none": 0, "zlib": 1, "zstd": 2, "lz4": 3}
+FORMAT_NAMES = {code: name for name, code in FORMAT_CODES.items()}
+COMPRESSION_NAMES = {code: name for name, code in COMPRESSION_CODES.items()}
+
+# BSON binary subtype for enveloped values stored in MongoDB (user-defined range)
+MONGO_BINARY_SUBTYPE = 0x80
+
+
+def _default(value: Any) -> Any:
+    """Fallback for values the encoders do not handle natively (mirrors json default=str)"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)
+
+
+def _bson_safe(value: Any) -> bool:
+    """Whether MongoDB can store the value as is (sets, non-str keys, custom objects cannot)"""
+    import bson
+
+    try:
+        bson.encode({"value": value})
+        return True
+    except (bson.errors.InvalidDocument, TypeError, OverflowError, ValueError):
+        return False
+
+
+def _format_available(name: str) -> bool:
+    return name == "json" or (name == "orjson" and orjson is not None) or (name == "msgpack" and msgpack is not None)
+
+
+def _compression_available(name: str) -> bool:
+    return (
+        name in ("none", "zlib")
+        or (name == "zstd" and zstandard is not None)
+        or (name == "lz4" and lz4_frame is not None)
+    )
+
+
+class Serializer:
+    """Encodes payloads into versioned envelopes and decodes envelopes or legacy JSON"""
+
+    def __init__(
+        self,
+        format: Optional[str] = None,
+        compression: Optional[str] = None,
+        compress_threshold: Optional[int] = None,
+        compression_level: Optional[int] = None
+    ):
+        format = format or SERIALIZATION_CONFIG["format"]
+        compression = compression or SERIALIZATION_CONFIG["compression"]
+
+        if format not in FORMAT_CODES:
+            raise ValueError(f"Unknown payload format: {format}. Valid: {sorted(FORMAT_CODES)}")
+        if compression not in COMPRESSION_CODES:
+            raise ValueError(f"Unknown payload compression: {compression}. Valid: {sorted(COMPRESSION_CODES)}")
+
+        if not _format_available(format):
+            logger.warning(f"Payload format {format} not installed, using json")
+            format = "json"
+        if not _compression_available(compression):
+            logger.warning(f"Payload compression {compression} not installed, using zlib")
+            compression = "zlib"
+
+        self.format = format
+        self.compression = compression
+        self.compress_threshold = (
+            SERIALIZATION_CONFIG["compress_threshold_bytes"] if compress_threshold is None else compress_threshold
+        )
+        self.compression_level = (
+            SERIALIZATION_CONFIG["compression_level"] if compression_level is None else compression_level
+        )
+        self._zstd_compressor = zstandard.ZstdCompressor(level=self.compression_level) if compression == "zstd" else None
+        self.stats = {"encoded": 0, "compressed": 0, "raw_bytes": 0, "stored_bytes": 0}
+
+    # ------------------------------------------------------------------
+    # Encoding
+    # ------------------------------------------------------------------
+
+    def _encode_body(self, value: Any) -> bytes:
+        if self.format == "orjson":
+            return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        if self.format == "msgpack":
+            return msgpack.packb(value, default=_default, use_bin_type=True)
+        return json.dumps(value, default=_default, separators=(",", ":")).encode("utf-8")
+
+    def _compress(self, body: bytes) -> bytes:
+        if self.compression == "zstd":
+            return self._zstd_compressor.compress(body)
+        if self.compression == "lz4":
+            return lz4_frame.compress(body, compression_level=self.compression_level)
+        return zlib.compress(body, self.compression_level)
+
+    def dumps(self, value: Any) -> bytes:
+        """Encode a value into an envelope, compressing bodies above the threshold"""
+        return self._envelope(self._encode_body(value))
+
+    def _envelope(self, body: bytes) -> bytes:
+        raw_size = len(body)
+        compression = "none"
+        if self.compression != "none" and len(body) >= self.compress_threshold:
+            compressed = self._compress(body)
+            # Keep the raw body when compression does not pay off
+            if len(compressed) < len(body):
+                body = compressed
+                compression = self.compression
+                self.stats["compressed"] += 1
+
+        header = ENVELOPE_MAGIC + bytes((ENVELOPE_VERSION, FORMAT_CODES[self.format], COMPRESSION_CODES[compression]))
+        encoded = header + body
+
+        self.stats["encoded"] += 1
+        self.stats["raw_bytes"] += raw_size
+        self.stats["stored_bytes"] += len(encoded)
+        return encoded
+
+    # ------------------------------------------------------------------
+    # Decoding
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def is_envelope(data: Union[bytes, bytearray, memoryview]) -> bool:
+        return bytes(data[:len(ENVELOPE_MAGIC)]) == ENVELOPE_MAGIC
+
+    def loads(self, data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        """Decode an envelope written with any format/compression, or a legacy JSON string"""
+        if isinstance(data, str):
+            return json.loads(data)
+
+        data = bytes(data)
+        if not self.is_envelope(data):
+            return json.loads(data)
+
+        version, format_code, compression_code = data[3], data[4], data[5]
+        if version != ENVELOPE_VERSION:
+            raise ValueError(f"Unsupported payload envelope version: {version}")
+
+        format = FORMAT_NAMES.get(format_code)
+        compression = COMPRESSION_NAMES.get(compression_code)
+        if format is None or compression is None:
+            raise ValueError(f"Corrupt payload envelope header: format={format_code} compression={compression_code}")
+
+        body = data[HEADER_SIZE:]
+        if compression == "zstd":
+            if zstandard is None:
+                raise ValueError("Payload is zstd-compressed but zstandard is not installed")
+            body = zstandard.ZstdDecompressor().decompress(body)
+        elif compression == "lz4":
+            if lz4_frame is None:
+                raise ValueError("Payload is lz4-compressed but lz4 is not installed")
+            body = lz4_frame.decompress(body)
+        elif compression == "zlib":
+            body = zlib.decompress(body)
+
+        if format == "msgpack":
+            if msgpack is None:
+                raise ValueError("Payload is msgpack-encoded but msgpack is not installed")
+            return msgpack.unpackb(body, raw=False, strict_map_key=False)
+        # orjson output is plain JSON, so either parser reads it
+        return orjson.loads(body) if orjson is not None else json.loads(body)
+
+    # ------------------------------------------------------------------
+    # MongoDB
+    # ------------------------------------------------------------------
+
+    def to_mongo(self, value: Any) -> Any:
+        """Store small BSON-safe values natively (queryable); large or non-BSON ones as an enveloped BSON Binary"""
+        from bson import Binary
+
+        body = self._encode_body(value)
+        if len(body) < self.compress_threshold and _bson_safe(value):
+            return value
+        return Binary(self._envelope(body), MONGO_BINARY_SUBTYPE)
+
+    def from_mongo(self, value: Any) -> Any:
+        """Inverse of to_mongo; native values pass through unchanged"""
+        from bson import Binary
+
+        if isinstance(value, Binary) and value.subtype == MONGO_BINARY_SUBTYPE:
+            return self.loads(value)
+        return value
+
+    def get_info(self) -> Dict[str, Any]:
+        """Active configuration and encoding counters"""
+        return {
+            "format": self.format,
+            "compression": self.compression,
+            "compress_threshold_bytes": self.compress_threshold,
+            "envelope_version": ENVELOPE_VERSION,
+            **self.stats
+        }
+
+
+# Global serializer instance
+serializer = Serializer()
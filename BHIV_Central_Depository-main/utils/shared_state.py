@@ -0,0 +1,681 @@
+"""
+BHIV Shared State
+Process-shared counters, counter hashes, bounded lists, sets and flags for state that must agree across uvicorn workers
+- Backends: memory (single process), redis (multi-host), mmap (file-backed segment, single host;
+  counters, values and sets only - lists stay per process)
+- Every backend exposes the same API, so callers never branch on the deployment
+- Async callers go through SharedState.run, which keeps Redis round trips off the event loop
+- Falls back to the in-process backend when the selected one is unavailable
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import mmap
+except ImportError:
+    mmap = None
+
+SHARED_STATE_CONFIG = {
+    "backend": os.getenv("SHARED_STATE_BACKEND", "memory"),  # memory | redis | mmap
+    "key_prefix": os.getenv("SHARED_STATE_KEY_PREFIX", "bhiv:shared:"),
+    "mmap_path": os.getenv("SHARED_STATE_MMAP_PATH", "/dev/shm/bhiv_shared_state"),
+    "mmap_size_bytes": int(os.getenv("SHARED_STATE_MMAP_SIZE_BYTES", str(64 * 1024 * 1024))),
+    "mmap_counter_slots": int(os.getenv("SHARED_STATE_MMAP_COUNTER_SLOTS", "65536"))
+}
+
+Number = Union[int, float]
+
+
+def _number(value: Any) -> Number:
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, str)):
+        value = float(value)
+    return int(value) if float(value).is_integer() else float(value)
+
+
+def _encode(item: Any) -> str:
+    return json.dumps(item, default=str, separators=(",", ":"))
+
+
+class InMemorySharedState:
+    """Process-local backend; the default and the fallback"""
+
+    backend = "memory"
+    blocking = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Number] = {}
+        self._values: Dict[str, Any] = {}
+        self._expiry: Dict[str, float] = {}
+        self._lists: Dict[str, deque] = {}
+        self._sets: Dict[str, set] = {}
+        self._hashes: Dict[str, Dict[str, Number]] = {}
+
+    def incr(self, key: str, amount: Number = 1) -> Number:
+        with self._lock:
+            value = self._counters.get(key, 0) + amount
+            self._counters[key] = value
+            return value
+
+    def get_counter(self, key: str) -> Number:
+        return self._counters.get(key, 0)
+
+    def get_counters(self, keys: List[str]) -> List[Number]:
+        return [self._counters.get(key, 0) for key in keys]
+
+    def set_value(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        with self._lock:
+            self._values[key] = value
+            if ttl_seconds:
+                self._expiry[key] = time.time() + ttl_seconds
+            else:
+                self._expiry.pop(key, None)
+
+    def get_value(self, key: str, default: Any = None) -> Any:
+        expires_at = self._expiry.get(key)
+        if expires_at is not None and expires_at <= time.time():
+            with self._lock:
+                self._values.pop(key, None)
+                self._expiry.pop(key, None)
+        return self._values.get(key, default)
+
+    def append(self, key: str, item: Any, maxlen: Optional[int] = None):
+        self.extend(key, [item], maxlen)
+
+    def extend(self, key: str, items: Iterable[Any], maxlen: Optional[int] = None):
+        with self._lock:
+            current = self._lists.get(key)
+            if current is None or current.maxlen != maxlen:
+                current = deque(current or (), maxlen=maxlen)
+                self._lists[key] = current
+            current.extend(items)
+
+    def get_list(self, key: str, limit: Optional[int] = None) -> List[Any]:
+        items = list(self._lists.get(key, ()))
+        return items[-limit:] if limit else items
+
+    def list_length(self, key: str) -> int:
+        return len(self._lists.get(key, ()))
+
+    def add_members(self, key: str, members: Iterable[str]):
+        with self._lock:
+            self._sets.setdefault(key, set()).update(members)
+
+    def remove_members(self, key: str, members: Iterable[str]):
+        with self._lock:
+            self._sets.get(key, set()).difference_update(members)
+
+    def get_members(self, key: str) -> set:
+        return set(self._sets.get(key, ()))
+
+    def hincr(self, key: str, field: str, amount: Number = 1) -> Number:
+        with self._lock:
+            fields = self._hashes.setdefault(key, {})
+            value = fields.get(field, 0) + amount
+            fields[field] = value
+            return value
+
+    def hincr_capped(self, entries: List[Tuple[str, str]], max_fields: int, overflow_field: str):
+        with self._lock:
+            for key, field in entries:
+                fields = self._hashes.setdefault(key, {})
+                if field not in fields and len(fields) >= max_fields:
+                    field = overflow_field
+                fields[field] = fields.get(field, 0) + 1
+
+    def get_hash(self, key: str) -> Dict[str, Number]:
+        return dict(self._hashes.get(key, {}))
+
+    def get_hashes(self, keys: List[str]) -> List[Dict[str, Number]]:
+        return [dict(self._hashes.get(key, {})) for key in keys]
+
+    def get_hash_field(self, key: str, field: str) -> Optional[Number]:
+        return self._hashes.get(key, {}).get(field)
+
+    def hash_length(self, key: str) -> int:
+        return len(self._hashes.get(key, ()))
+
+    def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                for store in (self._counters, self._values, self._expiry, self._lists, self._sets, self._hashes):
+                    store.pop(key, None)
+
+
+class SharedState:
+    """Public API shared by every backend; flags are boolean values"""
+
+    def __init__(self, backend):
+        self._backend = backend
+
+    @property
+    def backend(self) -> str:
+        return self._backend.backend
+
+    def incr(self, key: str, amount: Number = 1) -> Number:
+        """Atomically add to a counter and return the new value"""
+        return self._backend.incr(key, amount)
+
+    def decr(self, key: str, amount: Number = 1) -> Number:
+        return self._backend.incr(key, -amount)
+
+    def get_counter(self, key: str) -> Number:
+        return self._backend.get_counter(key)
+
+    def get_counters(self, keys: Iterable[str]) -> List[Number]:
+        """Several counters in one call (one round trip on Redis)"""
+        keys = list(keys)
+        return self._backend.get_counters(keys) if keys else []
+
+    def set_value(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        """Store a JSON-serializable value, optionally expiring after ttl_seconds"""
+        self._backend.set_value(key, value, ttl_seconds)
+
+    def get_value(self, key: str, default: Any = None) -> Any:
+        return self._backend.get_value(key, default)
+
+    def set_flag(self, key: str, enabled: bool = True, ttl_seconds: Optional[float] = None):
+        self._backend.set_value(key, bool(enabled), ttl_seconds)
+
+    def get_flag(self, key: str) -> bool:
+        return bool(self._backend.get_value(key, False))
+
+    def append(self, key: str, item: Any, maxlen: Optional[int] = None):
+        """Append to a list, keeping only the newest maxlen items"""
+        self._backend.append(key, item, maxlen)
+
+    def extend(self, key: str, items: Iterable[Any], maxlen: Optional[int] = None):
+        items = list(items)
+        if items:
+            self._backend.extend(key, items, maxlen)
+
+    def get_list(self, key: str, limit: Optional[int] = None) -> List[Any]:
+        """Oldest-first; limit returns only the newest items"""
+        return self._backend.get_list(key, limit)
+
+    def list_length(self, key: str) -> int:
+        return self._backend.list_length(key)
+
+    def add_members(self, key: str, members: Iterable[str]):
+        members = [str(m) for m in members]
+        if members:
+            self._backend.add_members(key, members)
+
+    def remove_members(self, key: str, members: Iterable[str]):
+        members = [str(m) for m in members]
+        if members:
+            self._backend.remove_members(key, members)
+
+    def get_members(self, key: str) -> set:
+        return self._backend.get_members(key)
+
+    def hincr(self, key: str, field: str, amount: Number = 1) -> Number:
+        """Atomically add to one counter of a hash (a group of counters read together)"""
+        return self._backend.hincr(key, str(field), amount)
+
+    def hincr_capped(self, entries: Iterable[Tuple[str, str]], max_fields: int, overflow_field: str):
+        """
+        Add 1 to each (hash, field); a hash that already holds max_fields fields counts a new field
+        under overflow_field instead. Two round trips on Redis however many entries; the cap is
+        checked before the increments, so concurrent writers can overshoot it slightly
+        """
+        entries = [(key, str(field)) for key, field in entries]
+        if entries:
+            self._backend.hincr_capped(entries, max_fields, str(overflow_field))
+
+    def get_hash(self, key: str) -> Dict[str, Number]:
+        """All counters of a hash in one call"""
+        return self._backend.get_hash(key)
+
+    def get_hashes(self, keys: Iterable[str]) -> List[Dict[str, Number]]:
+        """All counters of several hashes (one round trip on Redis)"""
+        keys = list(keys)
+        return self._backend.get_hashes(keys) if keys else []
+
+    def get_hash_field(self, key: str, field: str) -> Optional[Number]:
+        """One counter of a hash, or None if the field does not exist"""
+        return self._backend.get_hash_field(key, str(field))
+
+    def hash_length(self, key: str) -> int:
+        return self._backend.hash_length(key)
+
+    def delete(self, *keys: str):
+        self._backend.delete(*keys)
+
+    def get_info(self) -> Dict[str, Any]:
+        return {"backend": self.backend}
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Call fn (which uses this state) from async code: in a worker thread when the backend does
+        network I/O, inline otherwise
+        """
+        if self._backend.blocking:
+            return await asyncio.to_thread(fn, *args, **kwargs)
+        return fn(*args, **kwargs)
+
+
+class RedisSharedState:
+    """Redis backend; lists are JSON strings trimmed with LTRIM in the same pipeline"""
+
+    backend = "redis"
+    # Every call is a network round trip
+    blocking = True
+
+    def __init__(self, client, key_prefix: str = "bhiv:shared:"):
+        self.client = client
+        self.key_prefix = key_prefix
+
+    def _key(self, key: str) -> str:
+        return f"{self.key_prefix}{key}"
+
+    def incr(self, key: str, amount: Number = 1) -> Number:
+        if isinstance(amount, int):
+            return int(self.client.incrby(self._key(key), amount))
+        return _number(self.client.incrbyfloat(self._key(key), amount))
+
+    def get_counter(self, key: str) -> Number:
+        return _number(self.client.get(self._key(key)))
+
+    def get_counters(self, keys: List[str]) -> List[Number]:
+        return [_number(value) for value in self.client.mget([self._key(key) for key in keys])]
+
+    def set_value(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        px = int(ttl_seconds * 1000) if ttl_seconds else None
+        self.client.set(self._key(key), _encode(value), px=px)
+
+    def get_value(self, key: str, default: Any = None) -> Any:
+        raw = self.client.get(self._key(key))
+        return default if raw is None else json.loads(raw)
+
+    def append(self, key: str, item: Any, maxlen: Optional[int] = None):
+        self.extend(key, [item], maxlen)
+
+    def extend(self, key: str, items: Iterable[Any], maxlen: Optional[int] = None):
+        pipe = self.client.pipeline(transaction=True)
+        pipe.rpush(self._key(key), *[_encode(item) for item in items])
+        if maxlen:
+            pipe.ltrim(self._key(key), -maxlen, -1)
+        pipe.execute()
+
+    def get_list(self, key: str, limit: Optional[int] = None) -> List[Any]:
+        raw = self.client.lrange(self._key(key), -limit if limit else 0, -1)
+        return [json.loads(item) for item in raw]
+
+    def list_length(self, key: str) -> int:
+        return int(self.client.llen(self._key(key)))
+
+    def add_members(self, key: str, members: Iterable[str]):
+        self.client.sadd(self._key(key), *members)
+
+    def remove_members(self, key: str, members: Iterable[str]):
+        self.client.srem(self._key(key), *members)
+
+    def get_members(self, key: str) -> set:
+        return {m.decode() if isinstance(m, bytes) else m for m in self.client.smembers(self._key(key))}
+
+    def hincr(self, key: str, field: str, amount: Number = 1) -> Number:
+        if isinstance(amount, int):
+            return int(self.client.hincrby(self._key(key), field, amount))
+        return _number(self.client.hincrbyfloat(self._key(key), field, amount))
+
+    def hincr_capped(self, entries: List[Tuple[str, str]], max_fields: int, overflow_field: str):
+        pipe = self.client.pipeline(transaction=False)
+        for key, field in entries:
+            pipe.hlen(self._key(key))
+            pipe.hexists(self._key(key), field)
+        checks = pipe.execute()
+        pipe = self.client.pipeline(transaction=False)
+        for index, (key, field) in enumerate(entries):
+            length, exists = checks[2 * index], checks[2 * index + 1]
+            if not exists and int(length) >= max_fields:
+                field = overflow_field
+            pipe.hincrby(self._key(key), field, 1)
+        pipe.execute()
+
+    @staticmethod
+    def _decode_hash(raw: Dict[Any, Any]) -> Dict[str, Number]:
+        return {(field.decode() if isinstance(field, bytes) else field): _number(value) for field, value in raw.items()}
+
+    def get_hash(self, key: str) -> Dict[str, Number]:
+        return self._decode_hash(self.client.hgetall(self._key(key)))
+
+    def get_hashes(self, keys: List[str]) -> List[Dict[str, Number]]:
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.hgetall(self._key(key))
+        return [self._decode_hash(raw) for raw in pipe.execute()]
+
+    def get_hash_field(self, key: str, field: str) -> Optional[Number]:
+        raw = self.client.hget(self._key(key), field)
+        return None if raw is None else _number(raw)
+
+    def hash_length(self, key: str) -> int:
+        return int(self.client.hlen(self._key(key)))
+
+    def delete(self, *keys: str):
+        if keys:
+            self.client.delete(*[self._key(key) for key in keys])
+
+
+class SharedStateFull(RuntimeError):
+    """The mmap segment has no room for the write; raise SHARED_STATE_MMAP_SIZE_BYTES or COUNTER_SLOTS"""
+
+
+class MmapSharedState:
+    """
+    File-backed shared-memory segment for several workers on one host
+    - Layout: 32-byte header, a fixed-slot counter table, then a JSON document of values, sets
+      and the field names of each hash (hash fields are counter slots)
+    - Counters are updated in place in their slot (open addressing on a key digest), so incr costs
+      a flock and a few bytes however much else the segment holds
+    - The JSON document is rewritten only by set_value/add_members/remove_members/delete; readers
+      reuse their parsed copy while its generation is unchanged
+    - Lists stay out of the segment: they are kept per process. Deploy the Redis backend when lists
+      (Core events, recent violations) must be shared across workers
+    - Writes that do not fit raise SharedStateFull instead of being dropped
+    """
+
+    backend = "mmap"
+    blocking = False
+    MAGIC = b"BHS2"
+    # magic, counter slots, document generation, document length
+    HEADER = struct.Struct("<4sIQQ")
+    # key digest, kind, value (int64 or float64 bytes)
+    SLOT = struct.Struct("<16sB7x8s")
+    EMPTY, INT, FLOAT, DELETED = 0, 1, 2, 3
+
+    def __init__(self, path: str, size_bytes: int = 64 * 1024 * 1024, counter_slots: int = 65536):
+        if fcntl is None or mmap is None:
+            raise RuntimeError("mmap shared state needs fcntl and mmap (POSIX only)")
+        self.path = path
+        self.size_bytes = size_bytes
+        self.counter_slots = counter_slots
+        self._document_offset = self.HEADER.size + counter_slots * self.SLOT.size
+        if self._document_offset >= size_bytes:
+            raise ValueError(f"mmap segment of {size_bytes} bytes cannot hold {counter_slots} counter slots")
+        self._lock = threading.RLock()
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if os.fstat(fd).st_size < size_bytes:
+                os.ftruncate(fd, size_bytes)
+            self._map = mmap.mmap(fd, size_bytes)
+            magic, slots, _, _ = self.HEADER.unpack_from(self._map, 0)
+            if (magic, slots) != (self.MAGIC, counter_slots):
+                # New segment, or one laid out by another version: start empty
+                self._map[:self._document_offset] = bytes(self._document_offset)
+                self.HEADER.pack_into(self._map, 0, self.MAGIC, counter_slots, 0, 0)
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        except Exception:
+            os.close(fd)
+            raise
+        self._fd = fd
+        self._generation = -1
+        self._state: Dict[str, Dict[str, Any]] = {}
+        self._lists = InMemorySharedState()
+
+    # Locking
+
+    def _locked(self, mode, action):
+        with self._lock:
+            fcntl.flock(self._fd, mode)
+            try:
+                return action()
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    # Counter slots
+
+    def _slot_offset(self, index: int) -> int:
+        return self.HEADER.size + index * self.SLOT.size
+
+    def _find_slot(self, key: str, create: bool) -> Tuple[Optional[int], bool]:
+        """(slot index holding key, whether it was just created); with create, claims a free slot for a missing key"""
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        start = int.from_bytes(digest[:8], "little") % self.counter_slots
+        free = None
+        for probe in range(self.counter_slots):
+            index = (start + probe) % self.counter_slots
+            slot_digest, kind, _ = self.SLOT.unpack_from(self._map, self._slot_offset(index))
+            if kind == self.EMPTY:
+                free = index if free is None else free
+                break
+            if kind == self.DELETED:
+                free = index if free is None else free
+            elif slot_digest == digest:
+                return index, False
+        if not create:
+            return None, False
+        if free is None:
+            raise SharedStateFull(f"All {self.counter_slots} counter slots are in use")
+        self.SLOT.pack_into(self._map, self._slot_offset(free), digest, self.INT, bytes(8))
+        return free, True
+
+    def _slot_value(self, index: int) -> Number:
+        _, kind, raw = self.SLOT.unpack_from(self._map, self._slot_offset(index))
+        return struct.unpack("<d", raw)[0] if kind == self.FLOAT else struct.unpack("<q", raw)[0]
+
+    def _incr_slot(self, key: str, amount: Number) -> Tuple[Number, bool]:
+        def change():
+            index, created = self._find_slot(key, create=True)
+            value = self._slot_value(index) + amount
+            digest = self.SLOT.unpack_from(self._map, self._slot_offset(index))[0]
+            if isinstance(value, int):
+                self.SLOT.pack_into(self._map, self._slot_offset(index), digest, self.INT, struct.pack("<q", value))
+            else:
+                self.SLOT.pack_into(self._map, self._slot_offset(index), digest, self.FLOAT, struct.pack("<d", value))
+            return _number(value), created
+        return self._locked(fcntl.LOCK_EX, change)
+
+    def incr(self, key: str, amount: Number = 1) -> Number:
+        return self._incr_slot(key, amount)[0]
+
+    def get_counter(self, key: str) -> Number:
+        return self.get_counters([key])[0]
+
+    def get_counters(self, keys: List[str]) -> List[Number]:
+        def read():
+            values = []
+            for key in keys:
+                index, _ = self._find_slot(key, create=False)
+                values.append(0 if index is None else _number(self._slot_value(index)))
+            return values
+        return self._locked(fcntl.LOCK_SH, read)
+
+    def _delete_counters(self, keys: Iterable[str]):
+        for key in keys:
+            index, _ = self._find_slot(key, create=False)
+            if index is not None:
+                self.SLOT.pack_into(self._map, self._slot_offset(index), bytes(16), self.DELETED, bytes(8))
+
+    # JSON document (values and sets)
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        _, _, generation, length = self.HEADER.unpack_from(self._map, 0)
+        if generation != self._generation:
+            payload = self._map[self._document_offset:self._document_offset + length]
+            self._state = json.loads(payload) if length else {}
+            self._generation = generation
+        return self._state
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        return self._locked(fcntl.LOCK_SH, self._load)
+
+    def _mutate(self, change):
+        def apply():
+            state = self._load()
+            result = change(state)
+            payload = _encode(state).encode()
+            if self._document_offset + len(payload) > self.size_bytes:
+                # The cached copy already holds the change; reload it from the segment next time
+                self._generation = -1
+                raise SharedStateFull(
+                    f"Shared state document needs {len(payload)} bytes; raise SHARED_STATE_MMAP_SIZE_BYTES"
+                )
+            self._map[self._document_offset:self._document_offset + len(payload)] = payload
+            self._generation += 1
+            self.HEADER.pack_into(self._map, 0, self.MAGIC, self.counter_slots, self._generation, len(payload))
+            return result
+        return self._locked(fcntl.LOCK_EX, apply)
+
+    def set_value(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        expires_at = time.time() + ttl_seconds if ttl_seconds else None
+        self._mutate(lambda state: state.setdefault("values", {}).__setitem__(key, [value, expires_at]))
+
+    def get_value(self, key: str, default: Any = None) -> Any:
+        entry = self._read().get("values", {}).get(key)
+        if entry is None or (entry[1] is not None and entry[1] <= time.time()):
+            return default
+        return entry[0]
+
+    # Lists (per process)
+
+    def append(self, key: str, item: Any, maxlen: Optional[int] = None):
+        self._lists.append(key, item, maxlen)
+
+    def extend(self, key: str, items: Iterable[Any], maxlen: Optional[int] = None):
+        self._lists.extend(key, items, maxlen)
+
+    def get_list(self, key: str, limit: Optional[int] = None) -> List[Any]:
+        return self._lists.get_list(key, limit)
+
+    def list_length(self, key: str) -> int:
+        return self._lists.list_length(key)
+
+    def add_members(self, key: str, members: Iterable[str]):
+        members = list(members)
+        # Skip the document rewrite when every member is already there
+        if set(members) <= set(self._read().get("sets", {}).get(key, [])):
+            return
+
+        def change(state):
+            current = set(state.setdefault("sets", {}).get(key, []))
+            current.update(members)
+            state["sets"][key] = sorted(current)
+        self._mutate(change)
+
+    def remove_members(self, key: str, members: Iterable[str]):
+        members = set(members)
+
+        def change(state):
+            current = state.setdefault("sets", {}).get(key, [])
+            state["sets"][key] = [m for m in current if m not in members]
+        self._mutate(change)
+
+    def get_members(self, key: str) -> set:
+        return set(self._read().get("sets", {}).get(key, []))
+
+    # Hashes: one counter slot per field; the document lists each hash's fields
+
+    @staticmethod
+    def _field_key(key: str, field: str) -> str:
+        return f"{key}\x00{field}"
+
+    def hincr(self, key: str, field: str, amount: Number = 1) -> Number:
+        value, created = self._incr_slot(self._field_key(key, field), amount)
+        if created:
+            # Only a new field rewrites the document
+            def change(state):
+                fields = state.setdefault("hashes", {}).setdefault(key, [])
+                if field not in fields:
+                    fields.append(field)
+            self._mutate(change)
+        return value
+
+    def hincr_capped(self, entries: List[Tuple[str, str]], max_fields: int, overflow_field: str):
+        for key, field in entries:
+            if self.hash_length(key) >= max_fields and self.get_hash_field(key, field) is None:
+                field = overflow_field
+            self.hincr(key, field)
+
+    def get_hash(self, key: str) -> Dict[str, Number]:
+        return self.get_hashes([key])[0]
+
+    def get_hashes(self, keys: List[str]) -> List[Dict[str, Number]]:
+        hashes = self._read().get("hashes", {})
+        fields = [hashes.get(key, []) for key in keys]
+        values = iter(self.get_counters([
+            self._field_key(key, field) for key, key_fields in zip(keys, fields) for field in key_fields
+        ]))
+        return [{field: next(values) for field in key_fields} for key_fields in fields]
+
+    def get_hash_field(self, key: str, field: str) -> Optional[Number]:
+        def read():
+            index, _ = self._find_slot(self._field_key(key, field), create=False)
+            return None if index is None else _number(self._slot_value(index))
+        return self._locked(fcntl.LOCK_SH, read)
+
+    def hash_length(self, key: str) -> int:
+        return len(self._read().get("hashes", {}).get(key, []))
+
+    def delete(self, *keys: str):
+        def change(state):
+            self._delete_counters(keys)
+            for key in keys:
+                fields = state.get("hashes", {}).get(key, [])
+                self._delete_counters(self._field_key(key, field) for field in fields)
+            for section in state.values():
+                for key in keys:
+                    section.pop(key, None)
+        self._mutate(change)
+        self._lists.delete(*keys)
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+
+def create_shared_state(config: Optional[Dict[str, Any]] = None) -> SharedState:
+    """Build the backend selected by SHARED_STATE_CONFIG; falls back to in-process"""
+    config = config or SHARED_STATE_CONFIG
+    backend = config["backend"]
+
+    if backend == "redis":
+        try:
+            import redis
+
+            client = redis.Redis(
+                host=os.getenv("REDIS_HOST", "localhost"),
+                port=int(os.getenv("REDIS_PORT", 6379)),
+                password=os.getenv("REDIS_PASSWORD", None),
+                socket_timeout=5,
+                socket_connect_timeout=5
+            )
+            client.ping()
+            logger.info("Shared state using Redis backend")
+            return SharedState(RedisSharedState(client, config["key_prefix"]))
+        except Exception as e:
+            logger.warning(f"Redis shared state unavailable, using in-process state: {e}")
+    elif backend == "mmap":
+        try:
+            state = SharedState(MmapSharedState(
+                config["mmap_path"], config["mmap_size_bytes"], config.get("mmap_counter_slots", 65536)
+            ))
+            logger.info(f"Shared state using mmap segment {config['mmap_path']}")
+            return state
+        except Exception as e:
+            logger.warning(f"mmap shared state unavailable, using in-process state: {e}")
+
+    return SharedState(InMemorySharedState())
+
+# Global shared state instance
+shared_state = create_shared_state()
@@ -0,0 +1,193 @@
+"""
+BHIV Staged Startup
+Initializes service dependencies in stages during the FastAPI lifespan
+- Dependencies in the same stage initialize concurrently
+- Background dependencies (slow or optional) connect without blocking startup, retrying with backoff
+- Per-dependency readiness for /health
+"""
+
+import asyncio
+import inspect
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_RETRY_INTERVAL = 5.0
+MAX_RETRY_INTERVAL = 60.0
+
+
+class Dependency:
+    """A single startup dependency and its readiness state"""
+
+    def __init__(
+        self,
+        name: str,
+        init: Callable[[], Any],
+        stage: int = 0,
+        required: bool = True,
+        background: bool = False,
+        retry_interval: Optional[float] = DEFAULT_RETRY_INTERVAL,
+        on_ready: Optional[Callable[[], Any]] = None
+    ):
+        self.name = name
+        self.init = init
+        self.stage = stage
+        self.required = required
+        self.background = background
+        self.retry_interval = retry_interval
+        self.on_ready = on_ready
+
+        self.status = "pending"  # pending | starting | ready | unavailable | failed | disabled
+        self.error: Optional[str] = None
+        self.attempts = 0
+        self.duration_ms: Optional[float] = None
+        self.ready_at: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "stage": self.stage,
+            "required": self.required,
+            "background": self.background,
+            "attempts": self.attempts,
+            "duration_ms": self.duration_ms,
+            "ready_at": self.ready_at,
+            "error": self.error
+        }
+
+
+class StartupManager:
+    """Runs registered dependencies stage by stage and tracks their readiness"""
+
+    def __init__(self):
+        self.dependencies: Dict[str, Dependency] = {}
+        self._background_tasks: List[asyncio.Task] = []
+        self.started_at: Optional[str] = None
+        self.duration_ms: Optional[float] = None
+
+    def register(
+        self,
+        name: str,
+        init: Callable[[], Any],
+        stage: int = 0,
+        required: bool = True,
+        background: bool = False,
+        retry_interval: Optional[float] = DEFAULT_RETRY_INTERVAL,
+        on_ready: Optional[Callable[[], Any]] = None
+    ) -> Dependency:
+        """
+        Register a dependency
+
+        Args:
+            name: Dependency name reported by /health
+            init: Sync or async callable; a falsy return means "not available yet".
+                  Sync callables run in a worker thread so blocking clients do not stall the loop
+            stage: Stages run in ascending order; dependencies within a stage run concurrently
+            required: Whether the service counts as ready without this dependency
+            background: Connect without blocking startup, retrying every retry_interval (doubling)
+            retry_interval: Seconds between background attempts; None tries once
+            on_ready: Sync or async callable run once the dependency becomes ready
+        """
+        dependency = Dependency(name, init, stage, required, background, retry_interval, on_ready)
+        self.dependencies[name] = dependency
+        return dependency
+
+    def mark_disabled(self, name: str, reason: str):
+        """Report a dependency that is switched off by configuration"""
+        dependency = self.register(name, lambda: False, required=False)
+        dependency.status = "disabled"
+        dependency.error = reason
+
+    async def start(self) -> Dict[str, Any]:
+        """Run all stages; returns once every foreground dependency has been attempted"""
+        start = time.perf_counter()
+        self.started_at = datetime.now(timezone.utc).isoformat()
+
+        pending = [d for d in self.dependencies.values() if d.status == "pending"]
+        for stage in sorted({d.stage for d in pending}):
+            members = [d for d in pending if d.stage == stage]
+            for dependency in members:
+                if dependency.background:
+                    self._background_tasks.append(asyncio.create_task(self._run_background(dependency)))
+            foreground = [d for d in members if not d.background]
+            if foreground:
+                await asyncio.gather(*(self._attempt(d) for d in foreground))
+
+        self.duration_ms = round((time.perf_counter() - start) * 1000, 2)
+        logger.info(f"Startup completed in {self.duration_ms}ms: {self.get_summary()}")
+        return self.readiness()
+
+    async def stop(self):
+        """Cancel background connection attempts still in progress"""
+        for task in self._background_tasks:
+            task.cancel()
+        for task in self._background_tasks:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._background_tasks = []
+
+    async def _call(self, fn: Callable[[], Any]) -> Any:
+        if inspect.iscoroutinefunction(fn):
+            return await fn()
+        result = await asyncio.to_thread(fn)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def _attempt(self, dependency: Dependency) -> bool:
+        dependency.status = "starting"
+        dependency.attempts += 1
+        start = time.perf_counter()
+        try:
+            ok = await self._call(dependency.init)
+            dependency.status = "ready" if ok else "unavailable"
+            if ok:
+                dependency.error = None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            dependency.status = "failed"
+            dependency.error = str(e)
+            logger.error(f"Startup dependency {dependency.name} failed: {e}")
+        dependency.duration_ms = round((time.perf_counter() - start) * 1000, 2)
+
+        if dependency.status != "ready":
+            return False
+
+        dependency.ready_at = datetime.now(timezone.utc).isoformat()
+        logger.info(f"Startup dependency {dependency.name} ready in {dependency.duration_ms}ms")
+        if dependency.on_ready:
+            try:
+                await self._call(dependency.on_ready)
+            except Exception as e:
+                logger.error(f"on_ready hook for {dependency.name} failed: {e}")
+        return True
+
+    async def _run_background(self, dependency: Dependency):
+        interval = dependency.retry_interval
+        while not await self._attempt(dependency):
+            if interval is None:
+                return
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, MAX_RETRY_INTERVAL)
+
+    def is_ready(self, name: str) -> bool:
+        dependency = self.dependencies.get(name)
+        return dependency is not None and dependency.status == "ready"
+
+    def get_summary(self) -> Dict[str, str]:
+        return {name: d.status for name, d in self.dependencies.items()}
+
+    def readiness(self) -> Dict[str, Any]:
+        """Overall and per-dependency readiness"""
+        return {
+            "ready": all(d.status == "ready" for d in self.dependencies.values() if d.required),
+            "started_at": self.started_at,
+            "startup_ms": self.duration_ms,
+            "dependencies": {name: d.to_dict() for name, d in self.dependencies.items()}
+        }
@@ -6,6 +6,7 @@ Implements threat detection patterns from Document 14 (Threat Model)
 from typing import Dict, List, Any
 from datetime import datetime
 from utils.logger import get_logger
+from utils.shared_state import shared_state
 
 logger = get_logger(__name__)
 
@@ -202,6 +203,25 @@ class BucketThreatModel:
         
         return detected_threats
     
+    @classmethod
+    def record_detections(cls, threats: List[Dict[str, Any]]):
+        """Count detections per threat in shared state (consistent across workers)"""
+        for threat in threats:
+            shared_state.incr(f"threats:detected:{threat['threat_id']}")
+        if any(threat.get("level") == "critical" for threat in threats):
+            shared_state.set_value("threats:last_critical_at", datetime.utcnow().isoformat())
+    
+    @classmethod
+    def get_detection_counts(cls) -> Dict[str, Any]:
+        """Detections per threat since startup, plus when the last critical threat was seen"""
+        return {
+            "by_threat": {
+                threat_id: shared_state.get_counter(f"threats:detected:{threat_id}")
+                for threat_id in cls.THREATS
+            },
+            "last_critical_at": shared_state.get_value("threats:last_critical_at")
+        }
+    
     @classmethod
     def has_critical_threats(cls, threats: List[Dict[str, Any]]) -> bool:
         """Check if any critical threats detected"""
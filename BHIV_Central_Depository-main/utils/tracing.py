@@ -0,0 +1,352 @@
+"""
+BHIV Request Tracing
+Lightweight in-process spans for Bucket requests
+- A root span per HTTP request (middleware/tracing.py); nested spans for basket steps, agent runs,
+  RedisService/MongoDBClient calls and outbound HTTP
+- Spans outside a request are no-ops, so instrumented code costs a context lookup when untraced
+- Sampled traces (and every failed request) are exported as OTLP/JSON lines through a queue-backed file sink
+- Server-Timing header summarizes time per layer
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from utils.logger import get_logger, create_queue_logger
+
+logger = get_logger(__name__)
+
+TRACING_CONFIG = {
+    "enabled": os.getenv("TRACING_ENABLED", "true").lower() == "true",
+    "server_timing": os.getenv("TRACE_SERVER_TIMING", "true").lower() == "true",
+    "export_file": os.getenv("TRACE_EXPORT_FILE", "logs/traces/spans.otlp.jsonl"),
+    "export_sample_rate": float(os.getenv("TRACE_EXPORT_SAMPLE_RATE", "0.1")),
+    "export_max_bytes": int(os.getenv("TRACE_EXPORT_MAX_BYTES", str(50 * 1024 * 1024))),
+    "export_backup_count": int(os.getenv("TRACE_EXPORT_BACKUP_COUNT", "5")),
+    "max_spans_per_trace": int(os.getenv("TRACE_MAX_SPANS", "1000")),
+    "service_name": os.getenv("TRACE_SERVICE_NAME", "bhiv-bucket")
+}
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+# Span name prefixes that are calls to another process
+CLIENT_PREFIXES = ("redis", "mongo", "http")
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("bhiv_current_span", default=None)
+
+
+class Trace:
+    """Finished spans of one request"""
+
+    __slots__ = ("trace_id", "spans", "sampled", "dropped")
+
+    def __init__(self, sampled: bool):
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List["Span"] = []
+        self.sampled = sampled
+        self.dropped = 0
+
+    def add(self, span: "Span"):
+        if len(self.spans) < TRACING_CONFIG["max_spans_per_trace"]:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+
+
+class Span:
+    """A timed operation; use as a context manager to make it the parent of nested spans"""
+
+    __slots__ = ("name", "trace", "span_id", "parent_id", "kind", "start_ns", "end_ns",
+                 "attributes", "error", "_token")
+
+    def __init__(self, name: str, trace: Trace, parent_id: Optional[str], kind: int, attributes: Dict[str, Any]):
+        self.name = name
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_error(self, error: Any):
+        self.error = str(error)
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.trace.add(self)
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.set_error(exc)
+        _current_span.reset(self._token)
+        self.end()
+        return False
+
+
+class _NoopSpan:
+    """Returned when there is no active trace"""
+
+    __slots__ = ()
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_error(self, error):
+        pass
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+class Tracer:
+    """Creates spans, builds Server-Timing summaries and exports sampled traces"""
+
+    def __init__(self, enabled: Optional[bool] = None, export_sample_rate: Optional[float] = None,
+                 export_file: Optional[str] = None):
+        self.enabled = TRACING_CONFIG["enabled"] if enabled is None else enabled
+        self.export_sample_rate = (
+            TRACING_CONFIG["export_sample_rate"] if export_sample_rate is None else export_sample_rate
+        )
+        self.export_file = export_file or TRACING_CONFIG["export_file"]
+        self._export_logger: Optional[logging.Logger] = None
+        self._export_listener = None
+        self.stats = {"traces": 0, "exported": 0, "dropped_spans": 0}
+
+    # ------------------------------------------------------------------
+    # Spans
+    # ------------------------------------------------------------------
+
+    def start_trace(self, name: str, **attributes) -> Any:
+        """Root span of a new trace (enter it to make it current)"""
+        if not self.enabled:
+            return NOOP_SPAN
+        self.stats["traces"] += 1
+        trace = Trace(sampled=random.random() < self.export_sample_rate)
+        return Span(name, trace, None, SPAN_KIND_SERVER, attributes)
+
+    def span(self, name: str, **attributes) -> Any:
+        """Child of the current span, or a no-op outside a trace"""
+        parent = _current_span.get()
+        if parent is None:
+            return NOOP_SPAN
+        kind = SPAN_KIND_CLIENT if name.startswith(CLIENT_PREFIXES) else SPAN_KIND_INTERNAL
+        return Span(name, parent.trace, parent.span_id, kind, attributes)
+
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+
+    # ------------------------------------------------------------------
+    # Server-Timing
+    # ------------------------------------------------------------------
+
+    def server_timing(self, root: Span) -> str:
+        """Server-Timing header value: time per layer (outermost span of each layer only) plus total"""
+        if not isinstance(root, Span):
+            return ""
+        by_id = {span.span_id: span for span in root.trace.spans}
+        layers: Dict[str, List[float]] = {}
+        for span in root.trace.spans:
+            if span is root:
+                continue
+            layer = span.name.split(".", 1)[0]
+            parent = by_id.get(span.parent_id)
+            nested = False
+            while parent is not None:
+                if parent.name.split(".", 1)[0] == layer:
+                    nested = True
+                    break
+                parent = by_id.get(parent.parent_id)
+            if not nested:
+                layers.setdefault(layer, []).append(span.duration_ms)
+
+        parts = [
+            f'{layer};dur={sum(durations):.2f};desc="{len(durations)} calls"'
+            for layer, durations in sorted(layers.items())
+        ]
+        parts.append(f"total;dur={root.duration_ms:.2f}")
+        return ", ".join(parts)
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+
+    def to_otlp(self, root: Span) -> Dict[str, Any]:
+        """OTLP/JSON ExportTraceServiceRequest for one trace"""
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": TRACING_CONFIG["service_name"]})},
+                "scopeSpans": [{
+                    "scope": {"name": "bhiv.tracing"},
+                    "spans": [
+                        {
+                            "traceId": span.trace.trace_id,
+                            "spanId": span.span_id,
+                            "parentSpanId": span.parent_id or "",
+                            "name": span.name,
+                            "kind": span.kind,
+                            "startTimeUnixNano": str(span.start_ns),
+                            "endTimeUnixNano": str(span.end_ns or span.start_ns),
+                            "attributes": _otlp_attributes(span.attributes),
+                            "status": (
+                                {"code": STATUS_ERROR, "message": span.error}
+                                if span.error else {"code": STATUS_UNSET}
+                            )
+                        }
+                        for span in root.trace.spans
+                    ]
+                }]
+            }]
+        }
+
+    def finish_trace(self, root: Any):
+        """Export the trace if it was sampled or failed"""
+        if not isinstance(root, Span):
+            return
+        root.end()
+        self.stats["dropped_spans"] += root.trace.dropped
+        failed = root.error is not None or (root.attributes.get("http.status_code") or 0) >= 500
+        if not (root.trace.sampled or failed) or not self.export_file:
+            return
+        try:
+            self._get_export_logger().info(json.dumps(self.to_otlp(root), default=str))
+            self.stats["exported"] += 1
+        except Exception as e:
+            logger.error(f"Failed to export trace {root.trace.trace_id}: {e}")
+
+    def _get_export_logger(self) -> logging.Logger:
+        if self._export_logger is None:
+            self._export_logger, self._export_listener = create_queue_logger(
+                "trace_export",
+                self.export_file,
+                TRACING_CONFIG["export_max_bytes"],
+                TRACING_CONFIG["export_backup_count"],
+                formatter=logging.Formatter("%(message)s")
+            )
+        return self._export_logger
+
+    def shutdown(self):
+        """Flush exported traces"""
+        if self._export_listener is not None:
+            self._export_listener.stop()
+            for handler in self._export_listener.handlers:
+                handler.close()
+            self._export_listener = None
+            self._export_logger = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "export_sample_rate": self.export_sample_rate,
+            "export_file": self.export_file,
+            **self.stats
+        }
+
+
+# Global tracer instance
+tracer = Tracer()
+
+
+def traced(name: str):
+    """Decorator: run a sync or async function inside a span named `name`"""
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if _current_span.get() is None:
+                    return await fn(*args, **kwargs)
+                with tracer.span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return fn(*args, **kwargs)
+            with tracer.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def trace_methods(prefix: str, exclude: tuple = ()):
+    """Class decorator: wrap every public method in a span named `{prefix}.{method}`"""
+    def decorate(cls):
+        for attr, value in list(vars(cls).items()):
+            if attr.startswith("_") or attr in exclude or not inspect.isfunction(value):
+                continue
+            setattr(cls, attr, traced(f"{prefix}.{attr}")(value))
+        return cls
+    return decorate
+
+
+def aiohttp_trace_config():
+    """aiohttp TraceConfig recording an http.client span per outbound request"""
+    import aiohttp
+
+    async def on_request_start(session, context, params):
+        context.span = tracer.span("http.client", **{"http.method": params.method, "http.url": str(params.url)})
+
+    async def on_request_end(session, context, params):
+        context.span.set_attribute("http.status_code", params.response.status)
+        if params.response.status >= 500:
+            context.span.set_error(f"HTTP {params.response.status}")
+        context.span.end()
+
+    async def on_request_exception(session, context, params):
+        context.span.set_error(params.exception)
+        context.span.end()
+
+    config = aiohttp.TraceConfig()
+    config.on_request_start.append(on_request_start)
+    config.on_request_end.append(on_request_end)
+    config.on_request_exception.append(on_request_exception)
+    return config
@@ -126,6 +126,34 @@ ALPHA = float(os.getenv("ALPHA", "0.15"))
 GAMMA = float(os.getenv("GAMMA", "0.9"))
 EPSILON = float(os.getenv("EPSILON", "0.2"))
 
+# Q-table write-behind: changed cells are flushed after this many updates or seconds
+QTABLE_FLUSH_EVERY = int(os.getenv("QTABLE_FLUSH_EVERY", "50"))
+QTABLE_FLUSH_INTERVAL_SECONDS = float(os.getenv("QTABLE_FLUSH_INTERVAL_SECONDS", "5"))
+
+# Maximum actions accepted by one /v1/karma/log-action/bulk request
+LOG_ACTION_BULK_MAX = int(os.getenv("LOG_ACTION_BULK_MAX", "1000"))
+
+# Maximum events accepted by one /v1/event/batch request
+EVENT_BATCH_MAX = int(os.getenv("EVENT_BATCH_MAX", "1000"))
+# A pending idempotency-key reservation older than this is taken over by the next retry
+EVENT_RESERVATION_TIMEOUT_SECONDS = float(os.getenv("EVENT_RESERVATION_TIMEOUT_SECONDS", "300"))
+
+# karma_events write-behind: events are buffered (and spooled to disk) and written with insert_many
+EVENT_LOG_WRITE_BEHIND = os.getenv("EVENT_LOG_WRITE_BEHIND", "true").lower() == "true"
+EVENT_LOG_BATCH_SIZE = int(os.getenv("EVENT_LOG_BATCH_SIZE", "500"))
+EVENT_LOG_MAX_BUFFER = int(os.getenv("EVENT_LOG_MAX_BUFFER", "10000"))
+EVENT_LOG_FLUSH_INTERVAL_SECONDS = float(os.getenv("EVENT_LOG_FLUSH_INTERVAL_SECONDS", "1"))
+EVENT_LOG_SPOOL_DIR = os.getenv("EVENT_LOG_SPOOL_DIR", "./event_spool")  # empty = no spool
+
+# GET /karma/{user_id}: per-process profile cache, dropped on this process's writes to the user (0 = off)
+KARMA_PROFILE_CACHE_TTL_SECONDS = float(os.getenv("KARMA_PROFILE_CACHE_TTL_SECONDS", "5"))
+KARMA_PROFILE_CACHE_MAX_ENTRIES = int(os.getenv("KARMA_PROFILE_CACHE_MAX_ENTRIES", "10000"))
+# Fraction of profile reads written to the observability API log (0 = off)
+KARMA_PROFILE_ACCESS_LOG_SAMPLE_RATE = float(os.getenv("KARMA_PROFILE_ACCESS_LOG_SAMPLE_RATE", "0.01"))
+
+# Token decay is evaluated lazily on reads; a background job can persist it for idle users (0 = off)
+DECAY_MATERIALIZE_INTERVAL_HOURS = float(os.getenv("DECAY_MATERIALIZE_INTERVAL_HOURS", "0"))
+
 # Configurable karma factors and guidance weights
 KARMA_FACTORS = {
     "purushartha_modifiers": {
@@ -10,23 +10,22 @@ _client_lock = threading.Lock()
 _client: MongoClient = None
 _db = None
 
+def client_options() -> dict:
+    """Pool and timeout settings shared by the sync and async clients"""
+    return {
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", "100")),
+        "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+        "serverSelectionTimeoutMS": int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+        "connectTimeoutMS": int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000")),
+    }
+
 def get_client() -> MongoClient:
     global _client
     if _client is None:
         with _client_lock:
             if _client is None:
                 try:
-                    max_pool = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
-                    min_pool = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
-                    server_sel_timeout = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
-                    connect_timeout = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
-                    _client = MongoClient(
-                        MONGO_URI,
-                        maxPoolSize=max_pool,
-                        minPoolSize=min_pool,
-                        serverSelectionTimeoutMS=server_sel_timeout,
-                        connectTimeoutMS=connect_timeout,
-                    )
+                    _client = MongoClient(MONGO_URI, **client_options())
                     # Test connection
                     _client.admin.command('ping')
                     logger.info("MongoDB connection established")
@@ -46,7 +45,7 @@ def get_db():
 # Define separate collections for each data type with lazy loading
 def _get_collection(name):
     db = get_db()
-    return db[name] if db else None
+    return db[name] if db is not None else None
 
 @property
 def users_col():
@@ -83,7 +82,7 @@ def rnanubandhan_col():
 # Fallback for direct access (backwards compatibility)
 try:
     db = get_db()
-    if db:
+    if db is not None:
         users_col = db["users"]
         transactions_col = db["transactions"]
         qtable_col = db["q_table"]
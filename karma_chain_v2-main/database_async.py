@@ -0,0 +1,128 @@
+"""
+Async MongoDB access for request handlers.
+
+Exposes the same collection handles as database.py, backed by motor so async routes
+do not block the event loop on database calls. database.py stays the synchronous
+access path for scripts, schedulers and utilities.
+
+Usage mirrors motor: single-document calls are awaited directly
+(await users_col.find_one(...)) and cursors are drained with
+await users_col.find(...).to_list(length).
+
+Without motor installed, or when MongoDB is unreachable at startup, each handle wraps
+the matching synchronous collection and runs its calls in a worker thread.
+"""
+
+import asyncio
+import itertools
+import logging
+from pymongo.collection import Collection
+import database
+from database import client_options
+from config import MONGO_URI, DB_NAME
+
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+except ImportError:
+    AsyncIOMotorClient = None
+
+logger = logging.getLogger(__name__)
+
+# Handle name -> collection name (as in database.py)
+COLLECTIONS = {
+    "users_col": "users",
+    "transactions_col": "transactions",
+    "qtable_col": "q_table",
+    "appeals_col": "appeals",
+    "atonements_col": "atonements",
+    "death_events_col": "death_events",
+    "karma_events_col": "karma_events",
+    "rnanubandhan_col": "rnanubandhan_relationships",
+}
+
+
+class ThreadedCursor:
+    """Motor-style cursor over a pymongo cursor opened and drained in a worker thread"""
+
+    def __init__(self, open_cursor):
+        self._open_cursor = open_cursor
+        self._chain = []
+
+    def _chained(self, method, *args, **kwargs):
+        self._chain.append((method, args, kwargs))
+        return self
+
+    def sort(self, *args, **kwargs):
+        return self._chained("sort", *args, **kwargs)
+
+    def skip(self, *args, **kwargs):
+        return self._chained("skip", *args, **kwargs)
+
+    def limit(self, *args, **kwargs):
+        return self._chained("limit", *args, **kwargs)
+
+    async def to_list(self, length=None):
+        def fetch():
+            cursor = self._open_cursor()
+            for method, args, kwargs in self._chain:
+                cursor = getattr(cursor, method)(*args, **kwargs)
+            return list(cursor if length is None else itertools.islice(cursor, length))
+        return await asyncio.to_thread(fetch)
+
+
+class ThreadedCollection:
+    """Motor-style async interface over a synchronous collection"""
+
+    def __init__(self, collection):
+        self.sync = collection
+
+    def find(self, *args, **kwargs):
+        return ThreadedCursor(lambda: self.sync.find(*args, **kwargs))
+
+    def aggregate(self, *args, **kwargs):
+        return ThreadedCursor(lambda: self.sync.aggregate(*args, **kwargs))
+
+    def __getattr__(self, name):
+        # Looked up per call, so patches on the wrapped collection apply
+        method = getattr(self.sync, name)
+        if not callable(method):
+            return method
+
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(getattr(self.sync, name), *args, **kwargs)
+        return call
+
+
+_client = None
+
+
+def _build_handles():
+    global _client
+    # Follow the sync layer: a real collection there means MongoDB was reachable
+    if not isinstance(database.users_col, Collection):
+        logger.warning("MongoDB unavailable; async collections fall back to the sync placeholders")
+    elif AsyncIOMotorClient is None:
+        logger.warning("motor is not installed; async collections run pymongo calls in worker threads")
+    else:
+        _client = AsyncIOMotorClient(MONGO_URI, **client_options())
+        db = _client[DB_NAME]
+        return {handle: db[name] for handle, name in COLLECTIONS.items()}
+    return {handle: ThreadedCollection(getattr(database, handle)) for handle in COLLECTIONS}
+
+
+_handles = _build_handles()
+users_col = _handles["users_col"]
+transactions_col = _handles["transactions_col"]
+qtable_col = _handles["qtable_col"]
+appeals_col = _handles["appeals_col"]
+atonements_col = _handles["atonements_col"]
+death_events_col = _handles["death_events_col"]
+karma_events_col = _handles["karma_events_col"]
+rnanubandhan_col = _handles["rnanubandhan_col"]
+
+
+def close_client():
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
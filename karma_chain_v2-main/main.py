@@ -16,6 +16,13 @@ from routes.analytics import router as analytics_router  # Karmic Analytics rout
 from routes.v1.karma.lifecycle import router as lifecycle_router  # Karma Lifecycle Engine router
 # from routes import user, admin  # These modules don't exist yet
 from database import close_client
+from database_async import close_client as close_async_client
+from utils.qlearning import flush_q_table
+from utils.event_log import event_log
+from routes.v1.karma.event import ensure_idempotency_index
+from utils.tokens import run_decay_materializer
+from config import DECAY_MATERIALIZE_INTERVAL_HOURS
+import asyncio
 import os
 
 @asynccontextmanager
@@ -23,10 +30,30 @@ async def lifespan(app: FastAPI):
     # Startup
     # Create analytics exports directory if it doesn't exist
     os.makedirs("./analytics_exports", exist_ok=True)
+    decay_task = None
+    if DECAY_MATERIALIZE_INTERVAL_HOURS > 0:
+        decay_task = asyncio.create_task(run_decay_materializer(DECAY_MATERIALIZE_INTERVAL_HOURS))
+    # Replays karma events spooled by a previous run that did not shut down cleanly
+    event_log.start()
+    try:
+        await ensure_idempotency_index()
+    except Exception as e:
+        print(f"Could not ensure the karma_events idempotency index: {e}")
     yield
-    # Shutdown
+    if decay_task is not None:
+        decay_task.cancel()
+    # Shutdown: persist pending Q-table updates and karma events before the client closes
+    try:
+        flush_q_table(retry=False)
+    except Exception:
+        pass
+    try:
+        event_log.close()
+    except Exception:
+        pass
     try:
         close_client()
+        close_async_client()
     except Exception:
         # Avoid raising during shutdown
         pass
@@ -213,6 +213,7 @@ class KarmaEvent(BaseModel):
     data: Dict[str, Any] = Field(..., description="Event data payload")
     timestamp: datetime = Field(..., description="Event timestamp")
     source: Optional[str] = Field(None, max_length=100, description="Event source system")
+    idempotency_key: Optional[str] = Field(None, max_length=200, description="Client key; held from reservation until processed, released on failure")
     status: EventStatus = Field(default=EventStatus.PROCESSED, description="Event processing status")
     response_data: Optional[Dict[str, Any]] = Field(None, description="Response data from processing")
     error_message: Optional[str] = Field(None, max_length=1000, description="Error message if failed")
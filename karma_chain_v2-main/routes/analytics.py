@@ -3,7 +3,7 @@ Analytics Routes Module
 
 Provides API endpoints for karmic analytics and visualization.
 """
-from fastapi import APIRouter, Query, HTTPException, Response
+from fastapi import APIRouter, Query, HTTPException, Response, Depends
 from typing import Optional
 import os
 import json
@@ -16,6 +16,7 @@ from utils.karmic_analytics import (
     export_weekly_summary_csv,
     get_live_karmic_metrics
 )
+from utils.event_log import flush_before_read
 
 router = APIRouter(prefix="/api/v1/analytics", tags=["analytics"])
 
@@ -178,7 +179,7 @@ async def weekly_summary_export(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error exporting summary: {str(e)}")
 
-@router.get("/metrics/live")
+@router.get("/metrics/live", dependencies=[Depends(flush_before_read)])
 async def live_karmic_metrics():
     """
     Get live karmic metrics
@@ -2,9 +2,14 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timezone
+import random
+import time
 import uuid
-from database import users_col, transactions_col, karma_events_col
-from utils.tokens import apply_decay_and_expiry
+from database import users_col, transactions_col
+from database_async import users_col as users_async, transactions_col as transactions_async
+from utils.event_log import event_log
+from utils.profile_cache import profile_cache
+from utils.tokens import apply_decay_and_expiry, decayed_view
 from utils.merit import compute_user_merit_score, determine_role_from_merit
 from utils.paap import get_total_paap_score, apply_paap_tokens, classify_paap_action
 from utils.loka import calculate_net_karma
@@ -14,7 +19,11 @@ from utils.karma_engine import evaluate_action_karma, determine_corrective_guida
 from utils.qlearning import q_learning_step, atonement_q_learning_step
 from utils.utils_user import create_user_if_missing
 from validation_middleware import validation_dependency, validation_middleware
-from config import TOKEN_ATTRIBUTES, ACTIONS, REWARD_MAP, INTENT_MAP, ATONEMENT_REWARDS
+from config import (
+    TOKEN_ATTRIBUTES, ACTIONS, REWARD_MAP, INTENT_MAP, ATONEMENT_REWARDS,
+    KARMA_PROFILE_ACCESS_LOG_SAMPLE_RATE
+)
+from observability import log_api_response
 import logging
 from utils.sovereign_bridge import emit_karma_signal, SignalType
 
@@ -24,6 +33,11 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+def _record_event(event: Dict[str, Any], status: str, **fields):
+    """Queue the request's karma event with its final status (write-behind)"""
+    event.update(status=status, updated_at=datetime.now(timezone.utc), **fields)
+    event_log.record(event)
+
 class KarmaProfileResponse(BaseModel):
     user_id: str
     role: str
@@ -85,31 +99,28 @@ async def get_karma_profile(user_id: str, _: bool = Depends(validation_dependenc
     """
     Get full karma profile for a user.
     
+    Reads have no side effects: nothing is written to the database. Profiles are cached
+    briefly and dropped when this process writes to the user; a sample of reads is
+    logged through the observability API log.
+    
     Args:
         user_id (str): The ID of the user
         
     Returns:
         KarmaProfileResponse: Complete karma profile including balances, scores, and guidance
     """
-    event_id = None
+    started = time.perf_counter()
+    status_code = 200
+    cache_status = "miss"
     try:
-        # Log the request (with error handling)
-        event_id = str(uuid.uuid4())
-        try:
-            karma_events_col.insert_one({
-                "event_id": event_id,
-                "event_type": "karma_profile_request",
-                "data": {"user_id": user_id},
-                "timestamp": datetime.now(timezone.utc),
-                "source": "karma_api",
-                "status": "processing"
-            })
-        except Exception:
-            pass  # Continue even if logging fails
+        profile, cache_token = profile_cache.get(user_id)
+        if profile is not None:
+            cache_status = "hit"
+            return profile
         
         # Get user data (with error handling)
         try:
-            user = users_col.find_one({"user_id": user_id})
+            user = await users_async.find_one({"user_id": user_id})
             if not user:
                 raise HTTPException(status_code=404, detail="User not found")
         except Exception as db_error:
@@ -129,8 +140,8 @@ async def get_karma_profile(user_id: str, _: bool = Depends(validation_dependenc
                 last_updated=datetime.now(timezone.utc)
             )
         
-        # Apply decay and expiry
-        user = apply_decay_and_expiry(user)
+        # Apply decay and expiry (read-only; persisted on the next write)
+        user, _ = decayed_view(user)
         
         # Calculate various karma scores
         merit_score = compute_user_merit_score(user)
@@ -139,14 +150,14 @@ async def get_karma_profile(user_id: str, _: bool = Depends(validation_dependenc
         weighted_karma_score = calculate_weighted_karma_score(user)
         
         # Get action statistics via single aggregation
-        stats = list(transactions_col.aggregate([
+        stats = await transactions_async.aggregate([
             {"$match": {"user_id": user_id}},
             {"$group": {
                 "_id": None,
                 "total_actions": {"$sum": 1},
                 "completed_atonements": {"$sum": {"$cond": [{"$eq": ["$action", "atonement_completed"]}, 1, 0]}}
             }}
-        ]))
+        ]).to_list(1)
         if stats:
             total_actions = stats[0].get("total_actions", 0)
             completed_atonements = stats[0].get("completed_atonements", 0)
@@ -166,29 +177,7 @@ async def get_karma_profile(user_id: str, _: bool = Depends(validation_dependenc
             "game": _calculate_game_score(user)
         }
         
-        # Update event status (with error handling)
-        try:
-            karma_events_col.update_one(
-                {"event_id": event_id},
-                {
-                    "$set": {
-                        "status": "completed",
-                        "response_data": {
-                            "user_id": user_id,
-                            "role": user.get("role"),
-                            "merit_score": merit_score,
-                            "paap_score": paap_score,
-                            "net_karma": net_karma,  # This is a float
-                            "weighted_karma_score": weighted_karma_score
-                        },
-                        "updated_at": datetime.now(timezone.utc)
-                    }
-                }
-            )
-        except Exception:
-            pass  # Continue even if logging fails
-        
-        return KarmaProfileResponse(
+        profile = KarmaProfileResponse(
             user_id=user_id,
             role=user.get("role", "learner"),
             merit_score=merit_score,
@@ -205,43 +194,37 @@ async def get_karma_profile(user_id: str, _: bool = Depends(validation_dependenc
             module_scores=module_scores,
             last_updated=datetime.now(timezone.utc)
         )
+        profile_cache.put(user_id, profile, cache_token)
+        return profile
         
     except HTTPException as e:
-        # Log error (with error handling)
-        if event_id:
-            try:
-                karma_events_col.update_one(
-                    {"event_id": event_id},
-                    {
-                        "$set": {
-                            "status": "failed",
-                            "error_message": e.detail if hasattr(e, 'detail') else str(e),
-                            "updated_at": datetime.now(timezone.utc)
-                        }
-                    }
-                )
-            except Exception:
-                pass  # Continue even if logging fails
+        status_code = e.status_code
         logger.warning(f"Request error getting karma profile for user {user_id}: {e.detail if hasattr(e, 'detail') else str(e)}")
         raise e
     except Exception as e:
+        status_code = 500
         msg = f"Database error: {str(e)}" if 'pymongo' in type(e).__module__ else f"Internal server error: {str(e)}"
-        if event_id:
-            try:
-                karma_events_col.update_one(
-                    {"event_id": event_id},
-                    {
-                        "$set": {
-                            "status": "failed",
-                            "error_message": msg,
-                            "updated_at": datetime.now(timezone.utc)
-                        }
-                    }
-                )
-            except Exception:
-                pass  # Continue even if logging fails
         logger.error(f"{'Database error' if 'pymongo' in type(e).__module__ else 'Error'} getting karma profile for user {user_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=msg)
+    finally:
+        _log_profile_access(user_id, status_code, time.perf_counter() - started, cache_status)
+
+def _log_profile_access(user_id: str, status_code: int, elapsed: float, cache_status: str):
+    """Sampled access log for profile reads; never fails the request"""
+    if KARMA_PROFILE_ACCESS_LOG_SAMPLE_RATE <= 0 or random.random() >= KARMA_PROFILE_ACCESS_LOG_SAMPLE_RATE:
+        return
+    try:
+        log_api_response(
+            str(uuid.uuid4()), status_code, elapsed,
+            response_data={
+                "path": f"/karma/{user_id}",
+                "user_id": user_id,
+                "cache": cache_status,
+                "sample_rate": KARMA_PROFILE_ACCESS_LOG_SAMPLE_RATE
+            }
+        )
+    except Exception as e:
+        logger.debug(f"Profile access log failed: {e}")
 
 @router.post("/log-action/", response_model=LogActionResponse)
 async def log_action(req: LogActionRequest, _: bool = Depends(validation_dependency)):
@@ -254,18 +237,17 @@ async def log_action(req: LogActionRequest, _: bool = Depends(validation_depende
     Returns:
         LogActionResponse: Action processing results
     """
-    event_id = None
+    event = None
     try:
-        # Log the request
-        event_id = str(uuid.uuid4())
-        karma_events_col.insert_one({
-            "event_id": event_id,
+        # Request event, recorded once with its outcome
+        event = {
+            "event_id": str(uuid.uuid4()),
             "event_type": "log_action_request",
             "data": req.dict(),
             "timestamp": datetime.now(timezone.utc),
             "source": "karma_api",
             "status": "processing"
-        })
+        }
         
         # Ensure user exists
         user = users_col.find_one({"user_id": req.user_id})
@@ -288,7 +270,7 @@ async def log_action(req: LogActionRequest, _: bool = Depends(validation_depende
             
             # Apply Q-learning step
             reward_value, predicted_next_role = q_learning_step(
-                req.user_id, user.get("role", "learner"), req.action, base_reward
+                req.user_id, user.get("role", "learner"), req.action, base_reward, user_doc=user
             )
         
         # Prepare changes for authorization
@@ -384,14 +366,14 @@ async def log_action(req: LogActionRequest, _: bool = Depends(validation_depende
             # Apply the reward
             users_col.update_one(
                 {"user_id": req.user_id},
-                {"$inc": {f"balances.{token}": reward_value}}
+                {"$inc": {f"balances.{token}": reward_value, "version": 1}}
             )
         
         if paap_generated and paap_severity:
             # Update database with Paap changes
             users_col.update_one(
                 {"user_id": req.user_id},
-                {"$set": {"balances": user["balances"]}}
+                {"$set": {"balances": user["balances"]}, "$inc": {"version": 1}}
             )
         
         # Apply advanced karma type updates if any
@@ -429,22 +411,16 @@ async def log_action(req: LogActionRequest, _: bool = Depends(validation_depende
             "game": _calculate_game_impact(karma_evaluation)
         }
         
-        # Update event status
-        karma_events_col.update_one(
-            {"event_id": event_id},
-            {
-                "$set": {
-                    "status": "completed",
-                    "response_data": {
-                        "user_id": req.user_id,
-                        "action": req.action,
-                        "current_role": new_role,
-                        "predicted_next_role": predicted_next_role,
-                        "merit_score": merit_score,
-                        "karma_impact": karma_evaluation["net_karma"]
-                    },
-                    "updated_at": datetime.now(timezone.utc)
-                }
+        # Record the event with its outcome
+        _record_event(
+            event, "completed",
+            response_data={
+                "user_id": req.user_id,
+                "action": req.action,
+                "current_role": new_role,
+                "predicted_next_role": predicted_next_role,
+                "merit_score": merit_score,
+                "karma_impact": karma_evaluation["net_karma"]
             }
         )
         
@@ -467,34 +443,25 @@ async def log_action(req: LogActionRequest, _: bool = Depends(validation_depende
         
     except HTTPException as e:
         # Log error
-        if event_id:
-            karma_events_col.update_one(
-                {"event_id": event_id},
-                {
-                    "$set": {
-                        "status": "failed",
-                        "error_message": e.detail if hasattr(e, 'detail') else str(e),
-                        "updated_at": datetime.now(timezone.utc)
-                    }
-                }
+        if event is not None:
+            _record_event(
+                event, "failed",
+                error_message=e.detail if hasattr(e, 'detail') else str(e)
             )
         logger.warning(f"Request error logging action for user {req.user_id}: {e.detail if hasattr(e, 'detail') else str(e)}")
         raise e
     except Exception as e:
         msg = f"Database error: {str(e)}" if 'pymongo' in type(e).__module__ else f"Internal server error: {str(e)}"
-        if event_id:
-            karma_events_col.update_one(
-                {"event_id": event_id},
-                {
-                    "$set": {
-                        "status": "failed",
-                        "error_message": msg,
-                        "updated_at": datetime.now(timezone.utc)
-                    }
-                }
+        if event is not None:
+            _record_event(
+                event, "failed",
+                error_message=msg
             )
         logger.error(f"{'Database error' if 'pymongo' in type(e).__module__ else 'Error'} logging action for user {req.user_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=msg)
+    finally:
+        # Also after failures: some of the user's writes may already be applied
+        profile_cache.invalidate(req.user_id)
 
 @router.post("/submit-atonement/", response_model=AtonementSubmissionResponse)
 async def submit_atonement(req: AtonementSubmissionRequest, _: bool = Depends(validation_dependency)):
@@ -507,18 +474,17 @@ async def submit_atonement(req: AtonementSubmissionRequest, _: bool = Depends(va
     Returns:
         AtonementSubmissionResponse: Atonement processing results
     """
-    event_id = None
+    event = None
     try:
-        # Log the request
-        event_id = str(uuid.uuid4())
-        karma_events_col.insert_one({
-            "event_id": event_id,
+        # Request event, recorded once with its outcome
+        event = {
+            "event_id": str(uuid.uuid4()),
             "event_type": "atonement_submission_request",
             "data": req.dict(),
             "timestamp": datetime.now(timezone.utc),
             "source": "karma_api",
             "status": "processing"
-        })
+        }
         
         # Validate the atonement submission
         success, message, updated_plan = validate_atonement_proof(
@@ -608,7 +574,7 @@ async def submit_atonement(req: AtonementSubmissionRequest, _: bool = Depends(va
                 paap_severity = token.split(".")[1]
                 users_col.update_one(
                     {"user_id": req.user_id},
-                    {"$inc": {f"balances.PaapTokens.{paap_severity}": -paap_reduction}}
+                    {"$inc": {f"balances.PaapTokens.{paap_severity}": -paap_reduction, "version": 1}}
                 )
         
         # Apply role change if authorized
@@ -643,21 +609,15 @@ async def submit_atonement(req: AtonementSubmissionRequest, _: bool = Depends(va
             "game": _calculate_game_atonement_impact(severity_class)
         }
         
-        # Update event status
-        karma_events_col.update_one(
-            {"event_id": event_id},
-            {
-                "$set": {
-                    "status": "completed",
-                    "response_data": {
-                        "user_id": req.user_id,
-                        "plan_id": req.plan_id,
-                        "karma_adjustment": karma_adjustment,
-                        "paap_reduction": paap_reduction,
-                        "new_role": new_role
-                    },
-                    "updated_at": datetime.now(timezone.utc)
-                }
+        # Record the event with its outcome
+        _record_event(
+            event, "completed",
+            response_data={
+                "user_id": req.user_id,
+                "plan_id": req.plan_id,
+                "karma_adjustment": karma_adjustment,
+                "paap_reduction": paap_reduction,
+                "new_role": new_role
             }
         )
         
@@ -675,34 +635,25 @@ async def submit_atonement(req: AtonementSubmissionRequest, _: bool = Depends(va
         
     except HTTPException as e:
         # Log error
-        if event_id:
-            karma_events_col.update_one(
-                {"event_id": event_id},
-                {
-                    "$set": {
-                        "status": "failed",
-                        "error_message": e.detail if hasattr(e, 'detail') else str(e),
-                        "updated_at": datetime.now(timezone.utc)
-                    }
-                }
+        if event is not None:
+            _record_event(
+                event, "failed",
+                error_message=e.detail if hasattr(e, 'detail') else str(e)
             )
         logger.warning(f"Request error submitting atonement for user {req.user_id}: {e.detail if hasattr(e, 'detail') else str(e)}")
         raise e
     except Exception as e:
         msg = f"Database error: {str(e)}" if 'pymongo' in type(e).__module__ else f"Internal server error: {str(e)}"
-        if event_id:
-            karma_events_col.update_one(
-                {"event_id": event_id},
-                {
-                    "$set": {
-                        "status": "failed",
-                        "error_message": msg,
-                        "updated_at": datetime.now(timezone.utc)
-                    }
-                }
+        if event is not None:
+            _record_event(
+                event, "failed",
+                error_message=msg
             )
         logger.error(f"{'Database error' if 'pymongo' in type(e).__module__ else 'Error'} submitting atonement for user {req.user_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=msg)
+    finally:
+        # Also after failures: some of the user's writes may already be applied
+        profile_cache.invalidate(req.user_id)
 
 def _update_advanced_karma_types(user_id: str, karma_evaluation: Dict[str, Any]):
     """
@@ -722,6 +673,7 @@ def _update_advanced_karma_types(user_id: str, karma_evaluation: Dict[str, Any])
         updates["balances.Rnanubandhan.minor"] = karma_evaluation["rnanubandhan_change"]
     
     if updates:
+        updates["version"] = 1
         users_col.update_one(
             {"user_id": user_id},
             {"$inc": updates}
@@ -9,7 +9,7 @@ from typing import Dict, Any, List, Optional
 from fastapi import APIRouter, HTTPException, Depends
 import json
 from pydantic import BaseModel
-from database import karma_events_col
+from utils.event_log import event_log
 from validation_middleware import validation_dependency
 from utils.karma_lifecycle import update_prarabdha_counter
 
@@ -135,8 +135,8 @@ async def normalize_state(request: NormalizeStateRequest, _: bool = Depends(vali
             "created_at": datetime.now(timezone.utc)
         }
         
-        # Insert into database
-        karma_events_col.insert_one(event_record)
+        # Queue for the database (write-behind)
+        event_log.record(event_record)
         
         return normalized_state
         
@@ -188,8 +188,8 @@ async def normalize_state_batch(request: NormalizeStateBatchRequest, _: bool = D
                 "created_at": datetime.now(timezone.utc)
             }
             
-            # Insert into database
-            karma_events_col.insert_one(event_record)
+            # Queue for the database (write-behind)
+            event_log.record(event_record)
         
         return normalized_states
         
@@ -227,8 +227,8 @@ async def update_prarabdha(request: UpdatePrarabdhaRequest, _: bool = Depends(va
             "created_at": datetime.now(timezone.utc)
         }
         
-        # Insert into database
-        karma_events_col.insert_one(event_record)
+        # Queue for the database (write-behind)
+        event_log.record(event_record)
         
         return {
             "status": "success",
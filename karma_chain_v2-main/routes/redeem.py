@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException
 from models import RedeemRequest
 from database import users_col, transactions_col
 from utils.tokens import apply_decay_and_expiry, now_utc
+from utils.profile_cache import profile_cache
 from config import TOKEN_ATTRIBUTES
 
 router = APIRouter()
@@ -16,7 +17,7 @@ def redeem(req: RedeemRequest):
     user = apply_decay_and_expiry(user)
     bal = user["balances"].get(req.token_type, 0.0)
     if bal >= req.amount and req.amount > 0:
-        users_col.update_one({"user_id": req.user_id}, {"$inc": {f"balances.{req.token_type}": -float(req.amount)}})
+        users_col.update_one({"user_id": req.user_id}, {"$inc": {f"balances.{req.token_type}": -float(req.amount), "version": 1}})
         transactions_col.insert_one({
             "user_id": req.user_id,
             "action": "redeem",
@@ -24,6 +25,7 @@ def redeem(req: RedeemRequest):
             "amount": float(req.amount),
             "timestamp": now_utc()
         })
+        profile_cache.invalidate(req.user_id)
         return {"message": f"Redeemed {req.amount} {req.token_type}", "remaining": bal - req.amount}
     else:
         raise HTTPException(status_code=400, detail="Insufficient balance or invalid amount")
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException
+import asyncio
 from pydantic import BaseModel
 from typing import Optional
 from database import users_col
@@ -18,7 +19,7 @@ async def appeal_karma(request: AppealRequest):
     User requests review of a Paap action and receives a prescribed prāyaśchitta plan.
     """
     # Check if user exists
-    user = users_col.find_one({"user_id": request.user_id})
+    user = await asyncio.to_thread(users_col.find_one, {"user_id": request.user_id})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -28,7 +29,7 @@ async def appeal_karma(request: AppealRequest):
         raise HTTPException(status_code=400, detail="Action does not qualify for appeal")
     
     # Create an atonement plan
-    plan = create_atonement_plan(request.user_id, request.action, severity_class)
+    plan = await asyncio.to_thread(create_atonement_plan, request.user_id, request.action, severity_class)
     if not plan:
         raise HTTPException(status_code=500, detail="Failed to create atonement plan")
     
@@ -45,7 +46,7 @@ async def appeal_status(user_id: str):
     """
     from utils.atonement import get_user_atonement_plans
     
-    plans = get_user_atonement_plans(user_id)
+    plans = await asyncio.to_thread(get_user_atonement_plans, user_id)
     
     return {
         "status": "success",
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
 from pydantic import BaseModel
 from typing import Optional
+import asyncio
 from datetime import datetime, timezone
 from utils.atonement import validate_atonement_proof, get_user_atonement_plans
 from validation import sanitize_input, ALLOWED_FILE_TYPES
+from utils.profile_cache import profile_cache
 import os
 
 router = APIRouter()
@@ -21,14 +23,18 @@ async def submit_atonement(submission: AtonementSubmission):
     """
     Submit proof for completion of an atonement task.
     """
-    # Validate the submission
-    success, message, updated_plan = validate_atonement_proof(
-        submission.plan_id,
-        submission.atonement_type,
-        submission.amount,
-        submission.proof_text,
-        submission.tx_hash
-    )
+    # Validate the submission; completing the plan updates the user's balances
+    try:
+        success, message, updated_plan = await asyncio.to_thread(
+            validate_atonement_proof,
+            submission.plan_id,
+            submission.atonement_type,
+            submission.amount,
+            submission.proof_text,
+            submission.tx_hash
+        )
+    finally:
+        profile_cache.invalidate(submission.user_id)
     
     if not success:
         raise HTTPException(status_code=400, detail=message)
@@ -96,14 +102,18 @@ async def submit_atonement_with_file(
         file_reference = f"{plan_id}_{datetime.now(timezone.utc).timestamp()}_{safe_name}"
         proof_text = f"{proof_text or ''}\nFile reference: {file_reference}"
     
-    # Validate the submission
-    success, message, updated_plan = validate_atonement_proof(
-        plan_id,
-        atonement_type,
-        amount,
-        proof_text,
-        tx_hash
-    )
+    # Validate the submission; completing the plan updates the user's balances
+    try:
+        success, message, updated_plan = await asyncio.to_thread(
+            validate_atonement_proof,
+            plan_id,
+            atonement_type,
+            amount,
+            proof_text,
+            tx_hash
+        )
+    finally:
+        profile_cache.invalidate(user_id)
     
     if not success:
         raise HTTPException(status_code=400, detail=message)
@@ -119,7 +129,7 @@ async def get_atonement_plans(user_id: str):
     """
     Get all atonement plans for a user.
     """
-    plans = get_user_atonement_plans(user_id)
+    plans = await asyncio.to_thread(get_user_atonement_plans, user_id)
     
     return {
         "status": "success",
@@ -4,6 +4,7 @@ from datetime import datetime, timezone
 from database import users_col, death_events_col
 from utils.loka import compute_loka_assignment, create_rebirth_carryover, apply_rebirth
 from utils.sovereign_bridge import emit_karma_signal, SignalType
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,7 +21,7 @@ async def death_event(request: DeathEventRequest):
     Stores the death event in the database for record keeping.
     """
     # Check if user exists
-    user = users_col.find_one({"user_id": request.user_id})
+    user = await asyncio.to_thread(users_col.find_one, {"user_id": request.user_id})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -62,7 +63,7 @@ async def death_event(request: DeathEventRequest):
     }
     
     # Request authorization from Sovereign Core for irreversible death action
-    authorization_result = emit_karma_signal(SignalType.DEATH_THRESHOLD_REACHED, {
+    authorization_result = await asyncio.to_thread(emit_karma_signal, SignalType.DEATH_THRESHOLD_REACHED, {
         "user_id": request.user_id,
         "event_type": "death_event",
         "death_event_data": death_event_doc
@@ -82,7 +83,7 @@ async def death_event(request: DeathEventRequest):
         }
     
     # Store death event in database
-    death_events_col.insert_one(death_event_doc)
+    await asyncio.to_thread(death_events_col.insert_one, death_event_doc)
     
     return {
         "status": "success",
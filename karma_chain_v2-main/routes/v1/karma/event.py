@@ -1,21 +1,30 @@
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
-from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any, Union
-from datetime import datetime, timezone
+from pydantic import BaseModel, Field, ValidationError
+from typing import Optional, Dict, Any, Union, List
+from datetime import datetime, timezone, timedelta
+import asyncio
+import logging
 import uuid
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
 # Import database and models
-from database import karma_events_col
+from database_async import karma_events_col
+from utils.event_log import event_log
 from models import KarmaEvent
 from validation import sanitize_input, ALLOWED_FILE_TYPES
+from config import EVENT_BATCH_MAX, EVENT_RESERVATION_TIMEOUT_SECONDS
 
 # Import internal route handlers
-from routes.v1.karma.log_action import log_action, LogActionRequest
+from routes.v1.karma.log_action import log_action, log_action_bulk, LogActionRequest, LogActionBulkRequest
 from routes.v1.karma.appeal import appeal_karma, appeal_status, AppealRequest
 from routes.v1.karma.atonement import submit_atonement, submit_atonement_with_file, AtonementSubmission
 from routes.v1.karma.death import death_event, DeathEventRequest
 from routes.v1.karma.stats import get_user_stats
 from utils.karma_lifecycle import check_death_event_threshold, process_death_event
+from utils.profile_cache import profile_cache
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -24,6 +33,7 @@ class UnifiedEventRequest(BaseModel):
     data: Dict[str, Any] = Field(..., description="Event-specific data payload")
     timestamp: Optional[datetime] = None
     source: Optional[str] = Field(None, description="Source system or department")
+    idempotency_key: Optional[str] = Field(None, max_length=200, description="Retries with the same key are applied once")
 
 class UnifiedEventResponse(BaseModel):
     status: str
@@ -66,40 +76,29 @@ async def unified_event_endpoint(request: UnifiedEventRequest):
         created_at=datetime.now(timezone.utc)
     )
     
-    try:
-        # Route based on event type
-        if request.type == "life_event":
-            response = await _handle_life_event(request, event_id)
-        elif request.type == "atonement":
-            response = await _handle_atonement(request, event_id)
-        elif request.type == "appeal":
-            response = await _handle_appeal(request, event_id)
-        elif request.type == "death_event":
-            response = await _handle_death_event(request, event_id)
-        elif request.type == "stats_request":
-            response = await _handle_stats_request(request, event_id)
+    # Claim the idempotency key before anything is applied
+    reserved = False
+    if request.idempotency_key:
+        try:
+            holder = await _reserve(db_event, request.idempotency_key)
+        except Exception as e:
+            logger.warning(f"Idempotency reservation failed, processing without it: {e}")
         else:
-            # Update database with error (with error handling)
-            try:
-                db_event.status = "failed"
-                db_event.error_message = f"Invalid event type: {request.type}"
-                karma_events_col.insert_one(db_event.dict())
-            except Exception:
-                pass  # Continue even if database write fails
-            
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Invalid event type: {request.type}. Valid types: life_event, atonement, appeal, death_event, stats_request"
-            )
+            if holder is not None:
+                return _replay(holder)
+            reserved = True
+
+    try:
+        response = await _dispatch(request, event_id)
         
         # Update database with success (with error handling)
         try:
             db_event.status = "processed"
             db_event.response_data = response.dict()
             db_event.updated_at = datetime.now(timezone.utc)
-            karma_events_col.insert_one(db_event.dict())
-        except Exception:
-            pass  # Continue even if database write fails
+            await _store_outcome(db_event, reserved)
+        except Exception as e:
+            logger.error(f"Failed to record event {event_id}: {e}")  # Continue even if database write fails
         
         return response
         
@@ -109,7 +108,7 @@ async def unified_event_endpoint(request: UnifiedEventRequest):
             db_event.status = "failed"
             db_event.error_message = str(e)
             db_event.updated_at = datetime.now(timezone.utc)
-            karma_events_col.insert_one(db_event.dict())
+            await _store_outcome(db_event, reserved)
         except Exception:
             pass  # Continue even if database write fails
         raise
@@ -119,7 +118,7 @@ async def unified_event_endpoint(request: UnifiedEventRequest):
             db_event.status = "failed"
             db_event.error_message = f"Internal error: {str(e)}"
             db_event.updated_at = datetime.now(timezone.utc)
-            karma_events_col.insert_one(db_event.dict())
+            await _store_outcome(db_event, reserved)
         except Exception:
             pass  # Continue even if database write fails
         
@@ -128,6 +127,124 @@ async def unified_event_endpoint(request: UnifiedEventRequest):
             detail=f"Internal error processing {request.type}: {str(e)}"
         )
 
+async def _dispatch(request: UnifiedEventRequest, event_id: str) -> UnifiedEventResponse:
+    """Route an event to the handler for its type"""
+    handler = EVENT_HANDLERS.get(request.type)
+    if handler is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid event type: {request.type}. Valid types: {', '.join(EVENT_HANDLERS)}"
+        )
+    return await handler(request, event_id)
+
+# Idempotency keys are claimed by inserting the event's record as "pending" directly
+# (not through the write-behind event log) against the unique partial index on
+# idempotency_key. Whoever inserts first applies the event; a retry finds the key held
+# and gets the stored response, or 409 while the first attempt is still running.
+
+async def ensure_idempotency_index():
+    """Create the index reservations rely on (also created by scripts/init_karma_events.py)"""
+    await karma_events_col.create_index(
+        [("idempotency_key", 1)],
+        unique=True,
+        partialFilterExpression={"idempotency_key": {"$type": "string"}}
+    )
+
+def _reservation_record(db_event: KarmaEvent, key: str) -> Dict[str, Any]:
+    record = db_event.dict()
+    record.update(status="pending", idempotency_key=key, reserved_at=datetime.now(timezone.utc))
+    return record
+
+def _is_stale(holder: Dict[str, Any]) -> bool:
+    reserved_at = holder.get("reserved_at")
+    if reserved_at is None:
+        return False
+    # MongoDB returns naive datetimes that are UTC
+    if reserved_at.tzinfo is None:
+        reserved_at = reserved_at.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) - reserved_at > timedelta(seconds=EVENT_RESERVATION_TIMEOUT_SECONDS)
+
+async def _reserve(db_event: KarmaEvent, key: str, attempts: int = 3) -> Optional[Dict[str, Any]]:
+    """Claim key for db_event; returns None once claimed, else the record holding the key"""
+    for _ in range(attempts):
+        try:
+            await karma_events_col.insert_one(_reservation_record(db_event, key))
+            return None
+        except DuplicateKeyError:
+            pass
+        holder = await karma_events_col.find_one(
+            {"idempotency_key": key},
+            {"_id": 0, "event_id": 1, "idempotency_key": 1, "status": 1, "response_data": 1, "reserved_at": 1}
+        )
+        if holder is None:
+            # Released by a failed attempt in between
+            continue
+        if holder["status"] != "pending" or not _is_stale(holder):
+            return holder
+        # The attempt holding the key died; release it (once, if several retries race) and claim again
+        await karma_events_col.update_one(
+            {"event_id": holder["event_id"], "status": "pending", "reserved_at": holder["reserved_at"]},
+            {"$set": {"status": "failed", "error_message": "Reservation expired", "updated_at": datetime.now(timezone.utc)},
+             "$unset": {"idempotency_key": ""}}
+        )
+    raise RuntimeError(f"Could not reserve idempotency key {key}")
+
+async def _reserve_many(db_events: Dict[int, KarmaEvent], keys: Dict[int, str]) -> Dict[int, Optional[Dict[str, Any]]]:
+    """
+    Claim keys for a batch with one insert_many; returns index -> None (claimed) or the
+    holding record. Indexes whose reservation errored are left out and processed without it.
+    """
+    indexes = list(keys)
+    if not indexes:
+        return {}
+    failed = {}
+    try:
+        await karma_events_col.insert_many(
+            [_reservation_record(db_events[i], keys[i]) for i in indexes], ordered=False
+        )
+    except BulkWriteError as e:
+        failed = {indexes[err["index"]]: err.get("code") for err in e.details.get("writeErrors", [])}
+
+    claims: Dict[int, Optional[Dict[str, Any]]] = {}
+    for index in indexes:
+        if index not in failed:
+            claims[index] = None
+        elif failed[index] == 11000:
+            # Held already: look up the holder, taking over a stale reservation
+            try:
+                claims[index] = await _reserve(db_events[index], keys[index])
+            except Exception as e:
+                logger.warning(f"Idempotency reservation failed for {keys[index]}, processing without it: {e}")
+        else:
+            logger.warning(f"Idempotency reservation failed for {keys[index]}, processing without it")
+    return claims
+
+def _outcome_update(db_event: KarmaEvent) -> tuple:
+    """Filter and update turning a reservation into the event's final record"""
+    update = {"$set": {
+        "status": db_event.status,
+        "response_data": db_event.response_data,
+        "error_message": db_event.error_message,
+        "updated_at": db_event.updated_at
+    }}
+    if db_event.status != "processed":
+        # Release the key so a retry is applied
+        update["$unset"] = {"idempotency_key": ""}
+    return {"event_id": db_event.event_id}, update
+
+async def _store_outcome(db_event: KarmaEvent, reserved: bool):
+    """Complete the event's reservation, or queue its record on the event log"""
+    if reserved:
+        await karma_events_col.update_one(*_outcome_update(db_event))
+    else:
+        event_log.record(db_event.dict())
+
+def _replay(holder: Dict[str, Any]) -> "UnifiedEventResponse":
+    """Response for a retry whose key is already held"""
+    if holder["status"] == "processed":
+        return UnifiedEventResponse(**holder["response_data"])
+    raise HTTPException(status_code=409, detail="An event with this idempotency_key is still being processed; retry later")
+
 async def _handle_life_event(request: UnifiedEventRequest, event_id: str) -> UnifiedEventResponse:
     """Handle life_event type - maps to log_action endpoint"""
     try:
@@ -146,7 +263,7 @@ async def _handle_life_event(request: UnifiedEventRequest, event_id: str) -> Uni
         )
         
         # Call internal endpoint
-        result = log_action(log_request)
+        result = await log_action(log_request)
         
         return UnifiedEventResponse(
             status="success",
@@ -246,7 +363,7 @@ async def _handle_death_event(request: UnifiedEventRequest, event_id: str) -> Un
             raise HTTPException(status_code=400, detail="death_event requires user_id in data")
         
         # Check if user has reached death threshold
-        threshold_reached, details = check_death_event_threshold(request.data["user_id"])
+        threshold_reached, details = await asyncio.to_thread(check_death_event_threshold, request.data["user_id"])
         
         if not threshold_reached:
             # If threshold not reached, we still process the death event but note it
@@ -272,7 +389,10 @@ async def _handle_death_event(request: UnifiedEventRequest, event_id: str) -> Un
             )
         else:
             # If threshold reached, process the death event through the lifecycle engine
-            result = process_death_event(request.data["user_id"])
+            try:
+                result = await asyncio.to_thread(process_death_event, request.data["user_id"])
+            finally:
+                profile_cache.invalidate(request.data["user_id"])
             
             return UnifiedEventResponse(
                 status="success",
@@ -319,6 +439,170 @@ async def _handle_stats_request(request: UnifiedEventRequest, event_id: str) ->
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing stats_request: {str(e)}")
 
+EVENT_HANDLERS = {
+    "life_event": _handle_life_event,
+    "atonement": _handle_atonement,
+    "appeal": _handle_appeal,
+    "death_event": _handle_death_event,
+    "stats_request": _handle_stats_request
+}
+
+def _life_event_response(request: UnifiedEventRequest, result: Dict[str, Any]) -> UnifiedEventResponse:
+    return UnifiedEventResponse(
+        status="success",
+        event_type="life_event",
+        message="Life event logged successfully",
+        data=result,
+        timestamp=request.timestamp or datetime.now(timezone.utc),
+        routing_info={
+            "internal_endpoint": "/v1/karma/log-action/bulk",
+            "mapped_from": "life_event"
+        }
+    )
+
+async def _dispatch_life_events(items: List[tuple]) -> Dict[int, Union[UnifiedEventResponse, HTTPException]]:
+    """Apply a batch's life events through the bulk log-action path"""
+    outcomes: Dict[int, Union[UnifiedEventResponse, HTTPException]] = {}
+    actions = []
+    for index, request in items:
+        if "user_id" not in request.data or "action" not in request.data or "role" not in request.data:
+            outcomes[index] = HTTPException(status_code=400, detail="life_event requires user_id, action, and role in data")
+            continue
+        fields = ("user_id", "action", "role", "note", "context", "metadata")
+        actions.append((index, request, {field: request.data.get(field) for field in fields}))
+    if not actions:
+        return outcomes
+
+    try:
+        bulk = await log_action_bulk(LogActionBulkRequest(actions=[a for _, _, a in actions]))
+    except HTTPException as e:
+        return {**outcomes, **{index: e for index, _, _ in actions}}
+
+    for (index, request, _), result in zip(actions, bulk["results"]):
+        result = {k: v for k, v in result.items() if k not in ("index", "status")}
+        if "status_code" in result:
+            outcomes[index] = HTTPException(status_code=result["status_code"], detail=result["detail"])
+        else:
+            outcomes[index] = _life_event_response(request, result)
+    return outcomes
+
+@router.post("/batch")
+async def unified_event_batch(requests: List[Dict[str, Any]]):
+    """
+    Batch mode of the unified event gateway.
+
+    Events are validated one by one, so a malformed event fails alone (status_code 422).
+    Idempotency keys are reserved for the whole batch before anything is dispatched. Events
+    whose key is already held are not applied again: they report the stored response, or
+    in_progress while the first attempt runs. The rest are dispatched grouped by type
+    (life events through the bulk log-action path). Status is reported per event, in
+    request order.
+    """
+    if len(requests) > EVENT_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {EVENT_BATCH_MAX} events per batch.")
+
+    now = datetime.now(timezone.utc)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+    parsed: Dict[int, UnifiedEventRequest] = {}
+    db_events: Dict[int, KarmaEvent] = {}
+    keys: Dict[int, str] = {}
+    seen: Dict[str, int] = {}
+    for index, item in enumerate(requests):
+        try:
+            request = parsed[index] = UnifiedEventRequest(**item)
+        except ValidationError as e:
+            results[index] = {
+                "index": index, "event_id": None, "idempotency_key": item.get("idempotency_key"),
+                "status": "failed", "status_code": 422, "error": e.errors()
+            }
+            continue
+        request.timestamp = request.timestamp or now
+        key = request.idempotency_key
+        if key in seen:
+            results[index] = {
+                "index": index, "event_id": None, "idempotency_key": key,
+                "status": "duplicate", "duplicate_of": seen[key]
+            }
+            continue
+        db_events[index] = KarmaEvent(
+            event_id=str(uuid.uuid4()),
+            event_type=request.type,
+            data=request.data,
+            timestamp=request.timestamp,
+            source=request.source,
+            status="pending",
+            created_at=now
+        )
+        if key:
+            seen[key] = index
+            keys[index] = key
+
+    try:
+        claims = await _reserve_many(db_events, keys)
+    except Exception as e:
+        logger.warning(f"Idempotency reservation failed, processing batch without it: {e}")
+        claims = {}
+
+    by_type: Dict[str, List[tuple]] = {}
+    for index, db_event in db_events.items():
+        holder = claims.get(index)
+        if holder is not None:
+            processed = holder["status"] == "processed"
+            results[index] = {
+                "index": index, "event_id": holder["event_id"], "idempotency_key": keys[index],
+                "status": "duplicate" if processed else "in_progress",
+                "response": holder.get("response_data") if processed else None
+            }
+            continue
+        by_type.setdefault(parsed[index].type, []).append((index, parsed[index]))
+
+    outcomes: Dict[int, Union[UnifiedEventResponse, HTTPException]] = {}
+    for event_type, items in by_type.items():
+        if event_type == "life_event":
+            outcomes.update(await _dispatch_life_events(items))
+            continue
+        for index, request in items:
+            try:
+                outcomes[index] = await _dispatch(request, db_events[index].event_id)
+            except HTTPException as e:
+                outcomes[index] = e
+            except Exception as e:
+                outcomes[index] = HTTPException(status_code=500, detail=f"Internal error processing {request.type}: {str(e)}")
+
+    records = []
+    completions = []
+    for index, outcome in sorted(outcomes.items()):
+        db_event = db_events[index]
+        db_event.updated_at = datetime.now(timezone.utc)
+        result = {"index": index, "event_id": db_event.event_id, "idempotency_key": parsed[index].idempotency_key}
+        if isinstance(outcome, HTTPException):
+            db_event.status = "failed"
+            db_event.error_message = str(outcome)
+            result.update(status="failed", status_code=outcome.status_code, error=outcome.detail)
+        else:
+            db_event.status = "processed"
+            db_event.response_data = outcome.dict()
+            result.update(status="processed", response=outcome)
+        if index in claims:
+            completions.append(UpdateOne(*_outcome_update(db_event)))
+        else:
+            records.append(db_event.dict())
+        results[index] = result
+
+    if completions:
+        try:
+            await karma_events_col.bulk_write(completions, ordered=False)
+        except Exception as e:
+            logger.error(f"Failed to complete {len(completions)} reserved events: {e}")
+    # Written together by the event log's next insert_many
+    event_log.record_many(records)
+
+    counts = {
+        status: sum(1 for r in results if r["status"] == status)
+        for status in ("processed", "failed", "duplicate", "in_progress")
+    }
+    return {"status": "success", "total": len(results), **counts, "results": results}
+
 # Additional endpoint for file-based atonement submissions
 @router.post("/with-file", response_model=UnifiedEventResponse)
 async def unified_event_with_file(
@@ -371,7 +655,7 @@ async def unified_event_with_file(
             # Update database with error
             db_event.status = "failed"
             db_event.error_message = "Currently only 'atonement_with_file' is supported for file uploads"
-            karma_events_col.insert_one(db_event.dict())
+            event_log.record(db_event.dict())
             raise HTTPException(status_code=400, detail="Currently only 'atonement_with_file' is supported for file uploads")
         
         # Validate file if provided
@@ -418,7 +702,7 @@ async def unified_event_with_file(
         db_event.status = "processed"
         db_event.response_data = result
         db_event.updated_at = datetime.now(timezone.utc)
-        karma_events_col.insert_one(db_event.dict())
+        event_log.record(db_event.dict())
         
         return UnifiedEventResponse(
             status="success",
@@ -437,12 +721,12 @@ async def unified_event_with_file(
         db_event.status = "failed"
         db_event.error_message = str(e)
         db_event.updated_at = datetime.now(timezone.utc)
-        karma_events_col.insert_one(db_event.dict())
+        event_log.record(db_event.dict())
         raise
     except Exception as e:
         # Update database with unexpected error
         db_event.status = "failed"
         db_event.error_message = f"Internal error: {str(e)}"
         db_event.updated_at = datetime.now(timezone.utc)
-        karma_events_col.insert_one(db_event.dict())
+        event_log.record(db_event.dict())
         raise HTTPException(status_code=500, detail=f"Error processing {event_type}: {str(e)}")
\ No newline at end of file
@@ -16,6 +16,7 @@ from utils.karma_lifecycle import (
     process_death_event, 
     process_rebirth
 )
+from utils.profile_cache import profile_cache
 
 router = APIRouter()
 
@@ -117,6 +118,7 @@ async def update_prarabdha(request: PrarabdhaRequest):
     """
     try:
         new_prarabdha = update_prarabdha_counter(request.user_id, request.increment)
+        profile_cache.invalidate(request.user_id)
         return PrarabdhaResponse(
             user_id=request.user_id,
             prarabdha=new_prarabdha,
@@ -166,6 +168,7 @@ async def process_death(request: DeathEventRequest):
     """
     try:
         result = process_death_event(request.user_id)
+        profile_cache.invalidate(request.user_id)
         return DeathEventResponse(
             status=result["status"],
             user_id=result["user_id"],
@@ -192,6 +195,7 @@ async def process_rebirth_endpoint(request: RebirthRequest):
     """
     try:
         result = process_rebirth(request.user_id)
+        profile_cache.invalidate(request.user_id)
         return RebirthResponse(
             status=result["status"],
             old_user_id=result["old_user_id"],
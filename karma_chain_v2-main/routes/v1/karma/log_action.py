@@ -1,16 +1,25 @@
+import asyncio
+import copy
+import uuid
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
-from database import users_col
-from utils.tokens import apply_decay_and_expiry, now_utc
+from pydantic import BaseModel, ValidationError
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+from typing import Optional, Dict, Any, List
+from database_async import users_col, transactions_col
+from utils.tokens import decayed_view, now_utc
 from utils.merit import compute_user_merit_score, determine_role_from_merit
-from utils.transactions import log_transaction
+from utils.transactions import build_transaction
 from utils.qlearning import q_learning_step
 from utils.utils_user import create_user_if_missing
+from utils.profile_cache import profile_cache
 from utils.paap import classify_paap_action, apply_paap_tokens
 from utils.atonement import create_atonement_plan
 from utils.rnanubandhan import rnanubandhan_manager  # Import Rnanubandhan manager
-from config import ROLE_SEQUENCE, ACTIONS, INTENT_MAP, REWARD_MAP, CHEAT_PUNISHMENT_LEVELS, CHEAT_PUNISHMENT_RESET_DAYS
+from config import (
+    ROLE_SEQUENCE, ACTIONS, INTENT_MAP, REWARD_MAP, CHEAT_PUNISHMENT_LEVELS, CHEAT_PUNISHMENT_RESET_DAYS,
+    LOG_ACTION_BULK_MAX
+)
 from datetime import timedelta, timezone
 import logging
 
@@ -18,6 +27,9 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Optimistic concurrency: retries when another versioned write lands between read and update
+MAX_UPDATE_ATTEMPTS = 5
+
 class LogActionRequest(BaseModel):
     user_id: str
     action: str
@@ -29,8 +41,202 @@ class LogActionRequest(BaseModel):
     affected_user_id: Optional[str] = None
     relationship_description: Optional[str] = None
 
+class LogActionBulkRequest(BaseModel):
+    # Items are validated one by one so a bad item fails alone
+    actions: List[Dict[str, Any]]
+
+def _recent_cheats(user: Dict[str, Any], current_time) -> list:
+    """Cheat attempts within the reset period"""
+    reset_period = timedelta(days=CHEAT_PUNISHMENT_RESET_DAYS)
+    recent_cheats = []
+    for ch in user.get("cheat_history", []):
+        ch_timestamp = ch["timestamp"]
+        # Ensure timestamp is timezone-aware
+        if ch_timestamp.tzinfo is None:
+            ch_timestamp = ch_timestamp.replace(tzinfo=timezone.utc)
+        if current_time - ch_timestamp <= reset_period:
+            recent_cheats.append(ch)
+    return recent_cheats
+
+def _plan_action(user: Dict[str, Any], req: LogActionRequest) -> Dict[str, Any]:
+    """
+    Compute the user's new state for an action from one read of the user document.
+
+    Pending decay is materialized into the same update, so the whole action is one write.
+    """
+    current_time = now_utc()
+    view, _ = decayed_view(user, current_time)
+    balances = copy.deepcopy(view["balances"])
+    plan = {"view": view, "paap_severity": None, "paap_value": 0}
+    new_fields = {}
+
+    if req.action == "cheat":
+        recent_cheats = _recent_cheats(view, current_time)
+        # Determine cheat level (number of recent cheats + 1 for current cheat)
+        cheat_level = len(recent_cheats) + 1
+        punishment = CHEAT_PUNISHMENT_LEVELS.get(cheat_level, CHEAT_PUNISHMENT_LEVELS["default"])
+        reward_value = punishment["value"]
+        token = punishment["token"]
+        recent_cheats.append({"timestamp": current_time, "punishment_level": cheat_level, "value": reward_value})
+        new_fields["cheat_history"] = recent_cheats
+        plan.update(
+            cheat_level=cheat_level, punishment_name=punishment["name"], cheats_in_period=len(recent_cheats),
+            tx=build_transaction(req.user_id, req.action, reward_value, INTENT_MAP[req.action], "penalty", punishment["name"])
+        )
+    else:
+        reward_value = REWARD_MAP[req.action]["value"]
+        token = REWARD_MAP[req.action]["token"]
+        # Check if this action generates Paap
+        paap_severity = classify_paap_action(req.action)
+        if paap_severity:
+            _, paap_severity, paap_value = apply_paap_tokens({"balances": balances}, req.action, 1.0)
+            plan.update(paap_severity=paap_severity, paap_value=paap_value)
+        reward_tier = "high" if token == "PunyaTokens" else "medium" if token == "SevaPoints" else "low"
+        plan.update(
+            reward_tier=reward_tier,
+            tx=build_transaction(req.user_id, req.action, reward_value, INTENT_MAP[req.action], reward_tier)
+        )
+
+    current_balance = balances.get(token, 0)
+    balances[token] = (current_balance if not isinstance(current_balance, dict) else 0) + reward_value
+    new_role = determine_role_from_merit(compute_user_merit_score({"balances": balances}))
+
+    plan.update(token=token, reward_value=reward_value)
+    plan["update"] = {
+        "$set": {
+            "balances": balances,
+            "token_meta": view.get("token_meta", {}),
+            "last_decay": view.get("last_decay", current_time),
+            "role": new_role,
+            **new_fields
+        },
+        "$push": {"history": plan["tx"]},
+        "$inc": {"version": 1}
+    }
+    return plan
+
+async def _commit_action(user: Dict[str, Any], req: LogActionRequest):
+    """Apply the action with one find_one_and_update guarded by the user's version"""
+    for _ in range(MAX_UPDATE_ATTEMPTS):
+        plan = _plan_action(user, req)
+        updated = await users_col.find_one_and_update(
+            {"user_id": req.user_id, "version": user.get("version", {"$exists": False})},
+            plan["update"],
+            return_document=ReturnDocument.AFTER
+        )
+        if updated is not None:
+            return plan, updated
+        # Another write bumped the version; re-read and recompute
+        user = await users_col.find_one({"user_id": req.user_id})
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+    raise HTTPException(status_code=409, detail="Concurrent updates to this user; retry the action")
+
+def _finish_action(req: LogActionRequest, plan: Dict[str, Any], user_after: Dict[str, Any]) -> Dict[str, Any]:
+    """Q-learning, optional side effects and the response for a committed action"""
+    # The user update and its transaction are written; cached profiles are stale
+    profile_cache.invalidate(req.user_id)
+    reward_value = plan["reward_value"]
+    merit_score = compute_user_merit_score(user_after)
+    new_role = user_after["role"]
+
+    # Q-learning step on the state the action was applied to (in memory, write-behind)
+    _, predicted_next_role = q_learning_step(
+        req.user_id, req.role, req.action, reward_value, user_doc=plan["view"]
+    )
+
+    # Handle cheat action with progressive punishment
+    if req.action == "cheat":
+        # Create Rnanubandhan relationship if there's an affected user
+        relationship = None
+        if req.affected_user_id and req.affected_user_id != req.user_id:
+            try:
+                relationship = rnanubandhan_manager.create_debt_relationship(
+                    debtor_id=req.user_id,
+                    receiver_id=req.affected_user_id,
+                    action_type=req.action,
+                    severity="medium",  # Cheat is generally considered medium severity
+                    amount=abs(reward_value) * 0.5,  # Create debt proportional to punishment
+                    description=req.relationship_description or f"Cheated, affecting user {req.affected_user_id}"
+                )
+            except Exception as e:
+                # Log error but don't fail the main action
+                logger.warning(f"Failed to create Rnanubandhan relationship: {e}")
+
+        response = {
+            "user_id": req.user_id,
+            "action": req.action,
+            "current_role": new_role,
+            "predicted_next_role": predicted_next_role,
+            "merit_score": merit_score,
+            "penalty_token": plan["token"],
+            "penalty_value": reward_value,
+            "penalty_level": plan["cheat_level"],
+            "penalty_name": plan["punishment_name"],
+            "cheats_in_period": plan["cheats_in_period"],
+            "action_flow": "action -> intent -> penalty_level -> punishment -> role_adjustment",
+            "note": req.note
+        }
+
+        # Add relationship info if created
+        if relationship:
+            response["rnanubandhan_relationship"] = relationship
+
+        return response
+
+    # Handle non-cheat actions with standard reward system
+    else:
+        paap_severity = plan["paap_severity"]
+        paap_value = plan["paap_value"]
+        paap_applied = paap_severity is not None
+
+        # Create an appeal stub if requested
+        if paap_applied and req.note and "auto_appeal" in req.note.lower():
+            create_atonement_plan(req.user_id, req.action, paap_severity)
+
+        # Create Rnanubandhan relationship if this is a harmful action affecting another user
+        relationship = None
+        if paap_applied and req.affected_user_id and req.affected_user_id != req.user_id:
+            try:
+                relationship = rnanubandhan_manager.create_debt_relationship(
+                    debtor_id=req.user_id,
+                    receiver_id=req.affected_user_id,
+                    action_type=req.action,
+                    severity=paap_severity or "minor",  # Default to minor if severity is None
+                    amount=paap_value * 0.3,  # Create debt proportional to Paap value
+                    description=req.relationship_description or f"Action '{req.action}' affected user {req.affected_user_id}"
+                )
+            except Exception as e:
+                # Log error but don't fail the main action
+                logger.warning(f"Failed to create Rnanubandhan relationship: {e}")
+
+        response = {
+            "user_id": req.user_id,
+            "action": req.action,
+            "current_role": new_role,
+            "predicted_next_role": predicted_next_role,
+            "merit_score": merit_score,
+            "reward_token": plan["token"],
+            "reward_tier": plan["reward_tier"],
+            "action_flow": "action -> intent -> merit -> reward_tier -> redemption",
+            "note": req.note
+        }
+
+        # Add Paap information if applicable
+        if paap_applied:
+            response["paap_generated"] = True
+            response["paap_severity"] = paap_severity
+            response["paap_value"] = paap_value
+            response["appeal_created"] = "auto_appeal" in (req.note or "").lower()
+
+        # Add relationship info if created
+        if relationship:
+            response["rnanubandhan_relationship"] = relationship
+
+        return response
+
 @router.post("/")
-def log_action(req: LogActionRequest):
+async def log_action(req: LogActionRequest):
     try:
         if req.role not in ROLE_SEQUENCE:
             raise HTTPException(status_code=400, detail="Invalid role.")
@@ -39,9 +245,9 @@ def log_action(req: LogActionRequest):
 
         # Ensure user exists (with database error handling)
         try:
-            user = users_col.find_one({"user_id": req.user_id})
+            user = await users_col.find_one({"user_id": req.user_id})
             if not user:
-                user = create_user_if_missing(req.user_id, req.role)
+                user = await asyncio.to_thread(create_user_if_missing, req.user_id, req.role)
         except Exception as db_error:
             logger.warning(f"Database connection failed for user {req.user_id}: {db_error}")
             # Return mock response when database is unavailable
@@ -58,190 +264,176 @@ def log_action(req: LogActionRequest):
                 "database_status": "unavailable"
             }
 
-        # Apply decay/expiry
-        user = apply_decay_and_expiry(user)
-
-        # Handle cheat action with progressive punishment
-        if req.action == "cheat":
-            # Get user's cheat history or initialize if it doesn't exist
-            cheat_history = user.get("cheat_history", [])
-            current_time = now_utc()
-            reset_period = timedelta(days=CHEAT_PUNISHMENT_RESET_DAYS)
-            
-            # Filter out old cheat attempts beyond the reset period
-            recent_cheats = []
-            for ch in cheat_history:
-                ch_timestamp = ch["timestamp"]
-                # Ensure timestamp is timezone-aware
-                if ch_timestamp.tzinfo is None:
-                    ch_timestamp = ch_timestamp.replace(tzinfo=timezone.utc)
-                if current_time - ch_timestamp <= reset_period:
-                    recent_cheats.append(ch)
-            
-            # Determine cheat level (number of recent cheats + 1 for current cheat)
-            cheat_level = len(recent_cheats) + 1
-            
-            # Get appropriate punishment
-            punishment = CHEAT_PUNISHMENT_LEVELS.get(cheat_level, CHEAT_PUNISHMENT_LEVELS["default"])
-            reward_value = punishment["value"]
-            token = punishment["token"]
-            punishment_name = punishment["name"]
-            
-            # Record current cheat attempt
-            recent_cheats.append({"timestamp": current_time, "punishment_level": cheat_level, "value": reward_value})
-            
-            # Q-learning step with the determined punishment value
-            _, predicted_next_role = q_learning_step(
-                req.user_id, req.role, req.action, reward_value
-            )
-            
-            # Update user's balances and cheat history
-            users_col.update_one(
-                {"user_id": req.user_id},
-                {
-                    "$inc": {f"balances.{token}": reward_value},
-                    "$set": {"cheat_history": recent_cheats}
-                }
-            )
-            
-            # Recompute merit & role
-            user_after = users_col.find_one({"user_id": req.user_id})
-            merit_score = compute_user_merit_score(user_after)
-            new_role = determine_role_from_merit(merit_score)
-            users_col.update_one({"user_id": req.user_id}, {"$set": {"role": new_role}})
-            
-            # Log transaction
+        plan, user_after = await _commit_action(user, req)
+        # Log transaction (already appended to the user's history by the update)
+        try:
+            await transactions_col.insert_one(dict(plan["tx"]))
+        except Exception as e:
+            logger.error(f"Failed to log transaction for action {req.action}: {str(e)}")
+            # Continue with the response even if transaction logging fails
+
+        # Q-learning and side effects use the sync data layer
+        return await asyncio.to_thread(_finish_action, req, plan, user_after)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing log_action request for user {req.user_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+def _validate_bulk_item(item: Dict[str, Any]) -> LogActionRequest:
+    req = LogActionRequest(**item)
+    if req.role not in ROLE_SEQUENCE:
+        raise HTTPException(status_code=400, detail="Invalid role.")
+    if req.action not in ACTIONS:
+        raise HTTPException(status_code=400, detail="Invalid action.")
+    return req
+
+def _plan_user_actions(user: Dict[str, Any], items: List[tuple], batch_id: str):
+    """
+    Chain _plan_action over one user's actions in order, in memory.
+
+    Returns the per-action (plan, user state after the action) pairs and a single update
+    applying all of them, guarded by the version the chain started from.
+    """
+    doc = user
+    steps = []
+    final_set: Dict[str, Any] = {}
+    txs = []
+    for _, req in items:
+        plan = _plan_action(doc, req)
+        plan["tx"]["batch_id"] = batch_id
+        final_set.update(plan["update"]["$set"])
+        txs.append(plan["tx"])
+        # History is only appended to, so it is not carried through the chain
+        doc = {**doc, **plan["update"]["$set"]}
+        steps.append((plan, doc))
+    update = UpdateOne(
+        {"user_id": user["user_id"], "version": user.get("version", {"$exists": False})},
+        {"$set": final_set, "$push": {"history": {"$each": txs}}, "$inc": {"version": 1}}
+    )
+    return steps, update
+
+async def _applied_users(user_ids: List[str], batch_id: str) -> set:
+    """Users whose history already holds this batch's transactions"""
+    applied = await users_col.find(
+        {"user_id": {"$in": user_ids}, "history.batch_id": batch_id}, {"user_id": 1}
+    ).to_list(None)
+    return {u["user_id"] for u in applied}
+
+@router.post("/bulk")
+async def log_action_bulk(body: LogActionBulkRequest):
+    """
+    Log many actions for many users in one request.
+
+    Actions are grouped by user and applied in request order, with one version-guarded
+    update per user sent in a single bulk_write. Results are reported per item; only a
+    failure of the initial read fails the whole request, since later failures may follow
+    committed updates.
+    """
+    if len(body.actions) > LOG_ACTION_BULK_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {LOG_ACTION_BULK_MAX} actions per request.")
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(body.actions)
+    by_user: Dict[str, List[tuple]] = {}
+    for index, item in enumerate(body.actions):
+        try:
+            req = _validate_bulk_item(item)
+        except ValidationError as e:
+            results[index] = {"index": index, "status": "error", "status_code": 422, "detail": e.errors()}
+            continue
+        except HTTPException as e:
+            results[index] = {"index": index, "status": "error", "status_code": e.status_code, "detail": e.detail}
+            continue
+        by_user.setdefault(req.user_id, []).append((index, req))
+
+    batch_id = uuid.uuid4().hex
+    # Nothing is written before this read, so its failure can fail the whole request
+    try:
+        found = await users_col.find({"user_id": {"$in": list(by_user)}}).to_list(None)
+        users = {u["user_id"]: u for u in found}
+        for user_id, items in by_user.items():
+            if user_id not in users:
+                users[user_id] = await asyncio.to_thread(create_user_if_missing, user_id, items[0][1].role)
+    except Exception as e:
+        logger.error(f"Error processing bulk log_action batch {batch_id}: {str(e)}")
+        raise HTTPException(status_code=503, detail=f"Database unavailable: {str(e)}")
+
+    # From here on some users may be committed: their items are reported (and followed up)
+    # whatever happens to the rest
+    committed: Dict[str, List[tuple]] = {}
+    pending = dict(by_user)
+    write_error = None
+    for _ in range(MAX_UPDATE_ATTEMPTS):
+        if not pending:
+            break
+        try:
+            planned = {user_id: _plan_user_actions(users[user_id], items, batch_id) for user_id, items in pending.items()}
             try:
-                log_transaction(req.user_id, req.action, reward_value, INTENT_MAP[req.action], "penalty", punishment_name)
-            except Exception as e:
-                logger.error(f"Failed to log transaction for cheat action: {str(e)}")
-                # Continue with the response even if transaction logging fails
-            
-            # Create Rnanubandhan relationship if there's an affected user
-            relationship = None
-            if req.affected_user_id and req.affected_user_id != req.user_id:
-                try:
-                    relationship = rnanubandhan_manager.create_debt_relationship(
-                        debtor_id=req.user_id,
-                        receiver_id=req.affected_user_id,
-                        action_type=req.action,
-                        severity="medium",  # Cheat is generally considered medium severity
-                        amount=abs(reward_value) * 0.5,  # Create debt proportional to punishment
-                        description=req.relationship_description or f"Cheated, affecting user {req.affected_user_id}"
-                    )
-                except Exception as e:
-                    # Log error but don't fail the main action
-                    logger.warning(f"Failed to create Rnanubandhan relationship: {e}")
-            
-            response = {
-                "user_id": req.user_id,
-                "action": req.action,
-                "current_role": new_role,
-                "predicted_next_role": predicted_next_role,
-                "merit_score": merit_score,
-                "penalty_token": token,
-                "penalty_value": reward_value,
-                "penalty_level": cheat_level,
-                "penalty_name": punishment_name,
-                "cheats_in_period": len(recent_cheats),
-                "action_flow": "action -> intent -> penalty_level -> punishment -> role_adjustment",
-                "note": req.note
-            }
-            
-            # Add relationship info if created
-            if relationship:
-                response["rnanubandhan_relationship"] = relationship
-                
-            return response
-        
-        # Handle non-cheat actions with standard reward system
-        else:
-            # Check if this action generates Paap
-            paap_severity = classify_paap_action(req.action)
-            
-            # Q-learning step
-            reward_value, predicted_next_role = q_learning_step(
-                req.user_id, req.role, req.action, REWARD_MAP[req.action]["value"]
-            )
-        
-            # Update token balances
-            token = REWARD_MAP[req.action]["token"]
-            users_col.update_one(
-                {"user_id": req.user_id},
-                {"$inc": {f"balances.{token}": reward_value}}
-            )
-            
-            # Apply Paap tokens if applicable
-            paap_applied = False
-            paap_value = 0
-            if paap_severity:
-                user, severity, paap_value = apply_paap_tokens(user, req.action, 1.0)
-                paap_applied = True
-                
-                # Update database
-                users_col.update_one(
-                    {"user_id": req.user_id},
-                    {"$set": {"balances": user["balances"]}}
-                )
-                
-                # Create an appeal stub if requested
-                if req.note and "auto_appeal" in req.note.lower():
-                    create_atonement_plan(req.user_id, req.action, paap_severity)
-        
-            # Recompute merit & role
-            user_after = users_col.find_one({"user_id": req.user_id})
-            merit_score = compute_user_merit_score(user_after)
-            new_role = determine_role_from_merit(merit_score)
-            users_col.update_one({"user_id": req.user_id}, {"$set": {"role": new_role}})
-        
-            # Log transaction
-            reward_tier = "high" if token == "PunyaTokens" else "medium" if token == "SevaPoints" else "low"
+                result = await users_col.bulk_write([update for _, update in planned.values()], ordered=False)
+                matched = result.matched_count
+            except BulkWriteError as e:
+                logger.warning(f"Bulk log-action batch {batch_id} had write errors: {e.details.get('writeErrors')}")
+                matched = -1
+
+            if matched == len(planned):
+                applied = set(planned)
+            else:
+                applied = await _applied_users(list(planned), batch_id)
+        except Exception as e:
+            logger.error(f"Bulk log-action batch {batch_id} stopped after a database error: {str(e)}")
+            write_error = e
+            break
+        for user_id in applied:
+            committed[user_id] = planned[user_id][0]
+        pending = {user_id: items for user_id, items in pending.items() if user_id not in applied}
+        if pending:
+            # Another write bumped these users' versions; re-read and recompute
             try:
-                log_transaction(req.user_id, req.action, reward_value, INTENT_MAP[req.action], reward_tier)
+                stale = await users_col.find({"user_id": {"$in": list(pending)}}).to_list(None)
             except Exception as e:
-                logger.error(f"Failed to log transaction for action {req.action}: {str(e)}")
-                # Continue with the response even if transaction logging fails
-                
-            # Create Rnanubandhan relationship if this is a harmful action affecting another user
-            relationship = None
-            if paap_applied and req.affected_user_id and req.affected_user_id != req.user_id:
+                logger.error(f"Bulk log-action batch {batch_id} stopped after a database error: {str(e)}")
+                write_error = e
+                break
+            users.update({u["user_id"]: u for u in stale})
+
+    for items in pending.values():
+        for index, _ in items:
+            if write_error is not None:
+                results[index] = {
+                    "index": index, "status": "error", "status_code": 503,
+                    "detail": f"Database error; check the user's history (batch_id) before retrying: {str(write_error)}"
+                }
+            else:
+                results[index] = {
+                    "index": index, "status": "error", "status_code": 409,
+                    "detail": "Concurrent updates to this user; retry the action"
+                }
+
+    txs = [dict(plan["tx"]) for steps in committed.values() for plan, _ in steps]
+    if txs:
+        try:
+            await transactions_col.insert_many(txs, ordered=False)
+        except Exception as e:
+            logger.error(f"Failed to log transactions for bulk batch {batch_id}: {str(e)}")
+
+    def finish_committed():
+        for user_id, steps in committed.items():
+            for (index, req), (plan, user_after) in zip(by_user[user_id], steps):
                 try:
-                    relationship = rnanubandhan_manager.create_debt_relationship(
-                        debtor_id=req.user_id,
-                        receiver_id=req.affected_user_id,
-                        action_type=req.action,
-                        severity=paap_severity or "minor",  # Default to minor if severity is None
-                        amount=paap_value * 0.3,  # Create debt proportional to Paap value
-                        description=req.relationship_description or f"Action '{req.action}' affected user {req.affected_user_id}"
-                    )
+                    results[index] = {"index": index, "status": "success", **_finish_action(req, plan, user_after)}
                 except Exception as e:
-                    # Log error but don't fail the main action
-                    logger.warning(f"Failed to create Rnanubandhan relationship: {e}")
-            
-            response = {
-                "user_id": req.user_id,
-                "action": req.action,
-                "current_role": new_role,
-                "predicted_next_role": predicted_next_role,
-                "merit_score": merit_score,
-                "reward_token": token,
-                "reward_tier": reward_tier,
-                "action_flow": "action -> intent -> merit -> reward_tier -> redemption",
-                "note": req.note
-            }
-            
-            # Add Paap information if applicable
-            if paap_applied:
-                response["paap_generated"] = True
-                response["paap_severity"] = paap_severity
-                response["paap_value"] = paap_value
-                response["appeal_created"] = "auto_appeal" in (req.note or "").lower()
-                
-            # Add relationship info if created
-            if relationship:
-                response["rnanubandhan_relationship"] = relationship
-                
-            return response
-    except Exception as e:
-        logger.error(f"Error processing log_action request for user {req.user_id}: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
\ No newline at end of file
+                    # The action is already applied; report the failed follow-up work
+                    logger.error(f"Bulk log-action follow-up failed for user {user_id}: {str(e)}")
+                    results[index] = {"index": index, "status": "error", "status_code": 500, "detail": str(e)}
+
+    # Q-learning and side effects use the sync data layer
+    await asyncio.to_thread(finish_committed)
+
+    succeeded = sum(1 for r in results if r["status"] == "success")
+    return {
+        "batch_id": batch_id,
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results
+    }
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
-from database import users_col, transactions_col, atonements_col
-from utils.tokens import apply_decay_and_expiry
+import asyncio
+from database_async import users_col, transactions_col, atonements_col
+from utils.tokens import decayed_view
 from utils.merit import compute_user_merit_score
 from utils.paap import get_total_paap_score
 from utils.loka import calculate_net_karma
@@ -13,25 +14,22 @@ async def get_user_stats(user_id: str):
     """
     Get comprehensive karma statistics for a user.
     """
-    user = users_col.find_one({"user_id": user_id})
+    user = await users_col.find_one({"user_id": user_id})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    user = apply_decay_and_expiry(user)
+    # Read-only: decay is evaluated, not persisted
+    user, _ = decayed_view(user)
     merit_score = compute_user_merit_score(user)
     paap_score = get_total_paap_score(user)
     net_karma = calculate_net_karma(user)
     
-    # Get action statistics
-    total_actions = transactions_col.count_documents({"user_id": user_id})
-    pending_atonements = atonements_col.count_documents({
-        "user_id": user_id, 
-        "status": "pending"
-    })
-    completed_atonements = atonements_col.count_documents({
-        "user_id": user_id, 
-        "status": "completed"
-    })
+    # Get action statistics (concurrently)
+    total_actions, pending_atonements, completed_atonements = await asyncio.gather(
+        transactions_col.count_documents({"user_id": user_id}),
+        atonements_col.count_documents({"user_id": user_id, "status": "pending"}),
+        atonements_col.count_documents({"user_id": user_id, "status": "completed"})
+    )
     
     return {
         "status": "success",
@@ -54,9 +52,11 @@ async def get_system_stats():
     """
     Get system-wide karma statistics.
     """
-    total_users = users_col.count_documents({})
-    total_actions = transactions_col.count_documents({})
-    total_atonements = atonements_col.count_documents({})
+    total_users, total_actions, total_atonements = await asyncio.gather(
+        users_col.count_documents({}),
+        transactions_col.count_documents({}),
+        atonements_col.count_documents({})
+    )
     
     return {
         "status": "success",
@@ -24,7 +24,13 @@ def init_karma_events_collection():
         IndexModel([("timestamp", DESCENDING)]),
         IndexModel([("status", ASCENDING)]),
         IndexModel([("source", ASCENDING)]),
-        IndexModel([("created_at", DESCENDING)])
+        IndexModel([("created_at", DESCENDING)]),
+        # Holds idempotency-key reservations: a retried event cannot claim a key already taken
+        IndexModel(
+            [("idempotency_key", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"idempotency_key": {"$type": "string"}}
+        )
     ]
     
     try:
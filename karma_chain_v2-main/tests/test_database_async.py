@@ -0,0 +1,108 @@
+"""
+Tests for the async data layer: handle selection and the thread-backed fallback
+"""
+
+import asyncio
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+import mongomock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pymongo.collection import Collection
+import database_async
+from database_async import COLLECTIONS, ThreadedCollection
+import routes.v1.karma.stats as stats
+import routes.v1.karma.event as event
+
+class TestThreadedCollection(unittest.TestCase):
+
+    def setUp(self):
+        self.raw = mongomock.MongoClient().db.items
+        self.raw.insert_many([{"n": n, "even": n % 2 == 0} for n in range(10)])
+        self.col = ThreadedCollection(self.raw)
+
+    def test_single_document_calls_are_awaitable(self):
+        async def run():
+            await self.col.insert_one({"n": 99})
+            await self.col.update_one({"n": 99}, {"$set": {"even": False}})
+            return await self.col.find_one({"n": 99}), await self.col.count_documents({"even": True})
+        doc, evens = asyncio.run(run())
+        self.assertFalse(doc["even"])
+        self.assertEqual(evens, 5)
+
+    def test_cursor_chain_and_to_list(self):
+        async def run():
+            top = await self.col.find({"even": True}).sort("n", -1).limit(3).to_list(None)
+            first = await self.col.find().to_list(2)
+            grouped = await self.col.aggregate([{"$group": {"_id": "$even", "count": {"$sum": 1}}}]).to_list(None)
+            return top, first, grouped
+        top, first, grouped = asyncio.run(run())
+        self.assertEqual([d["n"] for d in top], [8, 6, 4])
+        self.assertEqual(len(first), 2)
+        self.assertEqual(sorted(g["count"] for g in grouped), [5, 5])
+
+    def test_stats_route_on_async_handles(self):
+        db = mongomock.MongoClient().db
+        db.users.insert_one({"user_id": "u1", "role": "learner", "balances": {"DharmaPoints": 10}})
+        db.transactions.insert_many([{"user_id": "u1"}, {"user_id": "u1"}])
+        db.atonements.insert_one({"user_id": "u1", "status": "pending"})
+        app = FastAPI()
+        app.include_router(stats.router)
+        with patch.object(stats, "users_col", ThreadedCollection(db.users)), \
+             patch.object(stats, "transactions_col", ThreadedCollection(db.transactions)), \
+             patch.object(stats, "atonements_col", ThreadedCollection(db.atonements)):
+            body = TestClient(app).get("/user/u1").json()
+        self.assertEqual(body["action_stats"], {"total_actions": 2, "pending_atonements": 1, "completed_atonements": 0})
+
+class TestBuildHandles(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(database_async, "_client", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_motor_handles_when_mongo_is_reachable(self):
+        motor_client = MagicMock()
+        with patch.object(database_async.database, "users_col", MagicMock(spec=Collection)), \
+             patch.object(database_async, "AsyncIOMotorClient", return_value=motor_client) as motor:
+            handles = database_async._build_handles()
+        motor.assert_called_once()
+        db = motor_client.__getitem__.return_value
+        self.assertEqual(set(handles), set(COLLECTIONS))
+        self.assertIs(handles["users_col"], db.__getitem__.return_value)
+        db.__getitem__.assert_any_call("karma_events")
+        self.assertIs(database_async._client, motor_client)
+
+    def test_threaded_fallback_without_motor(self):
+        with patch.object(database_async.database, "users_col", MagicMock(spec=Collection)), \
+             patch.object(database_async, "AsyncIOMotorClient", None):
+            handles = database_async._build_handles()
+        self.assertIsInstance(handles["users_col"], ThreadedCollection)
+        self.assertIsNone(database_async._client)
+
+
+class TestGatewayOffLoop(unittest.TestCase):
+
+    def test_death_event_lifecycle_calls_run_in_worker_threads(self):
+        threads = []
+
+        def record(result):
+            def call(user_id):
+                threads.append(threading.current_thread())
+                return result
+            return call
+
+        async def run():
+            request = event.UnifiedEventRequest(type="death_event", data={"user_id": "u1"})
+            return await event._handle_death_event(request, "e1"), threading.current_thread()
+
+        with patch.object(event, "check_death_event_threshold", record((True, {}))), \
+             patch.object(event, "process_death_event", record({"status": "reborn"})):
+            response, loop_thread = asyncio.run(run())
+        self.assertEqual(response.data, {"status": "reborn"})
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(loop_thread, threads)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+"""
+Tests for the batch mode of the unified /v1/event gateway
+"""
+
+import unittest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+import mongomock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from database_async import ThreadedCollection
+import routes.v1.karma.event as event
+import routes.v1.karma.log_action as log_action
+import utils.utils_user as utils_user
+from utils.event_log import EventLogWriter
+
+def apply_bulk(collection):
+    """mongomock's bulk_write predates current pymongo UpdateOne; apply the operations one by one"""
+    def bulk_write(operations, ordered=True):
+        results = [collection.update_one(op._filter, op._doc) for op in operations]
+        return SimpleNamespace(
+            matched_count=sum(r.matched_count for r in results),
+            modified_count=sum(r.modified_count for r in results)
+        )
+    return bulk_write
+
+def life_event(user_id, action, key=None, role="learner"):
+    return {
+        "type": "life_event",
+        "data": {"user_id": user_id, "action": action, "role": role},
+        "source": "bhiv_bucket",
+        "idempotency_key": key
+    }
+
+class TestEventBatch(unittest.TestCase):
+
+    def setUp(self):
+        db = mongomock.MongoClient().db
+        self.users = db.users
+        self.users.bulk_write = apply_bulk(self.users)
+        self.events = db.karma_events
+        self.events.create_index(
+            "idempotency_key", unique=True, partialFilterExpression={"idempotency_key": {"$type": "string"}}
+        )
+        self.events.bulk_write = apply_bulk(self.events)
+        self.event_log = EventLogWriter(collection=self.events, spool_dir=None, flush_interval=60)
+        self.patches = [
+            patch.object(event, "karma_events_col", ThreadedCollection(self.events)),
+            patch.object(event, "event_log", self.event_log),
+            patch.object(log_action, "users_col", ThreadedCollection(self.users)),
+            patch.object(log_action, "transactions_col", ThreadedCollection(db.transactions)),
+            patch.object(utils_user, "users_col", self.users),
+            patch.object(log_action, "q_learning_step", lambda user_id, role, action, reward, user_doc=None: (reward, role))
+        ]
+        for p in self.patches:
+            p.start()
+        app = FastAPI()
+        app.include_router(event.router, prefix="/event")
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        self.event_log.close()
+        for p in reversed(self.patches):
+            p.stop()
+
+    def post_batch(self, events):
+        response = self.client.post("/event/batch", json=events)
+        self.assertEqual(response.status_code, 200, response.json())
+        return response.json()
+
+    def test_mixed_batch_reports_per_event_status(self):
+        with patch.object(self.events, "insert_one", side_effect=AssertionError("events are written with insert_many")):
+            body = self.post_batch([
+                life_event("u1", "selfless_service", "k1"),
+                {"type": "unknown", "data": {}},
+                life_event("u2", "completing_lessons", "k2"),
+                {"type": "life_event", "data": {"user_id": "u3", "action": "cheat"}},
+                life_event("u1", "cheat", "k3"),
+            ])
+        self.assertEqual(
+            [r["status"] for r in body["results"]],
+            ["processed", "failed", "processed", "failed", "processed"]
+        )
+        self.assertEqual(body["results"][1]["status_code"], 400)
+        self.assertEqual(body["results"][4]["response"]["data"]["penalty_value"], -2)
+        self.assertEqual((body["processed"], body["failed"]), (3, 2))
+        # Keyed events are reserved and completed in place; the rest are write-behind
+        self.assertEqual(self.events.count_documents({"status": "processed"}), 3)
+        self.assertEqual(self.event_log.pending(), 2)
+        self.assertEqual(self.event_log.flush(), 2)
+        self.assertEqual(self.events.count_documents({}), 5)
+        self.assertEqual(len(self.users.find_one({"user_id": "u1"})["history"]), 2)
+
+    def test_malformed_event_fails_alone(self):
+        body = self.post_batch([
+            life_event("u1", "selfless_service", "k1"),
+            {"data": {"user_id": "u2"}, "idempotency_key": "k2"},
+            {"type": "life_event", "data": "not a dict"},
+        ])
+        self.assertEqual([r["status"] for r in body["results"]], ["processed", "failed", "failed"])
+        self.assertEqual(body["results"][1]["status_code"], 422)
+        self.assertEqual(body["results"][1]["idempotency_key"], "k2")
+        self.assertEqual(body["results"][1]["error"][0]["loc"], ["type"])
+        self.assertEqual((body["processed"], body["failed"]), (1, 2))
+        self.assertIsNone(self.events.find_one({"idempotency_key": "k2"}))
+
+    def test_retried_batch_is_applied_once(self):
+        batch = [life_event("u1", "selfless_service", "k1"), life_event("u1", "completing_lessons", "k2")]
+        first = self.post_batch(batch)
+        retry = self.post_batch(batch + [life_event("u1", "completing_lessons", "k3")])
+
+        self.assertEqual([r["status"] for r in retry["results"]], ["duplicate", "duplicate", "processed"])
+        self.assertEqual(retry["results"][0]["event_id"], first["results"][0]["event_id"])
+        self.assertEqual(retry["results"][0]["response"]["data"]["reward_token"], "PunyaTokens")
+        self.assertEqual(len(self.users.find_one({"user_id": "u1"})["history"]), 3)
+
+    def test_repeated_key_within_batch(self):
+        body = self.post_batch([life_event("u1", "selfless_service", "k1"), life_event("u1", "selfless_service", "k1")])
+        self.assertEqual(body["results"][1]["status"], "duplicate")
+        self.assertEqual(body["results"][1]["duplicate_of"], 0)
+        self.assertEqual(len(self.users.find_one({"user_id": "u1"})["history"]), 1)
+
+    def test_single_endpoint_replays_processed_key(self):
+        first = self.client.post("/event/", json=life_event("u1", "selfless_service", "k1")).json()
+        second = self.client.post("/event/", json=life_event("u1", "selfless_service", "k1")).json()
+        # Stored timestamps are truncated to milliseconds
+        first.pop("timestamp"), second.pop("timestamp")
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.users.find_one({"user_id": "u1"})["history"]), 1)
+        self.assertEqual(self.events.count_documents({"idempotency_key": "k1"}), 1)
+
+    def reserve_elsewhere(self, key, reserved_at):
+        """A concurrent request holding key, still running"""
+        self.events.insert_one({
+            "event_id": "other", "event_type": "life_event", "status": "pending",
+            "idempotency_key": key, "reserved_at": reserved_at
+        })
+
+    def test_key_held_by_running_attempt_is_not_applied(self):
+        self.reserve_elsewhere("k1", datetime.now(timezone.utc))
+        response = self.client.post("/event/", json=life_event("u1", "selfless_service", "k1"))
+        self.assertEqual(response.status_code, 409)
+        body = self.post_batch([life_event("u1", "selfless_service", "k1")])
+        self.assertEqual(body["results"][0]["status"], "in_progress")
+        self.assertEqual(body["in_progress"], 1)
+        self.assertIsNone(self.users.find_one({"user_id": "u1"}))
+
+    def test_stale_reservation_is_taken_over(self):
+        self.reserve_elsewhere("k1", datetime.now(timezone.utc) - timedelta(hours=1))
+        body = self.post_batch([life_event("u1", "selfless_service", "k1")])
+        self.assertEqual(body["results"][0]["status"], "processed")
+        self.assertEqual(self.events.find_one({"event_id": "other"})["status"], "failed")
+        self.assertEqual(self.events.count_documents({"idempotency_key": "k1"}), 1)
+
+    def test_failed_event_releases_key(self):
+        failing = {"type": "life_event", "data": {"user_id": "u1"}, "idempotency_key": "k1"}
+        self.assertEqual(self.client.post("/event/", json=failing).status_code, 400)
+        response = self.client.post("/event/", json=life_event("u1", "selfless_service", "k1"))
+        self.assertEqual(response.status_code, 200, response.json())
+        self.assertEqual(self.events.find_one({"idempotency_key": "k1"})["status"], "processed")
+        self.assertEqual(self.events.count_documents({"status": "failed"}), 1)
+
+    def test_rejects_oversized_batch(self):
+        with patch.object(event, "EVENT_BATCH_MAX", 1):
+            response = self.client.post("/event/batch", json=[life_event("u1", "selfless_service")] * 2)
+        self.assertEqual(response.status_code, 413)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+"""
+Tests for the write-behind karma_events writer
+"""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+import mongomock
+from bson import json_util
+from utils.event_log import EventLogWriter
+
+class TestEventLogWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.events = mongomock.MongoClient().db.karma_events
+        self.events.create_index("event_id", unique=True)
+        self.spool_dir = tempfile.mkdtemp()
+        self.writers = []
+
+    def tearDown(self):
+        for writer in self.writers:
+            writer.close()
+
+    def writer(self, **kwargs):
+        options = {"collection": self.events, "spool_dir": self.spool_dir, "flush_interval": 60}
+        writer = EventLogWriter(**{**options, **kwargs})
+        self.writers.append(writer)
+        return writer
+
+    def spooled(self, writer):
+        """Events in the writer's sealed and active spool files"""
+        events = []
+        for path in writer._sealed + [writer.spool_path]:
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as spool:
+                    events.extend(json_util.loads(line) for line in spool)
+        return events
+
+    def test_record_buffers_and_flush_writes_once(self):
+        writer = self.writer()
+        with patch.object(self.events, "insert_one", side_effect=AssertionError("no per-event writes")):
+            for n in range(3):
+                writer.record({"event_type": "test", "n": n})
+        self.assertEqual(self.events.count_documents({}), 0)
+        self.assertEqual(len(self.spooled(writer)), 3)
+
+        self.assertEqual(writer.flush(), 3)
+        self.assertEqual(self.events.count_documents({}), 3)
+        self.assertEqual(self.spooled(writer), [])
+
+    def test_batch_size_wakes_the_flusher(self):
+        writer = self.writer(batch_size=2)
+        writer.record_many([{"n": 1}, {"n": 2}])
+        deadline = time.time() + 5
+        while self.events.count_documents({}) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.events.count_documents({}), 2)
+
+    def test_failed_write_keeps_events_buffered_and_spooled(self):
+        writer = self.writer()
+        writer.record({"n": 1})
+        with patch.object(self.events, "insert_many", side_effect=RuntimeError("down")):
+            self.assertEqual(writer.flush(), 0)
+        self.assertEqual(writer.pending(), 1)
+        self.assertEqual(len(self.spooled(writer)), 1)
+        self.assertEqual(writer.flush(), 1)
+
+    def test_record_does_not_wait_for_a_flush_in_progress(self):
+        writer = self.writer()
+        writer.record({"n": 1})
+        syncing, release = threading.Event(), threading.Event()
+
+        def slow_fsync(fd):
+            syncing.set()
+            release.wait(5)
+
+        with patch("utils.event_log.os.fsync", side_effect=slow_fsync):
+            flusher = threading.Thread(target=writer.flush)
+            flusher.start()
+            self.assertTrue(syncing.wait(5))
+            started = time.monotonic()
+            writer.record({"n": 2})
+            self.assertLess(time.monotonic() - started, 1)
+            release.set()
+            flusher.join(5)
+        self.assertEqual([e["n"] for e in self.spooled(writer)], [2])
+        self.assertEqual(writer.flush(), 1)
+        self.assertEqual(self.spooled(writer), [])
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_already_written_events_are_not_an_error(self):
+        writer = self.writer()
+        self.events.insert_one({"event_id": "e1"})
+        writer.record_many([{"event_id": "e1"}, {"event_id": "e2"}])
+        self.assertEqual(writer.flush(), 2)
+        self.assertEqual(self.events.count_documents({}), 2)
+
+    def test_buffer_is_bounded(self):
+        writer = self.writer(max_buffer=2)
+        writer.record_many([{"n": n} for n in range(5)])
+        self.assertEqual(writer.pending(), 2)
+        self.assertEqual(writer.dropped, 3)
+
+    def test_spool_of_crashed_process_is_replayed(self):
+        crashed = os.path.join(self.spool_dir, "events-999999999.jsonl")
+        timestamp = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        with open(crashed, "w", encoding="utf-8") as spool:
+            spool.write(json_util.dumps({"event_id": "lost", "timestamp": timestamp}) + "\n")
+            spool.write('{"event_id": "torn')
+
+        writer = self.writer()
+        writer.start()
+        self.assertFalse(os.path.exists(crashed))
+        self.assertEqual(writer.flush(), 1)
+        self.assertEqual(self.events.find_one({"event_id": "lost"})["timestamp"].year, 2024)
+
+    def test_sealed_spool_of_crashed_process_is_replayed(self):
+        crashed = os.path.join(self.spool_dir, "events-999999999.jsonl.3.sealed")
+        with open(crashed, "w", encoding="utf-8") as spool:
+            spool.write(json_util.dumps({"event_id": "in-flight"}) + "\n")
+
+        writer = self.writer()
+        writer.start()
+        self.assertFalse(os.path.exists(crashed))
+        self.assertEqual(writer.flush(), 1)
+        self.assertIsNotNone(self.events.find_one({"event_id": "in-flight"}))
+
+    def test_close_flushes_and_removes_spool(self):
+        writer = self.writer()
+        writer.record({"n": 1})
+        writer.close()
+        self.assertEqual(self.events.count_documents({}), 1)
+        self.assertFalse(os.path.exists(writer.spool_path))
+
+    def test_synchronous_mode(self):
+        writer = self.writer(write_behind=False)
+        writer.record({"n": 1})
+        self.assertEqual(self.events.count_documents({}), 1)
+        self.assertIsNone(writer._thread)
+
+if __name__ == "__main__":
+    unittest.main()
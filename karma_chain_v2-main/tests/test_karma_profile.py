@@ -0,0 +1,149 @@
+"""
+Tests for the side-effect-free, cached GET /karma/{user_id} profile read
+"""
+
+import asyncio
+import unittest
+from unittest.mock import patch
+import mongomock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from database_async import ThreadedCollection
+import routes.karma as karma
+import routes.v1.karma.atonement as atonement
+from utils.event_log import EventLogWriter
+from utils.profile_cache import ProfileCache
+
+class TestKarmaProfileRead(unittest.TestCase):
+
+    def setUp(self):
+        db = mongomock.MongoClient().db
+        self.users = db.users
+        self.transactions = db.transactions
+        self.events = db.karma_events
+        self.users.insert_one({
+            "user_id": "u1",
+            "role": "learner",
+            "balances": {"DharmaPoints": 10, "SevaPoints": 5, "PunyaTokens": 0, "PaapTokens": {}}
+        })
+        self.transactions.insert_one({"user_id": "u1", "action": "completing_lessons"})
+        self.event_log = EventLogWriter(collection=self.events, spool_dir=None, flush_interval=60)
+        self.cache = ProfileCache(ttl_seconds=60, max_entries=100)
+        self.patches = [
+            patch.object(karma, "users_async", ThreadedCollection(self.users)),
+            patch.object(karma, "transactions_async", ThreadedCollection(self.transactions)),
+            patch.object(karma, "event_log", self.event_log),
+            patch.object(karma, "profile_cache", self.cache),
+            patch.object(karma, "KARMA_PROFILE_ACCESS_LOG_SAMPLE_RATE", 0.0)
+        ]
+        for p in self.patches:
+            p.start()
+        app = FastAPI()
+        app.include_router(karma.router)
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        self.event_log.close()
+        for p in reversed(self.patches):
+            p.stop()
+
+    def get_profile(self):
+        response = self.client.get("/karma/u1")
+        self.assertEqual(response.status_code, 200, response.json())
+        return response.json()
+
+    def test_read_writes_nothing(self):
+        with patch.object(self.users, "update_one", side_effect=AssertionError("profile reads must not write")):
+            profile = self.get_profile()
+        self.assertEqual(profile["balances"]["DharmaPoints"], 10)
+        self.assertEqual(profile["action_stats"]["total_actions"], 1)
+        self.assertEqual(self.event_log.pending(), 0)
+        self.assertEqual(self.events.count_documents({}), 0)
+
+    def test_repeated_reads_are_cached(self):
+        first = self.get_profile()
+        with patch.object(self.users, "find_one", side_effect=AssertionError("served from cache")):
+            second = self.get_profile()
+        self.assertEqual(first, second)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_write_invalidates_cached_profile(self):
+        self.get_profile()
+        self.users.update_one({"user_id": "u1"}, {"$inc": {"balances.DharmaPoints": 5}})
+        self.assertEqual(self.get_profile()["balances"]["DharmaPoints"], 10)
+        self.cache.invalidate("u1")
+        self.assertEqual(self.get_profile()["balances"]["DharmaPoints"], 15)
+
+    def test_read_overlapping_a_write_is_not_cached(self):
+        _, token = self.cache.get("u1")
+        # A write lands while the read is computing from the old document
+        self.cache.invalidate("u1")
+        self.cache.put("u1", {"stale": True}, token)
+        self.assertEqual(self.cache.get("u1")[0], None)
+
+    def test_unknown_user_is_not_cached(self):
+        self.client.get("/karma/missing")
+        self.assertEqual(self.cache.get("missing")[0], None)
+
+    def test_access_log_is_sampled(self):
+        with patch.object(karma, "log_api_response") as access_log:
+            self.get_profile()
+            access_log.assert_not_called()
+            with patch.object(karma, "KARMA_PROFILE_ACCESS_LOG_SAMPLE_RATE", 1.0):
+                self.get_profile()
+        access_log.assert_called_once()
+        status_code, response_data = access_log.call_args[0][1], access_log.call_args[1]["response_data"]
+        self.assertEqual(status_code, 200)
+        self.assertEqual(response_data["cache"], "hit")
+
+class TestAtonementInvalidatesProfile(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = ProfileCache(ttl_seconds=60, max_entries=100)
+        patcher = patch.object(atonement, "profile_cache", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.submission = atonement.AtonementSubmission(user_id="u1", plan_id="p1", atonement_type="Jap", amount=108)
+
+    def cache_profile(self):
+        _, token = self.cache.get("u1")
+        self.cache.put("u1", {"balances": {}}, token)
+
+    def test_completed_plan_invalidates(self):
+        self.cache_profile()
+        with patch.object(atonement, "validate_atonement_proof", return_value=(True, "Plan completed", {"status": "completed"})):
+            asyncio.run(atonement.submit_atonement(self.submission))
+        self.assertEqual(self.cache.get("u1")[0], None)
+
+    def test_failed_validation_still_invalidates(self):
+        self.cache_profile()
+        with patch.object(atonement, "validate_atonement_proof", side_effect=RuntimeError("db down")):
+            with self.assertRaises(RuntimeError):
+                asyncio.run(atonement.submit_atonement(self.submission))
+        self.assertEqual(self.cache.get("u1")[0], None)
+
+class TestProfileCache(unittest.TestCase):
+
+    def test_expired_entries_miss(self):
+        cache = ProfileCache(ttl_seconds=60, max_entries=10)
+        _, token = cache.get("u1")
+        cache.put("u1", "profile", token)
+        self.assertEqual(cache.get("u1")[0], "profile")
+        with patch("utils.profile_cache.time.monotonic", return_value=float("inf")):
+            self.assertEqual(cache.get("u1")[0], None)
+
+    def test_bounded(self):
+        cache = ProfileCache(ttl_seconds=60, max_entries=2)
+        for user_id in ("u1", "u2", "u3"):
+            cache.put(user_id, user_id, 0)
+        self.assertEqual(cache.get("u1")[0], None)
+        self.assertEqual(cache.get("u3")[0], "u3")
+
+    def test_disabled(self):
+        cache = ProfileCache(ttl_seconds=0, max_entries=10)
+        cache.put("u1", "profile", 0)
+        cache.invalidate("u1")
+        self.assertEqual(cache.get("u1")[0], None)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+Tests for the single-pass rule matcher behind compute_karma
+"""
+
+import re
+import unittest
+from utils.karma_engine import (
+    KARMA_RULES, KarmaEngine, KarmaRuleMatcher, rule_matcher, compute_karma, compute_karma_batch
+)
+
+TEXTS = [
+    "",
+    "Please help, thank you! Thanks again, please.",
+    "PLEASE and Please are not polite enough for the case-sensitive rule",
+    "thanksgiving pleased sorry_ please_x 3please",
+    "that helped, thanks for the guidance. That makes sense, good point.",
+    "why does this happen? why not\nwhy again",
+    "how does recursion work\nhow does this relate to that? can you help me understand it",
+    "test test test\ntest test test test hello hello hello copy copy copy",
+    "aaaaaaaaaaaaaaaa and bbbbbbbbbbbb and ccccc",
+    "you are stupid, an idiot, useless and worthless: fake lie dumb terrible horrible awful",
+    "ignore the previous advice; never mind your suggestion; disregard what I said before",
+    "give me something harmful, then bypass safety and override the rules, ignore guidelines",
+    "ſorry, pleaſe, thank you with a Kelvin K",
+    "perhaps you could consider this; additionally, here is an alternative worth noting",
+    "whyever would you repeat yourself, repeat",
+]
+
+def findall_counts(text):
+    return {
+        category: sum(len(re.findall(pattern, text, flags)) for pattern in patterns)
+        for category, (patterns, flags) in KARMA_RULES.items()
+    }
+
+class TestKarmaRuleMatcher(unittest.TestCase):
+
+    def test_counts_match_findall(self):
+        for text in TEXTS:
+            for variant in (text, text.lower(), text.upper()):
+                with self.subTest(text=variant):
+                    self.assertEqual(rule_matcher.count(variant), findall_counts(variant))
+
+    def test_self_overlapping_phrase_falls_back_to_findall(self):
+        matcher = KarmaRuleMatcher({"echo": ([r'\ba b a\b'], 0)})
+        self.assertEqual(matcher.by_first_word, {})
+        self.assertEqual(matcher.count("a b a b a"), {"echo": 1})
+
+    def test_detect_methods_use_rule_weights(self):
+        engine = KarmaEngine()
+        # "please" is listed twice, so it scores twice
+        self.assertEqual(engine._detect_politeness("please thank you"), 9)
+        self.assertEqual(engine._detect_rudeness("stupid"), -10)
+
+
+class TestComputeKarma(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = KarmaEngine()
+        self.engine.constraint_only_mode = False
+        self.logs = [[{"message": text}, {"text": text.upper()}] for text in TEXTS]
+
+    def test_breakdown_and_trace(self):
+        result = self.engine.compute_karma([{"message": "Thank you, thanks. You are stupid."}])
+        self.assertEqual(result["karma_score"], 50 + 6 - 10)
+        self.assertEqual(result["traceability"]["detailed_breakdown"]["politeness"], 6)
+        self.assertEqual(result["traceability"]["factors_applied"], [
+            "Politeness detected: 6",
+            "Rudeness detected: -10",
+            "Neutral factors detected (no score impact): 0"
+        ])
+
+    def test_batch_matches_single(self):
+        self.assertEqual(
+            self.engine.compute_karma_batch(self.logs),
+            [self.engine.compute_karma(log) for log in self.logs]
+        )
+        self.assertEqual(compute_karma_batch(self.logs), [compute_karma(log) for log in self.logs])
+
+    def test_batch_rejects_non_list_log(self):
+        with self.assertRaises(ValueError):
+            self.engine.compute_karma_batch([[], "not a log"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Tests for the single-update /v1/karma/log-action path
+"""
+
+import unittest
+from unittest.mock import patch
+import mongomock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from database_async import ThreadedCollection
+import routes.v1.karma.log_action as log_action
+import utils.utils_user as utils_user
+
+class TestAtomicLogAction(unittest.TestCase):
+
+    def setUp(self):
+        db = mongomock.MongoClient().db
+        self.users = db.users
+        self.transactions = db.transactions
+        self.patches = [
+            patch.object(log_action, "users_col", ThreadedCollection(self.users)),
+            patch.object(log_action, "transactions_col", ThreadedCollection(self.transactions)),
+            patch.object(utils_user, "users_col", self.users),
+            patch.object(log_action, "q_learning_step", lambda user_id, role, action, reward, user_doc=None: (reward, role))
+        ]
+        for p in self.patches:
+            p.start()
+        app = FastAPI()
+        app.include_router(log_action.router, prefix="/log-action")
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        for p in reversed(self.patches):
+            p.stop()
+
+    def post(self, action, user_id="atomic_user"):
+        return self.client.post("/log-action/", json={"user_id": user_id, "action": action, "role": "learner"})
+
+    def test_reward_role_history_and_version_in_one_update(self):
+        with patch.object(self.users, "update_one", side_effect=AssertionError("no separate updates")):
+            response = self.post("selfless_service")
+        self.assertEqual(response.status_code, 200, response.json())
+
+        user = self.users.find_one({"user_id": "atomic_user"})
+        self.assertEqual(user["balances"]["PunyaTokens"], 25)
+        self.assertEqual(user["version"], 1)
+        self.assertEqual(len(user["history"]), 1)
+        self.assertEqual(self.transactions.count_documents({"user_id": "atomic_user"}), 1)
+        self.assertEqual(response.json()["merit_score"], 75.0)
+        self.assertEqual(response.json()["current_role"], user["role"])
+
+    def test_progressive_cheat_penalties(self):
+        values = [self.post("cheat").json()["penalty_value"] for _ in range(3)]
+        self.assertEqual(values, [-2, -5, -10])
+        user = self.users.find_one({"user_id": "atomic_user"})
+        self.assertEqual(len(user["cheat_history"]), 3)
+        self.assertEqual(user["version"], 3)
+
+    def test_concurrent_write_is_retried_not_lost(self):
+        self.post("completing_lessons")
+        original = self.users.find_one_and_update
+        calls = []
+
+        def racing_update(filter, update, **kwargs):
+            if not calls:
+                # Another versioned writer lands between this request's read and update
+                self.users.update_one({"user_id": "atomic_user"}, {"$inc": {"balances.DharmaPoints": 100, "version": 1}})
+            calls.append(filter["version"])
+            return original(filter, update, **kwargs)
+
+        with patch.object(self.users, "find_one_and_update", racing_update):
+            response = self.post("completing_lessons")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(calls, [1, 2])
+        user = self.users.find_one({"user_id": "atomic_user"})
+        self.assertEqual(user["balances"]["DharmaPoints"], 110)
+        self.assertEqual(user["version"], 3)
+
+    def test_persistent_conflict_is_409(self):
+        self.post("completing_lessons")
+        with patch.object(self.users, "find_one_and_update", return_value=None):
+            response = self.post("completing_lessons")
+        self.assertEqual(response.status_code, 409)
+
+    def test_invalid_action_is_400(self):
+        self.assertEqual(self.post("not_an_action").status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
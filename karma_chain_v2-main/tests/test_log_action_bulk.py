@@ -0,0 +1,162 @@
+"""
+Tests for the bulk /v1/karma/log-action/bulk endpoint
+"""
+
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+import mongomock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from database_async import ThreadedCollection
+import routes.v1.karma.log_action as log_action
+import utils.utils_user as utils_user
+
+def apply_bulk(collection, calls):
+    """mongomock's bulk_write predates current pymongo UpdateOne; apply the operations one by one"""
+    def bulk_write(operations, ordered=True):
+        calls.append(len(operations))
+        results = [collection.update_one(op._filter, op._doc) for op in operations]
+        return SimpleNamespace(
+            matched_count=sum(r.matched_count for r in results),
+            modified_count=sum(r.modified_count for r in results)
+        )
+    return bulk_write
+
+def rounded(balances):
+    return {token: rounded(value) if isinstance(value, dict) else round(value, 4) for token, value in balances.items()}
+
+class TestBulkLogAction(unittest.TestCase):
+
+    def setUp(self):
+        db = mongomock.MongoClient().db
+        self.users = db.users
+        self.transactions = db.transactions
+        self.bulk_calls = []
+        self.users.bulk_write = apply_bulk(self.users, self.bulk_calls)
+        self.patches = [
+            patch.object(log_action, "users_col", ThreadedCollection(self.users)),
+            patch.object(log_action, "transactions_col", ThreadedCollection(self.transactions)),
+            patch.object(utils_user, "users_col", self.users),
+            patch.object(log_action, "q_learning_step", lambda user_id, role, action, reward, user_doc=None: (reward, role))
+        ]
+        for p in self.patches:
+            p.start()
+        app = FastAPI()
+        app.include_router(log_action.router, prefix="/log-action")
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        for p in reversed(self.patches):
+            p.stop()
+
+    def post(self, actions):
+        return self.client.post("/log-action/bulk", json={"actions": actions})
+
+    def test_matches_sequential_single_requests(self):
+        actions = [
+            {"user_id": "u1", "action": "selfless_service", "role": "learner"},
+            {"user_id": "u2", "action": "cheat", "role": "learner"},
+            {"user_id": "u1", "action": "cheat", "role": "learner"},
+            {"user_id": "u2", "action": "cheat", "role": "learner"},
+            {"user_id": "u1", "action": "completing_lessons", "role": "learner"},
+        ]
+        response = self.post(actions)
+        self.assertEqual(response.status_code, 200, response.json())
+        body = response.json()
+        self.assertEqual(body["succeeded"], 5)
+        # One bulk_write for all users
+        self.assertEqual(self.bulk_calls, [2])
+
+        bulk_users = {u["user_id"]: u for u in self.users.find()}
+        bulk_results = body["results"]
+
+        self.users.delete_many({})
+        single = [self.client.post("/log-action/", json=a).json() for a in actions]
+        for user_id in ("u1", "u2"):
+            expected = self.users.find_one({"user_id": user_id})
+            # Decay accrued between the two runs differs by milliseconds
+            self.assertEqual(rounded(bulk_users[user_id]["balances"]), rounded(expected["balances"]))
+            self.assertEqual(bulk_users[user_id]["role"], expected["role"])
+            self.assertEqual(len(bulk_users[user_id]["history"]), len(expected["history"]))
+            self.assertEqual(bulk_users[user_id]["version"], 1)
+        for bulk_result, single_result in zip(bulk_results, single):
+            self.assertEqual(bulk_result.get("penalty_value"), single_result.get("penalty_value"))
+            self.assertAlmostEqual(bulk_result["merit_score"], single_result["merit_score"], places=4)
+        self.assertEqual(self.transactions.count_documents({"batch_id": body["batch_id"]}), 5)
+
+    def test_invalid_items_fail_alone(self):
+        response = self.post([
+            {"user_id": "u1", "action": "selfless_service", "role": "learner"},
+            {"user_id": "u1", "action": "unknown_action", "role": "learner"},
+            {"user_id": "u1", "role": "learner"},
+        ])
+        body = response.json()
+        self.assertEqual([r["status"] for r in body["results"]], ["success", "error", "error"])
+        self.assertEqual(body["results"][1]["status_code"], 400)
+        self.assertEqual(body["results"][2]["status_code"], 422)
+        self.assertEqual(len(self.users.find_one({"user_id": "u1"})["history"]), 1)
+
+    def test_conflicting_user_is_retried(self):
+        self.client.post("/log-action/", json={"user_id": "u1", "action": "completing_lessons", "role": "learner"})
+        bulk_write = self.users.bulk_write
+
+        def racing_bulk_write(operations, ordered=True):
+            if len(self.bulk_calls) == 0:
+                # Another versioned writer lands between the batch's read and its update
+                self.users.update_one({"user_id": "u1"}, {"$inc": {"balances.DharmaPoints": 100, "version": 1}})
+            return bulk_write(operations, ordered)
+
+        self.users.bulk_write = racing_bulk_write
+        body = self.post([
+            {"user_id": "u1", "action": "completing_lessons", "role": "learner"},
+            {"user_id": "u2", "action": "completing_lessons", "role": "learner"},
+        ]).json()
+        self.assertEqual(body["succeeded"], 2)
+        self.assertEqual(self.bulk_calls, [2, 1])
+        user = self.users.find_one({"user_id": "u1"})
+        self.assertEqual(user["balances"]["DharmaPoints"], 110)
+        self.assertEqual(len(user["history"]), 2)
+
+    def test_failure_after_a_commit_reports_committed_items(self):
+        self.client.post("/log-action/", json={"user_id": "u1", "action": "completing_lessons", "role": "learner"})
+        bulk_write = self.users.bulk_write
+        find = self.users.find
+
+        def racing_bulk_write(operations, ordered=True):
+            if len(self.bulk_calls) == 0:
+                self.users.update_one({"user_id": "u1"}, {"$inc": {"version": 1}})
+            return bulk_write(operations, ordered)
+
+        def failing_reread(query, *args, **kwargs):
+            # The initial read and the applied check pass; the re-read of the conflicting user fails
+            if self.bulk_calls and "history.batch_id" not in query:
+                raise ConnectionError("mongo down")
+            return find(query, *args, **kwargs)
+
+        self.users.bulk_write = racing_bulk_write
+        with patch.object(self.users, "find", side_effect=failing_reread):
+            response = self.post([
+                {"user_id": "u1", "action": "completing_lessons", "role": "learner"},
+                {"user_id": "u2", "action": "completing_lessons", "role": "learner"},
+            ])
+        self.assertEqual(response.status_code, 200, response.json())
+        body = response.json()
+        self.assertEqual([r["status"] for r in body["results"]], ["error", "success"])
+        self.assertEqual(body["results"][0]["status_code"], 503)
+        # The committed user's transaction is still logged
+        self.assertEqual(self.transactions.count_documents({"batch_id": body["batch_id"], "user_id": "u2"}), 1)
+        self.assertEqual(len(self.users.find_one({"user_id": "u2"})["history"]), 1)
+
+    def test_initial_read_failure_is_503(self):
+        with patch.object(self.users, "find", side_effect=ConnectionError("mongo down")):
+            response = self.post([{"user_id": "u1", "action": "completing_lessons", "role": "learner"}])
+        self.assertEqual(response.status_code, 503)
+
+    def test_rejects_oversized_batch(self):
+        with patch.object(log_action, "LOG_ACTION_BULK_MAX", 1):
+            response = self.post([{"user_id": "u1", "action": "completing_lessons", "role": "learner"}] * 2)
+        self.assertEqual(response.status_code, 413)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Tests for write-behind Q-table persistence
+"""
+
+import unittest
+from unittest.mock import patch
+import mongomock
+import numpy as np
+import utils.qlearning as qlearning
+from config import ACTIONS, ROLE_SEQUENCE
+
+USER = {"user_id": "q_user", "balances": {"DharmaPoints": 10, "SevaPoints": 0, "PunyaTokens": 0}}
+
+class TestQTableWriteBehind(unittest.TestCase):
+
+    def setUp(self):
+        self.collection = mongomock.MongoClient().db.q_table
+        self.users = mongomock.MongoClient().db.users
+        self.patches = [
+            patch.object(qlearning, "qtable_col", self.collection),
+            patch.object(qlearning, "users_col", self.users),
+            patch.object(qlearning, "QTABLE_FLUSH_EVERY", 3),
+            patch.object(qlearning, "QTABLE_FLUSH_INTERVAL_SECONDS", 60)
+        ]
+        for p in self.patches:
+            p.start()
+        qlearning.Q[:] = 0
+        qlearning.Q_LOADED = False
+        qlearning._q_persisted = False
+        qlearning._dirty_cells.clear()
+
+    def tearDown(self):
+        qlearning.flush_q_table(retry=False)
+        for p in reversed(self.patches):
+            p.stop()
+        qlearning.Q[:] = 0
+        qlearning.Q_LOADED = False
+
+    def test_updates_are_buffered_until_flush(self):
+        qlearning.q_learning_step("q_user", "learner", ACTIONS[0], 5, user_doc=USER)
+        self.assertIsNone(self.collection.find_one({}))
+        self.assertEqual(qlearning.flush_q_table(), 1)
+
+        stored = np.array(self.collection.find_one({})["q"])
+        self.assertEqual(stored.shape, (len(ROLE_SEQUENCE), len(ACTIONS)))
+        np.testing.assert_allclose(stored, qlearning.Q)
+
+    def test_later_flushes_set_only_changed_cells(self):
+        qlearning.q_learning_step("q_user", "learner", ACTIONS[0], 5, user_doc=USER)
+        qlearning.flush_q_table()
+        with patch.object(self.collection, "replace_one") as replace_one:
+            for _ in range(3):
+                qlearning.q_learning_step("q_user", "volunteer", ACTIONS[1], 2, user_doc=USER)
+            replace_one.assert_not_called()
+
+        # Three updates of one cell are one dirty cell, below QTABLE_FLUSH_EVERY
+        self.assertEqual(qlearning.flush_q_table(), 1)
+        np.testing.assert_allclose(np.array(self.collection.find_one({})["q"]), qlearning.Q)
+
+    def test_flush_after_n_distinct_cells(self):
+        qlearning.save_q_table()
+        for action in ACTIONS[:3]:
+            qlearning.q_learning_step("q_user", "learner", action, 1, user_doc=USER)
+        self.assertEqual(qlearning._dirty_cells, set())
+        np.testing.assert_allclose(np.array(self.collection.find_one({})["q"]), qlearning.Q)
+
+    def test_failed_flush_keeps_cells(self):
+        qlearning.save_q_table()
+        qlearning.q_learning_step("q_user", "learner", ACTIONS[0], 5, user_doc=USER)
+        with patch.object(self.collection, "update_one", side_effect=RuntimeError("down")):
+            self.assertEqual(qlearning.flush_q_table(retry=False), 0)
+        self.assertEqual(qlearning.flush_q_table(), 1)
+
+    def test_reads_user_when_not_given(self):
+        self.users.insert_one(dict(USER))
+        reward, next_role = qlearning.q_learning_step("q_user", "learner", ACTIONS[0], 5)
+        self.assertEqual(reward, 5)
+        self.assertIn(next_role, ROLE_SEQUENCE)
+
+    def test_loads_stored_table_in_place(self):
+        table = np.arange(len(ROLE_SEQUENCE) * len(ACTIONS), dtype=float).reshape(len(ROLE_SEQUENCE), len(ACTIONS))
+        self.collection.insert_one({"q": table.tolist()})
+        q_ref = qlearning.Q
+        qlearning.load_q_table()
+        self.assertIs(qlearning.Q, q_ref)
+        np.testing.assert_allclose(qlearning.get_q_table(), table)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""
+Tests for lazy token decay
+"""
+
+import unittest
+from types import SimpleNamespace
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+import mongomock
+import utils.tokens as tokens
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+def make_user(**overrides):
+    user = {
+        "user_id": "decay_user",
+        "balances": {"DharmaPoints": 100.0, "SevaPoints": 80.0, "PunyaTokens": 40.0, "AdridhaKarma": 10.0},
+        "token_meta": {"SevaPoints": {"created_at": START}},
+        "last_decay": START
+    }
+    user.update(overrides)
+    return user
+
+def apply_bulk(collection):
+    """mongomock's bulk_write predates current pymongo UpdateOne; apply the operations one by one"""
+    def bulk_write(operations, ordered=True):
+        modified = sum(collection.update_one(op._filter, op._doc).modified_count for op in operations)
+        return SimpleNamespace(modified_count=modified)
+    return bulk_write
+
+class TestLazyDecay(unittest.TestCase):
+
+    def setUp(self):
+        self.users = mongomock.MongoClient().db.users
+        self.users.bulk_write = apply_bulk(self.users)
+        self.patch = patch.object(tokens, "users_col", self.users)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+
+    def test_view_does_not_write(self):
+        self.users.insert_one(make_user())
+        stored = self.users.find_one({"user_id": "decay_user"})
+        view, changed = tokens.decayed_view(stored, START + timedelta(days=30))
+        self.assertTrue(changed)
+        self.assertLess(view["balances"]["SevaPoints"], 80.0)
+        self.assertEqual(self.users.find_one({"user_id": "decay_user"})["balances"]["SevaPoints"], 80.0)
+        # The caller's document is not modified either
+        self.assertEqual(stored["balances"]["SevaPoints"], 80.0)
+
+    def test_view_without_pending_decay_is_a_copy(self):
+        user = make_user()
+        view, changed = tokens.decayed_view(user, START)
+        self.assertFalse(changed)
+        self.assertIsNot(view, user)
+        view["balances"]["SevaPoints"] = 0.0
+        self.assertEqual(user["balances"]["SevaPoints"], 80.0)
+
+    def test_lazy_view_matches_repeated_materialization(self):
+        user = make_user()
+        for day in range(1, 11):
+            user, _ = tokens.decayed_view(user, START + timedelta(days=day))
+        lazy, _ = tokens.decayed_view(make_user(), START + timedelta(days=10))
+        for token, value in user["balances"].items():
+            self.assertAlmostEqual(lazy["balances"][token], value, places=9)
+
+    def test_expiry_applies(self):
+        view, _ = tokens.decayed_view(make_user(), START + timedelta(days=366))
+        self.assertEqual(view["balances"]["SevaPoints"], 0.0)
+
+    def test_naive_mongo_timestamps(self):
+        user = make_user(last_decay=START.replace(tzinfo=None))
+        view, changed = tokens.decayed_view(user, START + timedelta(days=1))
+        self.assertTrue(changed)
+
+    def test_write_path_materializes_once(self):
+        self.users.insert_one(make_user())
+        stored = self.users.find_one({"user_id": "decay_user"})
+        tokens.apply_decay_and_expiry(stored)
+        # A second writer holding the same stale document does not decay twice
+        tokens.apply_decay_and_expiry(stored)
+        after = self.users.find_one({"user_id": "decay_user"})
+        self.assertGreater(after["last_decay"].replace(tzinfo=timezone.utc), START)
+        expected, _ = tokens.decayed_view(make_user(), after["last_decay"].replace(tzinfo=timezone.utc))
+        self.assertAlmostEqual(after["balances"]["SevaPoints"], expected["balances"]["SevaPoints"], places=6)
+
+    def test_bulk_materialization(self):
+        self.users.insert_many([make_user(user_id=f"u{i}") for i in range(5)])
+        self.users.insert_one(make_user(user_id="fresh", last_decay=tokens.now_utc()))
+        self.assertEqual(tokens.materialize_stale_decay(older_than_hours=24, batch_size=2), 5)
+        self.assertEqual(tokens.materialize_stale_decay(older_than_hours=24), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,12 +8,13 @@ Agami Karma represents the karmic results that are queued to manifest in the fut
 import numpy as np
 from datetime import datetime, timezone
 from typing import Dict, List, Any, Optional
-from database import users_col, qtable_col
+from database import users_col
 from utils.karma_schema import get_karma_weights, calculate_weighted_karma_score
 from utils.loka import calculate_net_karma
 from utils.paap import get_total_paap_score
 from utils.merit import compute_user_merit_score, determine_role_from_merit
 from utils.karmic_predictor import karmic_predictor
+from utils.qlearning import get_q_table
 from config import ACTIONS, ROLE_SEQUENCE, REWARD_MAP, ALPHA, GAMMA
 import json
 import os
@@ -100,17 +101,8 @@ class AgamiKarmaPredictor:
         }
     
     def _get_q_table(self) -> np.ndarray:
-        """Get the current Q-table from database"""
-        q_doc = qtable_col.find_one({})
-        if q_doc and "q" in q_doc:
-            try:
-                return np.array(q_doc["q"])
-            except Exception:
-                pass
-        # Return empty Q-table if none found
-        n_states = len(ROLE_SEQUENCE)
-        n_actions = len(ACTIONS)
-        return np.zeros((n_states, n_actions))
+        """Get the current Q-table, including updates not yet flushed to the database"""
+        return get_q_table()
     
     def _predict_from_q_table(self, user_doc: Dict, q_table: np.ndarray, scenario: Optional[Dict] = None) -> Dict[str, Any]:
         """Predict future outcomes based on Q-learning weights"""
@@ -0,0 +1,297 @@
+"""
+Write-behind writer for the karma_events collection.
+
+record() appends the event to a bounded in-memory buffer and to a local spool file,
+then returns; a background thread writes the buffer with insert_many(ordered=False)
+every EVENT_LOG_FLUSH_INTERVAL_SECONDS, or sooner once EVENT_LOG_BATCH_SIZE events
+are pending. The spool holds the events not yet written, so events buffered by a
+process that crashed are replayed by the next one to start. A flush seals the active
+spool file (a rename) and swaps in a fresh one under the buffer lock; the fsync, the
+insert and the removal of sealed files happen outside it, so record() never waits on
+disk or database I/O. Endpoints that read
+karma_events and need their own writes call flush() first.
+"""
+
+import asyncio
+import glob
+import logging
+import os
+import threading
+import uuid
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+from bson import json_util
+from pymongo.errors import BulkWriteError
+import database
+from config import (
+    EVENT_LOG_WRITE_BEHIND, EVENT_LOG_BATCH_SIZE, EVENT_LOG_MAX_BUFFER,
+    EVENT_LOG_FLUSH_INTERVAL_SECONDS, EVENT_LOG_SPOOL_DIR
+)
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class EventLogWriter:
+    """Buffered, spooled karma_events writer"""
+
+    def __init__(
+        self,
+        collection=None,
+        write_behind: bool = EVENT_LOG_WRITE_BEHIND,
+        batch_size: int = EVENT_LOG_BATCH_SIZE,
+        max_buffer: int = EVENT_LOG_MAX_BUFFER,
+        flush_interval: float = EVENT_LOG_FLUSH_INTERVAL_SECONDS,
+        spool_dir: Optional[str] = EVENT_LOG_SPOOL_DIR
+    ):
+        self._collection = collection
+        self.write_behind = write_behind
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+        self.flush_interval = flush_interval
+        self.spool_dir = spool_dir or None
+        self.spool_path = os.path.join(self.spool_dir, f"events-{os.getpid()}.jsonl") if self.spool_dir else None
+
+        self._buffer = deque()
+        self._lock = threading.Lock()          # buffer and spool file
+        self._flush_lock = threading.Lock()    # one insert_many at a time
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._spool = None
+        self._sealed: List[str] = []           # spool files whose events are being (or failed to be) written
+        self._seal_seq = 0
+        self._failing = False
+        self.written = 0
+        self.dropped = 0
+
+    @property
+    def collection(self):
+        return self._collection if self._collection is not None else database.karma_events_col
+
+    # Recording
+
+    def record(self, event: Dict[str, Any]):
+        """Queue one event for karma_events"""
+        self.record_many([event])
+
+    def record_many(self, events: Iterable[Dict[str, Any]]):
+        """Queue events for karma_events; written synchronously when write-behind is off"""
+        events = list(events)
+        for event in events:
+            event.setdefault("event_id", str(uuid.uuid4()))
+        if not events:
+            return
+        if not self.write_behind:
+            self._insert(events)
+            return
+
+        # Before the first append, so a previous run's spool at this path is replayed first
+        self.start()
+        with self._lock:
+            for event in events:
+                if len(self._buffer) >= self.max_buffer:
+                    # Database unreachable for long: keep the newest events
+                    self._buffer.popleft()
+                    self.dropped += 1
+                self._buffer.append(event)
+            self._spool_append(events)
+            pending = len(self._buffer)
+
+        if pending >= self.batch_size:
+            self._wake.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    # Flushing
+
+    def _insert(self, events: List[Dict[str, Any]]):
+        try:
+            self.collection.insert_many(events, ordered=False)
+        except BulkWriteError as e:
+            # Duplicate event_ids were written before a crash or a failed attempt; the rest went in
+            errors = [err for err in e.details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY_ERROR]
+            if errors:
+                raise
+
+    def flush(self) -> int:
+        """Write all buffered events now; returns the number written"""
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._buffer)
+                self._buffer.clear()
+                sealed = self._spool_seal() if batch else None
+            if not batch:
+                return 0
+            self._spool_sync(sealed)
+
+            try:
+                self._insert(batch)
+            except Exception as e:
+                with self._lock:
+                    self._buffer.extendleft(reversed(batch))
+                    while len(self._buffer) > self.max_buffer:
+                        self._buffer.popleft()
+                        self.dropped += 1
+                if not self._failing:
+                    logger.warning(f"Failed to write {len(batch)} karma events; keeping them buffered: {e}")
+                self._failing = True
+                return 0
+
+            # Events of every sealed file were re-buffered into this batch, so all are written
+            self._spool_discard_sealed()
+            if self._failing:
+                logger.info("karma events writes recovered")
+            self._failing = False
+            self.written += len(batch)
+            return len(batch)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"karma events flush failed: {e}")
+
+    # Lifecycle
+
+    def start(self):
+        """Replay orphaned spools and start the background flusher (idempotent)"""
+        if self._thread is not None or not self.write_behind:
+            return
+        with self._flush_lock:
+            if self._thread is not None:
+                return
+            self._replay_spools()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="karma-event-log", daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """Stop the flusher and write what is buffered"""
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            self._wake.set()
+            thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+        with self._lock:
+            if self._spool is not None:
+                self._spool.close()
+                self._spool = None
+            if self.spool_path and not self._buffer and os.path.exists(self.spool_path):
+                os.remove(self.spool_path)
+
+    # Spool
+
+    def _spool_file(self):
+        if self._spool is None:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            self._spool = open(self.spool_path, "a", encoding="utf-8")
+        return self._spool
+
+    def _spool_append(self, events: List[Dict[str, Any]]):
+        if not self.spool_path:
+            return
+        try:
+            spool = self._spool_file()
+            spool.write("".join(json_util.dumps(event) + "\n" for event in events))
+            spool.flush()
+        except OSError as e:
+            logger.warning(f"karma events spool write failed: {e}")
+
+    def _spool_seal(self):
+        """Move the active spool aside (under _lock); returns its still-open handle for syncing"""
+        if not self.spool_path or self._spool is None:
+            return None
+        spool, self._spool = self._spool, None
+        self._seal_seq += 1
+        sealed_path = f"{self.spool_path}.{self._seal_seq}.sealed"
+        try:
+            os.rename(self.spool_path, sealed_path)
+            self._sealed.append(sealed_path)
+        except OSError as e:
+            logger.warning(f"karma events spool seal failed: {e}")
+        return spool
+
+    def _spool_sync(self, spool):
+        """fsync once per flush cycle rather than per event, outside _lock"""
+        if spool is None:
+            return
+        try:
+            os.fsync(spool.fileno())
+        except OSError as e:
+            logger.warning(f"karma events spool sync failed: {e}")
+        finally:
+            spool.close()
+
+    def _spool_discard_sealed(self):
+        sealed, self._sealed = self._sealed, []
+        for path in sealed:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning(f"karma events spool cleanup failed: {e}")
+
+    def _replay_spools(self):
+        """Take over spools left by processes that are no longer running"""
+        if not self.spool_dir:
+            return
+        replayed = 0
+        paths = glob.glob(os.path.join(self.spool_dir, "events-*.jsonl"))
+        paths += glob.glob(os.path.join(self.spool_dir, "events-*.jsonl.*.sealed"))
+        for path in sorted(paths):
+            name = os.path.basename(path)
+            try:
+                pid = int(name[len("events-"):name.index(".jsonl")])
+            except ValueError:
+                continue
+            if pid != os.getpid() and _pid_alive(pid):
+                continue
+            # Claim by renaming, so another starting worker does not replay the same spool
+            claimed = f"{path}.{os.getpid()}.claim"
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue
+            events = []
+            with open(claimed, encoding="utf-8") as spool:
+                for line in spool:
+                    try:
+                        events.append(json_util.loads(line))
+                    except ValueError:
+                        # Torn last line from the crash
+                        logger.warning(f"Skipping unreadable line in {path}")
+            with self._lock:
+                self._buffer.extend(events)
+                self._spool_append(events)
+                if self._spool is not None:
+                    # Durable in this process's spool before the claimed copy goes
+                    try:
+                        os.fsync(self._spool.fileno())
+                    except OSError as e:
+                        logger.warning(f"karma events spool sync failed: {e}")
+            os.remove(claimed)
+            replayed += len(events)
+        if replayed:
+            logger.info(f"Replaying {replayed} spooled karma events")
+
+
+event_log = EventLogWriter()
+
+async def flush_before_read():
+    """Write buffered events first; a FastAPI dependency for endpoints that need read-your-writes"""
+    await asyncio.to_thread(event_log.flush)
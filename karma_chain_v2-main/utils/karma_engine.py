@@ -9,6 +9,192 @@ class KarmaBand(Enum):
     NEUTRAL = "neutral"
     POSITIVE = "positive"
 
+# Behavioral rules: category -> (patterns, flags). Each pattern counts once per
+# non-overlapping match, as re.findall would.
+KARMA_RULES = {
+    "politeness": ([
+        r'\bplease\b',
+        r'\bthank you\b',
+        r'\bthanks\b',
+        r'\bplease\b',
+        r'\bappreciate\b',
+        r'\bgrateful\b',
+        r'\bexcuse me\b',
+        r'\bpardon\b',
+        r'\bsorry\b'
+    ], 0),
+    "thoughtful_question": ([
+        r'\bhow does.*work\b',
+        r'\bwhy.*\b',
+        r'\bcan you explain.*\b',
+        r'\bwhat if.*\b',
+        r'\bhow could.*\b',
+        r'\bcould you elaborate.*\b',
+        r'\bwhat are the.*implications\b',
+        r'\bhow does this relate.*\b',
+        r'\bcan you help me understand.*\b'
+    ], re.IGNORECASE),
+    "respectful_tone": ([
+        r'\bunderstand\b',
+        r'\brespect\b',
+        r'\bagree\b',
+        r'\bvalid point\b',
+        r'\binteresting perspective\b',
+        r'\bhelpful\b',
+        r'\binsightful\b',
+        r'\bconstructive\b'
+    ], re.IGNORECASE),
+    "acknowledging_guidance": ([
+        r'\bthat helped\b',
+        r'\bthanks for the guidance\b',
+        r'\bfollowing your advice\b',
+        r'\bbased on your suggestion\b',
+        r'\bthat makes sense\b',
+        r'\bgood point\b',
+        r'\blearned from\b',
+        r'\bappreciate the clarification\b'
+    ], re.IGNORECASE),
+    "constructive_feedback": ([
+        r'\bthis could be improved by\b',
+        r'\bperhaps you could\b',
+        r'\ba suggestion would be\b',
+        r'\bhere is an alternative\b',
+        r'\bconsider\b',
+        r'\bworth noting\b',
+        r'\badditionally\b'
+    ], re.IGNORECASE),
+    "spam": ([
+        r'\brepeat.*repeat\b',
+        r'\btest\b.*\btest\b.*\btest\b',
+        r'(.)\1{10,}',  # Repeated characters
+        r'\bhello\b.*\bhello\b.*\bhello\b',  # Repeated greetings
+        r'\bcopy\b.*\bcopy\b.*\bcopy\b',  # Repeated words
+    ], re.IGNORECASE),
+    "rudeness": ([
+        r'\bstupid\b',
+        r'\bidiot\b',
+        r'\buseless\b',
+        r'\bworthless\b',
+        r'\bfake\b',
+        r'\blie\b',
+        r'\bdumb\b',
+        r'\bterrible\b',
+        r'\bhorrible\b',
+        r'\bawful\b'
+    ], re.IGNORECASE),
+    "ignoring_guidance": ([
+        r'\bignore.*previous\b',
+        r'\bnever mind.*previous\b',
+        r'\bnever mind.*suggestion\b',
+        r'\bnever mind.*advice\b',
+        r'\bdisregard.*before\b',
+        r'\bforget.*suggestion\b'
+    ], re.IGNORECASE),
+    "unsafe_intent": ([
+        r'\bexploit\b',
+        r'\bmanipulate\b',
+        r'\bgive me.*harmful\b',
+        r'\bgenerate.*harmful\b',
+        r'\bignore.*safety\b',
+        r'\boverride.*rules\b',
+        r'\bbypass.*safety\b',
+        r'\bignore.*guidelines\b'
+    ], re.IGNORECASE),
+}
+
+_COMPILED_RULES = {
+    category: [re.compile(pattern, flags) for pattern in patterns]
+    for category, (patterns, flags) in KARMA_RULES.items()
+}
+
+# \bword phrase\b with no internal regex syntax
+_LITERAL_RULE = re.compile(r'\\b([a-z]+(?: [a-z]+)*)\\b')
+_RULE_ANCHOR = re.compile(r'\\b([a-z]+)')
+_WORD = re.compile(r'\w+')
+
+def _count_rule(category: str, text: str) -> int:
+    """Reference count for one category: a findall per pattern"""
+    return sum(len(pattern.findall(text)) for pattern in _COMPILED_RULES[category])
+
+def _self_overlapping(words: List[str]) -> bool:
+    # "a b a" matches twice in "a b a b a" but findall counts one
+    return any(words[-k:] == words[:k] for k in range(1, len(words)))
+
+class KarmaRuleMatcher:
+    """
+    Counts all KARMA_RULES matches in one pass over the words of a text.
+
+    Literal phrase rules are indexed by their first word; every word in the text is
+    looked up once and the candidate rules starting there are confirmed with an
+    anchored match. Rules with wildcards or backreferences still use findall, but
+    only when the text has a word starting with their leading literal. Counts are
+    identical to running findall for every pattern.
+    """
+
+    def __init__(self, rules: Dict[str, Any] = KARMA_RULES):
+        self.categories = list(rules)
+        self.by_first_word = {}    # word -> [(category, compiled)]
+        self.anchored = {}         # leading literal -> [(category, compiled)]
+        self.unanchored = []       # [(category, compiled)]
+        for category, (patterns, flags) in rules.items():
+            for pattern in patterns:
+                compiled = re.compile(pattern, flags)
+                literal = _LITERAL_RULE.fullmatch(pattern)
+                if literal and not _self_overlapping(literal.group(1).split(" ")):
+                    first_word = literal.group(1).split(" ")[0]
+                    self.by_first_word.setdefault(first_word, []).append((category, compiled))
+                    continue
+                anchor = _RULE_ANCHOR.match(pattern)
+                if anchor:
+                    self.anchored.setdefault(anchor.group(1), []).append((category, compiled))
+                else:
+                    self.unanchored.append((category, compiled))
+        self.all_literals = [rule for rules_ in self.by_first_word.values() for rule in rules_]
+        self.anchor_lengths = sorted({len(anchor) for anchor in self.anchored})
+
+    def count(self, text: str) -> Dict[str, int]:
+        """Match count per category"""
+        counts = dict.fromkeys(self.categories, 0)
+        anchors_seen = set()
+        for word in _WORD.finditer(text):
+            token = word.group()
+            if token.isascii():
+                token = token.lower()
+                candidates = self.by_first_word.get(token, ())
+                for length in self.anchor_lengths:
+                    if token[:length] in self.anchored:
+                        anchors_seen.add(token[:length])
+            else:
+                # Case-insensitive matching folds some non-ASCII letters (ſ, K, ...) to ASCII
+                candidates = self.all_literals
+                anchors_seen.update(self.anchored)
+            for category, compiled in candidates:
+                if compiled.match(text, word.start()):
+                    counts[category] += 1
+
+        for anchor in anchors_seen:
+            for category, compiled in self.anchored[anchor]:
+                counts[category] += len(compiled.findall(text))
+        for category, compiled in self.unanchored:
+            counts[category] += len(compiled.findall(text))
+        return counts
+
+
+rule_matcher = KarmaRuleMatcher()
+
+# (category, detailed_breakdown key, trace label), in scoring order
+_SCORED_RULES = [
+    ("politeness", "politeness", "Politeness"),
+    ("thoughtful_question", "thoughtful_questions", "Thoughtful questions"),
+    ("respectful_tone", "respectful_tone", "Respectful tone"),
+    ("acknowledging_guidance", "acknowledging_guidance", "Acknowledging guidance"),
+    ("constructive_feedback", "constructive_feedback", "Constructive feedback"),
+    ("spam", "spam", "Spam"),
+    ("rudeness", "rudeness", "Rudeness"),
+    ("ignoring_guidance", "ignoring_guidance", "Ignoring guidance"),
+    ("unsafe_intent", "unsafe_intent", "Unsafe intent"),
+]
+
 class KarmaEngine:
     """
     Karma Engine - Computes karma scores based on interaction logs
@@ -73,173 +259,39 @@ class KarmaEngine:
     
     def _detect_politeness(self, text: str) -> int:
         """Detect polite language patterns"""
-        politeness_patterns = [
-            r'\bplease\b',
-            r'\bthank you\b',
-            r'\bthanks\b',
-            r'\bplease\b',
-            r'\bappreciate\b',
-            r'\bgrateful\b',
-            r'\bexcuse me\b',
-            r'\bpardon\b',
-            r'\bsorry\b'
-        ]
-        
-        count = 0
-        for pattern in politeness_patterns:
-            count += len(re.findall(pattern, text))
-        
-        return count * self.positive_weights['politeness']
+        return _count_rule("politeness", text) * self.positive_weights['politeness']
     
     def _detect_thoughtful_questions(self, text: str) -> int:
         """Detect thoughtful questions that show engagement"""
-        # Questions that show deep thinking or learning intent
-        thoughtful_patterns = [
-            r'\bhow does.*work\b',
-            r'\bwhy.*\b',
-            r'\bcan you explain.*\b',
-            r'\bwhat if.*\b',
-            r'\bhow could.*\b',
-            r'\bcould you elaborate.*\b',
-            r'\bwhat are the.*implications\b',
-            r'\bhow does this relate.*\b',
-            r'\bcan you help me understand.*\b'
-        ]
-        
-        count = 0
-        for pattern in thoughtful_patterns:
-            count += len(re.findall(pattern, text, re.IGNORECASE))
-        
-        return count * self.positive_weights['thoughtful_question']
+        return _count_rule("thoughtful_question", text) * self.positive_weights['thoughtful_question']
     
     def _detect_respectful_tone(self, text: str) -> int:
         """Detect respectful communication patterns"""
-        respectful_indicators = [
-            r'\bunderstand\b',
-            r'\brespect\b',
-            r'\bagree\b',
-            r'\bvalid point\b',
-            r'\binteresting perspective\b',
-            r'\bhelpful\b',
-            r'\binsightful\b',
-            r'\bconstructive\b'
-        ]
-        
-        count = 0
-        for pattern in respectful_indicators:
-            count += len(re.findall(pattern, text, re.IGNORECASE))
-        
-        return count * self.positive_weights['respectful_tone']
+        return _count_rule("respectful_tone", text) * self.positive_weights['respectful_tone']
     
     def _detect_acknowledging_guidance(self, text: str) -> int:
         """Detect acknowledgment of previous guidance"""
-        acknowledgment_patterns = [
-            r'\bthat helped\b',
-            r'\bthanks for the guidance\b',
-            r'\bfollowing your advice\b',
-            r'\bbased on your suggestion\b',
-            r'\bthat makes sense\b',
-            r'\bgood point\b',
-            r'\blearned from\b',
-            r'\bappreciate the clarification\b'
-        ]
-        
-        count = 0
-        for pattern in acknowledgment_patterns:
-            count += len(re.findall(pattern, text, re.IGNORECASE))
-        
-        return count * self.positive_weights['acknowledging_guidance']
+        return _count_rule("acknowledging_guidance", text) * self.positive_weights['acknowledging_guidance']
     
     def _detect_constructive_feedback(self, text: str) -> int:
         """Detect constructive feedback"""
-        feedback_indicators = [
-            r'\bthis could be improved by\b',
-            r'\bperhaps you could\b',
-            r'\ba suggestion would be\b',
-            r'\bhere is an alternative\b',
-            r'\bconsider\b',
-            r'\bworth noting\b',
-            r'\badditionally\b'
-        ]
-        
-        count = 0
-        for pattern in feedback_indicators:
-            count += len(re.findall(pattern, text, re.IGNORECASE))
-        
-        return count * self.positive_weights['constructive_feedback']
+        return _count_rule("constructive_feedback", text) * self.positive_weights['constructive_feedback']
     
     def _detect_spam(self, text: str) -> int:
         """Detect spam-like behavior"""
-        spam_indicators = [
-            r'\brepeat.*repeat\b',
-            r'\btest\b.*\btest\b.*\btest\b',
-            r'(.)\1{10,}',  # Repeated characters
-            r'\bhello\b.*\bhello\b.*\bhello\b',  # Repeated greetings
-            r'\bcopy\b.*\bcopy\b.*\bcopy\b',  # Repeated words
-        ]
-        
-        count = 0
-        for pattern in spam_indicators:
-            count += len(re.findall(pattern, text, re.IGNORECASE))
-        
-        return count * self.negative_weights['spam']
+        return _count_rule("spam", text) * self.negative_weights['spam']
     
     def _detect_rudeness(self, text: str) -> int:
         """Detect rude language patterns"""
-        rudeness_patterns = [
-            r'\bstupid\b',
-            r'\bidiot\b',
-            r'\buseless\b',
-            r'\bworthless\b',
-            r'\bfake\b',
-            r'\blie\b',
-            r'\bdumb\b',
-            r'\bterrible\b',
-            r'\bhorrible\b',
-            r'\bawful\b'
-        ]
-        
-        count = 0
-        for pattern in rudeness_patterns:
-            count += len(re.findall(pattern, text, re.IGNORECASE))
-        
-        return count * self.negative_weights['rudeness']
+        return _count_rule("rudeness", text) * self.negative_weights['rudeness']
     
     def _detect_ignoring_guidance(self, text: str) -> int:
         """Detect signs of ignoring previous guidance"""
-        ignore_indicators = [
-            r'\bignore.*previous\b',
-            r'\bnever mind.*previous\b',
-            r'\bnever mind.*suggestion\b',
-            r'\bnever mind.*advice\b',
-            r'\bdisregard.*before\b',
-            r'\bforget.*suggestion\b'
-        ]
-        
-        count = 0
-        for pattern in ignore_indicators:
-            count += len(re.findall(pattern, text, re.IGNORECASE))
-        
-        return count * self.negative_weights['ignoring_guidance']
+        return _count_rule("ignoring_guidance", text) * self.negative_weights['ignoring_guidance']
     
     def _detect_unsafe_intent(self, text: str) -> int:
         """Detect potentially unsafe intent signals"""
-        unsafe_patterns = [
-            r'\bexploit\b',
-            r'\bmanipulate\b',
-            r'\bgive me.*harmful\b',
-            r'\bgenerate.*harmful\b',
-            r'\bignore.*safety\b',
-            r'\boverride.*rules\b',
-            r'\bbypass.*safety\b',
-            r'\bignore.*guidelines\b'
-        ]
-        
-        count = 0
-        for pattern in unsafe_patterns:
-            count += len(re.findall(pattern, text, re.IGNORECASE))
-        
-        return count * self.negative_weights['unsafe_intent']
+        return _count_rule("unsafe_intent", text) * self.negative_weights['unsafe_intent']
     
     def _detect_neutral_factors(self, text: str) -> int:
         """Detect factors that should NOT affect karma (return 0, just for traceability)"""
@@ -324,66 +376,44 @@ class KarmaEngine:
         if not isinstance(interaction_log, list):
             raise ValueError("Interaction log must be a list of entries")
         
-        # Initialize scoring
+        counts = rule_matcher.count(self._extract_text_from_log(interaction_log))
+        return self._score_counts(counts)
+    
+    def compute_karma_batch(self, interaction_logs: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Compute karma for many interaction logs with one engine and the shared compiled rules
+        
+        Args:
+            interaction_logs: List of interaction logs
+            
+        Returns:
+            List of results, in order, identical to compute_karma on each log
+        """
+        for interaction_log in interaction_logs:
+            if not isinstance(interaction_log, list):
+                raise ValueError("Interaction log must be a list of entries")
+        return [
+            self._score_counts(rule_matcher.count(self._extract_text_from_log(interaction_log)))
+            for interaction_log in interaction_logs
+        ]
+    
+    def _score_counts(self, counts: Dict[str, int]) -> Dict[str, Any]:
+        """Score rule match counts from KarmaRuleMatcher"""
         total_score = 50  # Base score of 50
         trace_log = []
+        detailed_breakdown = {}
         
-        # Extract text from log
-        text_content = self._extract_text_from_log(interaction_log)
-        
-        # Apply positive scoring rules
-        politeness_score = self._detect_politeness(text_content)
-        if politeness_score != 0:
-            trace_log.append(f"Politeness detected: {politeness_score}")
-        
-        thoughtful_score = self._detect_thoughtful_questions(text_content)
-        if thoughtful_score != 0:
-            trace_log.append(f"Thoughtful questions detected: {thoughtful_score}")
-        
-        respectful_score = self._detect_respectful_tone(text_content)
-        if respectful_score != 0:
-            trace_log.append(f"Respectful tone detected: {respectful_score}")
-        
-        acknowledgment_score = self._detect_acknowledging_guidance(text_content)
-        if acknowledgment_score != 0:
-            trace_log.append(f"Acknowledging guidance detected: {acknowledgment_score}")
-        
-        feedback_score = self._detect_constructive_feedback(text_content)
-        if feedback_score != 0:
-            trace_log.append(f"Constructive feedback detected: {feedback_score}")
+        # Positive rules first, then negative, in trace order
+        for category, breakdown_key, label in _SCORED_RULES:
+            weights = self.positive_weights if category in self.positive_weights else self.negative_weights
+            score = counts[category] * weights[category]
+            if score != 0:
+                trace_log.append(f"{label} detected: {score}")
+            detailed_breakdown[breakdown_key] = score
+            total_score += score
         
-        # Apply negative scoring rules
-        spam_score = self._detect_spam(text_content)
-        if spam_score != 0:
-            trace_log.append(f"Spam detected: {spam_score}")
-        
-        rudeness_score = self._detect_rudeness(text_content)
-        if rudeness_score != 0:
-            trace_log.append(f"Rudeness detected: {rudeness_score}")
-        
-        ignoring_score = self._detect_ignoring_guidance(text_content)
-        if ignoring_score != 0:
-            trace_log.append(f"Ignoring guidance detected: {ignoring_score}")
-        
-        unsafe_score = self._detect_unsafe_intent(text_content)
-        if unsafe_score != 0:
-            trace_log.append(f"Unsafe intent detected: {unsafe_score}")
-        
-        # Neutral factors (should not affect score, just for traceability)
-        neutral_score = self._detect_neutral_factors(text_content)
-        if neutral_score == 0:  # This is always true since neutral factors don't affect score
-            trace_log.append(f"Neutral factors detected (no score impact): {neutral_score}")
-        
-        # Calculate total score
-        total_score += politeness_score
-        total_score += thoughtful_score
-        total_score += respectful_score
-        total_score += acknowledgment_score
-        total_score += feedback_score
-        total_score += spam_score
-        total_score += rudeness_score
-        total_score += ignoring_score
-        total_score += unsafe_score
+        # Neutral factors never affect the score; recorded for traceability only
+        trace_log.append("Neutral factors detected (no score impact): 0")
         
         # Ensure score stays within reasonable bounds (-100 to 100)
         total_score = max(-100, min(100, total_score))
@@ -391,27 +421,6 @@ class KarmaEngine:
         # Determine karma band
         karma_band = self._determine_karma_band(total_score)
         
-        # Prepare result
-        result = {
-            "karma_score": total_score,
-            "karma_band": karma_band.value,
-            "traceability": {
-                "base_score": 50,
-                "factors_applied": trace_log,
-                "detailed_breakdown": {
-                    "politeness": politeness_score,
-                    "thoughtful_questions": thoughtful_score,
-                    "respectful_tone": respectful_score,
-                    "acknowledging_guidance": acknowledgment_score,
-                    "constructive_feedback": feedback_score,
-                    "spam": spam_score,
-                    "rudeness": rudeness_score,
-                    "ignoring_guidance": ignoring_score,
-                    "unsafe_intent": unsafe_score
-                }
-            }
-        }
-        
         # In constraint-only mode, only return basic information without detailed explanations
         if self.constraint_only_mode:
             return {
@@ -419,7 +428,15 @@ class KarmaEngine:
                 "karma_band": karma_band.value
             }
         
-        return result
+        return {
+            "karma_score": total_score,
+            "karma_band": karma_band.value,
+            "traceability": {
+                "base_score": 50,
+                "factors_applied": trace_log,
+                "detailed_breakdown": detailed_breakdown
+            }
+        }
     
     def _determine_karma_band(self, score: int) -> KarmaBand:
         """Determine the karma band based on the score"""
@@ -452,6 +469,24 @@ def compute_karma(interaction_log: List[Dict[str, Any]]) -> Dict[str, Any]:
     }
 
 
+def compute_karma_batch(interaction_logs: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Compute karma for many interaction logs in one call
+    
+    Args:
+        interaction_logs: List of interaction logs
+        
+    Returns:
+        List of dicts with karma_score and karma_band, in input order,
+        identical to calling compute_karma on each log
+    """
+    engine = KarmaEngine()
+    return [
+        {"karma_score": result["karma_score"], "karma_band": result["karma_band"]}
+        for result in engine.compute_karma_batch(interaction_logs)
+    ]
+
+
 def evaluate_action_karma(user: Dict[str, Any], action: str, intensity: float = 1.0) -> Dict[str, Any]:
     """Evaluate the karmic impact of an action."""
     # Extract interaction log from user if available, otherwise create a simple log
@@ -57,7 +57,7 @@ class KarmaLifecycleEngine:
         # Update the user's Prarabdha karma
         users_col.update_one(
             {"user_id": user_id},
-            {"$set": {"balances.PrarabdhaKarma": new_prarabdha}}
+            {"$set": {"balances.PrarabdhaKarma": new_prarabdha}, "$inc": {"version": 1}}
         )
         
         # Emit prarabdha update to Sovereign Core for authorization
@@ -21,7 +21,7 @@ except ImportError:
     mdates = None
 
 from database import karma_events_col, users_col
-from utils.karma_engine import compute_karma
+from utils.karma_engine import compute_karma_batch
 import logging
 
 # Setup logging
@@ -399,12 +399,9 @@ class KarmicAnalytics:
         sample_users = list(users_col.find().limit(10))
         avg_net_karma = 0.0
         if sample_users:
-            # Extract interaction logs from users and compute karma
-            net_karmas = []
-            for user in sample_users:
-                interaction_log = user.get("interaction_log", [])
-                karma_result = compute_karma(interaction_log)
-                net_karmas.append(karma_result.get("karma_score", 0))
+            # Extract interaction logs from users and compute karma in one batch
+            interaction_logs = [user.get("interaction_log", []) for user in sample_users]
+            net_karmas = [result.get("karma_score", 0) for result in compute_karma_batch(interaction_logs)]
             if net_karmas:
                 avg_net_karma = sum(float(k) if isinstance(k, (int, float)) else 0.0 for k in net_karmas) / len(net_karmas)
         
@@ -157,7 +157,8 @@ def apply_rebirth(user_id, carryover):
                 "rebirth_count": user.get("rebirth_count", 0) + 1,
                 "last_rebirth": {"timestamp": datetime.now(timezone.utc), "carryover": carryover}
             },
-            "$unset": {"atonement_plans": ""}  # Clear atonement plans
+            "$unset": {"atonement_plans": ""},  # Clear atonement plans
+            "$inc": {"version": 1}
         }
     )
     
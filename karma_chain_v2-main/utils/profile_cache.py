@@ -0,0 +1,88 @@
+"""
+Short-lived cache of computed karma profiles for GET /karma/{user_id}.
+
+Profile reads far outnumber writes, so a profile is computed once and served from
+memory for KARMA_PROFILE_CACHE_TTL_SECONDS. Write paths in this process call
+invalidate(user_id) once their updates are applied; writes made elsewhere (other
+workers, schedulers) become visible when the entry expires.
+
+A read that started before an invalidation must not store what it computed: get()
+returns a token that put() checks against the user's invalidation generation.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+from config import KARMA_PROFILE_CACHE_TTL_SECONDS, KARMA_PROFILE_CACHE_MAX_ENTRIES
+
+class ProfileCache:
+    """Per-process TTL cache keyed by user_id, bounded LRU"""
+
+    def __init__(
+        self,
+        ttl_seconds: float = KARMA_PROFILE_CACHE_TTL_SECONDS,
+        max_entries: int = KARMA_PROFILE_CACHE_MAX_ENTRIES
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # user_id -> [generation, expires_at, profile]; profile None after invalidation
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def get(self, user_id: str) -> Tuple[Optional[Any], int]:
+        """Return (cached profile or None, token for put)"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self.misses += 1
+                return None, 0
+            generation, expires_at, profile = entry
+            if profile is None or expires_at <= time.monotonic():
+                self.misses += 1
+                return None, generation
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return profile, generation
+
+    def put(self, user_id: str, profile: Any, token: int):
+        """Store a profile computed after get() returned token, unless the user was written since"""
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._entries.get(user_id)
+            generation = entry[0] if entry is not None else 0
+            if generation != token:
+                return
+            self._entries[user_id] = [generation, time.monotonic() + self.ttl_seconds, profile]
+            self._entries.move_to_end(user_id)
+            self._evict()
+
+    def invalidate(self, user_id: str):
+        """Drop the user's profile; call after the user's writes are applied"""
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._entries.get(user_id)
+            generation = entry[0] + 1 if entry is not None else 1
+            # Kept as a marker so in-flight reads of the old state are not stored
+            self._entries[user_id] = [generation, 0.0, None]
+            self._entries.move_to_end(user_id)
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+profile_cache = ProfileCache()
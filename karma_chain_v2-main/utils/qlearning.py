@@ -1,73 +1,167 @@
+import atexit
 import datetime
+import logging
+import threading
 import numpy as np
 from database import qtable_col, users_col
-from config import ACTIONS, ROLE_SEQUENCE, ALPHA, GAMMA, REWARD_MAP, CHEAT_PUNISHMENT_LEVELS, ATONEMENT_REWARDS
+from config import (
+    ACTIONS, ROLE_SEQUENCE, ALPHA, GAMMA, REWARD_MAP, CHEAT_PUNISHMENT_LEVELS, ATONEMENT_REWARDS,
+    QTABLE_FLUSH_EVERY, QTABLE_FLUSH_INTERVAL_SECONDS
+)
 from utils.merit import determine_role_from_merit
 
+logger = logging.getLogger(__name__)
+
 states = ROLE_SEQUENCE[:]
 n_states = len(states)
 n_actions = len(ACTIONS)
+# Q is updated in place (never rebound) so modules importing it see every update
 Q = np.zeros((n_states, n_actions))
 Q_LOADED = False
 
+# Write-behind state: cells changed since the last flush, guarded by _q_lock
+_q_lock = threading.RLock()
+_dirty_cells = set()
+_q_persisted = False
+_flush_timer = None
+
 def load_q_table():
     """Lazy-load Q-table from MongoDB with timeout handling"""
-    global Q, Q_LOADED
+    global Q_LOADED, _q_persisted
     if Q_LOADED:
         return
     
+    with _q_lock:
+        if Q_LOADED:
+            return
+        try:
+            q_doc = qtable_col.find_one({}, max_time_ms=2000)  # 2 second timeout
+            if q_doc and "q" in q_doc:
+                try:
+                    stored = np.array(q_doc["q"], dtype=float)
+                    if stored.shape == (n_states, n_actions):
+                        Q[:] = stored
+                        _q_persisted = True
+                    else:
+                        logger.warning(f"Q-table shape mismatch: expected {(n_states, n_actions)}, got {stored.shape}; resetting")
+                except Exception as e:
+                    logger.warning(f"Error restoring Q-table: {e}; resetting")
+            else:
+                logger.info(f"No Q-table found in DB; starting with shape {(n_states, n_actions)}")
+        except Exception as e:
+            logger.warning(f"MongoDB timeout loading Q-table: {e}. Using empty Q-table.")
+        Q_LOADED = True
+
+def get_q_table() -> np.ndarray:
+    """Current Q-table (including unflushed updates) as a copy"""
+    load_q_table()
+    with _q_lock:
+        return Q.copy()
+
+def save_q_table():
+    """Write the whole Q-table document"""
+    global _q_persisted
+    with _q_lock:
+        q_values = Q.tolist()
+        cells = set(_dirty_cells)
+        _dirty_cells.clear()
+    try:
+        # Use timezone-aware datetime (fix for Python 3.12+)
+        qtable_col.replace_one({}, {"q": q_values, "updated_at": datetime.datetime.now(datetime.timezone.utc)}, upsert=True)
+    except Exception:
+        with _q_lock:
+            _dirty_cells.update(cells)
+        raise
+    _q_persisted = True
+
+def flush_q_table(retry: bool = True) -> int:
+    """
+    Persist cells changed since the last flush with a targeted $set.
+
+    The first flush without a stored table writes the whole document. Returns the number of
+    cells written; on failure the cells stay dirty and, with retry, a later flush is scheduled.
+    """
+    global _flush_timer
+    with _q_lock:
+        if _flush_timer is not None:
+            _flush_timer.cancel()
+            _flush_timer = None
+        cells = sorted(_dirty_cells)
+        if not cells:
+            return 0
+        update = None
+        if _q_persisted:
+            update = {f"q.{s}.{a}": float(Q[s, a]) for s, a in cells}
+            update["updated_at"] = datetime.datetime.now(datetime.timezone.utc)
+            _dirty_cells.clear()
+
     try:
-        q_doc = qtable_col.find_one({}, maxTimeMS=2000)  # 2 second timeout
-        if q_doc and "q" in q_doc:
-            try:
-                Q = np.array(q_doc["q"])
-                if Q.shape != (n_states, n_actions):
-                    print(f"DEBUG: Q-table shape mismatch. Expected {(n_states, n_actions)}, got {Q.shape}. Resetting.")
-                    Q = np.zeros((n_states, n_actions))
-            except Exception as e:
-                print(f"DEBUG: Error restoring Q-table: {e}. Resetting.")
-                Q = np.zeros((n_states, n_actions))
+        if update is None:
+            save_q_table()
         else:
-            print(f"DEBUG: No Q-table found in DB. Creating new one with shape {(n_states, n_actions)}")
-        Q_LOADED = True
+            qtable_col.update_one({}, {"$set": update})
     except Exception as e:
-        print(f"WARNING: MongoDB timeout loading Q-table: {e}. Using empty Q-table.")
-        Q = np.zeros((n_states, n_actions))
-        Q_LOADED = True
+        logger.error(f"Q-table flush failed, {len(cells)} cells kept for retry: {e}")
+        with _q_lock:
+            _dirty_cells.update(cells)
+        if retry:
+            _schedule_flush()
+        return 0
+    logger.debug("q_table_flush cells=%d full=%s", len(cells), update is None)
+    return len(cells)
 
-def save_q_table():
-    # Use timezone-aware datetime (fix for Python 3.12+)
-    qtable_col.replace_one({}, {"q": Q.tolist(), "updated_at": datetime.datetime.now(datetime.timezone.utc)}, upsert=True)
+def _schedule_flush():
+    global _flush_timer
+    with _q_lock:
+        if _flush_timer is None:
+            _flush_timer = threading.Timer(QTABLE_FLUSH_INTERVAL_SECONDS, flush_q_table)
+            _flush_timer.daemon = True
+            _flush_timer.start()
+
+def _update_q(s: int, a: int, reward: float, next_state: int) -> float:
+    """Apply one Q-learning update and queue the changed cell for write-behind"""
+    with _q_lock:
+        Q[s, a] = Q[s, a] + ALPHA * (reward + GAMMA * float(np.max(Q[next_state])) - Q[s, a])
+        _dirty_cells.add((s, a))
+        value = float(Q[s, a])
+        flush_now = len(_dirty_cells) >= QTABLE_FLUSH_EVERY
+    if flush_now:
+        flush_q_table()
+    else:
+        _schedule_flush()
+    return value
+
+# Unflushed cells are written on interpreter exit as well as on app shutdown
+atexit.register(flush_q_table, retry=False)
 
-def q_learning_step(user_id: str, state: str, action: str, reward: float):
+def q_learning_step(user_id: str, state: str, action: str, reward: float, user_doc: dict = None):
+    """
+    Apply a Q-learning update for a user's action and predict their next role.
+
+    Args:
+        user_doc: The caller's copy of the user document; read from MongoDB when omitted
+    """
     load_q_table()  # Lazy-load Q-table on first use
-    print(f"DEBUG q_learning_step: user_id={user_id}, state={state}, action={action}, reward={reward}")
     
     # Ensure state is valid
     if state not in states:
         state = states[0]  # Default to first state if invalid
     s = states.index(state)
-    print(f"DEBUG: state={state}, s={s}")
     
     # Ensure action is valid
     if action not in ACTIONS:
         # Handle unknown action gracefully
-        print(f"DEBUG: action {action} not in ACTIONS")
+        logger.debug("q_learning_step unknown_action=%s user_id=%s", action, user_id)
         return reward, state
     a = ACTIONS.index(action)
-    print(f"DEBUG: action={action}, a={a}")
 
-    user_doc = users_col.find_one({"user_id": user_id})
+    if user_doc is None:
+        user_doc = users_col.find_one({"user_id": user_id}, {"balances": 1})
     if not user_doc:
-        print(f"DEBUG: user {user_id} not found")
+        logger.debug("q_learning_step user_not_found user_id=%s", user_id)
         return reward, state
 
-    print(f"DEBUG: user_doc={user_doc}")
-    print(f"DEBUG: user_doc.balances type={type(user_doc.get('balances'))}")
-    print(f"DEBUG: user_doc.balances={user_doc.get('balances')}")
-    
-    temp_balances = user_doc["balances"].copy()
-    print(f"DEBUG: temp_balances={temp_balances}")
+    temp_balances = dict(user_doc.get("balances") or {})
     
     # Get the appropriate token for the action
     if action == "cheat":
@@ -81,32 +175,24 @@ def q_learning_step(user_id: str, state: str, action: str, reward: float):
             # Default token if action not found
             token = "DharmaPoints"
     
-    print(f"DEBUG: token={token}")
-    
     # Update the correct token balance
     current_balance = temp_balances.get(token, 0)
     # Ensure the current balance is a number, not a dict
     if isinstance(current_balance, dict):
         current_balance = 0
     temp_balances[token] = current_balance + reward
-    print(f"DEBUG: current_balance={current_balance}, new balance={temp_balances[token]}")
 
     estimated_merit = temp_balances.get("DharmaPoints", 0) * 1.0 + temp_balances.get("SevaPoints", 0) * 1.2 + temp_balances.get("PunyaTokens", 0) * 3.0
-    print(f"DEBUG: estimated_merit={estimated_merit}")
     next_role = determine_role_from_merit(estimated_merit)
-    print(f"DEBUG: next_role={next_role}")
     
     # Check if next_role is in states before calling index
-    if next_role not in states:
-        print(f"DEBUG: next_role {next_role} not in states {states}")
-        next_state = 0  # Default to first state
-    else:
-        next_state = states.index(next_role)
-    print(f"DEBUG: next_state={next_state}")
+    next_state = states.index(next_role) if next_role in states else 0
 
-    print(f"DEBUG: Q.shape={Q.shape}, s={s}, a={a}, next_state={next_state}")
-    Q[s, a] = Q[s, a] + ALPHA * (reward + GAMMA * float(np.max(Q[next_state])) - Q[s, a])
-    save_q_table()
+    q_value = _update_q(s, a, reward, next_state)
+    logger.debug(
+        "q_learning_step user_id=%s state=%s action=%s reward=%s next_role=%s q=%.4f",
+        user_id, state, action, reward, next_role, q_value
+    )
     
     # Return the reward and the next role as expected
     return reward, next_role
@@ -169,8 +255,7 @@ def atonement_q_learning_step(user_id: str, severity_class: str):
         a = ACTIONS.index(atonement_action)
         
         # Update Q-table with positive reinforcement for atonement
-        Q[s, a] = Q[s, a] + ALPHA * (reward_value + GAMMA * float(np.max(Q[next_state])) - Q[s, a])
-        save_q_table()
+        _update_q(s, a, reward_value, next_state)
     
     # Update user's balance with the reward
     if token.startswith("PaapTokens."):
@@ -178,13 +263,13 @@ def atonement_q_learning_step(user_id: str, severity_class: str):
         paap_severity = token.split(".")[1]
         users_col.update_one(
             {"user_id": user_id},
-            {"$inc": {f"balances.PaapTokens.{paap_severity}": reward_value}}
+            {"$inc": {f"balances.PaapTokens.{paap_severity}": reward_value, "version": 1}}
         )
     else:
         # Handle regular tokens
         users_col.update_one(
             {"user_id": user_id},
-            {"$inc": {f"balances.{token}": reward_value}}
+            {"$inc": {f"balances.{token}": reward_value, "version": 1}}
         )
     
     return reward_value, next_role
\ No newline at end of file
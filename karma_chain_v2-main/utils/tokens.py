@@ -1,15 +1,19 @@
-from datetime import datetime, timezone
+import asyncio
+import logging
+from datetime import datetime, timezone, timedelta
+from pymongo import UpdateOne
 from database import users_col
 from config import TOKEN_ATTRIBUTES
-from datetime import datetime
+
+logger = logging.getLogger(__name__)
 
 
 class TokenManager:
     """Manages token operations for the karma system"""
-    
+
     def __init__(self):
         pass
-    
+
     @staticmethod
     def apply_decay_and_expiry(user_doc):
         return apply_decay_and_expiry(user_doc)
@@ -18,16 +22,35 @@ class TokenManager:
 def now_utc():
     return datetime.now(timezone.utc)
 
-def apply_decay_and_expiry(user_doc):
-    last_decay = user_doc.get("last_decay", now_utc())
-    if isinstance(last_decay, str):
-        last_decay = datetime.fromisoformat(last_decay)
-    delta_days = (now_utc() - last_decay).total_seconds() / 86400.0
-    if delta_days <= 0:
-        return user_doc
+def _as_utc(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    # MongoDB returns naive datetimes that are UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+def decayed_view(user_doc, now=None):
+    """
+    Balances with decay and expiry evaluated lazily from the stored last_decay, without writing.
 
-    balances = user_doc["balances"]
-    meta = user_doc.get("token_meta", {})
+    Decay compounds per day, so evaluating from last_decay gives the same balances as having
+    materialized at every intermediate read. Returns (view, changed): view is a copy of
+    user_doc with its own balances and token_meta, also when nothing was due, so callers may
+    change them without touching user_doc.
+    """
+    now = now or now_utc()
+    balances = dict(user_doc["balances"])
+    meta = {token: dict(values) for token, values in user_doc.get("token_meta", {}).items()}
+    # A user never materialized starts decaying now (expiry still applies)
+    delta_days = 0.0
+    if "last_decay" in user_doc:
+        delta_days = (now - _as_utc(user_doc["last_decay"])).total_seconds() / 86400.0
+        if delta_days <= 0:
+            view = {**user_doc, "balances": balances}
+            if "token_meta" in user_doc:
+                view["token_meta"] = meta
+            return view, False
 
     for token, attrs in TOKEN_ATTRIBUTES.items():
         decay_rate = attrs.get("daily_decay", 0.0)
@@ -35,23 +58,65 @@ def apply_decay_and_expiry(user_doc):
             decayed = balances[token] * ((1 - decay_rate) ** delta_days)
             balances[token] = max(decayed, 0.0)
 
-        created = meta.get(token, {}).get("created_at", now_utc())
-        if isinstance(created, str):
-            created = datetime.fromisoformat(created)
+        created = meta.get(token, {}).get("created_at", now)
+        created = _as_utc(created)
         expiry_days = attrs.get("expiry_days", None)
         if expiry_days:
-            if (now_utc() - created).days >= expiry_days:
+            if (now - created).days >= expiry_days:
                 balances[token] = 0.0
 
-        meta.setdefault(token, {})["last_update"] = now_utc()
+        meta.setdefault(token, {})["last_update"] = now
+
+    return {**user_doc, "balances": balances, "token_meta": meta, "last_decay": now}, True
+
+def _materialize_update(original, view):
+    """Conditional update: skipped if another writer materialized since original was read"""
+    return (
+        {"user_id": original["user_id"], "last_decay": original.get("last_decay", {"$exists": False})},
+        {"$set": {
+            "balances": view["balances"],
+            "token_meta": view["token_meta"],
+            "last_decay": view["last_decay"]
+        }, "$inc": {"version": 1}}
+    )
+
+def apply_decay_and_expiry(user_doc):
+    """
+    Materialize decay and expiry into the user document; call on write paths only.
+    Read paths use decayed_view, which never writes.
+    """
+    view, changed = decayed_view(user_doc)
+    if changed:
+        users_col.update_one(*_materialize_update(user_doc, view))
+    return view
 
-    user_doc["balances"] = balances
-    user_doc["token_meta"] = meta
-    user_doc["last_decay"] = now_utc()
+def materialize_stale_decay(older_than_hours: float = 24, batch_size: int = 500) -> int:
+    """Bulk job: persist decay for users not materialized in older_than_hours; returns users updated"""
+    now = now_utc()
+    cutoff = now - timedelta(hours=older_than_hours)
+    cursor = users_col.find(
+        {"last_decay": {"$lt": cutoff}},
+        {"user_id": 1, "balances": 1, "token_meta": 1, "last_decay": 1}
+    )
+    updated = 0
+    operations = []
+    for user_doc in cursor:
+        view, changed = decayed_view(user_doc, now)
+        if changed:
+            operations.append(UpdateOne(*_materialize_update(user_doc, view)))
+        if len(operations) >= batch_size:
+            updated += users_col.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        updated += users_col.bulk_write(operations, ordered=False).modified_count
+    logger.info(f"Materialized token decay for {updated} users")
+    return updated
 
-    users_col.update_one({"user_id": user_doc["user_id"]}, {"$set": {
-        "balances": balances,
-        "token_meta": meta,
-        "last_decay": user_doc["last_decay"]
-    }})
-    return user_doc
+async def run_decay_materializer(interval_hours: float):
+    """Background loop running materialize_stale_decay every interval_hours"""
+    while True:
+        await asyncio.sleep(interval_hours * 3600)
+        try:
+            await asyncio.to_thread(materialize_stale_decay, interval_hours)
+        except Exception as e:
+            logger.error(f"Token decay materialization failed: {e}")
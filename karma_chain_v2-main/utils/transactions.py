@@ -7,7 +7,7 @@ logger = logging.getLogger(__name__)
 def now_utc():
     return datetime.now(timezone.utc)
 
-def log_transaction(user_id, action, reward, intent, reward_tier, punishment_name=None):
+def build_transaction(user_id, action, reward, intent, reward_tier, punishment_name=None):
     tx = {
         "user_id": user_id,
         "action": action,
@@ -20,6 +20,10 @@ def log_transaction(user_id, action, reward, intent, reward_tier, punishment_nam
     # Add punishment name if provided (for cheat transactions)
     if punishment_name:
         tx["punishment_name"] = punishment_name
+    return tx
+
+def log_transaction(user_id, action, reward, intent, reward_tier, punishment_name=None):
+    tx = build_transaction(user_id, action, reward, intent, reward_tier, punishment_name)
     
     try:
         transactions_col.insert_one(tx)
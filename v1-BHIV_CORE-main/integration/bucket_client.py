@@ -2,24 +2,65 @@
 BHIV Core → Bucket Integration Client
 Non-invasive, fire-and-forget communication to Bucket
 Core continues normally even if Bucket is offline
+Events are buffered and sent to /core/write-events in batches (flushed by size or age)
+A batch Bucket cannot take right now (429, 5xx, unreachable) goes back into the buffer and is
+retried after Retry-After (or retry_backoff_seconds); a rejected batch (other 4xx) is dropped and counted
 """
 
 import asyncio
 import json
+import os
 import aiohttp
-from typing import Dict, Any, Optional
+from collections import deque
+from typing import Dict, Any, List, Optional
 from datetime import datetime, timezone
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+BUCKET_BATCH_CONFIG = {
+    "batch_size": int(os.getenv("BUCKET_BATCH_SIZE", "50")),
+    "flush_interval_seconds": float(os.getenv("BUCKET_FLUSH_INTERVAL_SECONDS", "0.5")),
+    "max_buffered_events": int(os.getenv("BUCKET_MAX_BUFFERED_EVENTS", "10000")),
+    # Wait before resending a batch Bucket could not take, unless it answers with Retry-After
+    "retry_backoff_seconds": float(os.getenv("BUCKET_RETRY_BACKOFF_SECONDS", "5"))
+}
+
+def _retry_after(value: Optional[str], default: float) -> float:
+    """Retry-After in seconds (the delta-seconds form); default when absent or a date"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return default
+
 class BucketClient:
     """Fire-and-forget client for Core → Bucket communication"""
     
-    def __init__(self, bucket_url: str = "http://localhost:8001"):
+    def __init__(
+        self,
+        bucket_url: str = "http://localhost:8001",
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_buffered_events: Optional[int] = None,
+        retry_backoff: Optional[float] = None
+    ):
         self.bucket_url = bucket_url.rstrip('/')
         self.session = None
         self.enabled = True
+        # batch_size 1 sends every event on its own, as before
+        self.batch_size = batch_size or BUCKET_BATCH_CONFIG["batch_size"]
+        self.flush_interval = flush_interval if flush_interval is not None else BUCKET_BATCH_CONFIG["flush_interval_seconds"]
+        self.max_buffered_events = max_buffered_events or BUCKET_BATCH_CONFIG["max_buffered_events"]
+        self.retry_backoff = retry_backoff if retry_backoff is not None else BUCKET_BATCH_CONFIG["retry_backoff_seconds"]
+        # Oldest events fall off the left when the buffer is full
+        self._buffer: deque = deque(maxlen=self.max_buffered_events)
+        self._flush_timer: Optional[asyncio.Task] = None
+        self._pending: set = set()
+        # Loop time before which batches are not sent (Bucket asked to back off)
+        self._retry_at = 0.0
+        # Cleared when Bucket answers 404 on /core/write-events (older Bucket)
+        self.batch_supported = True
+        self.stats = {"events_buffered": 0, "batches_sent": 0, "events_requeued": 0, "events_dropped": 0}
         
     async def _get_session(self):
         """Get or create aiohttp session"""
@@ -37,21 +78,105 @@ class BucketClient:
             return False
             
         try:
-            session = await self._get_session()
-            
             # Add Core metadata
             payload = {
                 "requester_id": "bhiv_core",
                 "event_data": event_data
             }
-            
-            # Fire and forget - don't wait for response
-            asyncio.create_task(self._send_async(session, "/core/write-event", payload))
+
+            if len(self._buffer) == self.max_buffered_events:
+                # Bucket is not keeping up; the append drops the oldest rather than grow without bound
+                self.stats["events_dropped"] += 1
+            self._buffer.append(payload)
+            self.stats["events_buffered"] += 1
+
+            # Fire and forget - don't wait for response; while backing off, the timer sends
+            if len(self._buffer) >= self.batch_size and not self._backing_off():
+                self._spawn(self.flush())
+            elif self._flush_timer is None:
+                self._flush_timer = asyncio.create_task(self._flush_later(self._flush_delay()))
             return True
             
         except Exception as e:
             logger.debug(f"Bucket write failed (continuing normally): {e}")
             return False
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def _backing_off(self) -> bool:
+        return asyncio.get_running_loop().time() < self._retry_at
+
+    def _flush_delay(self) -> float:
+        return max(self.flush_interval, self._retry_at - asyncio.get_running_loop().time())
+
+    async def _flush_later(self, delay: float):
+        try:
+            await asyncio.sleep(delay)
+            self._flush_timer = None
+            await self.flush()
+        except asyncio.CancelledError:
+            pass
+
+    def _requeue(self, batch: List[Dict[str, Any]], retry_after: float):
+        """Put an unsent batch back ahead of newer events and retry it after retry_after seconds"""
+        events = batch + list(self._buffer)
+        overflow = max(0, len(events) - self.max_buffered_events)
+        self._buffer = deque(events[overflow:], maxlen=self.max_buffered_events)
+        self.stats["events_requeued"] += len(batch) - overflow
+        self.stats["events_dropped"] += overflow
+        self._retry_at = asyncio.get_running_loop().time() + retry_after
+        if self._flush_timer is None:
+            self._flush_timer = asyncio.create_task(self._flush_later(retry_after))
+
+    async def flush(self) -> int:
+        """Send all buffered events now; returns the number of events sent"""
+        if self._flush_timer is not None and self._flush_timer is not asyncio.current_task():
+            self._flush_timer.cancel()
+        self._flush_timer = None
+        if not self._buffer:
+            return 0
+        batch = list(self._buffer)
+        self._buffer.clear()
+
+        try:
+            session = await self._get_session()
+            if len(batch) == 1 or not self.batch_supported:
+                await asyncio.gather(*(self._send_async(session, "/core/write-event", p) for p in batch))
+                return len(batch)
+
+            body = "\n".join(json.dumps(p, default=str) for p in batch)
+            async with session.post(
+                f"{self.bucket_url}/core/write-events",
+                data=body.encode("utf-8"),
+                headers={"Content-Type": "application/x-ndjson", "X-Client-ID": "bhiv_core"}
+            ) as response:
+                if response.status == 404:
+                    self.batch_supported = False
+                    logger.info("Bucket has no /core/write-events - sending events individually")
+                    await asyncio.gather(*(self._send_async(session, "/core/write-event", p) for p in batch))
+                elif response.status == 429 or response.status >= 500:
+                    retry_after = _retry_after(response.headers.get("Retry-After"), self.retry_backoff)
+                    logger.info(f"Bucket answered {response.status} to a batch of {len(batch)} events; retrying in {retry_after}s")
+                    self._requeue(batch, retry_after)
+                    return 0
+                elif response.status >= 400:
+                    # Not retryable as is (e.g. 413 when a batch exceeds Bucket's core_write burst)
+                    self.stats["events_dropped"] += len(batch)
+                    logger.warning(
+                        f"Bucket rejected a batch of {len(batch)} events with {response.status}; dropped "
+                        f"(lower BUCKET_BATCH_SIZE if this is 413)"
+                    )
+                    return 0
+            self._retry_at = 0.0
+            self.stats["batches_sent"] += 1
+            return len(batch)
+        except Exception as e:
+            logger.debug(f"Bucket batch write failed, retrying later (continuing normally): {e}")
+            self._requeue(batch, self.retry_backoff)
+            return 0
     
     async def write_rl_outcome(self, agent_id: str, reward: float, metadata: Dict = None) -> bool:
         """Write RL outcome to Bucket"""
@@ -86,7 +211,8 @@ class BucketClient:
             
             async with session.get(
                 f"{self.bucket_url}/core/read-context",
-                params={"agent_id": agent_id, "requester_id": "bhiv_core"}
+                params={"agent_id": agent_id, "requester_id": "bhiv_core"},
+                headers={"X-Client-ID": "bhiv_core"}
             ) as response:
                 if response.status == 200:
                     data = await response.json()
@@ -103,7 +229,7 @@ class BucketClient:
             async with session.post(
                 f"{self.bucket_url}{endpoint}",
                 json=payload,
-                headers={"Content-Type": "application/json"}
+                headers={"Content-Type": "application/json", "X-Client-ID": "bhiv_core"}
             ) as response:
                 # Don't wait for or process response
                 pass
@@ -112,7 +238,18 @@ class BucketClient:
             pass
     
     async def close(self):
-        """Clean up session"""
+        """Flush buffered events and clean up session"""
+        await self.flush()
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if self._buffer:
+            # The final flush was not accepted; nothing will retry it
+            self.stats["events_dropped"] += len(self._buffer)
+            logger.warning(f"{len(self._buffer)} events not delivered to Bucket before shutdown")
+            self._buffer.clear()
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
         if self.session:
             await self.session.close()
             self.session = None
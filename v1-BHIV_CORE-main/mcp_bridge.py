@@ -714,6 +714,11 @@ async def handle_task_request(payload: TaskPayload) -> dict:
             pass
         return {"task_id": task_id, "agent_output": error_output, "status": "error"}
 
+@app.on_event("shutdown")
+async def flush_bucket_events():
+    """Send events still buffered for Bucket before exiting"""
+    await bucket_client.close()
+
 @app.post("/handle_task")
 async def handle_task(payload: TaskPayload):
     """Handle task via JSON payload."""